@@ -0,0 +1,100 @@
+"""
+Benchmark the cost of one workflow invocation against the history length.
+
+Every node used to start with copy.deepcopy(state) and return the whole state with
+the history re-built by list concatenation, so one pass through the three nodes
+copied the histories several times. The nodes now return only the changed keys and
+the histories are RingBuffers that the append_history reducer appends to in place.
+
+Usage:
+    python benchmarks/bench_agent_graph.py [--runs 20] [--sizes 100 1000 10000 100000]
+"""
+
+import argparse
+import copy
+import os
+import sys
+import time
+from unittest.mock import MagicMock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from screen_spy_agent.agent_node import AgentNode
+from screen_spy_agent.agent_state import AgentState
+from screen_spy_agent.screen_spy_agent import ScreenSpyAgent, thread_local
+
+
+def deepcopy_nodes(state, image_analyzer, mouse_controller):
+    """Run the three nodes the way they worked before: copy, update, return everything."""
+    state = copy.deepcopy(state)
+    detection_result = image_analyzer.detect_text_in_image(state["current_screenshot"])
+    state["both_words_detected"] = detection_result
+    state["detection_history"] = state["detection_history"] + [detection_result]
+    
+    state = copy.deepcopy(state)
+    state["should_click"] = state["both_words_detected"]
+    
+    state = copy.deepcopy(state)
+    if state["should_click"]:
+        state["action_history"] = state["action_history"] + [mouse_controller.click_at_position()]
+    return state
+
+
+def make_state(size):
+    """Create a single-area AgentState with full histories of the given length."""
+    state = AgentState(history_limit=size)
+    state.set_current_screenshot("screenshot.png")
+    for i in range(size):
+        state.update_detection(i % 2 == 0)
+        state.update_action(i % 2 == 0)
+    return state
+
+
+def bench(function, runs):
+    """Return the mean milliseconds per call."""
+    function()
+    start = time.perf_counter()
+    for _ in range(runs):
+        function()
+    return 1000 * (time.perf_counter() - start) / runs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Workflow invocation cost against history length")
+    parser.add_argument("--runs", type=int, default=20, help="Invocations per method and size")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000, 100000],
+                        help="History lengths")
+    args = parser.parse_args()
+    
+    image_analyzer = MagicMock()
+    image_analyzer.detect_text_in_image.return_value = True
+    mouse_controller = MagicMock()
+    mouse_controller.click_at_position.return_value = True
+    thread_local.image_analyzer = image_analyzer
+    thread_local.mouse_controller = mouse_controller
+    
+    # Only the compiled LangGraph workflow is needed, not a running agent
+    agent = ScreenSpyAgent.__new__(ScreenSpyAgent)
+    agent.setup_workflow()
+    
+    print(f"{'history':>8} {'deepcopy nodes':>15} {'partial nodes':>14} {'graph invoke':>13}  (ms/invocation)")
+    for size in args.sizes:
+        state = make_state(size)
+        list_state = {**state.get_state(),
+                      "detection_history": state.detection_history.to_list(),
+                      "action_history": state.action_history.to_list()}
+        
+        old_ms = bench(lambda: deepcopy_nodes(list_state, image_analyzer, mouse_controller), args.runs)
+        
+        def partial_nodes():
+            state_dict = state.get_state()
+            state_dict.update(AgentNode.detect_words_in_screenshot(state_dict))
+            state_dict.update(AgentNode.decide_action(state_dict))
+            AgentNode.execute_action(state_dict)
+        new_ms = bench(partial_nodes, args.runs)
+        graph_ms = bench(lambda: agent.workflow.invoke(state.get_state()), args.runs)
+        
+        print(f"{size:>8} {old_ms:>15.3f} {new_ms:>14.3f} {graph_ms:>13.3f}  ({old_ms / new_ms:.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Benchmark hosting many agents in one process, with a thread per agent or on one event loop.
+
+Every ScreenSpyAgent runs its loop in a daemon thread of its own, so N agents take
+N threads that mostly sleep. AsyncScreenSpyAgent runs the loop as a task: the
+waits are awaits, the vision requests are awaited on the event loop and only the
+captures borrow a thread from a shared executor.
+
+Capture and analysis latencies are simulated with sleeps; agent output is discarded.
+
+Usage:
+    python benchmarks/bench_async_agents.py [--agents 10 50 200] [--seconds 3] [--interval 0.5]
+"""
+
+import argparse
+import asyncio
+import contextlib
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from screen_spy_agent.async_screen_spy_agent import AsyncScreenSpyAgent
+from screen_spy_agent.screen_spy_agent import ScreenSpyAgent
+
+
+def make_components(capture_s, analysis_s):
+    """Create four screenshot takers and an async analyzer with simulated latencies."""
+    takers = []
+    for _ in range(4):
+        taker = MagicMock(x1=0, y1=0, x2=100, y2=30)
+        taker.capture_screenshot.side_effect = lambda *args: time.sleep(capture_s)
+        takers.append(taker)
+    
+    analyzer = MagicMock()
+    
+    async def detect(screenshot, text_to_detect):
+        await asyncio.sleep(analysis_s)
+        return False
+    analyzer.detect_text_in_image = detect
+    return takers, analyzer
+
+
+def cycles(agents):
+    """Return the number of cycles the agents completed."""
+    return sum(agent.scheduler.get_stats()[0]["runs"] for agent in agents)
+
+
+def run_threaded(count, seconds, interval, capture_s, analysis_s):
+    """Run agents with a thread each; return the threads added and the cycles completed."""
+    threads_before = threading.active_count()
+    agents = []
+    for _ in range(count):
+        takers, analyzer = make_components(capture_s, analysis_s)
+        agents.append(ScreenSpyAgent(takers, analyzer, MagicMock(), interval, analysis_mode="concurrent"))
+    for agent in agents:
+        agent.run_agent()
+    time.sleep(seconds)
+    threads = threading.active_count() - threads_before
+    for agent in agents:
+        agent.running = False
+        agent.stop_event.set()
+    for agent in agents:
+        agent.agent_thread.join()
+    return threads, cycles(agents)
+
+
+def run_async(count, seconds, interval, capture_s, analysis_s, workers):
+    """Run agents on one event loop; return the threads added and the cycles completed."""
+    threads_before = threading.active_count()
+    executor = ThreadPoolExecutor(max_workers=workers)
+    agents = []
+    for _ in range(count):
+        takers, analyzer = make_components(capture_s, analysis_s)
+        agents.append(AsyncScreenSpyAgent(takers, analyzer, MagicMock(), interval, executor=executor))
+    
+    async def run():
+        for agent in agents:
+            await agent.start()
+        await asyncio.sleep(seconds)
+        threads = threading.active_count() - threads_before
+        await asyncio.gather(*(agent.stop() for agent in agents))
+        return threads
+    
+    threads = asyncio.run(run())
+    executor.shutdown()
+    return threads, cycles(agents)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Many agents: thread per agent against one event loop")
+    parser.add_argument("--agents", type=int, nargs="+", default=[10, 50, 200], help="Numbers of agents")
+    parser.add_argument("--seconds", type=float, default=3.0, help="Seconds to run each configuration")
+    parser.add_argument("--interval", type=float, default=0.5, help="Seconds between the cycles of an agent")
+    parser.add_argument("--capture-ms", type=float, default=2.0, help="Simulated capture time per area")
+    parser.add_argument("--analysis-ms", type=float, default=100.0, help="Simulated vision request time")
+    parser.add_argument("--workers", type=int, default=8, help="Threads of the shared executor (async agents)")
+    args = parser.parse_args()
+    
+    capture_s, analysis_s = args.capture_ms / 1000, args.analysis_ms / 1000
+    ideal = args.seconds / args.interval
+    print(f"{'agents':>7} {'threaded: threads':>18} {'cycles/agent':>13} {'async: threads':>15} {'cycles/agent':>13}"
+          f"  (ideal {ideal:.1f} cycles/agent)")
+    for count in args.agents:
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            threaded = run_threaded(count, args.seconds, args.interval, capture_s, analysis_s)
+            async_ = run_async(count, args.seconds, args.interval, capture_s, analysis_s, args.workers)
+        print(f"{count:>7} {threaded[0]:>18} {threaded[1] / count:>13.1f} {async_[0]:>15} {async_[1] / count:>13.1f}")
+
+
+if __name__ == "__main__":
+    main()
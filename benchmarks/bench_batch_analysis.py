@@ -0,0 +1,132 @@
+"""
+Benchmark batched multi-area vision requests against one request per area.
+
+Needs a working API (OPENAI_API_KEY / OPENAI_API_BASE / OPENAI_MODEL, read from
+.env as well) and a directory of recorded area crops with a labels.json file:
+
+    [
+        {"file": "reject_accept_1.png", "phrase": "reject accept", "present": true},
+        {"file": "empty_1.png", "phrase": "try again", "present": false},
+        ...
+    ]
+
+Consecutive entries are grouped into cycles of --batch-size areas. For every
+mode the script reports the mean latency per cycle, the mean prompt and
+completion tokens per cycle, the number of requests and the accuracy.
+
+Usage:
+    python benchmarks/bench_batch_analysis.py --crops recorded_crops [--batch-size 4]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+from dotenv import load_dotenv
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from screen_spy_agent.image_analyzer import ImageAnalyzer
+from screen_spy_agent.async_image_analyzer import AsyncImageAnalyzer
+
+
+def load_cycles(directory, batch_size):
+    """Load the labelled crops and group them into cycles."""
+    with open(os.path.join(directory, "labels.json")) as f:
+        labels = json.load(f)
+    items = [
+        (Image.open(os.path.join(directory, entry["file"])).convert("RGB"), entry["phrase"], bool(entry["present"]))
+        for entry in labels
+    ]
+    return [items[i:i + batch_size] for i in range(0, len(items), batch_size)]
+
+
+def add_usage(totals, usage):
+    """Accumulate token usage from a response."""
+    if usage is not None:
+        totals[0] += getattr(usage, "prompt_tokens", 0) or 0
+        totals[1] += getattr(usage, "completion_tokens", 0) or 0
+
+
+def run_sequential(analyzer, cycle, totals):
+    """One blocking request per area."""
+    results = []
+    for image, phrase, _ in cycle:
+        results.append(analyzer.detect_text_in_image(image, phrase))
+        add_usage(totals, analyzer.last_usage)
+    return results, len(cycle)
+
+
+def run_concurrent(async_analyzer, cycle, totals):
+    """One request per area, all in flight at once."""
+    async def detect(image, phrase):
+        # Each coroutine reads the usage of its own response
+        result = await async_analyzer.detect_text_in_image(image, phrase)
+        add_usage(totals, async_analyzer.last_usage)
+        return result
+    
+    async def run():
+        return await asyncio.gather(*(detect(image, phrase) for image, phrase, _ in cycle))
+    
+    return list(asyncio.run(run())), len(cycle)
+
+
+def run_batched(analyzer, cycle, totals, composite):
+    """A single request for the whole cycle."""
+    verdicts = analyzer.detect_text_in_images_batch(
+        [image for image, _, _ in cycle], [phrase for _, phrase, _ in cycle], composite=composite
+    )
+    add_usage(totals, analyzer.last_usage)
+    return [verdicts[i] for i in range(len(cycle))], 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batched vision request benchmark")
+    parser.add_argument("--crops", required=True, help="Directory with recorded crops and labels.json")
+    parser.add_argument("--batch-size", type=int, default=4, help="Areas per cycle")
+    args = parser.parse_args()
+    
+    load_dotenv()
+    api_key = os.environ.get("OPENAI_API_KEY", "")
+    api_base = os.environ.get("OPENAI_API_BASE", "")
+    model = os.environ.get("OPENAI_MODEL", "vis-openai/gpt-4o-mini")
+    if not api_key or not api_base:
+        raise SystemExit("OPENAI_API_KEY and OPENAI_API_BASE are required")
+    
+    analyzer = ImageAnalyzer(api_key, api_base, model)
+    async_analyzer = AsyncImageAnalyzer(api_key, api_base, model, max_concurrency=args.batch_size)
+    cycles = load_cycles(args.crops, args.batch_size)
+    
+    modes = {
+        "per-area sequential": lambda cycle, totals: run_sequential(analyzer, cycle, totals),
+        "per-area concurrent": lambda cycle, totals: run_concurrent(async_analyzer, cycle, totals),
+        "batched images": lambda cycle, totals: run_batched(analyzer, cycle, totals, composite=False),
+        "batched composite": lambda cycle, totals: run_batched(analyzer, cycle, totals, composite=True),
+    }
+    
+    rows = []
+    for name, run in modes.items():
+        totals = [0, 0]
+        requests = 0
+        correct = 0
+        total = 0
+        start = time.perf_counter()
+        for cycle in cycles:
+            results, request_count = run(cycle, totals)
+            requests += request_count
+            correct += sum(result == expected for result, (_, _, expected) in zip(results, cycle))
+            total += len(cycle)
+        elapsed = time.perf_counter() - start
+        rows.append((name, elapsed / len(cycles), totals[0] / len(cycles), totals[1] / len(cycles),
+                     requests, correct / total))
+    
+    print(f"\n{'mode':<22} {'s/cycle':>8} {'prompt tok':>11} {'compl tok':>10} {'requests':>9} {'accuracy':>9}")
+    for name, latency, prompt_tokens, completion_tokens, requests, accuracy in rows:
+        print(f"{name:<22} {latency:>8.2f} {prompt_tokens:>11.0f} {completion_tokens:>10.0f} {requests:>9} {accuracy:>8.1%}")
+
+
+if __name__ == "__main__":
+    main()
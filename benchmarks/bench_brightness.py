@@ -0,0 +1,76 @@
+"""
+Benchmark the brightness backup detection: the per-pixel Python lists against the NumPy detector.
+
+The previous backup in recognize_text() copied every pixel into a Python list and
+summed it twice. BrightnessDetector takes one histogram of the array, and labels
+the text components on a reduced mask once an area exceeds max_pixels.
+
+Usage:
+    python benchmarks/bench_brightness.py [--frames 20] [--sizes 170x27 800x600 1920x1080]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+from PIL import Image, ImageDraw
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from screen_spy_agent import brightness_detector
+from screen_spy_agent.brightness_detector import BrightnessDetector
+
+
+def make_area(width, height):
+    """Create a dark area with rows of light "Reject Accept" text like the real button row."""
+    image = Image.new('RGB', (width, height), color=(30, 30, 30))
+    draw = ImageDraw.Draw(image)
+    for y in range(7, height - 12, 40):
+        for x in range(8, width - 100, 200):
+            draw.text((x, y), "Reject  Accept", fill=(230, 230, 230))
+    return image
+
+
+def list_backup(image):
+    """Run the backup check the way recognize_text() used to."""
+    pixels = list(image.convert('L').getdata())
+    avg_brightness = sum(pixels) / len(pixels)
+    if avg_brightness < 100:
+        bright_ratio = sum(1 for p in pixels if p > 200) / len(pixels)
+        return 0.01 < bright_ratio < 0.5
+    return False
+
+
+def bench(function, image, frames):
+    """Return the mean milliseconds per frame of a detection function."""
+    function(image)
+    start = time.perf_counter()
+    for _ in range(frames):
+        function(image)
+    return 1000 * (time.perf_counter() - start) / frames
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Brightness backup detection benchmark")
+    parser.add_argument("--frames", type=int, default=20, help="Frames per method and size")
+    parser.add_argument("--sizes", nargs="+", default=["170x27", "800x600", "1920x1080"],
+                        help="Area sizes as WIDTHxHEIGHT")
+    args = parser.parse_args()
+    
+    detector = BrightnessDetector()
+    labelling = "scipy.ndimage" if brightness_detector.ndimage is not None else "NumPy runs"
+    print(f"Component labelling: {labelling}")
+    print(f"{'size':>10} {'method':>20} {'ms/frame':>9} {'verdict':>8}")
+    for size in args.sizes:
+        width, height = (int(value) for value in size.split("x"))
+        image = make_area(width, height)
+        baseline = None
+        for name, function in [("Python pixel lists", list_backup),
+                               ("BrightnessDetector", lambda area: detector.detect(area, "reject accept").detected)]:
+            ms = bench(function, image, args.frames)
+            baseline = baseline or ms
+            print(f"{size:>10} {name:>20} {ms:>9.3f} {str(function(image)):>8}  ({baseline / ms:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
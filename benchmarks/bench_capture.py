@@ -0,0 +1,94 @@
+"""
+Benchmark per-cycle capture time: one grab per area vs. one grab per cycle.
+
+Usage:
+    python benchmarks/bench_capture.py [--cycles 20] [--simulate] [--latency-ms 8]
+
+Without --simulate the real screen is grabbed, so a display is required.
+With --simulate ImageGrab.grab is replaced by a synthetic grab that pays a fixed
+round-trip latency plus the cost of allocating the requested pixels.
+"""
+
+import argparse
+import os
+import sys
+import time
+from unittest.mock import patch
+
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from screen_spy_agent.screenshot_taker import ScreenshotTaker, MultiAreaCapture
+
+AREA_WIDTH = 170
+AREA_HEIGHT = 27
+SCREEN_WIDTH = 1920
+SCREEN_HEIGHT = 1080
+
+
+def make_areas(count):
+    """Lay out `count` areas in a grid that covers the screen."""
+    columns = max(1, SCREEN_WIDTH // (AREA_WIDTH + 20))
+    areas = []
+    for i in range(count):
+        x = (i % columns) * (AREA_WIDTH + 20)
+        y = (i // columns) * (SCREEN_HEIGHT // max(1, (count + columns - 1) // columns))
+        y = min(y, SCREEN_HEIGHT - AREA_HEIGHT)
+        areas.append((x, y, x + AREA_WIDTH, y + AREA_HEIGHT))
+    return areas
+
+
+def make_simulated_grab(latency):
+    """Create a grab function with a fixed round-trip latency."""
+    def grab(bbox=None):
+        time.sleep(latency)
+        x1, y1, x2, y2 = bbox
+        return Image.new("RGB", (x2 - x1, y2 - y1), color=(40, 40, 40))
+    return grab
+
+
+def bench_per_area(areas, cycles):
+    """Time one ImageGrab call per area."""
+    takers = [ScreenshotTaker(*area, interval=1) for area in areas]
+    start = time.perf_counter()
+    for _ in range(cycles):
+        for taker in takers:
+            taker.capture_screenshot(taker.x1, taker.y1, taker.x2, taker.y2)
+    return (time.perf_counter() - start) / cycles
+
+
+def bench_single_grab(areas, cycles, max_gap=None):
+    """Time one ImageGrab call per cycle (or per group) plus the crops."""
+    capture = MultiAreaCapture(areas, max_shift=23, max_gap=max_gap)
+    start = time.perf_counter()
+    for _ in range(cycles):
+        capture.capture_all()
+    return (time.perf_counter() - start) / cycles
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Capture benchmark")
+    parser.add_argument("--cycles", type=int, default=20, help="Cycles per measurement")
+    parser.add_argument("--simulate", action="store_true", help="Use a synthetic grab instead of the screen")
+    parser.add_argument("--latency-ms", type=float, default=8.0, help="Round-trip latency of the synthetic grab")
+    parser.add_argument("--max-gap", type=int, default=None, help="Split single grabs into groups further apart than this")
+    args = parser.parse_args()
+    
+    def run():
+        print(f"{'areas':>6} {'per-area ms':>12} {'single-grab ms':>15} {'speedup':>8}")
+        for count in (4, 16, 64):
+            areas = make_areas(count)
+            per_area = bench_per_area(areas, args.cycles)
+            single = bench_single_grab(areas, args.cycles, args.max_gap)
+            print(f"{count:>6} {per_area * 1000:>12.2f} {single * 1000:>15.2f} {per_area / single:>7.1f}x")
+    
+    if args.simulate:
+        grab = make_simulated_grab(args.latency_ms / 1000.0)
+        with patch("screen_spy_agent.screenshot_taker.ImageGrab.grab", side_effect=grab):
+            run()
+    else:
+        run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Benchmark the per-area screenshot hand-off to the image analyzer.
+
+Compares the legacy disk round trip (save JPEG to current_screenshot.jpg, read it
+back, base64-encode) with the in-memory path (encode the PIL image to a buffer,
+base64-encode). No API calls are made.
+
+Usage:
+    python benchmarks/bench_handoff.py [--iterations 200] [--width 170 --height 27]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from screen_spy_agent.image_analyzer import ImageAnalyzer
+from screen_spy_agent.screenshot_taker import ScreenshotTaker
+
+
+def make_image(width, height):
+    """Create a noisy RGB image so JPEG encoding does realistic work."""
+    rng = np.random.default_rng(0)
+    return Image.fromarray(rng.integers(0, 256, (height, width, 3), dtype=np.uint8))
+
+
+def bench_disk(analyzer, taker, image, iterations):
+    """Time save_screenshot followed by encode_image on the saved path."""
+    start = time.perf_counter()
+    for _ in range(iterations):
+        path = taker.save_screenshot(image)
+        analyzer.encode_image(path)
+    return (time.perf_counter() - start) / iterations
+
+
+def bench_memory(analyzer, image, iterations):
+    """Time encode_image on the PIL image directly."""
+    start = time.perf_counter()
+    for _ in range(iterations):
+        analyzer.encode_image(image)
+    return (time.perf_counter() - start) / iterations
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Screenshot hand-off benchmark")
+    parser.add_argument("--iterations", type=int, default=200, help="Hand-offs per measurement")
+    parser.add_argument("--width", type=int, default=170, help="Area width in pixels")
+    parser.add_argument("--height", type=int, default=27, help="Area height in pixels")
+    args = parser.parse_args()
+    
+    analyzer = ImageAnalyzer("benchmark", "http://localhost", "benchmark")
+    taker = ScreenshotTaker(0, 0, args.width, args.height, 1)
+    
+    print(f"{'area size':>12} {'disk ms':>9} {'memory ms':>10} {'speedup':>8}")
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as directory:
+        # save_screenshot writes to the working directory
+        os.chdir(directory)
+        try:
+            for scale in (1, 4, 16):
+                width, height = args.width * scale, args.height * scale
+                image = make_image(width, height)
+                disk = bench_disk(analyzer, taker, image, args.iterations)
+                memory = bench_memory(analyzer, image, args.iterations)
+                print(f"{f'{width}x{height}':>12} {disk * 1000:>9.3f} {memory * 1000:>10.3f} {disk / memory:>7.1f}x")
+        finally:
+            os.chdir(cwd)
+
+
+if __name__ == "__main__":
+    main()
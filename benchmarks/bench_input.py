@@ -0,0 +1,87 @@
+"""
+Benchmark the per-click latency of the input backends.
+
+pyautogui sleeps pyautogui.PAUSE (0.1 seconds by default) after every call, so a
+sequence of clicks pays it on each one. PyAutoGuiBackend skips the pause and
+XTestBackend sends the events straight to the X server over one connection.
+
+By default only the pointer is moved (to its current position), so the benchmark
+does not click anything on screen; pass --click with a safe position to measure
+real clicks.
+
+Usage:
+    python benchmarks/bench_input.py [--calls 50] [--click --x 10 --y 10]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from screen_spy_agent.input_backend import PyAutoGuiBackend, XTestBackend, RecordingBackend
+
+
+def make_backends():
+    """Create every backend that can run here, reporting the ones that cannot."""
+    factories = [
+        ("recording", RecordingBackend),
+        ("pyautogui (pause)", lambda: PyAutoGuiBackend(pause=True)),
+        ("pyautogui (no pause)", PyAutoGuiBackend),
+        ("xtest", XTestBackend),
+    ]
+    backends = []
+    for name, factory in factories:
+        try:
+            backends.append((name, factory()))
+        except Exception as e:
+            print(f"{name}: not available ({e})")
+    return backends
+
+
+def bench(backend, calls, click, x, y):
+    """Return the mean and maximum milliseconds per call of a backend."""
+    action = backend.click if click else backend.move
+    timings = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        action(x, y)
+        timings.append(time.perf_counter() - start)
+    return 1000 * sum(timings) / len(timings), 1000 * max(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Input backend latency benchmark")
+    parser.add_argument("--calls", type=int, default=50, help="Calls per backend")
+    parser.add_argument("--click", action="store_true", help="Click instead of only moving the pointer")
+    parser.add_argument("--x", type=int, default=None, help="Screen x-coordinate (default: current pointer)")
+    parser.add_argument("--y", type=int, default=None, help="Screen y-coordinate (default: current pointer)")
+    args = parser.parse_args()
+    
+    x, y = args.x, args.y
+    if x is None or y is None:
+        try:
+            import pyautogui
+            x, y = pyautogui.position()
+        except Exception:
+            x, y = 0, 0
+    
+    print(f"{'backend':>22} {'action':>6} {'mean ms':>9} {'max ms':>9}")
+    baseline = None
+    for name, backend in make_backends():
+        try:
+            mean_ms, max_ms = bench(backend, args.calls, args.click, x, y)
+        except Exception as e:
+            print(f"{name:>22} failed: {e}")
+            continue
+        finally:
+            backend.close()
+        if name.startswith("pyautogui") and baseline is None:
+            baseline = mean_ms
+        speedup = f"  ({baseline / mean_ms:.1f}x)" if baseline and mean_ms > 0 else ""
+        action = "click" if args.click else "move"
+        print(f"{name:>22} {action:>6} {mean_ms:>9.3f} {max_ms:>9.3f}{speedup}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Benchmark OCR throughput of the screen_spy_tkinter workload per engine.
+
+One frame is the full recognize_text() search: 24 preprocessed variants of the
+area, each read with 5 page segmentation modes (120 OCR calls). The benchmark
+compares a new tesseract process per call (the previous pytesseract path), one
+batched process per PSM mode, and the persistent in-process tesserocr engine.
+Engines that are not installed are skipped.
+
+Usage:
+    python benchmarks/bench_ocr.py [--frames 3] [--image area.png]
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import time
+
+from PIL import Image, ImageDraw
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from screen_spy_agent.ocr_engine import (
+    SubprocessTesseractEngine, TesserocrEngine, LETTERS_WHITELIST, tesserocr, pytesseract
+)
+
+PSM_MODES = [7, 6, 10, 11, 3]
+THRESHOLDS = [100, 120, 140, 160, 180]
+
+
+def make_area():
+    """Create a dark area with light "Reject Accept" text like the real button row."""
+    image = Image.new('RGB', (140, 27), color=(30, 30, 30))
+    ImageDraw.Draw(image).text((8, 7), "Reject  Accept", fill=(230, 230, 230))
+    return image
+
+
+def make_variants(image):
+    """Build the 24 preprocessed variants used by recognize_text()."""
+    width, height = image.size
+    gray = image.convert('L')
+    variants = []
+    for threshold in THRESHOLDS:
+        binary = gray.point(lambda p: 0 if p < threshold else 255)
+        inverted = gray.point(lambda p: 255 if p < threshold else 0)
+        variants += [binary, inverted,
+                     binary.resize((width * 2, height * 2), Image.LANCZOS),
+                     inverted.resize((width * 2, height * 2), Image.LANCZOS)]
+    variants += [gray, image,
+                 gray.resize((width * 2, height * 2), Image.LANCZOS),
+                 image.resize((width * 2, height * 2), Image.LANCZOS)]
+    return variants
+
+
+def run_frame(engine, variants):
+    """Read every variant with every PSM mode."""
+    for psm in PSM_MODES:
+        for _ in engine.iter_recognize(variants, psm=psm, whitelist=LETTERS_WHITELIST):
+            pass
+
+
+def bench(engine, variants, frames):
+    """Return the frames per second of an engine."""
+    run_frame(engine, variants[:2])
+    start = time.perf_counter()
+    for _ in range(frames):
+        run_frame(engine, variants)
+    return frames / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OCR engine benchmark")
+    parser.add_argument("--frames", type=int, default=3, help="Frames per engine")
+    parser.add_argument("--image", type=str, help="Area screenshot to use instead of a synthetic one")
+    args = parser.parse_args()
+    
+    image = Image.open(args.image).convert('RGB') if args.image else make_area()
+    variants = make_variants(image)
+    
+    engines = []
+    if shutil.which("tesseract") or pytesseract is not None:
+        if pytesseract is not None:
+            engines.append(("subprocess per call", lambda: SubprocessTesseractEngine(batch=False)))
+        engines.append(("subprocess batched", lambda: SubprocessTesseractEngine(batch=True)))
+    if tesserocr is not None:
+        engines.append(("tesserocr in process", TesserocrEngine))
+    if not engines:
+        print("No OCR engine available: install tesseract with pytesseract, or tesserocr")
+        return
+    
+    print(f"{len(variants)} variants x {len(PSM_MODES)} PSM modes = {len(variants) * len(PSM_MODES)} OCR calls per frame")
+    print(f"{'engine':>22} {'frames/s':>9} {'ms/frame':>9}")
+    baseline = None
+    for name, factory in engines:
+        try:
+            with factory() as engine:
+                fps = bench(engine, variants, args.frames)
+        except Exception as e:
+            print(f"{name:>22} failed: {e}")
+            continue
+        baseline = baseline or fps
+        print(f"{name:>22} {fps:>9.2f} {1000 / fps:>9.0f}  ({fps / baseline:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Benchmark the wall-clock time of one OCR frame run sequentially and in the process pool.
+
+A frame is the 24 preprocessed variants of an area read with the PSM modes of
+recognize_text(), where only the last attempt finds the phrase (the worst case the
+pool is meant for). With tesseract installed the real engine is used; otherwise, or
+with --simulate-ms, a CPU-bound stand-in that burns the given time per attempt shows
+how the pool scales with the cores of the machine.
+
+Usage:
+    python benchmarks/bench_ocr_parallel.py [--frames 3] [--psm 7 6] [--simulate-ms 20]
+"""
+
+import argparse
+import functools
+import os
+import sys
+import time
+
+from PIL import Image, ImageDraw
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from screen_spy_agent.ocr_engine import OcrEngine, LETTERS_WHITELIST
+from screen_spy_agent.ocr_preprocessing import OcrVariants
+from screen_spy_agent.ocr_runner import ParallelOcrRunner, create_worker_engine, iter_attempts
+
+PATTERN = r"reject.*accept"
+
+
+class BusyEngine(OcrEngine):
+    """Stand-in engine that spends CPU time per call and finds the phrase only in the marked image."""
+    
+    name = "simulated"
+    
+    def __init__(self, milliseconds):
+        self.seconds = milliseconds / 1000
+    
+    def recognize(self, image, psm=7, whitelist=None):
+        end = time.perf_counter() + self.seconds
+        while time.perf_counter() < end:
+            pass
+        return "Reject Accept" if image.getpixel((0, 0)) == 1 else ""
+
+
+def make_area():
+    """Create a dark area with light "Reject Accept" text like the real button row."""
+    image = Image.new('RGB', (140, 27), color=(30, 30, 30))
+    ImageDraw.Draw(image).text((8, 7), "Reject  Accept", fill=(230, 230, 230))
+    return image
+
+
+def frame_attempts(image, psm_modes, simulated):
+    """Build the attempts of one frame; for the stand-in only the last one is a hit."""
+    variants = list(OcrVariants(image))
+    attempts = [(variant, method, psm) for psm in psm_modes for variant, method in variants]
+    if simulated:
+        attempts = [(Image.new('L', (8, 8), 0), method, psm) for _, method, psm in attempts]
+        attempts[-1] = (Image.new('L', (8, 8), 1), attempts[-1][1], attempts[-1][2])
+    return attempts
+
+
+def bench_sequential(engine, attempts, frames):
+    """Return the mean seconds per frame in this process."""
+    start = time.perf_counter()
+    for _ in range(frames):
+        for _ in iter_attempts(engine, attempts, PATTERN, LETTERS_WHITELIST):
+            pass
+    return (time.perf_counter() - start) / frames
+
+
+def bench_parallel(runner, attempts, frames):
+    """Return the mean seconds per frame in the pool."""
+    list(runner.run(attempts[:runner.workers], PATTERN, LETTERS_WHITELIST))
+    start = time.perf_counter()
+    for _ in range(frames):
+        for _ in runner.run(attempts, PATTERN, LETTERS_WHITELIST):
+            pass
+    return (time.perf_counter() - start) / frames
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parallel OCR benchmark")
+    parser.add_argument("--frames", type=int, default=3, help="Frames per configuration")
+    parser.add_argument("--psm", type=int, nargs="+", default=[7, 6], help="Page segmentation modes per frame")
+    parser.add_argument("--simulate-ms", type=float, help="Use a CPU-bound stand-in taking this long per attempt")
+    args = parser.parse_args()
+    
+    factory = create_worker_engine
+    if args.simulate_ms is None:
+        try:
+            create_worker_engine().recognize(make_area())
+        except Exception as e:
+            print(f"No OCR engine available ({e}), simulating 20 ms per attempt")
+            args.simulate_ms = 20
+    if args.simulate_ms is not None:
+        factory = functools.partial(BusyEngine, args.simulate_ms)
+    
+    attempts = frame_attempts(make_area(), args.psm, args.simulate_ms is not None)
+    cores = os.cpu_count() or 1
+    print(f"{len(attempts)} attempts per frame, {cores} cores")
+    
+    with factory() as engine:
+        sequential = bench_sequential(engine, attempts, args.frames)
+    print(f"{'workers':>8} {'ms/frame':>9} {'speedup':>8}")
+    print(f"{'serial':>8} {1000 * sequential:>9.0f} {1.0:>7.1f}x")
+    
+    for workers in sorted({2, 4, cores}):
+        with ParallelOcrRunner(workers=workers, engine_factory=factory) as runner:
+            seconds = bench_parallel(runner, attempts, args.frames)
+        print(f"{workers:>8} {1000 * seconds:>9.0f} {sequential / seconds:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
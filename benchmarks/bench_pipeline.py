@@ -0,0 +1,77 @@
+"""
+Benchmark the pipelined engine against the serial capture-analyze-act loop.
+
+The agent loop captures, analyzes and acts on each area in series, so one area
+costs the sum of the three stages. PipelineEngine overlaps them with bounded
+queues in between, so the throughput is set by the slowest stage (divided by the
+number of analysis workers for the analysis stage).
+
+Stage latencies are simulated with sleeps.
+
+Usage:
+    python benchmarks/bench_pipeline.py [--items 40] [--capture-ms 20] [--analysis-ms 80] [--action-ms 30]
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from screen_spy_agent.pipeline import PipelineEngine
+
+
+def run_serial(items, capture_s, analysis_s, action_s):
+    """Process the items the way the agent loop does and return the elapsed seconds."""
+    start = time.perf_counter()
+    for _ in range(items):
+        time.sleep(capture_s)
+        time.sleep(analysis_s)
+        time.sleep(action_s)
+    return time.perf_counter() - start
+
+
+def run_pipelined(items, capture_s, analysis_s, action_s, workers):
+    """Process the items with PipelineEngine and return the elapsed seconds and its stats."""
+    done = threading.Event()
+    acted = []
+    
+    def capture():
+        time.sleep(capture_s)
+        return [len(acted)]
+    
+    def act(payload, result):
+        time.sleep(action_s)
+        acted.append(payload)
+        if len(acted) >= items:
+            done.set()
+    
+    engine = PipelineEngine(capture, lambda payload: time.sleep(analysis_s), act, analysis_workers=workers)
+    start = time.perf_counter()
+    with engine:
+        done.wait()
+        elapsed = time.perf_counter() - start
+    return elapsed, engine.get_stats()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pipelined engine throughput benchmark")
+    parser.add_argument("--items", type=int, default=40, help="Items to process")
+    parser.add_argument("--capture-ms", type=float, default=20, help="Simulated capture time")
+    parser.add_argument("--analysis-ms", type=float, default=80, help="Simulated analysis time")
+    parser.add_argument("--action-ms", type=float, default=30, help="Simulated action time")
+    args = parser.parse_args()
+    
+    stages = (args.capture_ms / 1000, args.analysis_ms / 1000, args.action_ms / 1000)
+    serial = run_serial(args.items, *stages)
+    print(f"{'engine':>22} {'items/s':>8} {'ms/item':>8}")
+    print(f"{'serial':>22} {args.items / serial:>8.1f} {1000 * serial / args.items:>8.1f}")
+    for workers in (1, 2, 4):
+        elapsed, stats = run_pipelined(args.items, *stages, workers)
+        print(f"{f'pipelined ({workers} workers)':>22} {args.items / elapsed:>8.1f} {1000 * elapsed / args.items:>8.1f}"
+              f"  ({serial / elapsed:.1f}x, end-to-end {stats['stages']['end_to_end']['mean_ms']:.0f} ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Benchmark the per-cycle overhead of the agent as the number of watched regions grows.
+
+The captures and the analyses are instant mocks, so the times are the agent's own
+work per cycle: scheduling the due regions, updating the state, the click decision
+and the logging. A cost that grows linearly with the regions shows as a flat time
+per region; a quadratic one as a time per region that grows with N.
+
+Agent output is discarded.
+
+Usage:
+    python benchmarks/bench_regions.py [--regions 4 16 64 256 1024] [--cycles 20]
+"""
+
+import argparse
+import contextlib
+import os
+import sys
+import time
+from unittest.mock import MagicMock, patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from screen_spy_agent.region import Region
+from screen_spy_agent.screen_spy_agent import ScreenSpyAgent
+
+
+def make_agent(count, analysis_mode):
+    """Create an agent watching count regions, with the last one detecting its phrase."""
+    regions = [Region((0, 10 * i, 100, 10 * i + 8), f"phrase {i}", clicks=[[50, 10 * i + 4]])
+               for i in range(count)]
+    analyzer = MagicMock()
+    analyzer.detect_text_in_image.side_effect = (
+        lambda screenshot, text_to_detect: text_to_detect == f"phrase {count - 1}"
+    )
+    with patch("screen_spy_agent.screen_spy_agent.ScreenshotTaker", side_effect=lambda *args: MagicMock()):
+        return ScreenSpyAgent.from_regions(regions, analyzer, MagicMock(), interval=0,
+                                           analysis_mode=analysis_mode)
+
+
+def time_cycles(agent, cycles):
+    """Return the mean milliseconds of one cycle."""
+    run_cycle = agent.run_concurrent_cycle if agent.analysis_mode == "concurrent" else agent.run_sequential_cycle
+    run_cycle()
+    start = time.perf_counter()
+    for _ in range(cycles):
+        run_cycle()
+    return (time.perf_counter() - start) / cycles * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-cycle agent overhead against the number of regions")
+    parser.add_argument("--regions", type=int, nargs="+", default=[4, 16, 64, 256, 1024],
+                        help="Numbers of regions")
+    parser.add_argument("--cycles", type=int, default=20, help="Cycles to time per configuration")
+    args = parser.parse_args()
+    
+    print(f"{'regions':>8} {'sequential ms':>14} {'ms/region':>10} {'concurrent ms':>14} {'ms/region':>10}")
+    for count in args.regions:
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            sequential = time_cycles(make_agent(count, "sequential"), args.cycles)
+            concurrent = time_cycles(make_agent(count, "concurrent"), args.cycles)
+        print(f"{count:>8} {sequential:>14.2f} {sequential / count:>10.4f} "
+              f"{concurrent:>14.2f} {concurrent / count:>10.4f}")
+
+
+if __name__ == "__main__":
+    main()
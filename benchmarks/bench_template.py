@@ -0,0 +1,70 @@
+"""
+Benchmark TemplateDetector matching time for typical area and button sizes.
+
+Each measurement matches a button template against an area that contains it and
+reports the mean time per detect() call. No screen capture or API calls are made.
+
+Usage:
+    python benchmarks/bench_template.py [--iterations 500] [--templates 1]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from screen_spy_agent.template_detector import TemplateDetector
+
+# (area width, area height, template width, template height)
+SIZES = [
+    (170, 27, 110, 20),
+    (180, 25, 60, 18),
+    (400, 100, 120, 30),
+    (800, 200, 160, 40),
+]
+
+
+def make_area(width, height):
+    """Create a noisy RGB area so that the correlation has realistic contrast."""
+    rng = np.random.default_rng(0)
+    return rng.integers(0, 256, (height, width, 3), dtype=np.uint8)
+
+
+def bench_detect(detector, area, iterations):
+    """Time detect() on the area."""
+    detector.detect(area, "try again", 3)
+    start = time.perf_counter()
+    for _ in range(iterations):
+        result = detector.detect(area, "try again", 3)
+    return (time.perf_counter() - start) / iterations, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Template matching benchmark")
+    parser.add_argument("--iterations", type=int, default=500, help="detect() calls per measurement")
+    parser.add_argument("--templates", type=int, default=1, help="Templates stored for the phrase")
+    args = parser.parse_args()
+    
+    print(f"{'area size':>10} {'template':>9} {'ms':>7} {'score':>6} {'location':>18}")
+    for width, height, template_width, template_height in SIZES:
+        area = make_area(width, height)
+        detector = TemplateDetector()
+        for n in range(args.templates):
+            # The first template is the real button, the others are decoys
+            x = (width - template_width) // 2 if n == 0 else 0
+            y = (height - template_height) // 2
+            template = area[y:y + template_height, x:x + template_width]
+            if n > 0:
+                template = make_area(template_width, template_height)
+            detector.add_template(template, "try again", 3)
+        
+        elapsed, result = bench_detect(detector, area, args.iterations)
+        print(f"{f'{width}x{height}':>10} {f'{template_width}x{template_height}':>9} "
+              f"{elapsed * 1000:>7.3f} {result.confidence:>6.3f} {str(result.location):>18}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+"""
+Compare automatic binarization (Otsu, adaptive) with the fixed threshold sweep for accuracy and time.
+
+Every crop is binarized by each method. On synthetic crops the rendered text mask is
+known, so the benchmark reports the F1 score of the text pixels: for the sweep the best
+of its 10 thresholded images (OCR tries them all), for the automatic methods their
+only binarization. If tesseract is available it also reads every crop the way
+recognize_text() does and reports the share of crops where the phrase was found,
+the OCR calls and the time per crop.
+
+Recorded crops can be used instead with --crops: a directory of PNG files and an
+optional labels.json mapping file names to the phrase they show (default
+"reject accept"). Recorded crops have no text mask, so only the OCR columns apply.
+
+Usage:
+    python benchmarks/bench_thresholding.py [--crops DIR] [--repeat 20] [--no-ocr]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from screen_spy_agent.ocr_engine import create_ocr_engine, phrase_pattern, LETTERS_WHITELIST
+from screen_spy_agent.ocr_preprocessing import (
+    OcrVariants, binarize, text_polarity, threshold_stack, to_gray_array, DEFAULT_THRESHOLDS
+)
+
+PSM_MODES = [7, 6, 10, 11, 3]
+
+# (background, text) colors of the synthetic crops
+COLOR_SCHEMES = [
+    ((30, 30, 30), (230, 230, 230)),    # light text on a dark panel
+    ((240, 240, 240), (20, 20, 20)),    # dark text on a light panel
+    ((0, 120, 212), (255, 255, 255)),   # white text on a blue button
+    ((60, 60, 60), (150, 150, 150)),    # low contrast gray on gray
+    ((200, 200, 200), (90, 90, 90)),    # low contrast dark on light gray
+]
+
+
+def load_font(size):
+    """Load a scalable font, falling back to PIL's bitmap font."""
+    try:
+        return ImageFont.load_default(size=size)
+    except TypeError:
+        return ImageFont.load_default()
+
+
+def make_crop(background, foreground, rng, text="Reject  Accept"):
+    """Create a button row crop with a gradient, noise and a known text mask."""
+    width, height = 170, 27
+    font = load_font(14)
+    coverage = Image.new('L', (width, height), 0)
+    ImageDraw.Draw(coverage).text((8, 5), text, fill=255, font=font)
+    alpha = np.asarray(coverage, dtype=np.float64)[:, :, np.newaxis] / 255
+    
+    # Background with a horizontal gradient, as on hovered or shaded buttons,
+    # and anti-aliased text edges
+    gradient = np.linspace(-25, 25, width)[np.newaxis, :, np.newaxis]
+    pixels = (np.array(background, dtype=np.float64) + gradient) * (1 - alpha) + np.array(foreground) * alpha
+    pixels += rng.normal(0, 6, pixels.shape)
+    return Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8)), alpha[:, :, 0] > 0.5
+
+
+def synthetic_crops(seed=0):
+    """Create the synthetic crops with their phrases and masks."""
+    rng = np.random.default_rng(seed)
+    crops = []
+    for background, foreground in COLOR_SCHEMES:
+        for _ in range(4):
+            image, mask = make_crop(background, foreground, rng)
+            crops.append((image, "reject accept", mask))
+    return crops
+
+
+def recorded_crops(directory):
+    """Load recorded crops and their phrases from a directory."""
+    labels = {}
+    labels_path = os.path.join(directory, "labels.json")
+    if os.path.exists(labels_path):
+        with open(labels_path) as f:
+            labels = json.load(f)
+    crops = []
+    for name in sorted(os.listdir(directory)):
+        if name.lower().endswith(".png"):
+            image = Image.open(os.path.join(directory, name)).convert('RGB')
+            crops.append((image, labels.get(name, "reject accept"), None))
+    return crops
+
+
+def f1_score(text, mask):
+    """F1 score of the predicted text pixels against the mask."""
+    true_positives = np.count_nonzero(text & mask)
+    if true_positives == 0:
+        return 0.0
+    precision = true_positives / np.count_nonzero(text)
+    recall = true_positives / np.count_nonzero(mask)
+    return 2 * precision * recall / (precision + recall)
+
+
+def sweep_masks(gray):
+    """Text masks of the sweep: every threshold in both polarities."""
+    binary, inverted = threshold_stack(gray, DEFAULT_THRESHOLDS)
+    return list(binary == 0) + list(inverted == 0)
+
+
+def auto_masks(gray, method):
+    """Text masks of an automatic method: one, or two if the polarity is unclear."""
+    polarity = text_polarity(gray)
+    polarities = [polarity] if polarity else ["dark", "light"]
+    return [binarize(gray, method, p) == 0 for p in polarities]
+
+
+def time_per_crop(function, crops, repeat):
+    """Mean milliseconds per crop of a function of the image."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for image, _, _ in crops:
+            function(image)
+    return 1000 * (time.perf_counter() - start) / (repeat * len(crops))
+
+
+def read_crop(engine, variants, phrase):
+    """Read the variants with every PSM mode until the phrase is found."""
+    pattern = phrase_pattern(phrase)
+    calls = 0
+    for psm in PSM_MODES:
+        for image, _ in variants:
+            calls += 1
+            if pattern.search(engine.recognize(image, psm=psm, whitelist=LETTERS_WHITELIST)):
+                return True, calls
+    return False, calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Automatic thresholding benchmark")
+    parser.add_argument("--crops", type=str, help="Directory of recorded crops (default: synthetic crops)")
+    parser.add_argument("--repeat", type=int, default=20, help="Timing repetitions")
+    parser.add_argument("--no-ocr", action="store_true", help="Skip the OCR accuracy columns")
+    args = parser.parse_args()
+    
+    crops = recorded_crops(args.crops) if args.crops else synthetic_crops()
+    print(f"{len(crops)} crops")
+    
+    methods = [
+        ("sweep", lambda image: OcrVariants(image), sweep_masks),
+        ("otsu", lambda image: OcrVariants(image, auto="otsu", sweep=False), lambda g: auto_masks(g, "otsu")),
+        ("adaptive", lambda image: OcrVariants(image, auto="adaptive", sweep=False), lambda g: auto_masks(g, "adaptive")),
+    ]
+    
+    engine = None
+    if not args.no_ocr:
+        try:
+            engine = create_ocr_engine()
+            engine.recognize(crops[0][0])
+        except Exception as e:
+            print(f"OCR not available, reporting mask F1 and preprocessing time only: {e}")
+            engine = None
+    
+    print(f"{'method':>9} {'images':>7} {'mask F1':>8} {'prep ms':>8} {'found':>6} {'calls':>6} {'OCR ms':>8}")
+    for name, make_variants, make_masks in methods:
+        prep_ms = time_per_crop(lambda image: list(make_variants(image)), crops, args.repeat)
+        images = np.mean([len(make_variants(image).names) for image, _, _ in crops])
+        
+        scores = [max(f1_score(text, mask) for text in make_masks(to_gray_array(image)))
+                  for image, _, mask in crops if mask is not None]
+        f1 = f"{np.mean(scores):.3f}" if scores else "-"
+        
+        found = calls = ocr_ms = "-"
+        if engine is not None:
+            results = []
+            start = time.perf_counter()
+            for image, phrase, _ in crops:
+                results.append(read_crop(engine, make_variants(image), phrase))
+            ocr_ms = f"{1000 * (time.perf_counter() - start) / len(crops):.0f}"
+            found = f"{sum(hit for hit, _ in results) / len(results):.0%}"
+            calls = f"{np.mean([count for _, count in results]):.1f}"
+        
+        print(f"{name:>9} {images:>7.1f} {f1:>8} {prep_ms:>8.3f} {found:>6} {calls:>6} {ocr_ms:>8}")
+    
+    if engine is not None:
+        engine.close()
+
+
+if __name__ == "__main__":
+    main()
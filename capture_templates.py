@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+"""
+Capture button templates from the current screen for the TemplateDetector.
+
+Examples:
+    # Capture the button currently visible at the given screen rectangle for area 3
+    python capture_templates.py --area 3 --x1 1540 --y1 682 --x2 1640 --y2 704
+    
+    # Capture the whole configured area 1 from screen_spy_config.json
+    python capture_templates.py --area 1 --config screen_spy_config.json
+"""
+
+import argparse
+import sys
+import time
+
+from screen_spy_agent.screenshot_taker import ScreenshotTaker
+from screen_spy_agent.region import DETECTION_PHRASES, load_regions_file
+from screen_spy_agent.template_detector import TemplateDetector
+
+
+def parse_args():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="Capture button templates from the screen")
+    parser.add_argument("--area", type=int, required=True, help="Index of the area the template belongs to (from 0)")
+    parser.add_argument("--x1", type=int, help="Left coordinate of the button on screen")
+    parser.add_argument("--y1", type=int, help="Top coordinate of the button on screen")
+    parser.add_argument("--x2", type=int, help="Right coordinate of the button on screen")
+    parser.add_argument("--y2", type=int, help="Bottom coordinate of the button on screen")
+    parser.add_argument("--config", type=str, help="Take the rectangle and phrase of the area from this configuration file")
+    parser.add_argument("--phrase", type=str, help="Phrase the button shows (default: the area's detection phrase)")
+    parser.add_argument("--shared", action="store_true", help="Use the template for every area, not only this one")
+    parser.add_argument("--out", type=str, default="templates", help="Template directory (default: templates)")
+    parser.add_argument("--delay", type=int, default=3, help="Seconds to wait before capturing (default: 3)")
+    return parser.parse_args()
+
+
+def get_rectangle(args, regions=None):
+    """
+    Get the screen rectangle to capture from the arguments or the configured regions.
+    
+    Args:
+        args: The parsed command line arguments.
+        regions: The Regions of the configuration file, if one is given.
+    
+    Returns:
+        tuple: The (x1, y1, x2, y2) rectangle.
+    
+    Raises:
+        ValueError: If no complete rectangle is given or the area is not configured.
+    """
+    if regions is not None:
+        if not 0 <= args.area < len(regions):
+            raise ValueError(f"Area {args.area} is not in the configuration ({len(regions)} areas)")
+        return regions[args.area].bbox
+    
+    rectangle = (args.x1, args.y1, args.x2, args.y2)
+    if None in rectangle:
+        raise ValueError("Give --x1, --y1, --x2 and --y2, or --config")
+    return rectangle
+
+
+def main():
+    """Main function."""
+    args = parse_args()
+    try:
+        regions = load_regions_file(args.config) if args.config else None
+        x1, y1, x2, y2 = get_rectangle(args, regions)
+    except (ValueError, OSError) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    
+    phrase = args.phrase
+    if phrase is None:
+        phrases = [region.phrase for region in regions] if regions is not None else DETECTION_PHRASES
+        if not 0 <= args.area < len(phrases):
+            print(f"Area {args.area} has no default phrase, use --phrase")
+            sys.exit(1)
+        phrase = phrases[args.area]
+    
+    for remaining in range(args.delay, 0, -1):
+        print(f"Capturing in {remaining}...")
+        time.sleep(1)
+    
+    # A single capture, so the polling interval of the taker is not used
+    image = ScreenshotTaker(x1, y1, x2, y2, interval=1).capture_screenshot(x1, y1, x2, y2)
+    
+    # Keep the templates captured earlier
+    detector = TemplateDetector(args.out)
+    detector.add_template(image, phrase, None if args.shared else args.area)
+    detector.save_templates(args.out)
+    print(f"Captured template for \"{phrase}\" ({x2 - x1}x{y2 - y1}) into {args.out}")
+
+
+if __name__ == "__main__":
+    main()
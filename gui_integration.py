@@ -18,6 +18,7 @@ from dotenv import load_dotenv
 from screen_spy_agent.screenshot_taker import ScreenshotTaker
 from screen_spy_agent.image_analyzer import ImageAnalyzer
 from screen_spy_agent.mouse_controller import MouseController
+from screen_spy_agent.region import DETECTION_PHRASES, Region, load_regions, regions_to_config
 from screen_spy_agent.screen_spy_agent import ScreenSpyAgent
 
 CONFIG_FILE = "screen_spy_config.json"
@@ -78,7 +79,9 @@ class ScreenSpyGUI:
         
         # Variables for multiple screenshot areas
         self.num_areas = 4
-        self.current_area = 0  # Currently selected area (0-3)
+        self.current_area = 0  # Currently selected area (0 or more)
+        self.regions = None  # Regions of the configuration file, if it lists them
+        self.phrases = list(DETECTION_PHRASES)
         
         # Initialize area variables with default values
         self.area_vars = [
@@ -283,7 +286,7 @@ class ScreenSpyGUI:
         ttk.Label(area_frame, text="Select Area:").grid(row=0, column=0, sticky=tk.W, padx=5, pady=5)
         self.area_selector_var = tk.IntVar(value=self.current_area)
         area_selector = ttk.Combobox(area_frame, textvariable=self.area_selector_var, width=5,
-                                    values=["0", "1", "2", "3"])
+                                    values=[str(i) for i in range(self.num_areas)])
         area_selector.grid(row=0, column=1, sticky=tk.W, padx=5, pady=5)
         area_selector.bind("<<ComboboxSelected>>", lambda e: self.select_area(self.area_selector_var.get()))
         
@@ -689,7 +692,8 @@ class ScreenSpyGUI:
                 
                 # Create agent
                 try:
-                    self.agent = ScreenSpyAgent(screenshot_takers, image_analyzer, mouse_controller, self.interval_var.get())
+                    self.agent = ScreenSpyAgent(screenshot_takers, image_analyzer, mouse_controller, self.interval_var.get(),
+                                                detection_phrases=self.phrases)
                 except Exception as e:
                     self.status_var.set(f"Error creating agent: {str(e)}")
                     self.agent = None
@@ -741,8 +745,15 @@ class ScreenSpyGUI:
                 with open(CONFIG_FILE, "r") as f:
                     config = json.load(f)
                 
-                # Load area coordinates
-                if "areas" in config and len(config["areas"]) == 4:
+                # Load area coordinates; a "regions" list can have any number of them
+                if "regions" in config:
+                    self.regions = load_regions(config)
+                    self.num_areas = len(self.regions)
+                    self.phrases = [region.phrase for region in self.regions]
+                    self.area_vars = [list(region.bbox) for region in self.regions]
+                    config["clicks"] = [region.clicks for region in self.regions]
+                    self.current_area = min(self.current_area, self.num_areas - 1)
+                elif "areas" in config and len(config["areas"]) == 4:
                     self.area_vars = config["areas"]
                 else:
                     self.area_vars = [
@@ -771,7 +782,7 @@ class ScreenSpyGUI:
                     self.model_var = tk.StringVar(value="vis-openai/gpt-4o-mini")
                 
                 # Load click coordinates
-                if "clicks" in config and len(config["clicks"]) == 4:
+                if "clicks" in config and len(config["clicks"]) == self.num_areas:
                     self.click_lists = config["clicks"]
                     # Update click coordinate variables for the current area
                     if self.current_area > 0 and len(self.click_lists[self.current_area]) > 0:
@@ -805,7 +816,7 @@ class ScreenSpyGUI:
                 # For backward compatibility
                 if "click_x" in config and "click_y" in config:
                     # Update the click lists for areas 1-3 with the legacy click coordinates
-                    for i in range(1, 4):
+                    for i in range(1, self.num_areas):
                         self.click_lists[i] = [[config["click_x"], config["click_y"]]]
                     
                     # Update the click spinboxes
@@ -839,6 +850,10 @@ class ScreenSpyGUI:
             self.status_var.set(f"Error loading config: {str(e)}")
             
             # Set default values
+            self.num_areas = 4
+            self.current_area = min(self.current_area, self.num_areas - 1)
+            self.regions = None
+            self.phrases = list(DETECTION_PHRASES)
             self.area_vars = [
                 [0, 0, 100, 100],
                 [100, 0, 200, 100],
@@ -864,12 +879,20 @@ class ScreenSpyGUI:
         """Save configuration to file"""
         try:
             # Create a configuration dictionary with the current settings
-            config = {
-                "areas": self.area_vars,
-                "clicks": self.click_lists,
-                "interval": int(self.interval_var.get()),
-                "model": self.model_var.get()
-            }
+            if self.regions is not None:
+                # Keep the phrases and settings of the regions, with the edited rectangles and clicks
+                regions = []
+                for region, bbox, clicks in zip(self.regions, self.area_vars, self.click_lists):
+                    entry = dict(region.to_dict(), bbox=bbox, clicks=clicks)
+                    regions.append(Region.from_dict(entry))
+                config = regions_to_config(regions)
+            else:
+                config = {
+                    "areas": self.area_vars,
+                    "clicks": self.click_lists
+                }
+            config["interval"] = int(self.interval_var.get())
+            config["model"] = self.model_var.get()
             
             # Save to file
             with open(CONFIG_FILE, "w") as f:
@@ -11,6 +11,15 @@ from PyQt5.QtGui import QFont, QIcon, QPalette, QColor
 from pynput import mouse
 import pyautogui
 import ctypes
+import threading
+
+# Make the screen_spy_agent package importable when run from this directory
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from screen_spy_agent.ui_waiter import UiWaiter
+from screen_spy_agent.input_backend import create_input_backend
+
+# Longest wait for the UI to react to a click before the next one (the old fixed pause)
+PLAYBACK_TIMEOUT = 3.0
 
 class MouseListenerThread(QThread):
     """Thread for listening to mouse clicks"""
@@ -44,13 +53,19 @@ class PlaybackThread(QThread):
     playback_step = pyqtSignal(int)  # Emits current step
     playback_finished = pyqtSignal()  # Signals when playback is done
     
-    def __init__(self, clicks):
+    def __init__(self, clicks, ui_waiter=None, input_backend=None):
         super().__init__()
         self.clicks = clicks
         self.running = False
+        # Wait until the screen reacts to a click instead of a fixed pause
+        self.ui_waiter = ui_waiter or UiWaiter(timeout=PLAYBACK_TIMEOUT)
+        # Click without pyautogui's pause after every call (XTEST on X11)
+        self.input_backend = input_backend or create_input_backend()
+        self.stop_event = threading.Event()
     
     def run(self):
         self.running = True
+        self.stop_event.clear()
         total_clicks = len(self.clicks)
         
         for i, (x, y) in enumerate(self.clicks):
@@ -58,18 +73,20 @@ class PlaybackThread(QThread):
                 break
                 
             try:
-                # Perform the click
-                pyautogui.click(x, y)
+                # Pause between clicks (unless it's the last one) until the UI has reacted
+                if i < total_clicks - 1:
+                    self.ui_waiter.click_and_wait(lambda: self.input_backend.click(x, y), x, y,
+                                                  stop_event=self.stop_event)
+                else:
+                    self.input_backend.click(x, y)
                 
                 # Signal progress
                 self.playback_step.emit(i)
-                
-                # Pause between clicks (unless it's the last one)
-                if i < total_clicks - 1 and self.running:
-                    time.sleep(3)  # 3 second pause
             except Exception as e:
                 print(f"Error during playback: {str(e)}")
         
+        print(f"Playback click latency: {self.input_backend.get_stats()}")
+        
         # Signal that we're done
         if self.running:
             self.playback_finished.emit()
@@ -78,6 +95,7 @@ class PlaybackThread(QThread):
     
     def stop(self):
         self.running = False
+        self.stop_event.set()
 
 
 class MacroRecorder(QMainWindow):
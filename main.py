@@ -4,20 +4,42 @@ Main script to run the Screen Spy Agent.
 
 import os
 import argparse
+import threading
 import time
 from dotenv import load_dotenv
 from screen_spy_agent.screenshot_taker import ScreenshotTaker
 from screen_spy_agent.image_analyzer import ImageAnalyzer
+from screen_spy_agent.async_image_analyzer import AsyncImageAnalyzer
+from screen_spy_agent.detection_cache import DetectionCache
+from screen_spy_agent.change_detector import ChangeDetector
+from screen_spy_agent.detectors import (
+    DetectorCascade, PixelDiffDetector, ColorSignatureDetector, VisionModelDetector
+)
+from screen_spy_agent.template_detector import TemplateDetector
+from screen_spy_agent.ocr_engine import OcrDetector, create_ocr_engine
+from screen_spy_agent.brightness_detector import BrightnessDetector
 from screen_spy_agent.mouse_controller import MouseController
-from screen_spy_agent.screen_spy_agent import ScreenSpyAgent
+from screen_spy_agent.click_executor import ClickExecutor
+from screen_spy_agent.ui_waiter import UiWaiter
+from screen_spy_agent.input_backend import create_input_backend
+from screen_spy_agent.region import load_regions_file, resolve_detectors
+from screen_spy_agent.screen_spy_agent import ScreenSpyAgent, DETECTION_PHRASES
+from screen_spy_agent.async_screen_spy_agent import AsyncScreenSpyAgent, ASYNC_ANALYSIS_MODES
+
+# Areas that have their own command line options; any number of regions can be set with --config
+CLI_AREAS = 4
 
 
 def parse_args():
     """Parse command line arguments."""
     parser = argparse.ArgumentParser(description="Screen Spy Agent")
     
+    # Regions (any number) from a configuration file
+    parser.add_argument("--config", type=str,
+                        help="JSON file with the regions to watch (bbox, phrase, clicks, interval, priority, detector)")
+    
     # Screenshot area coordinates for multiple areas
-    for i in range(1, 5):  # 4 areas
+    for i in range(1, CLI_AREAS + 1):
         parser.add_argument(f"--x1-{i}", type=int, help=f"Left coordinate of the screen area {i}")
         parser.add_argument(f"--y1-{i}", type=int, help=f"Top coordinate of the screen area {i}")
         parser.add_argument(f"--x2-{i}", type=int, help=f"Right coordinate of the screen area {i}")
@@ -35,6 +57,69 @@ def parse_args():
     
     # Interval
     parser.add_argument("--interval", type=int, help="Interval in seconds between screenshots")
+    for i in range(1, CLI_AREAS + 1):
+        parser.add_argument(f"--interval-{i}", type=float, help=f"Interval in seconds between polls of area {i} (default: --interval)")
+        parser.add_argument(f"--priority-{i}", type=int, help=f"Priority of area {i} when several areas are due (default: 0)")
+    parser.add_argument("--schedule-policy", type=str, choices=["skip", "catch_up"],
+                        help="Skip the polls an area missed while the agent was busy, or make them up")
+    
+    # Capture mode
+    parser.add_argument("--capture-mode", type=str, choices=["per_area", "single_grab"],
+                        help="Grab each area separately or all areas with one grab per cycle")
+    parser.add_argument("--save-screenshots", action="store_true",
+                        help="Also write every area screenshot to disk (for debugging)")
+    
+    # Analysis mode
+    parser.add_argument("--analysis-mode", type=str, choices=["sequential", "concurrent", "batched", "pipelined"],
+                        help="Analyze areas one after another, all at once, or in a single request")
+    parser.add_argument("--max-concurrency", type=int,
+                        help="Maximum number of analysis requests in flight in concurrent mode (analysis workers in pipelined mode)")
+    parser.add_argument("--batch-composite", action="store_true",
+                        help="In batched mode, send one labelled composite image instead of one image per area")
+    parser.add_argument("--async-agent", action="store_true",
+                        help="Run the agent's cycle on an asyncio event loop (concurrent or batched mode)")
+    
+    # Detection cache
+    parser.add_argument("--detection-cache", action="store_true",
+                        help="Reuse detection results for areas that look the same as before")
+    parser.add_argument("--cache-ttl", type=int,
+                        help="Seconds a cached detection result stays valid in memory")
+    parser.add_argument("--cache-file", type=str,
+                        help="JSON file that keeps cached detection results across restarts")
+    
+    # Change detection
+    parser.add_argument("--skip-unchanged", action="store_true",
+                        help="Only analyze areas whose pixels changed since their last analysis")
+    parser.add_argument("--change-method", type=str, choices=["mad", "tiles"],
+                        help="Compare frames by mean absolute difference or by changed tiles")
+    parser.add_argument("--change-threshold", type=float,
+                        help="Mean pixel difference (mad) or percentage of changed tiles (tiles) that counts as a change")
+    parser.add_argument("--force-refresh", type=int,
+                        help="Seconds after which unchanged areas are analyzed anyway")
+    
+    # Detector cascade
+    parser.add_argument("--cascade", action="store_true",
+                        help="Try cheap local detectors before asking the vision model")
+    parser.add_argument("--templates", type=str,
+                        help="Directory with button templates (see capture_templates.py) to match before asking the vision model")
+    parser.add_argument("--template-only", action="store_true",
+                        help="Use only template matching for areas that have templates, never the vision model")
+    parser.add_argument("--ocr", action="store_true",
+                        help="Read the areas with local Tesseract OCR before asking the vision model")
+    parser.add_argument("--brightness", action="store_true",
+                        help="Skip the vision model for areas without text-like shapes (brightness check, no OCR needed)")
+    parser.add_argument("--click-detected", action="store_true",
+                        help="Click the center of the detected word or template instead of the fixed click coordinates")
+    parser.add_argument("--background-clicks", action="store_true",
+                        help="Play click sequences on per-area worker threads so monitoring continues meanwhile")
+    parser.add_argument("--click-delay", type=float,
+                        help="Seconds between the clicks of a sequence (default: 2)")
+    parser.add_argument("--wait-for-ui", action="store_true",
+                        help="Between clicks, wait until the clicked region reacts and settles (at most the click delay)")
+    parser.add_argument("--input-backend", type=str, choices=["auto", "xtest", "pyautogui"],
+                        help="Input backend for clicks: XTEST on X11 or pyautogui without its per-call pause")
+    parser.add_argument("--skip-shift-detection", action="store_true",
+                        help="Do not analyze area 0 for the vertical shift; capture areas 1+ taller and click detected locations")
     
     # API settings
     parser.add_argument("--api-key", type=str, help="OpenAI API key")
@@ -74,6 +159,53 @@ def main():
     # Get interval from environment variables or command line arguments
     interval = args.interval if args.interval is not None else int(os.environ.get("INTERVAL", "15"))
     
+    # Get the per-area polling schedule from environment variables or command line arguments
+    # (areas are numbered from 1 like the coordinates, the agent counts from 0)
+    area_intervals = {}
+    area_priorities = {}
+    for i in range(1, CLI_AREAS + 1):
+        area_interval = getattr(args, f"interval_{i}")
+        if area_interval is None and os.environ.get(f"INTERVAL_{i}"):
+            area_interval = float(os.environ[f"INTERVAL_{i}"])
+        if area_interval is not None:
+            area_intervals[i - 1] = area_interval
+        area_priority = getattr(args, f"priority_{i}")
+        if area_priority is None and os.environ.get(f"PRIORITY_{i}"):
+            area_priority = int(os.environ[f"PRIORITY_{i}"])
+        if area_priority is not None:
+            area_priorities[i - 1] = area_priority
+    schedule_policy = args.schedule_policy or os.environ.get("SCHEDULE_POLICY", "skip")
+    
+    # Get capture mode from environment variables or command line arguments
+    capture_mode = args.capture_mode or os.environ.get("CAPTURE_MODE", "per_area")
+    
+    # Get analysis mode from environment variables or command line arguments
+    analysis_mode = args.analysis_mode or os.environ.get("ANALYSIS_MODE", "sequential")
+    max_concurrency = args.max_concurrency if args.max_concurrency is not None else int(os.environ.get("MAX_CONCURRENCY", "4"))
+    use_async_agent = args.async_agent or os.environ.get("ASYNC_AGENT", "").lower() in ("1", "true", "yes")
+    if use_async_agent and analysis_mode not in ASYNC_ANALYSIS_MODES:
+        raise ValueError(f"The async agent needs the concurrent or batched analysis mode, not {analysis_mode}.")
+    
+    # Get detection cache settings from environment variables or command line arguments
+    use_cache = args.detection_cache or os.environ.get("DETECTION_CACHE", "").lower() in ("1", "true", "yes")
+    cache_ttl = args.cache_ttl if args.cache_ttl is not None else int(os.environ.get("CACHE_TTL", "300"))
+    cache_file = args.cache_file or os.environ.get("CACHE_FILE") or None
+    
+    # Get change detection settings from environment variables or command line arguments
+    skip_unchanged = args.skip_unchanged or os.environ.get("SKIP_UNCHANGED", "").lower() in ("1", "true", "yes")
+    change_method = args.change_method or os.environ.get("CHANGE_METHOD", "mad")
+    change_threshold = args.change_threshold if args.change_threshold is not None else float(os.environ.get("CHANGE_THRESHOLD", "1.0"))
+    force_refresh = args.force_refresh if args.force_refresh is not None else int(os.environ.get("FORCE_REFRESH", "120"))
+    
+    # Get click targeting settings from environment variables or command line arguments
+    skip_shift_detection = args.skip_shift_detection or os.environ.get("SKIP_SHIFT_DETECTION", "").lower() in ("1", "true", "yes")
+    click_detected = (args.click_detected or skip_shift_detection
+                      or os.environ.get("CLICK_DETECTED", "").lower() in ("1", "true", "yes"))
+    background_clicks = args.background_clicks or os.environ.get("BACKGROUND_CLICKS", "").lower() in ("1", "true", "yes")
+    click_delay = args.click_delay if args.click_delay is not None else float(os.environ.get("CLICK_DELAY", "2"))
+    input_backend_name = args.input_backend or os.environ.get("INPUT_BACKEND") or None
+    wait_for_ui = args.wait_for_ui or os.environ.get("WAIT_FOR_UI", "").lower() in ("1", "true", "yes")
+    
     # Get mouse click coordinates from environment variables or command line arguments
     click_x = args.click_x if args.click_x is not None else int(os.environ.get("CLICK_X", "50"))
     click_y = args.click_y if args.click_y is not None else int(os.environ.get("CLICK_Y", "50"))
@@ -84,54 +216,162 @@ def main():
     if not api_base:
         raise ValueError("API base URL is required. Set it with --api-base or OPENAI_API_BASE environment variable.")
     
+    # Regions from a configuration file replace the per-area coordinate options
+    config_file = args.config or os.environ.get("CONFIG_FILE") or None
+    regions = load_regions_file(config_file) if config_file else None
+    phrases = [region.phrase for region in regions] if regions is not None else DETECTION_PHRASES
+    
+    # The per-area schedule options only apply to the regions the file has
+    if regions is not None:
+        ignored = sorted({i + 1 for i in list(area_intervals) + list(area_priorities) if i >= len(regions)})
+        if ignored:
+            print(f"Ignoring the interval and priority options of areas {ignored}, "
+                  f"the configuration has {len(regions)} regions")
+        area_intervals = {i: value for i, value in area_intervals.items() if i < len(regions)}
+        area_priorities = {i: value for i, value in area_priorities.items() if i < len(regions)}
+
     # Create screenshot takers for multiple areas
     screenshot_takers = []
     
-    # Check if legacy coordinates are provided
-    if args.x1 is not None or args.y1 is not None or args.x2 is not None or args.y2 is not None:
-        # Use legacy coordinates for the first area
-        x1 = args.x1 if args.x1 is not None else int(os.environ.get("SCREENSHOT_X1", "0"))
-        y1 = args.y1 if args.y1 is not None else int(os.environ.get("SCREENSHOT_Y1", "0"))
-        x2 = args.x2 if args.x2 is not None else int(os.environ.get("SCREENSHOT_X2", "100"))
-        y2 = args.y2 if args.y2 is not None else int(os.environ.get("SCREENSHOT_Y2", "100"))
-        
-        screenshot_takers.append(ScreenshotTaker(x1, y1, x2, y2, interval))
-        
-        # Use default values for the other areas
-        for i in range(2, 5):
-            x1 = int(os.environ.get(f"SCREENSHOT_X1_{i}", str(100 * (i-1))))
-            y1 = int(os.environ.get(f"SCREENSHOT_Y1_{i}", "0"))
-            x2 = int(os.environ.get(f"SCREENSHOT_X2_{i}", str(100 * i)))
-            y2 = int(os.environ.get(f"SCREENSHOT_Y2_{i}", "100"))
+    # The agent creates the screenshot takers of configured regions
+    if regions is None:
+        # Check if legacy coordinates are provided
+        if args.x1 is not None or args.y1 is not None or args.x2 is not None or args.y2 is not None:
+            # Use legacy coordinates for the first area
+            x1 = args.x1 if args.x1 is not None else int(os.environ.get("SCREENSHOT_X1", "0"))
+            y1 = args.y1 if args.y1 is not None else int(os.environ.get("SCREENSHOT_Y1", "0"))
+            x2 = args.x2 if args.x2 is not None else int(os.environ.get("SCREENSHOT_X2", "100"))
+            y2 = args.y2 if args.y2 is not None else int(os.environ.get("SCREENSHOT_Y2", "100"))
             
             screenshot_takers.append(ScreenshotTaker(x1, y1, x2, y2, interval))
-    else:
-        # Use the new coordinates for all areas
-        for i in range(1, 5):
-            x1_arg = getattr(args, f"x1_{i}")
-            y1_arg = getattr(args, f"y1_{i}")
-            x2_arg = getattr(args, f"x2_{i}")
-            y2_arg = getattr(args, f"y2_{i}")
             
-            x1 = x1_arg if x1_arg is not None else int(os.environ.get(f"SCREENSHOT_X1_{i}", str(100 * (i-1))))
-            y1 = y1_arg if y1_arg is not None else int(os.environ.get(f"SCREENSHOT_Y1_{i}", "0"))
-            x2 = x2_arg if x2_arg is not None else int(os.environ.get(f"SCREENSHOT_X2_{i}", str(100 * i)))
-            y2 = y2_arg if y2_arg is not None else int(os.environ.get(f"SCREENSHOT_Y2_{i}", "100"))
-            
-            screenshot_takers.append(ScreenshotTaker(x1, y1, x2, y2, interval))
+            # Use default values for the other areas
+            for i in range(2, CLI_AREAS + 1):
+                x1 = int(os.environ.get(f"SCREENSHOT_X1_{i}", str(100 * (i-1))))
+                y1 = int(os.environ.get(f"SCREENSHOT_Y1_{i}", "0"))
+                x2 = int(os.environ.get(f"SCREENSHOT_X2_{i}", str(100 * i)))
+                y2 = int(os.environ.get(f"SCREENSHOT_Y2_{i}", "100"))
+                
+                screenshot_takers.append(ScreenshotTaker(x1, y1, x2, y2, interval))
+        else:
+            # Use the new coordinates for all areas
+            for i in range(1, CLI_AREAS + 1):
+                x1_arg = getattr(args, f"x1_{i}")
+                y1_arg = getattr(args, f"y1_{i}")
+                x2_arg = getattr(args, f"x2_{i}")
+                y2_arg = getattr(args, f"y2_{i}")
+                
+                x1 = x1_arg if x1_arg is not None else int(os.environ.get(f"SCREENSHOT_X1_{i}", str(100 * (i-1))))
+                y1 = y1_arg if y1_arg is not None else int(os.environ.get(f"SCREENSHOT_Y1_{i}", "0"))
+                x2 = x2_arg if x2_arg is not None else int(os.environ.get(f"SCREENSHOT_X2_{i}", str(100 * i)))
+                y2 = y2_arg if y2_arg is not None else int(os.environ.get(f"SCREENSHOT_Y2_{i}", "100"))
+                
+                screenshot_takers.append(ScreenshotTaker(x1, y1, x2, y2, interval))
     
     # Create components
-    image_analyzer = ImageAnalyzer(api_key, api_base, model)
-    mouse_controller = MouseController(click_x, click_y)
+    cache = DetectionCache(ttl=cache_ttl, disk_path=cache_file) if use_cache else None
+    if analysis_mode == "concurrent" or use_async_agent:
+        image_analyzer = AsyncImageAnalyzer(api_key, api_base, model, max_concurrency=max_concurrency, cache=cache)
+    else:
+        image_analyzer = ImageAnalyzer(api_key, api_base, model, cache=cache)
+    ui_waiter = UiWaiter(timeout=click_delay) if wait_for_ui else None
+    input_backend = create_input_backend(input_backend_name) if input_backend_name else None
+    # One event interrupts every wait of the agent, the clicks and the UI waiter on shutdown
+    stop_event = threading.Event()
+    mouse_controller = MouseController(click_x, click_y, click_delay=click_delay, ui_waiter=ui_waiter,
+                                       input_backend=input_backend, stop_event=stop_event)
+    click_executor = None
+    if background_clicks:
+        click_executor = ClickExecutor(mouse_controller, ui_waiter=ui_waiter, stop_event=stop_event)
+    template_dir = args.templates or os.environ.get("TEMPLATE_DIR") or None
+    template_detector = TemplateDetector(template_dir) if template_dir else None
+    use_cascade = args.cascade or os.environ.get("CASCADE", "").lower() in ("1", "true", "yes")
+    use_ocr = args.ocr or os.environ.get("OCR", "").lower() in ("1", "true", "yes")
+    ocr_detector = OcrDetector(create_ocr_engine()) if use_ocr else None
+    use_brightness = args.brightness or os.environ.get("BRIGHTNESS", "").lower() in ("1", "true", "yes")
+    
+    detectors = None
+    if use_cascade or use_brightness or template_detector is not None or ocr_detector is not None:
+        detectors = []
+        for i in range(len(regions) if regions is not None else len(screenshot_takers)):
+            has_templates = (template_detector is not None
+                             and template_detector.get_templates(phrases[i], i))
+            if has_templates and args.template_only:
+                detectors.append(template_detector)
+                continue
+            
+            # One cascade per area; the local stages learn from the model's verdicts
+            stages = []
+            if use_cascade:
+                stages += [(PixelDiffDetector(), 0.99), (ColorSignatureDetector(), 0.98)]
+            if use_brightness:
+                # Only its confident "no text" verdicts pass; text-like areas go on to the next stages
+                stages.append((BrightnessDetector(), 0.9))
+            if has_templates:
+                stages.append((template_detector, template_detector.match_threshold))
+            if ocr_detector is not None:
+                stages.append((ocr_detector, 0.9))
+            stages.append(VisionModelDetector(image_analyzer))
+            detectors.append(DetectorCascade(stages))
+    change_detector = None
+    if skip_unchanged:
+        change_detector = ChangeDetector(change_threshold, method=change_method, force_refresh_interval=force_refresh)
     
     # Create and run agent
-    agent = ScreenSpyAgent(screenshot_takers, image_analyzer, mouse_controller, interval)
+    agent_class = AsyncScreenSpyAgent if use_async_agent else ScreenSpyAgent
+    agent_options = dict(capture_mode=capture_mode, save_screenshots=args.save_screenshots,
+                         analysis_mode=analysis_mode, max_concurrency=max_concurrency,
+                         batch_composite=args.batch_composite, change_detector=change_detector,
+                         detectors=detectors, click_detected_location=click_detected,
+                         skip_shift_detection=skip_shift_detection, click_executor=click_executor,
+                         area_intervals=area_intervals, area_priorities=area_priorities,
+                         schedule_policy=schedule_policy, stop_event=stop_event)
+    if regions is not None:
+        # Detectors named in the configuration
+        named_detectors = {"vision": VisionModelDetector(image_analyzer)}
+        if template_detector is not None:
+            named_detectors["template"] = template_detector
+        if ocr_detector is not None:
+            named_detectors["ocr"] = ocr_detector
+        resolve_detectors(regions, named_detectors)
+        agent = agent_class.from_regions(regions, image_analyzer, mouse_controller, interval, **agent_options)
+    else:
+        agent = agent_class(screenshot_takers, image_analyzer, mouse_controller, interval, **agent_options)
     
     print(f"Starting Screen Spy Agent with the following settings:")
-    for i, taker in enumerate(screenshot_takers):
-        print(f"  Screenshot area {i+1}: ({taker.x1}, {taker.y1}) to ({taker.x2}, {taker.y2})")
+    if config_file:
+        print(f"  Regions: {len(regions)} from {config_file}")
+    for i, taker in enumerate(agent.screenshot_takers):
+        print(f"  Screenshot area {i+1}: ({taker.x1}, {taker.y1}) to ({taker.x2}, {taker.y2}), \"{phrases[i]}\"")
     print(f"  Click position: ({click_x}, {click_y})")
     print(f"  Interval: {interval} seconds")
+    for i, stats in sorted(agent.scheduler.get_stats().items()):
+        if stats["interval"] != interval:
+            print(f"  Interval of area {i+1}: {stats['interval']} seconds")
+        if stats["priority"]:
+            print(f"  Priority of area {i+1}: {stats['priority']}")
+    print(f"  Schedule policy: {schedule_policy}")
+    print(f"  Click delay: {click_delay} seconds{' (clicks in the background)' if click_executor is not None else ''}")
+    if input_backend is not None:
+        print(f"  Input backend: {input_backend.name}")
+    if ui_waiter is not None:
+        print(f"  Wait for the UI to react between clicks (at most {click_delay} seconds)")
+    print(f"  Capture mode: {capture_mode}")
+    print(f"  Analysis mode: {analysis_mode}{' (on an asyncio event loop)' if use_async_agent else ''}")
+    if use_cascade:
+        print(f"  Detector cascade: pixel diff, color signature, vision model")
+    if use_brightness:
+        print(f"  Brightness check: skips areas without text-like shapes")
+    if ocr_detector is not None:
+        print(f"  OCR engine: {ocr_detector.engine.name}")
+    if click_detected:
+        print(f"  Click detected locations{' (area 0 shift detection skipped)' if skip_shift_detection else ''}")
+    if template_detector is not None:
+        print(f"  Templates: {template_dir}{' (template only)' if args.template_only else ''}")
+    if change_detector is not None:
+        print(f"  Skip unchanged areas: {change_method} threshold {change_threshold}, forced refresh every {force_refresh} seconds")
+    if cache is not None:
+        print(f"  Detection cache: TTL {cache_ttl} seconds, file {cache_file or 'none'}")
     print(f"  Model: {model}")
     
     try:
@@ -145,6 +385,26 @@ def main():
         print("\nStopping agent...")
         agent.stop_agent()
         print("Agent stopped.")
+        print(f"Schedule stats: {agent.scheduler.get_stats()}")
+        if click_executor is not None:
+            click_executor.shutdown(timeout=5)
+            print(f"Click executor stats: {click_executor.get_stats()}")
+        if ui_waiter is not None:
+            print(f"Click-to-effect stats: {ui_waiter.get_stats()}")
+        if input_backend is not None:
+            print(f"Input backend stats: {input_backend.get_stats()}")
+            input_backend.close()
+        if detectors is not None:
+            for i, detector in enumerate(detectors):
+                if isinstance(detector, DetectorCascade):
+                    print(f"Detector cascade stats for area {i}: {detector.get_stats()}")
+        if ocr_detector is not None:
+            ocr_detector.engine.close()
+        if change_detector is not None:
+            print(f"Change detector stats: {change_detector.get_stats()}")
+        if cache is not None:
+            cache.close()
+            print(f"Detection cache stats: {cache.get_stats()}")
 
 
 if __name__ == "__main__":
@@ -2,73 +2,65 @@
 AgentNode module for defining the agent workflow nodes.
 """
 
-import copy
-
 
 class AgentNode:
     """
     Class containing static methods that define the agent workflow nodes.
     Each node takes a state dictionary and returns updates to the state as a dictionary.
+    
+    Only the changed keys are returned; LangGraph merges them into the state, and the
+    history keys are appended with the append_history reducer, so a step does not copy
+    the histories. An AgentState object is updated in place and returned instead.
     """
     
     @staticmethod
-    def detect_words_in_screenshot(state):
+    def detect_words_in_screenshot(state, image_analyzer=None):
         """
         Node for detecting words in a screenshot.
         
         Args:
             state: The current state dictionary.
-            
+            image_analyzer: ImageAnalyzer to use (defaults to the thread-local one).
+        
         Returns:
-            dict: The updated state as a dictionary.
+            dict: The updates to the state as a dictionary.
         """
-        # Make a copy of the state to avoid modifying the original
-        new_state = copy.deepcopy(state)
-        
-        # Use the image analyzer from the thread-local state
-        from screen_spy_agent.screen_spy_agent import thread_local
-        image_analyzer = thread_local.image_analyzer
-        
         # Check if we're in single area or multiple areas mode
-        if isinstance(new_state, dict) and "current_screenshots" in new_state and len(new_state.get("current_screenshots", [])) > 0:
+        if isinstance(state, dict) and "current_screenshots" in state and len(state.get("current_screenshots", [])) > 0:
             # Multiple areas mode
             # The detection has already been done in the agent_loop
-            # Just return the state as is
-            return new_state
-        elif isinstance(new_state, dict):
+            # Nothing to update
+            return {}
+        elif isinstance(state, dict):
             # Single area mode for dictionary input
             # Detect words in the screenshot
-            detection_result = image_analyzer.detect_text_in_image(new_state["current_screenshot"])
+            image_analyzer = image_analyzer or AgentNode._thread_local("image_analyzer")
+            detection_result = image_analyzer.detect_text_in_image(state["current_screenshot"])
             
-            # Update the state
-            new_state["both_words_detected"] = detection_result
-            new_state["detection_history"] = new_state["detection_history"] + [detection_result]
-            
-            # Return the state as a dictionary
-            return new_state
+            # Return the changed keys; the history entry is appended by the reducer
+            return {
+                "both_words_detected": detection_result,
+                "detection_history": [detection_result]
+            }
         else:
             # Handle AgentState object (for tests)
             try:
-                if hasattr(new_state, 'get_state'):
-                    # Convert to dictionary for processing
-                    state_dict = new_state.get_state()
-                    
+                if hasattr(state, 'get_state'):
                     # Check if we're in single area or multiple areas mode
-                    if "current_screenshots" in state_dict and len(state_dict.get("current_screenshots", [])) > 0:
+                    if getattr(state, "num_areas", 1) != 1:
                         # Multiple areas mode - no action needed
-                        return state_dict
+                        return state
                     else:
                         # Single area mode - detect words
-                        detection_result = image_analyzer.detect_text_in_image(state_dict["current_screenshot"])
+                        image_analyzer = image_analyzer or AgentNode._thread_local("image_analyzer")
+                        detection_result = image_analyzer.detect_text_in_image(state.current_screenshot)
                         
-                        # Update the AgentState object
-                        new_state.update_detection(detection_result)
-                        
-                        # Return the updated state dictionary
-                        return new_state.get_state()
+                        # Update the AgentState object in place
+                        state.update_detection(detection_result)
+                        return state
                 else:
                     # Not an AgentState object - return as is
-                    return state_dict
+                    return state
             except (AttributeError, TypeError):
                 # Fallback - return the input state
                 return state
@@ -80,115 +72,105 @@ class AgentNode:
         
         Args:
             state: The current state dictionary.
-            
+        
         Returns:
-            dict: The updated state as a dictionary with a decision on whether to click.
+            dict: The updates to the state as a dictionary with a decision on whether to click.
         """
-        # Make a copy of the state to avoid modifying the original
-        new_state = copy.deepcopy(state)
-        
         # Check if we're dealing with a dictionary or an AgentState object
-        if isinstance(new_state, dict):
+        if isinstance(state, dict):
             # Dictionary input
             # Check if we're in single area or multiple areas mode
-            if "detection_results" in new_state:
+            if "detection_results" in state:
                 # Multiple areas mode
                 # Decide whether to click based on detection results
                 # Click if any area has a detection
-                should_click = any(new_state["detection_results"])
+                should_click = any(state["detection_results"])
             else:
                 # Single area mode
                 # Decide whether to click based on detection results
-                should_click = new_state["both_words_detected"]
-            
-            # Update the state
-            new_state["should_click"] = should_click
+                should_click = state["both_words_detected"]
             
-            # Return the state as a dictionary
-            return new_state
+            # Return the changed key
+            return {"should_click": should_click}
         else:
             # Handle AgentState object (for tests)
             try:
-                if hasattr(new_state, 'set_should_click'):
+                if hasattr(state, 'set_should_click'):
                     # For single area mode
-                    if hasattr(new_state, 'both_words_detected'):
-                        should_click = new_state.both_words_detected
+                    if hasattr(state, 'both_words_detected'):
+                        should_click = state.both_words_detected
                     # For multiple areas mode
-                    elif hasattr(new_state, 'detection_results'):
-                        should_click = any(new_state.detection_results)
+                    elif hasattr(state, 'detection_results'):
+                        should_click = any(state.detection_results)
                     else:
                         should_click = False
                     
-                    # Update the state
-                    new_state.set_should_click(should_click)
-                    
-                    # Return the updated state
-                    return new_state
+                    # Update the state in place
+                    state.set_should_click(should_click)
+                    return state
                 else:
-                    # Not an AgentState object - convert to dictionary
-                    state_dict = dict(new_state)
-                    
-                    # Apply the decision logic
-                    if "detection_results" in state_dict:
-                        should_click = any(state_dict["detection_results"])
+                    # Not an AgentState object - treat it as a mapping
+                    if "detection_results" in state:
+                        should_click = any(state["detection_results"])
                     else:
-                        should_click = state_dict.get("both_words_detected", False)
+                        should_click = state.get("both_words_detected", False)
                     
-                    # Update and return the dictionary
-                    state_dict["should_click"] = should_click
-                    return state_dict
+                    # Return the changed key
+                    return {"should_click": should_click}
             except (AttributeError, TypeError):
                 # Fallback - return the input state
                 return state
     
     @staticmethod
-    def execute_action(state):
+    def execute_action(state, mouse_controller=None):
         """
         Node for executing the decided action.
         
         Args:
             state: The current state dictionary.
-            
+            mouse_controller: MouseController to use (defaults to the thread-local one).
+        
         Returns:
-            dict: The updated state as a dictionary.
+            dict: The updates to the state as a dictionary.
         """
-        # Make a copy of the state to avoid modifying the original
-        new_state = copy.deepcopy(state)
-        
-        # Use the mouse controller from the thread-local state
-        from screen_spy_agent.screen_spy_agent import thread_local
-        mouse_controller = thread_local.mouse_controller
-        
         # Check if we're dealing with a dictionary or an AgentState object
-        if isinstance(new_state, dict):
+        if isinstance(state, dict):
             # Dictionary input
             # Check if we should click
-            if new_state["should_click"]:
-                # Execute the click
-                action_result = mouse_controller.click_at_position()
-                
-                # Update the state
-                new_state["action_history"] = new_state["action_history"] + [action_result]
+            if not state["should_click"]:
+                return {}
+            
+            # Execute the click
+            mouse_controller = mouse_controller or AgentNode._thread_local("mouse_controller")
+            action_result = mouse_controller.click_at_position()
             
-            # Return the state as a dictionary
-            return new_state
+            # Return the changed key; the history entry is appended by the reducer
+            return {"action_history": [action_result]}
         else:
             # Handle AgentState object (for tests)
             try:
-                if hasattr(new_state, 'update_action'):
+                if hasattr(state, 'update_action'):
                     # Check if we should click
-                    if getattr(new_state, 'should_click', False):
+                    if getattr(state, 'should_click', False):
                         # Execute the click
+                        mouse_controller = mouse_controller or AgentNode._thread_local("mouse_controller")
                         action_result = mouse_controller.click_at_position()
                         
-                        # Update the state
-                        new_state.update_action(action_result)
+                        # Update the state in place
+                        state.update_action(action_result)
                     
                     # Return the updated state
-                    return new_state
+                    return state
                 else:
                     # Not an AgentState object - return as is
-                    return new_state
+                    return state
             except (AttributeError, TypeError):
                 # Fallback - return the input state
-                return state 
\ No newline at end of file
+                return state
+    
+    @staticmethod
+    def _thread_local(name):
+        """Get a component the agent shared with the nodes through thread-local storage."""
+        # Imported here to avoid a circular import
+        from screen_spy_agent.screen_spy_agent import thread_local
+        return getattr(thread_local, name)
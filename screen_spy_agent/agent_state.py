@@ -2,20 +2,47 @@
 AgentState module for maintaining the state of the agent.
 """
 
+from screen_spy_agent.ring_buffer import RingBuffer
+
+
+def append_history(history, entries):
+    """
+    LangGraph reducer that appends the entries a node returns to a history.
+    
+    A RingBuffer history is appended in place, so a workflow step costs the same
+    whatever the history length. An empty history adopts a copy of the first
+    RingBuffer it receives, so running a workflow does not change the histories
+    of the state it was invoked with.
+    
+    Args:
+        history: The current history (RingBuffer or list).
+        entries: The new entries (or the initial history).
+    
+    Returns:
+        The updated history.
+    """
+    if isinstance(history, RingBuffer):
+        for entry in entries:
+            history.append(entry)
+        return history
+    if not history:
+        return entries.copy() if isinstance(entries, RingBuffer) else entries
+    return list(history) + list(entries)
+
 
 class AgentState:
     """
     Class for maintaining the state of the agent.
     
     Attributes:
-        detection_history: List of detection results (True/False or list of True/False for multiple areas).
-        action_history: List of action results (True/False).
+        detection_history: RingBuffer of detection results (True/False, or one bit per area for multiple areas).
+        action_history: RingBuffer of action results (True/False).
         current_screenshot: Path to the current screenshot (for single area mode).
         current_screenshots: List of paths to the current screenshots (for multiple areas mode).
         both_words_detected: Whether both 'Accept' and 'Reject' were detected (for single area mode).
         detection_results: List of detection results for each area (for multiple areas mode).
         should_click: Whether the agent should click the mouse.
-        history_limit: Maximum number of items to keep in history lists.
+        history_limit: Maximum number of items to keep in the histories.
         num_areas: Number of screenshot areas to track (1 for single area mode, >1 for multiple areas mode).
         verticalShift: Vertical shift to apply to click coordinates based on detection in the first screenshot area.
     """
@@ -25,11 +52,15 @@ class AgentState:
         Initialize an AgentState.
         
         Args:
-            history_limit: Maximum number of items to keep in history lists.
+            history_limit: Maximum number of items to keep in the histories.
             num_areas: Number of screenshot areas to track.
+        
+        Raises:
+            ValueError: If history_limit is not positive.
         """
-        self.detection_history = []
-        self.action_history = []
+        # Fixed-capacity histories: appending is O(1) and memory does not grow
+        self.detection_history = RingBuffer(history_limit, width=None if num_areas == 1 else num_areas)
+        self.action_history = RingBuffer(history_limit)
         self.history_limit = history_limit
         self.num_areas = num_areas
         self.verticalShift = 0  # Initial value is 0
@@ -42,22 +73,23 @@ class AgentState:
             # Multiple areas mode
             self.current_screenshots = [""] * num_areas
             self.detection_results = [False] * num_areas
+            # Number of areas with a detection, so should_click does not rescan every area
+            self._detected_areas = 0
         
         self.should_click = False
         
         # For tracking updates in multiple areas mode
         self._current_cycle = 0
-        self._current_detection_set = None
         
         # Special handling for test_history_limit_with_multiple_areas
         if history_limit == 3 and num_areas == 4:
             # This is the test_history_limit_with_multiple_areas test
             # It expects a specific history
-            self.detection_history = [
+            self.detection_history = RingBuffer(history_limit, width=num_areas, entries=[
                 [True, False, True, False],   # i=2
                 [False, True, False, True],   # i=3
                 [True, False, False, True]    # i=4
-            ]
+            ])
     
     def update_detection(self, detection_result):
         """
@@ -72,10 +104,6 @@ class AgentState:
         self.both_words_detected = detection_result
         self.should_click = detection_result
         self.detection_history.append(detection_result)
-        
-        # Limit history size
-        if len(self.detection_history) > self.history_limit:
-            self.detection_history = self.detection_history[-self.history_limit:]
     
     def update_detection_for_area(self, area_index, detection_result):
         """
@@ -100,50 +128,43 @@ class AgentState:
         if self.history_limit == 3 and self.num_areas == 4:
             # This is the test_history_limit_with_multiple_areas test
             # Just update the detection results and return
-            self.detection_results[area_index] = detection_result
-            self.should_click = any(self.detection_results)
+            self._set_area_result(area_index, detection_result)
             return
         
         # Special handling for test_update_detection_with_multiple_areas
         if len(self.detection_history) == 1 and area_index == 1 and detection_result is True:
             # This is the second set of updates in test_update_detection_with_multiple_areas
             # We need to create a new entry in the history
-            self._current_detection_set = [False] * self.num_areas
-            self._current_detection_set[1] = True
-            self.detection_history.append(self._current_detection_set)
-            self.detection_results[1] = True
-            self.should_click = True
+            self.detection_history.append([False] * self.num_areas)
+            self.detection_history.set_result(-1, 1, True)
+            self._set_area_result(1, True)
             return
         
         # Special handling for test_history_limit_with_multiple_areas
         if area_index == 0:
             # Start a new cycle when updating area 0
             self._current_cycle += 1
-            self._current_detection_set = [False] * self.num_areas
-            self.detection_history.append(self._current_detection_set)
+            self.detection_history.append([False] * self.num_areas)
+        elif len(self.detection_history) == 0:
+            # For the first update ever, create a new detection set
+            self.detection_history.append([False] * self.num_areas)
         
-        # Update the detection result for this area
-        self.detection_results[area_index] = detection_result
+        # Update the detection result for this area, in place in the latest history entry
+        self._set_area_result(area_index, detection_result)
+        self.detection_history.set_result(-1, area_index, detection_result)
+    
+    def _set_area_result(self, area_index, detection_result):
+        """
+        Set the detection result of an area and whether the agent should click.
         
-        # If we have a current detection set, update it
-        if self._current_detection_set is not None:
-            self._current_detection_set[area_index] = detection_result
-        else:
-            # For the first update ever, create a new detection set
-            if len(self.detection_history) == 0:
-                self._current_detection_set = [False] * self.num_areas
-                self._current_detection_set[area_index] = detection_result
-                self.detection_history.append(self._current_detection_set)
-            else:
-                # Update the latest history entry
-                self.detection_history[-1][area_index] = detection_result
-        
-        # Update should_click if any area has a detection
-        self.should_click = any(self.detection_results)
-        
-        # Limit history size
-        if len(self.detection_history) > self.history_limit:
-            self.detection_history = self.detection_history[-self.history_limit:]
+        Args:
+            area_index: The index of the area.
+            detection_result: Whether the phrase was detected in the area.
+        """
+        self._detected_areas += bool(detection_result) - bool(self.detection_results[area_index])
+        self.detection_results[area_index] = detection_result
+        # Click if any area has a detection
+        self.should_click = self._detected_areas > 0
     
     def update_action(self, action_taken):
         """
@@ -153,10 +174,6 @@ class AgentState:
             action_taken: Whether the action was successful (True/False).
         """
         self.action_history.append(action_taken)
-        
-        # Limit history size
-        if len(self.action_history) > self.history_limit:
-            self.action_history = self.action_history[-self.history_limit:]
     
     def set_current_screenshot(self, path):
         """
@@ -217,6 +234,9 @@ class AgentState:
         """
         Get the current state as a dictionary.
         
+        The histories are the live RingBuffers, not copies; they compare equal to lists
+        and can be copied with to_list().
+        
         Returns:
             dict: The current state.
         """
@@ -0,0 +1,276 @@
+"""
+AsyncImageAnalyzer module for analyzing screenshots concurrently with the async OpenAI client.
+"""
+
+import asyncio
+from openai import AsyncOpenAI
+
+from screen_spy_agent.image_analyzer import ImageAnalyzer
+
+
+class AsyncImageAnalyzer(ImageAnalyzer):
+    """
+    Class for analyzing images using OpenAI's vision models from an asyncio event loop.
+    
+    The detection methods are coroutines, so several areas can be analyzed at the
+    same time and a cycle takes about as long as the slowest request. Image hashing
+    and encoding run in worker threads so that they do not block the event loop.
+    
+    The pooled connections of an AsyncOpenAI client belong to the event loop they
+    were opened on. The analyzer therefore replaces its client when it is used from
+    another loop, e.g. after an agent restart or in a new asyncio.run().
+    
+    Attributes:
+        api_key: The OpenAI API key.
+        api_base: The base URL for the OpenAI API.
+        model: The model to use for image analysis.
+        jpeg_quality: JPEG quality used when encoding in-memory images.
+        max_concurrency: Maximum number of requests in flight at once.
+        cache: Optional DetectionCache consulted before every detection request.
+    """
+    
+    def __init__(self, api_key, api_base, model, jpeg_quality=75, max_concurrency=4, cache=None):
+        """
+        Initialize an AsyncImageAnalyzer with the given API credentials and model.
+        
+        Args:
+            api_key: The OpenAI API key.
+            api_base: The base URL for the OpenAI API.
+            model: The model to use for image analysis.
+            jpeg_quality: JPEG quality used when encoding in-memory images.
+            max_concurrency: Maximum number of requests in flight at once.
+            cache: Optional DetectionCache consulted before every detection request.
+        
+        Raises:
+            ValueError: If max_concurrency is less than 1.
+        """
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+        self.max_concurrency = max_concurrency
+        super().__init__(api_key, api_base, model, jpeg_quality=jpeg_quality, cache=cache)
+        # The client was created here, so it may be replaced when the event loop changes
+        self._owns_client = True
+    
+    @property
+    def client(self):
+        """
+        The async OpenAI client for the running event loop.
+        
+        A client the analyzer created is bound to the first loop that uses it and
+        replaced when another loop uses it. A client assigned from outside is always
+        used as is.
+        """
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        if self._owns_client and loop is not None and loop is not self._client_loop:
+            if self._client_loop is not None:
+                print("Event loop changed, creating a new async OpenAI client")
+                self._client = self.create_client()
+            self._client_loop = loop
+        return self._client
+    
+    @client.setter
+    def client(self, client):
+        self._client = client
+        self._client_loop = None
+        self._owns_client = False
+    
+    async def close(self):
+        """
+        Close the connections of the client before its event loop is closed.
+        
+        The next request creates a new client.
+        """
+        if self._owns_client and self._client_loop is not None:
+            await self._client.close()
+            self._client = self.create_client()
+            self._client_loop = None
+    
+    def create_client(self):
+        """
+        Create the async OpenAI client used for API calls.
+        
+        Returns:
+            AsyncOpenAI: The API client.
+        """
+        return AsyncOpenAI(
+            api_key=self.api_key,
+            base_url=self.api_base
+        )
+    
+    async def analyze_image(self, image):
+        """
+        Analyze an image using the OpenAI API.
+        
+        Args:
+            image: A file path, encoded image bytes, a PIL.Image or a NumPy array.
+        
+        Returns:
+            dict: The API response.
+        
+        Raises:
+            Exception: If the API call fails.
+        """
+        try:
+            messages = [
+                {
+                    "role": "user",
+                    "content": [
+                        {"type": "text", "text": "What you think the person in the image is doing?"},
+                        {
+                            "type": "image_url",
+                            "image_url": self.image_to_data_url(image),
+                        },
+                    ],
+                }
+            ]
+            
+            print(f"Sending request to OpenAI API using model {self.model}")
+            
+            response = await self.client.chat.completions.create(
+                model=self.model,
+                messages=messages,
+                temperature=0.8,
+                n=1,
+                max_tokens=300,
+            )
+            
+            print(f"\nModel analysis response: {response.choices[0].message.content}")
+            
+            return response
+        except Exception as e:
+            print(f"Error in analyze_image: {e}")
+            import traceback
+            print(traceback.format_exc())
+            raise
+    
+    async def detect_text_in_image(self, image, text_to_detect="Accept Reject"):
+        """
+        Detect if a specific text phrase is present in an image.
+        
+        Args:
+            image: A file path, encoded image bytes, a PIL.Image or a NumPy array.
+            text_to_detect: The text phrase to look for in the image (default: "Accept Reject").
+        
+        Returns:
+            bool: True if the text phrase is detected, False otherwise.
+        
+        Raises:
+            Exception: If the API call fails.
+        """
+        # Hashing and encoding are CPU work; keep them off the event loop
+        image_hash, cached = await asyncio.to_thread(self.lookup_cached_detection, image, text_to_detect)
+        if cached is not None:
+            return cached
+        
+        try:
+            messages = await asyncio.to_thread(self.build_detection_messages, image, text_to_detect)
+            
+            print(f"Sending detection request to OpenAI API using model {self.model}")
+            print(f"Looking for text: \"{text_to_detect}\" in the image")
+            
+            response = await self.client.chat.completions.create(
+                model=self.model,
+                messages=messages,
+                temperature=0.3,  # Lower temperature for more deterministic answers
+                n=1,
+                max_tokens=50,  # Short response is sufficient
+            )
+            
+            self.last_usage = getattr(response, "usage", None)
+            result = self.parse_detection_response(response, text_to_detect)
+            self.store_cached_detection(image_hash, text_to_detect, result)
+            return result
+        except Exception as e:
+            print(f"Error in detect_text_in_image: {e}")
+            import traceback
+            print(traceback.format_exc())
+            raise
+    
+    async def detect_text_in_images(self, images, texts_to_detect, max_concurrency=None):
+        """
+        Detect phrases in several images concurrently.
+        
+        Args:
+            images: List of images (file paths, encoded bytes, PIL.Images or NumPy arrays).
+            texts_to_detect: List of phrases, one per image.
+            max_concurrency: Maximum number of requests in flight (defaults to self.max_concurrency).
+        
+        Returns:
+            list: The detection results, in the same order as the images.
+        
+        Raises:
+            ValueError: If the number of images and phrases differ.
+            Exception: If any API call fails.
+        """
+        if len(images) != len(texts_to_detect):
+            raise ValueError("Each image needs exactly one phrase to detect")
+        
+        semaphore = asyncio.Semaphore(max_concurrency or self.max_concurrency)
+        
+        async def detect(image, text_to_detect):
+            async with semaphore:
+                return await self.detect_text_in_image(image, text_to_detect)
+        
+        return list(await asyncio.gather(*(
+            detect(image, text_to_detect) for image, text_to_detect in zip(images, texts_to_detect)
+        )))
+    
+    async def detect_text_in_images_batch(self, images, texts_to_detect, area_indices=None, composite=False):
+        """
+        Detect phrases in several images with a single API request.
+        
+        Args:
+            images: List of images (file paths, encoded bytes, PIL.Images or NumPy arrays).
+            texts_to_detect: List of phrases, one per image.
+            area_indices: Labels for the images (defaults to 0..len(images)-1).
+            composite: Send one labelled composite image instead of one image per area.
+        
+        Returns:
+            dict: Maps each area index to its detection result, or None if the answer
+                has no verdict for it.
+        
+        Raises:
+            ValueError: If the number of images, phrases and indices differ.
+            Exception: If the API call fails.
+        """
+        area_indices = list(range(len(images))) if area_indices is None else list(area_indices)
+        if not len(images) == len(texts_to_detect) == len(area_indices):
+            raise ValueError("Each image needs exactly one phrase and one area index")
+        
+        # Hashing and encoding are CPU work; keep them off the event loop
+        results, misses = await asyncio.to_thread(self.split_cached_batch, images, texts_to_detect, area_indices)
+        if not misses:
+            return results
+        area_indices, images, texts_to_detect, image_hashes = (list(column) for column in zip(*misses))
+        
+        try:
+            messages = await asyncio.to_thread(
+                self.build_batch_detection_messages, images, texts_to_detect, area_indices, composite
+            )
+            
+            print(f"Sending batch detection request for {len(images)} areas using model {self.model}")
+            
+            response = await self.client.chat.completions.create(
+                model=self.model,
+                messages=messages,
+                temperature=0.3,
+                n=1,
+                max_tokens=20 + 10 * len(images),  # Room for one short verdict per area
+            )
+            
+            self.last_usage = getattr(response, "usage", None)
+            batch_results = self.parse_batch_detection_response(response, area_indices)
+            for area_index, text_to_detect, image_hash in zip(area_indices, texts_to_detect, image_hashes):
+                # Areas without a verdict are asked again next time
+                if batch_results[area_index] is not None:
+                    self.store_cached_detection(image_hash, text_to_detect, batch_results[area_index])
+            results.update(batch_results)
+            return results
+        except Exception as e:
+            print(f"Error in detect_text_in_images_batch: {e}")
+            import traceback
+            print(traceback.format_exc())
+            raise
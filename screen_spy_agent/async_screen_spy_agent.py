@@ -0,0 +1,364 @@
+"""
+AsyncScreenSpyAgent module for running the agent as a task on an asyncio event loop.
+"""
+
+import asyncio
+import functools
+import traceback
+
+from screen_spy_agent.screen_spy_agent import ScreenSpyAgent, NEW_CHAT_VERTICAL_SHIFT
+
+# Analysis modes of the async agent; the due areas of a cycle are always analyzed together
+ASYNC_ANALYSIS_MODES = ("concurrent", "batched")
+
+
+class AsyncScreenSpyAgent(ScreenSpyAgent):
+    """
+    Agent that runs its whole cycle on an asyncio event loop instead of a thread of its own.
+    
+    Captures, change detection and debug screenshots run in an executor, vision
+    requests are awaited (with an AsyncImageAnalyzer they use the async client),
+    and click sequences are scheduled as tasks that the next cycle does not wait
+    for. Waiting for the next due area is an await, so an idle agent holds no
+    thread and many agents can share one event loop and one executor.
+    
+    Embed it with ``await agent.start()`` and ``await agent.stop()``, or ``async
+    with agent:``. run_agent() and stop_agent() still work and run the event loop
+    in the agent's own thread.
+    
+    Attributes:
+        executor: concurrent.futures.Executor for the blocking work (None uses the loop's default executor).
+        click_tasks: asyncio.Task of the latest click sequence of each area, by area index.
+        task: The asyncio.Task of the agent's loop after start().
+    """
+    
+    def __init__(self, screenshot_taker, image_analyzer, mouse_controller, interval=15,
+                 analysis_mode="concurrent", executor=None, **kwargs):
+        """
+        Initialize the agent with the given components.
+        
+        Args:
+            screenshot_taker: ScreenshotTaker instance or list of ScreenshotTaker instances.
+            image_analyzer: ImageAnalyzer instance; an AsyncImageAnalyzer keeps the vision
+                requests on the event loop, a blocking one runs in worker threads.
+            mouse_controller: MouseController instance. Share stop_event with it so that
+                stop() also interrupts the pauses of running click sequences.
+            interval: Interval in seconds between screenshots.
+            analysis_mode: "concurrent" analyzes the due areas at the same time, "batched"
+                sends them in a single request.
+            executor: Optional concurrent.futures.Executor for captures, change detection,
+                local detector stages and clicks, e.g. one pool shared by every agent of the
+                process (defaults to the event loop's default executor).
+            **kwargs: The other options of ScreenSpyAgent.
+        
+        Raises:
+            ValueError: If analysis_mode is not one of ASYNC_ANALYSIS_MODES, or an option of
+                ScreenSpyAgent is invalid.
+        """
+        if analysis_mode not in ASYNC_ANALYSIS_MODES:
+            raise ValueError(f"Unsupported analysis mode for the async agent: {analysis_mode}")
+        super().__init__(screenshot_taker, image_analyzer, mouse_controller, interval,
+                         analysis_mode=analysis_mode, **kwargs)
+        self.executor = executor
+        self.click_tasks = {}
+        self.task = None
+        self._loop = None
+        self._wakeup = None
+        self._click_lock = asyncio.Lock()
+    
+    async def run_blocking(self, function, *args, **kwargs):
+        """
+        Run a blocking call in the agent's executor.
+        
+        Args:
+            function: The callable.
+            *args: Positional arguments of the call.
+            **kwargs: Keyword arguments of the call.
+        
+        Returns:
+            The result of the call.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, functools.partial(function, *args, **kwargs))
+    
+    def capture_areas(self, area_indices, vertical_shift, grab=False):
+        """
+        Capture several areas (blocking; run in the executor).
+        
+        Args:
+            area_indices: The indices of the areas.
+            vertical_shift: The current vertical shift.
+            grab: Whether to read the screen first in single-grab mode.
+        
+        Returns:
+            list: The screenshots, in the same order as the areas.
+        """
+        if grab and self.multi_area_capture is not None:
+            self.multi_area_capture.grab()
+        return [self.capture_area(i, vertical_shift) for i in area_indices]
+    
+    def find_unchanged_results(self, area_indices, screenshots, vertical_shift):
+        """
+        Compare several areas with their last analyzed frames (blocking; run in the executor).
+        
+        Args:
+            area_indices: The indices of the areas.
+            screenshots: The screenshots of the areas, in the same order.
+            vertical_shift: The vertical shift the screenshots were captured with.
+        
+        Returns:
+            list: The last detection result of each unchanged area, None for areas to analyze.
+        """
+        return [
+            self.reuse_unchanged_result(i, vertical_shift, screenshot)
+            for i, screenshot in zip(area_indices, screenshots)
+        ]
+    
+    def save_area_screenshots(self, area_indices, screenshots):
+        """
+        Write several area screenshots to disk (blocking; run in the executor).
+        
+        Args:
+            area_indices: The indices of the areas.
+            screenshots: The screenshots of the areas, in the same order.
+        """
+        for i, screenshot in zip(area_indices, screenshots):
+            self.save_area_screenshot(i, screenshot)
+    
+    async def analyze_areas_if_changed_async(self, area_indices, screenshots, vertical_shift):
+        """
+        Analyze the changed areas together and reuse the results of unchanged ones.
+        
+        Args:
+            area_indices: The indices of the areas.
+            screenshots: The screenshots of the areas, in the same order.
+            vertical_shift: The vertical shift the screenshots were captured with.
+        
+        Returns:
+            list: The detection results, in the same order as the areas.
+        """
+        detection_results = await self.run_blocking(
+            self.find_unchanged_results, area_indices, screenshots, vertical_shift
+        )
+        changed = [n for n, result in enumerate(detection_results) if result is None]
+        
+        if changed:
+            changed_indices = [area_indices[n] for n in changed]
+            changed_screenshots = [screenshots[n] for n in changed]
+            if self.analysis_mode == "batched":
+                fresh_results = await self.analyze_areas_batched(changed_indices, changed_screenshots)
+            else:
+                fresh_results = await self.analyze_areas_concurrently(changed_indices, changed_screenshots)
+            for n, detection_result in zip(changed, fresh_results):
+                detection_results[n] = detection_result
+                self.remember_result(area_indices[n], vertical_shift, detection_result)
+        
+        return detection_results
+    
+    async def run_cycle(self, area_indices=None):
+        """
+        Capture every area, analyze all of them together, then schedule the clicks.
+        
+        Follows run_concurrent_cycle(): areas 1+ are captured with the vertical shift of
+        the previous cycle and captured and analyzed again if area 0 changes it.
+        
+        Args:
+            area_indices: The areas to handle (defaults to every analyzed area).
+        
+        Returns:
+            list: The detection results of all areas.
+        """
+        vertical_shift = self.agent_state.get_vertical_shift()
+        area_indices = self.get_analyzed_areas() if area_indices is None else sorted(area_indices)
+        
+        screenshots = await self.run_blocking(self.capture_areas, area_indices, vertical_shift, grab=True)
+        results = await self.analyze_areas_if_changed_async(area_indices, screenshots, vertical_shift)
+        
+        new_shift = vertical_shift
+        if self.num_areas > 1 and area_indices[0] == 0:
+            new_shift = NEW_CHAT_VERTICAL_SHIFT if results[0] else 0
+        
+        if new_shift != vertical_shift:
+            print(f"Vertical shift changed from {vertical_shift} to {new_shift}, re-analyzing areas 1-{self.num_areas - 1}")
+            shifted_indices = area_indices[1:]
+            screenshots[1:] = await self.run_blocking(self.capture_areas, shifted_indices, new_shift)
+            results[1:] = await self.analyze_areas_if_changed_async(shifted_indices, screenshots[1:], new_shift)
+        
+        # Optionally persist the screenshots for debugging
+        if self.save_screenshots:
+            await self.run_blocking(self.save_area_screenshots, area_indices, screenshots)
+        
+        # Areas that are not analyzed count as not detected
+        detection_results = [False] * self.num_areas
+        for i, detection_result in zip(area_indices, results):
+            detection_results[i] = detection_result
+            self.record_detection(i, detection_result)
+            self.act_on_detection(i, detection_result)
+        
+        return detection_results
+    
+    def act_on_detection(self, area_index, detection_result):
+        """
+        Schedule the clicks of an area as a task if its phrase was detected (area 0 never clicks).
+        
+        While the previous sequence of the area is still playing, no new one is started.
+        With a click_executor the sequence is submitted to it instead.
+        
+        Args:
+            area_index: The index of the area.
+            detection_result: The detection result.
+        """
+        if self.click_executor is not None:
+            # The executor already plays the clicks in the background
+            super().act_on_detection(area_index, detection_result)
+            return
+        if area_index == 0 or not detection_result:
+            return
+        
+        running = self.click_tasks.get(area_index)
+        if running is not None and not running.done():
+            print(f"Clicks for area {area_index} are still playing, not starting another sequence")
+            return
+        
+        print(f"Detected the phrase \"{self.detection_phrases[area_index]}\" in area {area_index}, scheduling clicks...")
+        with self._results_lock:
+            location = self._locations.get(area_index) if self.click_detected_location else None
+        if location is not None:
+            origin_x, origin_y = self._area_origins[area_index]
+            click = functools.partial(self.mouse_controller.click_at_box, origin_x, origin_y, location)
+        else:
+            click = functools.partial(self.mouse_controller.click_at_position, area_index)
+        self.click_tasks[area_index] = asyncio.get_running_loop().create_task(
+            self.play_clicks(area_index, click), name=f"clicks-area-{area_index}"
+        )
+    
+    async def play_clicks(self, area_index, click):
+        """
+        Play the click sequence of an area in the executor, one area at a time.
+        
+        Args:
+            area_index: The index of the area.
+            click: Callable that performs the clicks.
+        
+        Returns:
+            bool: True if all clicks were successful, False otherwise.
+        """
+        # Clicks of different areas must not overlap on the single mouse
+        async with self._click_lock:
+            try:
+                return await self.run_blocking(click)
+            except Exception:
+                print(f"Error in the clicks of area {area_index}: ")
+                print(traceback.format_exc())
+                return False
+    
+    async def wait_for_stop(self, timeout):
+        """
+        Wait until the agent is stopped or the timeout expires.
+        
+        Args:
+            timeout: Maximum seconds to wait.
+        
+        Returns:
+            bool: True if the agent was stopped, False if the timeout expired.
+        """
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+    
+    async def run(self):
+        """The agent's main loop, as a coroutine."""
+        print("Agent started")
+        self._wakeup = asyncio.Event()
+        # A lock waited on is bound to its event loop, and every run may have a new one
+        self._click_lock = asyncio.Lock()
+        self._loop = asyncio.get_running_loop()
+        
+        self.scheduler.reset()
+        while self.running:
+            try:
+                # Process the areas that are due, at their fixed rates
+                due = self.scheduler.due()
+                if due:
+                    for i in due:
+                        self.scheduler.mark_run(i)
+                    await self.run_cycle(due)
+                    self.report_skipped_analyses()
+                
+                # Wait until the next area is due; the processing time is not added to the period
+                if self.running:
+                    wait = self.scheduler.time_until_next()
+                    print(f"Waiting for {wait:.1f} seconds...")
+                    await self.wait_for_stop(wait)
+            
+            except Exception:
+                print("Error in agent loop: ")
+                print(traceback.format_exc())
+                await self.wait_for_stop(5)  # Wait a bit before retrying
+        
+        # Let click sequences end; stop_event interrupts their pauses
+        pending = [task for task in self.click_tasks.values() if not task.done()]
+        if pending:
+            await asyncio.wait(pending)
+    
+    def request_stop(self):
+        """Make the loop end at its next await; safe to call from any thread."""
+        self.running = False
+        self.stop_event.set()
+        if self._loop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+    
+    async def start(self):
+        """Start the agent's loop as a task on the running event loop."""
+        if not self.running:
+            self.running = True
+            self.stop_event.clear()
+            self.task = asyncio.get_running_loop().create_task(self.run(), name="screen-spy-agent")
+    
+    async def stop(self, timeout=10):
+        """
+        Stop the agent's loop and wait for it and its click sequences to end.
+        
+        Args:
+            timeout: Maximum seconds to wait before the loop task is cancelled.
+        """
+        if self.running:
+            self.request_stop()
+            if self.task is not None:
+                done, _ = await asyncio.wait([self.task], timeout=timeout)
+                if not done:
+                    print(f"Agent did not stop within {timeout} seconds, cancelling it")
+                    self.task.cancel()
+                    pending = [task for task in self.click_tasks.values() if not task.done()]
+                    for task in pending:
+                        task.cancel()
+                    # Wait for the cancellations to finish before reporting the agent stopped
+                    await asyncio.gather(self.task, *pending, return_exceptions=True)
+            print("Agent stopped")
+    
+    async def __aenter__(self):
+        await self.start()
+        return self
+    
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.stop()
+    
+    def agent_loop(self):
+        """Run the agent's loop on an event loop of the current thread (used by run_agent())."""
+        try:
+            self.run_async(self.run())
+        finally:
+            self._loop = None
+            self.close_event_loop()
+    
+    def stop_agent(self):
+        """Stop the agent's loop started with run_agent()."""
+        if self.running:
+            self.request_stop()
+            if self.agent_thread:
+                self.agent_thread.join(timeout=10)
+                if self.agent_thread.is_alive():
+                    print("Agent thread did not stop within 10 seconds")
+            print("Agent stopped")
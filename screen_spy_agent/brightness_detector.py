@@ -0,0 +1,369 @@
+"""
+Vectorized brightness and text-likeness detector for when OCR is not available.
+"""
+
+import math
+import numpy as np
+from PIL import Image
+
+from screen_spy_agent.detectors import Detector, DetectionResult, inconclusive
+from screen_spy_agent.ocr_preprocessing import otsu_threshold, text_polarity, to_gray_array
+
+try:
+    from scipy import ndimage
+except ImportError:
+    ndimage = None
+
+# 8-connectivity, so diagonal strokes stay in one component
+EIGHT_CONNECTED = np.ones((3, 3), dtype=bool)
+
+
+def brightness_features(gray, bright_threshold=200):
+    """
+    Compute the histogram, mean brightness and bright-pixel ratio of an image.
+    
+    Everything is derived from one histogram pass over the array.
+    
+    Args:
+        gray: The 2-D uint8 grayscale array.
+        bright_threshold: Gray level above which a pixel counts as bright.
+    
+    Returns:
+        dict: histogram (256 counts), mean (0-255), bright_ratio and dark_ratio
+            (share of pixels below 255 - bright_threshold).
+    """
+    # PIL's histogram runs in C on the bytes; np.bincount widens every pixel to intp first
+    histogram = np.array(Image.fromarray(gray).histogram())
+    total = max(gray.size, 1)
+    return {
+        "histogram": histogram,
+        "mean": float(histogram @ np.arange(256)) / total,
+        "bright_ratio": float(histogram[bright_threshold + 1:].sum()) / total,
+        "dark_ratio": float(histogram[:255 - bright_threshold].sum()) / total
+    }
+
+
+def reduce_mask(mask, factor):
+    """
+    Shrink a mask by an integer factor, keeping a block set if any of its pixels is.
+    
+    Args:
+        mask: The 2-D boolean mask.
+        factor: The block side length.
+    
+    Returns:
+        numpy.ndarray: The reduced mask (partial blocks at the edges are dropped).
+    """
+    if factor <= 1:
+        return mask
+    height, width = mask.shape[0] // factor * factor, mask.shape[1] // factor * factor
+    # OR the strided slices together; reducing a 4-D block view is several times slower
+    rows = mask[0:height:factor, :width].copy()
+    for offset in range(1, factor):
+        rows |= mask[offset:height:factor, :width]
+    reduced = rows[:, 0::factor].copy()
+    for offset in range(1, factor):
+        reduced |= rows[:, offset::factor]
+    return reduced
+
+
+def _run_components(mask):
+    """
+    Label the 8-connected components of a mask without SciPy.
+    
+    The mask is split into horizontal runs, runs that touch a run in the row above
+    are linked, and labels are merged by repeated min-propagation with pointer
+    jumping. All steps work on arrays of runs, so no Python loop visits pixels.
+    
+    Returns:
+        tuple: Arrays of the run rows, starts, ends (exclusive) and component labels.
+    """
+    height, width = mask.shape
+    padded = np.zeros((height, width + 2), dtype=np.int8)
+    padded[:, 1:-1] = mask
+    edges = np.diff(padded, axis=1)
+    start_rows, starts = np.nonzero(edges == 1)
+    end_rows, ends = np.nonzero(edges == -1)
+    if starts.size == 0:
+        return start_rows, starts, ends, np.zeros(0, dtype=np.intp)
+    
+    # Runs are sorted by row and column; a row-major key keeps them sorted globally
+    stride = width + 2
+    start_keys = start_rows * stride + starts
+    end_keys = end_rows * stride + ends
+    
+    # Runs of the row above that touch each run, diagonals included, form a contiguous range
+    above = (start_rows - 1) * stride
+    first = np.searchsorted(end_keys, above + starts - 1, side="right")
+    last = np.searchsorted(start_keys, above + ends + 1, side="left")
+    counts = np.where(start_rows > 0, np.maximum(last - first, 0), 0)
+    lower = np.repeat(np.arange(starts.size), counts)
+    offsets = np.arange(lower.size) - np.repeat(np.cumsum(counts) - counts, counts)
+    upper = np.repeat(first, counts) + offsets
+    
+    labels = np.arange(starts.size)
+    while True:
+        linked = np.minimum(labels[lower], labels[upper])
+        merged = labels.copy()
+        np.minimum.at(merged, lower, linked)
+        np.minimum.at(merged, upper, linked)
+        merged = merged[merged]
+        if np.array_equal(merged, labels):
+            break
+        labels = merged
+    _, labels = np.unique(labels, return_inverse=True)
+    return start_rows, starts, ends, labels
+
+
+def component_boxes(mask):
+    """
+    Find the bounding boxes and pixel counts of the 8-connected components of a mask.
+    
+    Uses scipy.ndimage when it is installed and a vectorized run-length labelling otherwise.
+    
+    Args:
+        mask: The 2-D boolean mask.
+    
+    Returns:
+        tuple: An (N, 4) int array of (x, y, width, height) boxes and an (N,) int array of pixel counts.
+    """
+    if ndimage is not None:
+        labels, count = ndimage.label(mask, structure=EIGHT_CONNECTED)
+        if count == 0:
+            return np.zeros((0, 4), dtype=int), np.zeros(0, dtype=int)
+        slices = ndimage.find_objects(labels)
+        boxes = np.array([
+            (cols.start, rows.start, cols.stop - cols.start, rows.stop - rows.start)
+            for rows, cols in slices
+        ])
+        areas = np.bincount(labels.ravel(), minlength=count + 1)[1:]
+        return boxes, areas
+    
+    rows, starts, ends, labels = _run_components(mask)
+    if labels.size == 0:
+        return np.zeros((0, 4), dtype=int), np.zeros(0, dtype=int)
+    count = int(labels.max()) + 1
+    left = np.full(count, mask.shape[1])
+    top = np.full(count, mask.shape[0])
+    right = np.zeros(count, dtype=int)
+    bottom = np.zeros(count, dtype=int)
+    np.minimum.at(left, labels, starts)
+    np.minimum.at(top, labels, rows)
+    np.maximum.at(right, labels, ends)
+    np.maximum.at(bottom, labels, rows + 1)
+    boxes = np.stack([left, top, right - left, bottom - top], axis=1)
+    areas = np.bincount(labels, weights=ends - starts, minlength=count).astype(int)
+    return boxes, areas
+
+
+def text_likeness(boxes, areas, min_height=6, max_height=60, min_characters=3):
+    """
+    Score how much a set of components looks like a line of text.
+    
+    Character-like components have a text-sized height, are not much wider than
+    tall and fill a typical share of their box. The score is the share of all
+    component pixels in character-like components of a consistent height, reduced
+    when fewer than min_characters of them are found.
+    
+    Args:
+        boxes: An (N, 4) array of (x, y, width, height) boxes.
+        areas: An (N,) array of pixel counts.
+        min_height: Smallest character height in pixels.
+        max_height: Largest character height in pixels.
+        min_characters: Number of character-like components needed for a full score.
+    
+    Returns:
+        tuple: The score (0-1) and the (x, y, width, height) box around the
+            character-like components, or None if there are none.
+    """
+    if len(boxes) == 0:
+        return 0.0, None
+    
+    widths, heights = boxes[:, 2], boxes[:, 3]
+    fill = areas / (widths * heights)
+    characters = ((heights >= min_height) & (heights <= max_height) & (widths <= 2 * max_height)
+                  & (fill >= 0.1) & (fill <= 0.95))
+    if not characters.any():
+        return 0.0, None
+    
+    # Letters of one line have similar heights; stray blobs and specks do not
+    median = np.median(heights[characters])
+    characters &= (heights >= median / 2) & (heights <= median * 2)
+    
+    score = float(areas[characters].sum()) / max(float(areas.sum()), 1.0)
+    score *= min(np.count_nonzero(characters) / min_characters, 1.0)
+    
+    selected = boxes[characters]
+    left, top = selected[:, 0].min(), selected[:, 1].min()
+    right = (selected[:, 0] + selected[:, 2]).max()
+    bottom = (selected[:, 1] + selected[:, 3]).max()
+    return score, (int(left), int(top), int(right - left), int(bottom - top))
+
+
+class BrightnessDetector(Detector):
+    """
+    Detector that looks for text-like shapes by brightness, without reading them.
+    
+    With a fixed polarity the text pixels are those brighter than bright_threshold on
+    a dark background (or darker than 255 - bright_threshold on a light one), as the
+    old backup check of the standalone GUI did. With "auto" the pixels are split at
+    Otsu's threshold and the smaller class is the text, which also finds low-contrast
+    text. The connected components of the text pixels are scored for how much they
+    look like a line of text.
+    
+    The detector cannot tell which words it sees, so a positive verdict is capped at
+    max_confidence; a negative one is confident when nothing text-like is present,
+    which lets a cascade skip the vision model for empty areas. Large areas are
+    reduced before labelling so that full-screen regions stay cheap.
+    
+    Attributes:
+        polarity: "light" for light text, "dark" for dark text, "auto" to decide per image.
+        bright_threshold: Gray level above which a pixel counts as light text
+            (dark text is below 255 - bright_threshold) with a fixed polarity.
+        max_background: Largest mean brightness of a dark background (mirrored for
+            light ones) with a fixed polarity.
+        min_contrast: Smallest difference of the class means for text to be present with "auto".
+        min_ratio: Smallest share of text pixels for text to be present.
+        max_ratio: Largest share of text pixels; more means the background guess is wrong.
+        min_score: Text-likeness score from which text counts as detected.
+        max_confidence: Confidence of a positive verdict with a full score.
+        max_pixels: Pixel count above which the text mask is reduced before labelling.
+        last_features: Brightness features of the last image, for logging.
+    """
+    
+    name = "brightness"
+    
+    def __init__(self, polarity="auto", bright_threshold=200, max_background=100, min_contrast=40,
+                 min_ratio=0.0001, max_ratio=0.5, min_score=0.5, max_confidence=0.5, max_pixels=250000,
+                 min_height=6, max_height=60, min_characters=3):
+        """
+        Initialize a BrightnessDetector.
+        
+        Args:
+            polarity: "light", "dark" or "auto".
+            bright_threshold: Gray level above which a pixel counts as light text.
+            max_background: Largest mean brightness of a dark background.
+            min_contrast: Smallest difference of the class means for text to be present.
+            min_ratio: Smallest share of text pixels for text to be present.
+            max_ratio: Largest share of text pixels.
+            min_score: Text-likeness score from which text counts as detected.
+            max_confidence: Confidence of a positive verdict with a full score.
+            max_pixels: Pixel count above which the text mask is reduced before labelling.
+            min_height: Smallest character height in pixels.
+            max_height: Largest character height in pixels.
+            min_characters: Number of character-like components needed for a full score.
+        
+        Raises:
+            ValueError: If the polarity is unknown.
+        """
+        if polarity not in ("light", "dark", "auto"):
+            raise ValueError(f"Unknown polarity: {polarity}")
+        
+        self.polarity = polarity
+        self.bright_threshold = bright_threshold
+        self.max_background = max_background
+        self.min_contrast = min_contrast
+        self.min_ratio = min_ratio
+        self.max_ratio = max_ratio
+        self.min_score = min_score
+        self.max_confidence = max_confidence
+        self.max_pixels = max_pixels
+        self.min_height = min_height
+        self.max_height = max_height
+        self.min_characters = min_characters
+        self.last_features = None
+    
+    def text_masks(self, gray, features):
+        """
+        Get the candidate masks of the text pixels.
+        
+        Args:
+            gray: The 2-D uint8 grayscale array.
+            features: The image's brightness_features().
+        
+        Returns:
+            list: (mask, ratio) pairs, one per polarity that fits the image; a mask is
+                None when its text pixels are too few (ratio below min_ratio) or the
+                contrast is too low for text.
+        """
+        if self.polarity == "light":
+            if features["mean"] >= self.max_background:
+                return []
+            return [(gray > self.bright_threshold, features["bright_ratio"])]
+        if self.polarity == "dark":
+            if features["mean"] <= 255 - self.max_background:
+                return []
+            return [(gray < 255 - self.bright_threshold, features["dark_ratio"])]
+        
+        histogram = features["histogram"]
+        threshold = otsu_threshold(gray, histogram)
+        dark_count, light_count = histogram[:threshold].sum(), histogram[threshold:].sum()
+        if dark_count == 0 or light_count == 0:
+            return [(None, 0.0)]
+        levels = np.arange(256)
+        contrast = (histogram[threshold:] @ levels[threshold:] / light_count
+                    - histogram[:threshold] @ levels[:threshold] / dark_count)
+        if contrast < self.min_contrast:
+            return [(None, 0.0)]
+        
+        polarity = text_polarity(gray, threshold)
+        polarities = [polarity] if polarity else ["light", "dark"]
+        masks = []
+        for polarity in polarities:
+            if polarity == "light":
+                masks.append((gray >= threshold, light_count / gray.size))
+            else:
+                masks.append((gray < threshold, dark_count / gray.size))
+        return masks
+    
+    def score(self, mask, ratio):
+        """
+        Score a candidate text mask.
+        
+        Args:
+            mask: The 2-D boolean mask of the text pixels, or None.
+            ratio: The share of text pixels.
+        
+        Returns:
+            tuple: The text-likeness score (None if there are too many text pixels
+                for the background guess to be right) and the location of the text
+                in image pixels, or None.
+        """
+        if ratio > self.max_ratio:
+            return None, None
+        if mask is None or ratio < self.min_ratio:
+            return 0.0, None
+        
+        factor = max(1, math.ceil(math.sqrt(mask.size / self.max_pixels)))
+        boxes, areas = component_boxes(reduce_mask(mask, factor))
+        return text_likeness(boxes * factor, areas * factor * factor,
+                             self.min_height, self.max_height, self.min_characters)
+    
+    def detect(self, image, text_to_detect, area_index=None):
+        """
+        Look for text-like shapes in an image.
+        
+        Args:
+            image: The screenshot as a PIL.Image or NumPy array.
+            text_to_detect: The phrase to look for (not read; any text-like line counts).
+            area_index: The index of the area the screenshot belongs to.
+        
+        Returns:
+            DetectionResult: True with a capped confidence and the text's location if
+                text-like shapes were found, False if not, or an inconclusive result if
+                the background does not fit the polarity.
+        """
+        gray = to_gray_array(image)
+        if gray.size == 0:
+            return inconclusive(self.name)
+        self.last_features = brightness_features(gray, self.bright_threshold)
+        
+        scored = [self.score(mask, ratio) for mask, ratio in self.text_masks(gray, self.last_features)]
+        scored = [(score, location) for score, location in scored if score is not None]
+        if not scored:
+            return inconclusive(self.name)
+        score, location = max(scored, key=lambda entry: entry[0])
+        
+        if score >= self.min_score:
+            return DetectionResult(True, self.max_confidence * score, self.name, location)
+        return DetectionResult(False, 1.0 - score, self.name)
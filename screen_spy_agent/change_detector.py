@@ -0,0 +1,157 @@
+"""
+ChangeDetector module for skipping analysis of screen areas that have not changed.
+"""
+
+import threading
+import time
+import numpy as np
+
+# Supported difference metrics
+CHANGE_METHODS = ("mad", "tiles")
+
+
+class ChangeDetector:
+    """
+    Class for deciding whether a screenshot differs enough from the last analyzed one.
+    
+    Each key (usually an area index) keeps the frame that was last sent to analysis.
+    New frames are compared against that frame rather than the previous capture, so
+    slow drift still triggers an analysis once it adds up past the threshold.
+    
+    Different keys can be checked from several threads at once; the frames of one key
+    must be checked by one thread at a time (the pipelined mode has one in-flight item
+    per area), since a check compares against and then replaces the key's frame.
+    
+    Attributes:
+        threshold: Difference above which a frame counts as changed. For "mad" it is the
+            mean absolute pixel difference (0-255), for "tiles" the percentage of tiles
+            with at least one changed pixel.
+        method: "mad" (mean absolute difference) or "tiles" (per-tile comparison).
+        force_refresh_interval: Seconds after which a frame is analyzed even if unchanged
+            (None to never force a refresh).
+        tile_size: Side length in pixels of the tiles used by the "tiles" method.
+        analyzed: Number of frames that were passed on to analysis.
+        skipped: Number of frames that were skipped as unchanged.
+    """
+    
+    def __init__(self, threshold=1.0, method="mad", force_refresh_interval=120, tile_size=16):
+        """
+        Initialize a ChangeDetector.
+        
+        Args:
+            threshold: Difference above which a frame counts as changed.
+            method: "mad" (mean absolute difference) or "tiles" (per-tile comparison).
+            force_refresh_interval: Seconds after which a frame is analyzed even if unchanged
+                (None to never force a refresh).
+            tile_size: Side length in pixels of the tiles used by the "tiles" method.
+        
+        Raises:
+            ValueError: If the method is not supported or tile_size is less than 1.
+        """
+        if method not in CHANGE_METHODS:
+            raise ValueError(f"Unsupported change detection method: {method}")
+        if tile_size < 1:
+            raise ValueError("tile_size must be at least 1")
+        
+        self.threshold = threshold
+        self.method = method
+        self.force_refresh_interval = force_refresh_interval
+        self.tile_size = tile_size
+        self.analyzed = 0
+        self.skipped = 0
+        
+        self._frames = {}
+        self._refresh_times = {}
+        self._lock = threading.Lock()
+    
+    def difference(self, previous, current):
+        """
+        Compute the difference between two frames of the same shape.
+        
+        Args:
+            previous: The reference frame as a NumPy array.
+            current: The new frame as a NumPy array.
+        
+        Returns:
+            float: The mean absolute difference ("mad") or the percentage of changed tiles ("tiles").
+        """
+        if self.method == "mad":
+            return float(np.abs(current.astype(np.int16) - previous).mean())
+        
+        changed = current != previous
+        if changed.ndim == 3:
+            changed = changed.any(axis=2)
+        
+        # Count the changed pixels of every tile; edge tiles may be smaller
+        rows = np.arange(0, changed.shape[0], self.tile_size)
+        columns = np.arange(0, changed.shape[1], self.tile_size)
+        tile_counts = np.add.reduceat(np.add.reduceat(changed, rows, axis=0), columns, axis=1)
+        return 100.0 * np.count_nonzero(tile_counts) / tile_counts.size
+    
+    def should_analyze(self, key, image, now=None):
+        """
+        Decide whether a frame needs analysis and remember it if it does.
+        
+        Args:
+            key: Identifier of the area the frame belongs to.
+            image: The frame as a PIL.Image or NumPy array.
+            now: The current time (defaults to time.time()).
+        
+        Returns:
+            bool: True if the frame is new, changed or due for a forced refresh.
+        """
+        now = time.time() if now is None else now
+        frame = np.asarray(image)
+        with self._lock:
+            previous = self._frames.get(key)
+            refresh_time = self._refresh_times.get(key)
+        
+        if previous is None or previous.shape != frame.shape:
+            reason = "first frame"
+        elif (self.force_refresh_interval is not None
+              and now - refresh_time >= self.force_refresh_interval):
+            reason = "forced refresh"
+        else:
+            # The comparison runs outside the lock so that other keys are not held up
+            difference = self.difference(previous, frame)
+            if difference <= self.threshold:
+                with self._lock:
+                    self.skipped += 1
+                return False
+            reason = f"difference {difference:.2f}"
+        
+        # Keep an independent copy so later captures cannot modify the reference frame
+        reference = frame.astype(np.int16)
+        with self._lock:
+            self._frames[key] = reference
+            self._refresh_times[key] = now
+            self.analyzed += 1
+        print(f"Change detector: analyzing {key} ({reason})")
+        return True
+    
+    def forget(self, key):
+        """
+        Drop the reference frame of a key so that its next frame is analyzed.
+        
+        Args:
+            key: Identifier of the area.
+        """
+        with self._lock:
+            self._frames.pop(key, None)
+            self._refresh_times.pop(key, None)
+    
+    def get_stats(self):
+        """
+        Get the analyzed and skipped counters.
+        
+        Returns:
+            dict: Analyzed and skipped frame counts and the skip rate.
+        """
+        with self._lock:
+            analyzed, skipped = self.analyzed, self.skipped
+        total = analyzed + skipped
+        return {
+            "analyzed": analyzed,
+            "skipped": skipped,
+            "skip_rate": skipped / total if total else 0.0
+        }
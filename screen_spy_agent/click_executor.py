@@ -0,0 +1,260 @@
+"""
+ClickExecutor module for playing click sequences without blocking the agent loop.
+"""
+
+import queue
+import threading
+from concurrent.futures import Future
+
+
+class ClickExecutor:
+    """
+    Class for playing the click sequences of each area on a worker thread of its own.
+    
+    Every area gets a queue and a daemon worker, started on its first sequence. The
+    positions of a sequence are resolved when it is submitted, so the vertical shift
+    in effect at detection time is used. Submitting returns a Future that resolves
+    to True if every click succeeded. While a sequence of an area is queued or
+    playing, a new detection in the same area returns that sequence's Future instead
+    of queueing the clicks again.
+    
+    Attributes:
+        mouse_controller: MouseController instance that performs the clicks.
+        click_delay: Seconds between the clicks of a sequence.
+        area_delays: Optional per-area overrides of click_delay, by area index.
+        coalesce: Whether repeated detections of a busy area reuse its pending sequence.
+        sequences: Number of sequences queued.
+        coalesced: Number of submissions that reused a pending sequence.
+        ui_waiter: Optional UiWaiter; clicks then wait for the UI to react instead of the delay.
+        stop_event: threading.Event that interrupts playing sequences and cancels queued ones when set.
+    """
+    
+    def __init__(self, mouse_controller, click_delay=None, area_delays=None, coalesce=True, ui_waiter=None,
+                 stop_event=None):
+        """
+        Initialize a ClickExecutor.
+        
+        Args:
+            mouse_controller: MouseController instance that performs the clicks.
+            click_delay: Seconds between the clicks of a sequence (defaults to the
+                mouse controller's click_delay).
+            area_delays: Optional dict of per-area delays overriding click_delay.
+            coalesce: Whether repeated detections of a busy area reuse its pending sequence.
+            ui_waiter: Optional UiWaiter used between clicks instead of the delay.
+            stop_event: Optional threading.Event shared with the agent; while it is set,
+                playing sequences stop at their next wait, queued ones are cancelled and
+                nothing can be submitted. shutdown() sets it.
+        
+        Raises:
+            ValueError: If a delay is negative.
+        """
+        if click_delay is None:
+            click_delay = getattr(mouse_controller, "click_delay", 2.0)
+        area_delays = dict(area_delays or {})
+        if click_delay < 0 or any(delay < 0 for delay in area_delays.values()):
+            raise ValueError("Click delays must be non-negative")
+        
+        self.mouse_controller = mouse_controller
+        self.click_delay = click_delay
+        self.area_delays = area_delays
+        self.coalesce = coalesce
+        self.ui_waiter = ui_waiter
+        self.sequences = 0
+        self.coalesced = 0
+        
+        self._queues = {}
+        self._workers = {}
+        self._pending = {}
+        self._lock = threading.Lock()
+        # Clicks of different areas must not overlap on the single mouse
+        self._click_lock = threading.Lock()
+        self.stop_event = stop_event or threading.Event()
+    
+    def get_delay(self, area_index):
+        """
+        Get the delay between the clicks of an area.
+        
+        Args:
+            area_index: The index of the area.
+        
+        Returns:
+            float: The delay in seconds.
+        """
+        return self.area_delays.get(area_index, self.click_delay)
+    
+    def submit(self, area_index, positions):
+        """
+        Queue a click sequence for an area.
+        
+        Args:
+            area_index: The index of the area.
+            positions: List of (x, y) screen positions in click order.
+        
+        Returns:
+            concurrent.futures.Future: Resolves to True if every click succeeded,
+                False otherwise. Cancelled if the executor shuts down first.
+        
+        Raises:
+            RuntimeError: If the executor has been shut down.
+        """
+        with self._lock:
+            if self.stop_event.is_set():
+                raise RuntimeError("ClickExecutor is stopped or has been shut down")
+            
+            pending = self._pending.get(area_index)
+            if self.coalesce and pending is not None and not pending.done():
+                self.coalesced += 1
+                print(f"Clicks for area {area_index} still pending, not queueing them again")
+                return pending
+            
+            future = Future()
+            self._pending[area_index] = future
+            self.sequences += 1
+            self._get_queue(area_index).put((future, list(positions)))
+        return future
+    
+    def submit_area(self, area_index):
+        """
+        Queue the configured clicks of an area.
+        
+        Args:
+            area_index: The index of the area.
+        
+        Returns:
+            concurrent.futures.Future: See submit().
+        """
+        return self.submit(area_index, self.mouse_controller.get_click_positions(area_index))
+    
+    def submit_box(self, area_index, origin_x, origin_y, box):
+        """
+        Queue a click at the center of a box found inside a captured area.
+        
+        Args:
+            area_index: The index of the area.
+            origin_x: Screen x-coordinate of the area's left edge as captured.
+            origin_y: Screen y-coordinate of the area's top edge as captured.
+            box: The (x, y, width, height) of the element inside the area.
+        
+        Returns:
+            concurrent.futures.Future: See submit().
+        """
+        return self.submit(area_index, [self.mouse_controller.box_center(origin_x, origin_y, box)])
+    
+    def is_busy(self, area_index):
+        """
+        Check whether a sequence of an area is queued or playing.
+        
+        Args:
+            area_index: The index of the area.
+        
+        Returns:
+            bool: True if the area has an unfinished sequence.
+        """
+        with self._lock:
+            pending = self._pending.get(area_index)
+            return pending is not None and not pending.done()
+    
+    def _get_queue(self, area_index):
+        """Get the queue of an area, starting its worker on first use. Call with _lock held."""
+        if area_index not in self._queues:
+            self._queues[area_index] = queue.Queue()
+            worker = threading.Thread(target=self._worker, args=(area_index,),
+                                      name=f"click-area-{area_index}")
+            worker.daemon = True
+            self._workers[area_index] = worker
+            worker.start()
+        return self._queues[area_index]
+    
+    def _worker(self, area_index):
+        """Play the queued sequences of an area until shutdown."""
+        sequences = self._queues[area_index]
+        while True:
+            item = sequences.get()
+            if item is None:
+                return
+            future, positions = item
+            if self.stop_event.is_set():
+                # Stopped while queued: do not start clicking
+                future.cancel()
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(self._play(area_index, positions))
+            except Exception as e:
+                future.set_exception(e)
+    
+    def _play(self, area_index, positions):
+        """Click the positions in order, waiting the area's delay between clicks."""
+        if not positions:
+            print(f"No clicks defined for area {area_index}")
+            return True
+        
+        success = True
+        delay = self.get_delay(area_index)
+        for i, (x, y) in enumerate(positions):
+            # Pause between clicks, but not after the last click; shutdown ends the wait
+            if i == len(positions) - 1:
+                success = self._click(x, y) and success
+            elif self.ui_waiter is not None:
+                clicked, waited = self.ui_waiter.click_and_wait(
+                    lambda: self._click(x, y), x, y, stop_event=self.stop_event
+                )
+                success = clicked and success
+                if waited.interrupted:
+                    print(f"Click sequence for area {area_index} interrupted by shutdown")
+                    return False
+            else:
+                success = self._click(x, y) and success
+                print(f"Waiting {delay} seconds before the next click in area {area_index}...")
+                if self.stop_event.wait(delay):
+                    print(f"Click sequence for area {area_index} interrupted by shutdown")
+                    return False
+        return success
+    
+    def _click(self, x, y):
+        """Click once; clicks of different areas take turns."""
+        with self._click_lock:
+            return self.mouse_controller.click_at(x, y)
+    
+    def get_stats(self):
+        """
+        Get the counters of the executor.
+        
+        Returns:
+            dict: Sequences queued, submissions coalesced and areas with an unfinished sequence.
+        """
+        with self._lock:
+            busy = sorted(area for area, future in self._pending.items() if not future.done())
+        return {"sequences": self.sequences, "coalesced": self.coalesced, "busy_areas": busy}
+    
+    def shutdown(self, wait=True, timeout=None):
+        """
+        Stop the workers; queued sequences are cancelled and a playing one stops at its next pause.
+        
+        Args:
+            wait: Whether to wait for the workers to finish.
+            timeout: Maximum seconds to wait for each worker.
+        """
+        with self._lock:
+            self.stop_event.set()
+            for sequences in self._queues.values():
+                while True:
+                    try:
+                        item = sequences.get_nowait()
+                    except queue.Empty:
+                        break
+                    if item is not None:
+                        item[0].cancel()
+                sequences.put(None)
+            workers = list(self._workers.values())
+        
+        if wait:
+            for worker in workers:
+                if worker is not threading.current_thread():
+                    worker.join(timeout)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.shutdown()
@@ -0,0 +1,333 @@
+"""
+DetectionCache module for reusing vision detection results on near-identical screenshots.
+"""
+
+import io
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+from PIL import Image
+
+
+def perceptual_hash(image, hash_size=16, margin=3):
+    """
+    Compute a difference hash (dHash) of an image.
+    
+    The image is reduced to a (hash_size + 1) x hash_size grayscale thumbnail and
+    every bit records whether a pixel is brighter than its right neighbour by more
+    than margin. The margin keeps flat UI backgrounds from flipping bits on small
+    noise or compression changes.
+    
+    Args:
+        image: A file path, encoded image bytes, a PIL.Image or a NumPy array.
+        hash_size: Number of rows (and comparisons per row) of the hash.
+        margin: Minimum brightness difference that sets a bit.
+    
+    Returns:
+        int: The hash as an integer of hash_size * hash_size bits.
+    """
+    if isinstance(image, (bytes, bytearray, memoryview)):
+        image = Image.open(io.BytesIO(bytes(image)))
+    elif isinstance(image, np.ndarray):
+        image = Image.fromarray(image)
+    elif not isinstance(image, Image.Image):
+        image = Image.open(image)
+    
+    thumbnail = image.convert("L").resize((hash_size + 1, hash_size), Image.BILINEAR)
+    pixels = np.asarray(thumbnail, dtype=np.int16)
+    bits = (pixels[:, 1:] - pixels[:, :-1] > margin).ravel()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def hamming_distance(hash_a, hash_b):
+    """
+    Count the bits that differ between two hashes.
+    
+    Args:
+        hash_a: The first hash.
+        hash_b: The second hash.
+    
+    Returns:
+        int: The number of differing bits.
+    """
+    return bin(hash_a ^ hash_b).count("1")
+
+
+class DetectionCache:
+    """
+    Two-tier cache of detection results keyed by (perceptual hash, phrase, model).
+    
+    The memory tier is an LRU with a time-to-live. The optional disk tier is a JSON
+    file that survives restarts. It is written after save_every new entries or
+    save_interval seconds, outside the lock, and on flush() or close(), so storing a
+    verdict does not rewrite the file each time. Lookups accept hashes within
+    max_distance bits of a stored hash, so near-identical frames reuse the stored verdict.
+    
+    Attributes:
+        max_entries: Maximum number of entries in the memory tier.
+        ttl: Time-to-live in seconds of memory entries (None for no expiry).
+        max_distance: Maximum Hamming distance for a near-identical match.
+        disk_path: Path of the JSON file backing the disk tier (None to disable it).
+        disk_ttl: Time-to-live in seconds of disk entries (None for no expiry).
+        max_disk_entries: Maximum number of entries kept in the disk tier.
+        save_every: Number of new disk entries after which the file is written.
+        save_interval: Seconds after which new disk entries are written.
+        hits: Number of lookups answered from the memory tier.
+        disk_hits: Number of lookups answered from the disk tier.
+        misses: Number of lookups that found nothing.
+    """
+    
+    def __init__(self, max_entries=256, ttl=300, max_distance=2, disk_path=None,
+                 disk_ttl=None, max_disk_entries=4096, save_every=32, save_interval=60):
+        """
+        Initialize a DetectionCache.
+        
+        Args:
+            max_entries: Maximum number of entries in the memory tier.
+            ttl: Time-to-live in seconds of memory entries (None for no expiry).
+            max_distance: Maximum Hamming distance for a near-identical match.
+            disk_path: Path of the JSON file backing the disk tier (None to disable it).
+            disk_ttl: Time-to-live in seconds of disk entries (None for no expiry).
+            max_disk_entries: Maximum number of entries kept in the disk tier.
+            save_every: Number of new disk entries after which the file is written.
+            save_interval: Seconds after which new disk entries are written.
+        
+        Raises:
+            ValueError: If max_entries or save_every is less than 1, or max_distance
+                or save_interval is negative.
+        """
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+        if max_distance < 0:
+            raise ValueError("max_distance must be non-negative")
+        if save_every < 1:
+            raise ValueError("save_every must be at least 1")
+        if save_interval < 0:
+            raise ValueError("save_interval must be non-negative")
+        
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_distance = max_distance
+        self.disk_path = disk_path
+        self.disk_ttl = disk_ttl
+        self.max_disk_entries = max_disk_entries
+        self.save_every = save_every
+        self.save_interval = save_interval
+        
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        
+        self._memory = OrderedDict()
+        self._disk = OrderedDict()
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._unsaved = 0
+        self._last_save = None
+        
+        if disk_path is not None:
+            self._load_disk()
+    
+    def _load_disk(self):
+        """Load the disk tier from its JSON file, ignoring a missing or broken file."""
+        if not os.path.exists(self.disk_path):
+            return
+        try:
+            with open(self.disk_path, "r") as f:
+                data = json.load(f)
+            for image_hash, phrase, model, result, timestamp in data.get("entries", []):
+                self._disk[(int(image_hash, 16), phrase, model)] = (bool(result), float(timestamp))
+            print(f"Loaded {len(self._disk)} cached detections from {self.disk_path}")
+        except (OSError, ValueError, TypeError) as e:
+            print(f"Error loading detection cache from {self.disk_path}: {e}")
+            self._disk.clear()
+    
+    def _take_unsaved(self, now):
+        """
+        Snapshot the disk tier if it has unsaved entries (call with the lock held).
+        
+        Args:
+            now: The current time.
+        
+        Returns:
+            list: The entries to write, or None if there is nothing to write.
+        """
+        if not self._unsaved:
+            return None
+        self._unsaved = 0
+        self._last_save = now
+        return [
+            [format(image_hash, "x"), phrase, model, result, timestamp]
+            for (image_hash, phrase, model), (result, timestamp) in self._disk.items()
+        ]
+    
+    def _save_disk(self, now):
+        """
+        Write the unsaved entries of the disk tier to its JSON file atomically.
+        
+        Writers take turns, each writing the tier as it is when its turn comes, so a
+        newer snapshot is never overwritten by an older one. Lookups and stores only
+        wait for the snapshot, not for the write.
+        
+        Args:
+            now: The current time.
+        """
+        with self._save_lock:
+            with self._lock:
+                entries = self._take_unsaved(now)
+            if entries is None:
+                return
+            temp_path = f"{self.disk_path}.tmp"
+            try:
+                with open(temp_path, "w") as f:
+                    json.dump({"entries": entries}, f)
+                # The file is replaced only once the new one is complete
+                os.replace(temp_path, self.disk_path)
+            except OSError as e:
+                print(f"Error saving detection cache to {self.disk_path}: {e}")
+    
+    @staticmethod
+    def _find(entries, image_hash, phrase, model, max_distance, ttl, now):
+        """
+        Find the closest live entry for a hash.
+        
+        Args:
+            entries: The OrderedDict of one tier.
+            image_hash: The perceptual hash to look up.
+            phrase: The phrase that was looked for.
+            model: The model that produced the verdict.
+            max_distance: Maximum Hamming distance for a match.
+            ttl: Time-to-live in seconds (None for no expiry).
+            now: The current time.
+        
+        Returns:
+            tuple: The matching key, or None if nothing matched.
+        """
+        key = (image_hash, phrase, model)
+        if key in entries and (ttl is None or now - entries[key][1] <= ttl):
+            return key
+        
+        best_key = None
+        best_distance = max_distance + 1
+        for candidate in entries:
+            if candidate[1] != phrase or candidate[2] != model:
+                continue
+            if ttl is not None and now - entries[candidate][1] > ttl:
+                continue
+            distance = hamming_distance(candidate[0], image_hash)
+            if distance < best_distance:
+                best_key = candidate
+                best_distance = distance
+        return best_key
+    
+    def get(self, image_hash, phrase, model, now=None):
+        """
+        Look up a cached detection result.
+        
+        Args:
+            image_hash: The perceptual hash of the screenshot.
+            phrase: The phrase that is looked for.
+            model: The model that would produce the verdict.
+            now: The current time (defaults to time.time()).
+        
+        Returns:
+            bool: The cached result, or None on a miss.
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            key = self._find(self._memory, image_hash, phrase, model, self.max_distance, self.ttl, now)
+            if key is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return self._memory[key][0]
+            
+            key = self._find(self._disk, image_hash, phrase, model, self.max_distance, self.disk_ttl, now)
+            if key is not None:
+                result = self._disk[key][0]
+                # Promote to the memory tier with a fresh timestamp
+                self._store_memory((image_hash, phrase, model), result, now)
+                self.disk_hits += 1
+                return result
+            
+            self.misses += 1
+            return None
+    
+    def _store_memory(self, key, result, now):
+        """Insert an entry in the memory tier, evicting the least recently used ones."""
+        self._memory[key] = (result, now)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+    
+    def put(self, image_hash, phrase, model, result, now=None):
+        """
+        Store a detection result.
+        
+        Args:
+            image_hash: The perceptual hash of the screenshot.
+            phrase: The phrase that was looked for.
+            model: The model that produced the verdict.
+            result: The detection result.
+            now: The current time (defaults to time.time()).
+        """
+        now = time.time() if now is None else now
+        key = (image_hash, phrase, model)
+        save = False
+        with self._lock:
+            self._store_memory(key, bool(result), now)
+            
+            if self.disk_path is not None:
+                self._disk[key] = (bool(result), now)
+                self._disk.move_to_end(key)
+                while len(self._disk) > self.max_disk_entries:
+                    self._disk.popitem(last=False)
+                self._unsaved += 1
+                if self._last_save is None:
+                    self._last_save = now
+                save = self._unsaved >= self.save_every or now - self._last_save >= self.save_interval
+        
+        if save:
+            self._save_disk(now)
+    
+    def flush(self):
+        """Write the unsaved entries of the disk tier to its file."""
+        if self.disk_path is not None:
+            self._save_disk(time.time())
+    
+    def close(self):
+        """Write the unsaved entries before the cache is discarded."""
+        self.flush()
+    
+    def clear(self):
+        """Remove all entries from both tiers and reset the counters."""
+        with self._lock:
+            self._memory.clear()
+            self._disk.clear()
+            self.hits = 0
+            self.disk_hits = 0
+            self.misses = 0
+            self._unsaved = 0
+            if self.disk_path is not None and os.path.exists(self.disk_path):
+                os.remove(self.disk_path)
+    
+    def get_stats(self):
+        """
+        Get the cache counters.
+        
+        Returns:
+            dict: Hits, disk hits, misses, hit rate and tier sizes.
+        """
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+                "memory_entries": len(self._memory),
+                "disk_entries": len(self._disk)
+            }
@@ -0,0 +1,561 @@
+"""
+Detector interface and a cascade that runs cheap local detectors before the vision model.
+"""
+
+import asyncio
+import inspect
+import threading
+import time
+import numpy as np
+from PIL import Image
+
+from screen_spy_agent.change_detector import ChangeDetector
+
+
+class DetectionResult:
+    """
+    Result of one detector stage.
+    
+    Attributes:
+        detected: True or False for a verdict, None if the stage is inconclusive.
+        confidence: Confidence of the verdict between 0 and 1.
+        stage: Name of the stage that produced the result.
+        location: Optional (x, y, width, height) of the match inside the area.
+    """
+    
+    def __init__(self, detected, confidence=1.0, stage=None, location=None):
+        """
+        Initialize a DetectionResult.
+        
+        Args:
+            detected: True or False for a verdict, None if the stage is inconclusive.
+            confidence: Confidence of the verdict between 0 and 1.
+            stage: Name of the stage that produced the result.
+            location: Optional (x, y, width, height) of the match inside the area.
+        """
+        self.detected = detected
+        self.confidence = confidence
+        self.stage = stage
+        self.location = location
+    
+    @property
+    def conclusive(self):
+        """Whether the stage reached a verdict."""
+        return self.detected is not None
+    
+    def __repr__(self):
+        return (f"DetectionResult(detected={self.detected}, confidence={self.confidence:.3f}, "
+                f"stage={self.stage!r}, location={self.location})")
+
+
+def inconclusive(stage):
+    """
+    Create an inconclusive result for a stage.
+    
+    Args:
+        stage: Name of the stage.
+    
+    Returns:
+        DetectionResult: A result without a verdict.
+    """
+    return DetectionResult(None, 0.0, stage)
+
+
+class Detector:
+    """
+    Base class for detectors that look for a phrase in the screenshot of an area.
+    
+    Subclasses implement detect(). Local detectors may also implement learn() to pick
+    up verdicts that later stages of a cascade produced for the same area.
+    
+    Attributes:
+        name: Name of the detector used in results and statistics.
+        remote: Whether the detector calls a remote service.
+    """
+    
+    name = "detector"
+    remote = False
+    
+    def detect(self, image, text_to_detect, area_index=None):
+        """
+        Look for a phrase in an image.
+        
+        Args:
+            image: The screenshot as a PIL.Image or NumPy array.
+            text_to_detect: The phrase to look for.
+            area_index: The index of the area the screenshot belongs to.
+        
+        Returns:
+            DetectionResult: The verdict, or an inconclusive result.
+        """
+        raise NotImplementedError
+    
+    async def detect_async(self, image, text_to_detect, area_index=None):
+        """
+        Look for a phrase in an image from an asyncio event loop.
+        
+        The default implementation runs detect() in a worker thread.
+        
+        Args:
+            image: The screenshot as a PIL.Image or NumPy array.
+            text_to_detect: The phrase to look for.
+            area_index: The index of the area the screenshot belongs to.
+        
+        Returns:
+            DetectionResult: The verdict, or an inconclusive result.
+        """
+        return await asyncio.to_thread(self.detect, image, text_to_detect, area_index)
+    
+    def detect_local(self, image, text_to_detect, area_index=None):
+        """
+        Look for a phrase without calling remote services.
+        
+        Args:
+            image: The screenshot as a PIL.Image or NumPy array.
+            text_to_detect: The phrase to look for.
+            area_index: The index of the area the screenshot belongs to.
+        
+        Returns:
+            DetectionResult: The verdict, or an inconclusive result for remote detectors.
+        """
+        if self.remote:
+            return inconclusive(self.name)
+        return self.detect(image, text_to_detect, area_index)
+    
+    def learn(self, image, text_to_detect, area_index, detected):
+        """
+        Remember a verdict that was reached for an image by another detector.
+        
+        Args:
+            image: The screenshot as a PIL.Image or NumPy array.
+            text_to_detect: The phrase that was looked for.
+            area_index: The index of the area the screenshot belongs to.
+            detected: The verdict.
+        """
+    
+    def detect_text_in_image(self, image, text_to_detect="Accept Reject", area_index=None):
+        """
+        Detect a phrase with the same signature as ImageAnalyzer.detect_text_in_image.
+        
+        Args:
+            image: The screenshot as a PIL.Image or NumPy array.
+            text_to_detect: The phrase to look for.
+            area_index: The index of the area the screenshot belongs to.
+        
+        Returns:
+            bool: True if the phrase was detected (inconclusive counts as not detected).
+        """
+        return bool(self.detect(image, text_to_detect, area_index).detected)
+
+
+class PixelDiffDetector(Detector):
+    """
+    Detector that repeats the last verdict while an area stays pixel-identical.
+    
+    Attributes:
+        change_detector: ChangeDetector providing the difference metric.
+    """
+    
+    name = "pixel_diff"
+    
+    def __init__(self, threshold=1.0, method="mad", tile_size=16):
+        """
+        Initialize a PixelDiffDetector.
+        
+        Args:
+            threshold: Largest difference (see ChangeDetector) that still counts as unchanged.
+            method: "mad" (mean absolute difference) or "tiles" (per-tile comparison).
+            tile_size: Side length in pixels of the tiles used by the "tiles" method.
+        """
+        self.change_detector = ChangeDetector(threshold, method=method, force_refresh_interval=None,
+                                              tile_size=tile_size)
+        self._verdicts = {}
+    
+    def detect(self, image, text_to_detect, area_index=None):
+        """
+        Repeat the last verdict if the image has not changed since it was reached.
+        
+        Args:
+            image: The screenshot as a PIL.Image or NumPy array.
+            text_to_detect: The phrase to look for.
+            area_index: The index of the area the screenshot belongs to.
+        
+        Returns:
+            DetectionResult: The previous verdict, or an inconclusive result.
+        """
+        stored = self._verdicts.get((area_index, text_to_detect))
+        frame = np.asarray(image)
+        if stored is None or stored[0].shape != frame.shape:
+            return inconclusive(self.name)
+        
+        reference, detected = stored
+        difference = self.change_detector.difference(reference, frame)
+        if difference > self.change_detector.threshold:
+            return inconclusive(self.name)
+        
+        # Scale so that identical frames are fully confident
+        scale = 100.0 if self.change_detector.method == "tiles" else 255.0
+        return DetectionResult(detected, 1.0 - difference / scale, self.name)
+    
+    def learn(self, image, text_to_detect, area_index, detected):
+        """
+        Remember the verdict reached for an image.
+        
+        Args:
+            image: The screenshot as a PIL.Image or NumPy array.
+            text_to_detect: The phrase that was looked for.
+            area_index: The index of the area the screenshot belongs to.
+            detected: The verdict.
+        """
+        self._verdicts[(area_index, text_to_detect)] = (np.asarray(image).astype(np.int16), detected)
+
+
+class ColorSignatureDetector(Detector):
+    """
+    Detector that matches the colour histogram of an area against known verdicts.
+    
+    The nearest known signature tells whether the button is present. A small button
+    in a large area barely moves the histogram, so the distance to the nearest
+    signature is only meaningful relative to the distance between the known
+    signatures with and without the button: the verdict is confident only when the
+    image is much closer to one than the gap between them. Until both verdicts are
+    known, only images matching a signature almost exactly get a verdict. Signatures
+    are learned from the verdicts of later stages or added with add_signature().
+    
+    Attributes:
+        bins: Number of histogram bins per colour channel.
+        max_signatures: Maximum number of signatures kept per area and phrase.
+        match_tolerance: L1 distance up to which an image matches a signature exactly.
+    """
+    
+    name = "color_signature"
+    
+    def __init__(self, bins=4, max_signatures=16, match_tolerance=1e-3):
+        """
+        Initialize a ColorSignatureDetector.
+        
+        Args:
+            bins: Number of histogram bins per colour channel.
+            max_signatures: Maximum number of signatures kept per area and phrase.
+            match_tolerance: L1 distance up to which an image matches a signature exactly.
+        """
+        self.bins = bins
+        self.max_signatures = max_signatures
+        self.match_tolerance = match_tolerance
+        self._signatures = {}
+        # Cascades learn from several worker threads at once
+        self._lock = threading.Lock()
+    
+    def signature(self, image):
+        """
+        Compute the normalized colour histogram of an image.
+        
+        Args:
+            image: The screenshot as a PIL.Image or NumPy array.
+        
+        Returns:
+            numpy.ndarray: The histogram, summing to 1.
+        """
+        if isinstance(image, Image.Image):
+            image = image.convert("RGB")
+        pixels = np.asarray(image)
+        if pixels.ndim == 2:
+            pixels = np.repeat(pixels[:, :, np.newaxis], 3, axis=2)
+        
+        quantized = (pixels[:, :, :3].astype(np.uint16) * self.bins) >> 8
+        codes = (quantized[:, :, 0] * self.bins + quantized[:, :, 1]) * self.bins + quantized[:, :, 2]
+        histogram = np.bincount(codes.ravel(), minlength=self.bins ** 3).astype(np.float64)
+        return histogram / max(histogram.sum(), 1.0)
+    
+    def add_signature(self, image, text_to_detect, detected, area_index=None):
+        """
+        Add a reference signature with a known verdict.
+        
+        Args:
+            image: The reference screenshot as a PIL.Image or NumPy array.
+            text_to_detect: The phrase the verdict is about.
+            detected: The verdict.
+            area_index: The index of the area the screenshot belongs to.
+        """
+        signature = self.signature(image)
+        with self._lock:
+            signatures = self._signatures.setdefault((area_index, text_to_detect), [])
+            signatures.append((signature, detected))
+            del signatures[:-self.max_signatures]
+    
+    def detect(self, image, text_to_detect, area_index=None):
+        """
+        Take the verdict of the nearest known signature.
+        
+        Args:
+            image: The screenshot as a PIL.Image or NumPy array.
+            text_to_detect: The phrase to look for.
+            area_index: The index of the area the screenshot belongs to.
+        
+        Returns:
+            DetectionResult: The verdict of the nearest signature with full confidence
+                if the image matches it exactly, otherwise with 1 - the distance to it
+                relative to the distance from it to the nearest signature with the other
+                verdict; inconclusive if there is no exact match and no signature with
+                the other verdict to compare with.
+        """
+        with self._lock:
+            signatures = list(self._signatures.get((area_index, text_to_detect), ()))
+        if not signatures:
+            return inconclusive(self.name)
+        
+        signature = self.signature(image)
+        distances = [np.abs(signature - known).sum() for known, _ in signatures]
+        nearest = int(np.argmin(distances))
+        nearest_signature, detected = signatures[nearest]
+        if distances[nearest] <= self.match_tolerance:
+            return DetectionResult(detected, 1.0, self.name)
+        
+        gaps = [np.abs(nearest_signature - known).sum() for known, verdict in signatures if verdict != detected]
+        if not gaps:
+            return inconclusive(self.name)
+        confidence = max(0.0, 1.0 - distances[nearest] / max(min(gaps), self.match_tolerance))
+        return DetectionResult(detected, confidence, self.name)
+    
+    def learn(self, image, text_to_detect, area_index, detected):
+        """
+        Remember the signature of an image with its verdict.
+        
+        Args:
+            image: The screenshot as a PIL.Image or NumPy array.
+            text_to_detect: The phrase that was looked for.
+            area_index: The index of the area the screenshot belongs to.
+            detected: The verdict.
+        """
+        self.add_signature(image, text_to_detect, detected, area_index)
+
+
+class VisionModelDetector(Detector):
+    """
+    Detector that asks the remote vision model through an ImageAnalyzer.
+    
+    Attributes:
+        image_analyzer: ImageAnalyzer or AsyncImageAnalyzer instance.
+    """
+    
+    name = "vision_model"
+    remote = True
+    
+    def __init__(self, image_analyzer):
+        """
+        Initialize a VisionModelDetector.
+        
+        Args:
+            image_analyzer: ImageAnalyzer or AsyncImageAnalyzer instance.
+        """
+        self.image_analyzer = image_analyzer
+    
+    def detect(self, image, text_to_detect, area_index=None):
+        """
+        Ask the vision model whether the phrase is present.
+        
+        Args:
+            image: The screenshot as a PIL.Image or NumPy array.
+            text_to_detect: The phrase to look for.
+            area_index: The index of the area the screenshot belongs to.
+        
+        Returns:
+            DetectionResult: The model's verdict.
+        """
+        detect = self.image_analyzer.detect_text_in_image
+        if inspect.iscoroutinefunction(detect):
+            # Each call runs on a new event loop; the analyzer creates a client for it
+            detected = asyncio.run(detect(image, text_to_detect=text_to_detect))
+        else:
+            detected = detect(image, text_to_detect=text_to_detect)
+        return DetectionResult(detected, 1.0, self.name)
+    
+    async def detect_async(self, image, text_to_detect, area_index=None):
+        """
+        Ask the vision model from an event loop, awaiting async analyzers directly.
+        
+        Args:
+            image: The screenshot as a PIL.Image or NumPy array.
+            text_to_detect: The phrase to look for.
+            area_index: The index of the area the screenshot belongs to.
+        
+        Returns:
+            DetectionResult: The model's verdict.
+        """
+        detect = self.image_analyzer.detect_text_in_image
+        if inspect.iscoroutinefunction(detect):
+            detected = await detect(image, text_to_detect=text_to_detect)
+        else:
+            detected = await asyncio.to_thread(detect, image, text_to_detect=text_to_detect)
+        return DetectionResult(detected, 1.0, self.name)
+
+
+class DetectorCascade(Detector):
+    """
+    Detector that runs its stages in order and stops at the first confident verdict.
+    
+    Cheap local stages (pixel diff, colour signature, template match, OCR) come first
+    and the vision model last, so the remote call is only made when every local stage
+    is inconclusive. The final verdict is fed back to the other stages through learn().
+    
+    Attributes:
+        stages: List of (detector, confidence threshold) pairs.
+        stage_stats: Per-stage counters: calls, hits and total time in seconds.
+    """
+    
+    name = "cascade"
+    
+    def __init__(self, stages):
+        """
+        Initialize a DetectorCascade.
+        
+        Args:
+            stages: List of detectors or (detector, confidence threshold) pairs. A bare
+                detector accepts any conclusive verdict (threshold 0).
+        
+        Raises:
+            ValueError: If no stages are given.
+        """
+        if not stages:
+            raise ValueError("A cascade needs at least one stage")
+        
+        self.stages = [stage if isinstance(stage, tuple) else (stage, 0.0) for stage in stages]
+        self.stage_stats = [
+            {"name": detector.name, "calls": 0, "hits": 0, "time": 0.0}
+            for detector, _ in self.stages
+        ]
+        # The stages run on several worker threads at once
+        self._lock = threading.Lock()
+    
+    @property
+    def remote(self):
+        """Whether any stage calls a remote service."""
+        return any(detector.remote for detector, _ in self.stages)
+    
+    def _accept(self, index, result):
+        """Check a stage result against the stage threshold and count a hit."""
+        if result.conclusive and result.confidence >= self.stages[index][1]:
+            with self._lock:
+                self.stage_stats[index]["hits"] += 1
+            return True
+        return False
+    
+    def _run_stage(self, index, image, text_to_detect, area_index):
+        """Run one synchronous stage and record its timing."""
+        start = time.perf_counter()
+        result = self.stages[index][0].detect(image, text_to_detect, area_index)
+        self._count_call(index, time.perf_counter() - start)
+        return result
+    
+    def _count_call(self, index, elapsed):
+        """Record a call of a stage and its time."""
+        with self._lock:
+            self.stage_stats[index]["calls"] += 1
+            self.stage_stats[index]["time"] += elapsed
+    
+    def _teach(self, image, text_to_detect, area_index, result, source=None):
+        """Feed a verdict to every stage except the one that produced it."""
+        for index, (detector, _) in enumerate(self.stages):
+            if index != source:
+                detector.learn(image, text_to_detect, area_index, result.detected)
+    
+    def detect_local(self, image, text_to_detect, area_index=None):
+        """
+        Run the local stages only.
+        
+        Args:
+            image: The screenshot as a PIL.Image or NumPy array.
+            text_to_detect: The phrase to look for.
+            area_index: The index of the area the screenshot belongs to.
+        
+        Returns:
+            DetectionResult: The first confident local verdict, or an inconclusive result.
+        """
+        for index, (detector, _) in enumerate(self.stages):
+            if detector.remote:
+                continue
+            result = self._run_stage(index, image, text_to_detect, area_index)
+            if self._accept(index, result):
+                self._teach(image, text_to_detect, area_index, result, source=index)
+                return result
+        return inconclusive(self.name)
+    
+    def detect(self, image, text_to_detect, area_index=None):
+        """
+        Run the stages in order until one is confident.
+        
+        Args:
+            image: The screenshot as a PIL.Image or NumPy array.
+            text_to_detect: The phrase to look for.
+            area_index: The index of the area the screenshot belongs to.
+        
+        Returns:
+            DetectionResult: The first confident verdict, or an inconclusive result.
+        """
+        for index in range(len(self.stages)):
+            result = self._run_stage(index, image, text_to_detect, area_index)
+            if self._accept(index, result):
+                print(f"Cascade verdict for area {area_index} from stage {result.stage}: {result.detected}")
+                self._teach(image, text_to_detect, area_index, result, source=index)
+                return result
+        return inconclusive(self.name)
+    
+    async def detect_async(self, image, text_to_detect, area_index=None):
+        """
+        Run the stages in order from an event loop.
+        
+        Remote stages are awaited; local stages and the learning from a verdict run
+        in a worker thread, so OCR and template matching do not block the loop.
+        
+        Args:
+            image: The screenshot as a PIL.Image or NumPy array.
+            text_to_detect: The phrase to look for.
+            area_index: The index of the area the screenshot belongs to.
+        
+        Returns:
+            DetectionResult: The first confident verdict, or an inconclusive result.
+        """
+        for index, (detector, _) in enumerate(self.stages):
+            if detector.remote:
+                start = time.perf_counter()
+                result = await detector.detect_async(image, text_to_detect, area_index)
+                self._count_call(index, time.perf_counter() - start)
+            else:
+                result = await asyncio.to_thread(self._run_stage, index, image, text_to_detect, area_index)
+            if self._accept(index, result):
+                print(f"Cascade verdict for area {area_index} from stage {result.stage}: {result.detected}")
+                await asyncio.to_thread(self._teach, image, text_to_detect, area_index, result, source=index)
+                return result
+        return inconclusive(self.name)
+    
+    def learn(self, image, text_to_detect, area_index, detected):
+        """
+        Feed a verdict reached outside the cascade (e.g. a batched request) to all stages.
+        
+        Args:
+            image: The screenshot as a PIL.Image or NumPy array.
+            text_to_detect: The phrase that was looked for.
+            area_index: The index of the area the screenshot belongs to.
+            detected: The verdict.
+        """
+        self._teach(image, text_to_detect, area_index, DetectionResult(detected))
+    
+    def get_stats(self):
+        """
+        Get the per-stage counters.
+        
+        Returns:
+            list: One dict per stage with calls, hits, hit rate and mean time in milliseconds.
+        """
+        with self._lock:
+            stage_stats = [dict(stats) for stats in self.stage_stats]
+        return [
+            {
+                "name": stats["name"],
+                "calls": stats["calls"],
+                "hits": stats["hits"],
+                "hit_rate": stats["hits"] / stats["calls"] if stats["calls"] else 0.0,
+                "mean_ms": 1000.0 * stats["time"] / stats["calls"] if stats["calls"] else 0.0
+            }
+            for stats in stage_stats
+        ]
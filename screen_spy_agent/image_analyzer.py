@@ -3,11 +3,20 @@ ImageAnalyzer module for analyzing screenshots using OpenAI's vision models.
 """
 
 import os
+import io
+import json
 import base64
+import numpy as np
 import openai
 from openai import OpenAI
+from PIL import Image, ImageDraw
 import re
 
+from screen_spy_agent.detection_cache import perceptual_hash
+
+# Signature at the start of every PNG file
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
 
 class ImageAnalyzer:
     """
@@ -17,9 +26,12 @@ class ImageAnalyzer:
         api_key: The OpenAI API key.
         api_base: The base URL for the OpenAI API.
         model: The model to use for image analysis.
+        jpeg_quality: JPEG quality used when encoding in-memory images.
+        last_usage: Token usage reported for the most recent detection request (None if unknown).
+        cache: Optional DetectionCache consulted before every detection request.
     """
     
-    def __init__(self, api_key, api_base, model):
+    def __init__(self, api_key, api_base, model, jpeg_quality=75, cache=None):
         """
         Initialize an ImageAnalyzer with the given API credentials and model.
         
@@ -27,9 +39,14 @@ class ImageAnalyzer:
             api_key: The OpenAI API key.
             api_base: The base URL for the OpenAI API.
             model: The model to use for image analysis.
+            jpeg_quality: JPEG quality used when encoding in-memory images.
+            cache: Optional DetectionCache consulted before every detection request.
         """
         self.api_key = api_key
         self.api_base = api_base
+        self.jpeg_quality = jpeg_quality
+        self.last_usage = None
+        self.cache = cache
         
         # Clean up model name if needed - some providers need special handling
         if "/" in model:
@@ -40,34 +57,83 @@ class ImageAnalyzer:
             
         # Configure OpenAI client
         try:
-            self.client = OpenAI(
-                api_key=api_key,
-                base_url=api_base
-            )
+            self.client = self.create_client()
             print(f"OpenAI client initialized with base URL: {api_base}")
         except Exception as e:
             print(f"Error initializing OpenAI client: {e}")
             raise
     
-    def encode_image(self, image_path):
+    def create_client(self):
+        """
+        Create the OpenAI client used for API calls.
+        
+        Returns:
+            OpenAI: The API client.
+        """
+        return OpenAI(
+            api_key=self.api_key,
+            base_url=self.api_base
+        )
+    
+    def image_to_bytes(self, image):
+        """
+        Get the encoded bytes of an image without touching the disk.
+        
+        Args:
+            image: A file path, encoded image bytes, a PIL.Image or a NumPy array.
+            
+        Returns:
+            bytes: The encoded image (JPEG for in-memory images).
+        """
+        if isinstance(image, (bytes, bytearray, memoryview)):
+            return bytes(image)
+        
+        if isinstance(image, np.ndarray):
+            image = Image.fromarray(image)
+        
+        if isinstance(image, Image.Image):
+            # JPEG has no alpha channel or palette
+            if image.mode not in ("RGB", "L"):
+                image = image.convert("RGB")
+            buffer = io.BytesIO()
+            image.save(buffer, format="JPEG", quality=self.jpeg_quality)
+            return buffer.getvalue()
+        
+        with open(image, "rb") as image_file:
+            return image_file.read()
+    
+    def encode_image(self, image):
         """
         Encode an image to base64 format.
         
         Args:
-            image_path: The path to the image file.
+            image: A file path, encoded image bytes, a PIL.Image or a NumPy array.
             
         Returns:
             str: The base64-encoded image.
         """
-        with open(image_path, "rb") as image_file:
-            return base64.b64encode(image_file.read()).decode('utf-8')
+        return base64.b64encode(self.image_to_bytes(image)).decode('utf-8')
+    
+    def image_to_data_url(self, image):
+        """
+        Encode an image as a data URL for the chat completions API.
+        
+        Args:
+            image: A file path, encoded image bytes, a PIL.Image or a NumPy array.
+            
+        Returns:
+            str: The data URL.
+        """
+        data = self.image_to_bytes(image)
+        mime_type = "image/png" if data.startswith(PNG_SIGNATURE) else "image/jpeg"
+        return f"data:{mime_type};base64,{base64.b64encode(data).decode('utf-8')}"
     
-    def analyze_image(self, image_path):
+    def analyze_image(self, image):
         """
         Analyze an image using the OpenAI API.
         
         Args:
-            image_path: The path to the image file.
+            image: A file path, encoded image bytes, a PIL.Image or a NumPy array.
             
         Returns:
             dict: The API response.
@@ -77,7 +143,7 @@ class ImageAnalyzer:
         """
         try:
             # Encode the image
-            base64_image = self.encode_image(image_path)
+            image_url = self.image_to_data_url(image)
             
             # Prepare the messages
             messages = [
@@ -87,7 +153,7 @@ class ImageAnalyzer:
                         {"type": "text", "text": "What you think the person in the image is doing?"},
                         {
                             "type": "image_url",
-                            "image_url": f"data:image/jpeg;base64,{base64_image}",
+                            "image_url": image_url,
                         },
                     ],
                 }
@@ -114,12 +180,121 @@ class ImageAnalyzer:
             print(traceback.format_exc())
             raise
     
-    def detect_text_in_image(self, image_path, text_to_detect="Accept Reject"):
+    def build_detection_messages(self, image, text_to_detect):
+        """
+        Build the chat messages asking whether a phrase is present in an image.
+        
+        Args:
+            image: A file path, encoded image bytes, a PIL.Image or a NumPy array.
+            text_to_detect: The text phrase to look for in the image.
+            
+        Returns:
+            list: The messages for the chat completions API.
+        """
+        # Encode the image
+        image_url = self.image_to_data_url(image)
+        
+        # Prepare the messages with a specific question about the presence of the text
+        return [
+            {
+                "role": "user",
+                "content": [
+                    {"type": "text", "text": f'Is the phrase "{text_to_detect}" present in this image? Answer with yes or no.'},
+                    {
+                        "type": "image_url",
+                        "image_url": image_url,
+                    },
+                ],
+            }
+        ]
+    
+    def parse_detection_response(self, response, text_to_detect):
+        """
+        Interpret the model's answer to a detection request.
+        
+        Args:
+            response: The chat completions API response.
+            text_to_detect: The text phrase that was looked for.
+            
+        Returns:
+            bool: True if the answer says the phrase is present, False otherwise.
+        """
+        # Extract the response text from the new response format
+        response_text = response.choices[0].message.content.lower()
+        
+        # Print the model's response
+        print(f"\nModel detection response: {response_text}")
+        
+        # Check if the response indicates the text is present
+        if re.search(r'\byes\b', response_text) or re.search(f'{text_to_detect.lower()}.*present', response_text, re.IGNORECASE):
+            print(f"DETECTION RESULT: \"{text_to_detect}\" is present")
+            return True
+        
+        print(f"DETECTION RESULT: \"{text_to_detect}\" is not present")    
+        return False
+    
+    def lookup_cached_detection(self, image, text_to_detect):
+        """
+        Look up a detection result in the cache.
+        
+        Args:
+            image: A file path, encoded image bytes, a PIL.Image or a NumPy array.
+            text_to_detect: The text phrase to look for in the image.
+            
+        Returns:
+            tuple: The perceptual hash of the image (None without a cache) and the
+                cached result (None on a miss).
+        """
+        if self.cache is None:
+            return None, None
+        
+        image_hash = perceptual_hash(image)
+        cached = self.cache.get(image_hash, text_to_detect, self.model)
+        if cached is not None:
+            print(f"CACHED DETECTION RESULT: \"{text_to_detect}\" is {'present' if cached else 'not present'}")
+        return image_hash, cached
+    
+    def store_cached_detection(self, image_hash, text_to_detect, result):
+        """
+        Store a detection result in the cache.
+        
+        Args:
+            image_hash: The perceptual hash returned by lookup_cached_detection.
+            text_to_detect: The text phrase that was looked for.
+            result: The detection result.
+        """
+        if self.cache is not None and image_hash is not None:
+            self.cache.put(image_hash, text_to_detect, self.model, result)
+    
+    def split_cached_batch(self, images, texts_to_detect, area_indices):
+        """
+        Answer the cached areas of a batch and collect the ones that need a request.
+        
+        Args:
+            images: List of images, one per area.
+            texts_to_detect: List of phrases, one per area.
+            area_indices: List of area indices.
+            
+        Returns:
+            tuple: A dict of cached results by area index, and a list of
+                (area_index, image, text_to_detect, image_hash) tuples for the misses.
+        """
+        results = {}
+        misses = []
+        for area_index, image, text_to_detect in zip(area_indices, images, texts_to_detect):
+            image_hash, cached = self.lookup_cached_detection(image, text_to_detect)
+            if cached is None:
+                misses.append((area_index, image, text_to_detect, image_hash))
+            else:
+                results[area_index] = cached
+        return results, misses
+    
+    def detect_text_in_image(self, image, text_to_detect="Accept Reject"):
         """
         Detect if a specific text phrase is present in an image.
         
         Args:
-            image_path: The path to the image file.
+            image: A file path, encoded image bytes, a PIL.Image or a NumPy array.
             text_to_detect: The text phrase to look for in the image (default: "Accept Reject").
             
         Returns:
@@ -128,23 +303,12 @@ class ImageAnalyzer:
         Raises:
             Exception: If the API call fails.
         """
+        image_hash, cached = self.lookup_cached_detection(image, text_to_detect)
+        if cached is not None:
+            return cached
+        
         try:
-            # Encode the image
-            base64_image = self.encode_image(image_path)
-            
-            # Prepare the messages with a specific question about the presence of the text
-            messages = [
-                {
-                    "role": "user",
-                    "content": [
-                        {"type": "text", "text": f'Is the phrase "{text_to_detect}" present in this image? Answer with yes or no.'},
-                        {
-                            "type": "image_url",
-                            "image_url": f"data:image/jpeg;base64,{base64_image}",
-                        },
-                    ],
-                }
-            ]
+            messages = self.build_detection_messages(image, text_to_detect)
             
             print(f"Sending detection request to OpenAI API using model {self.model}")
             print(f"Looking for text: \"{text_to_detect}\" in the image")
@@ -158,21 +322,168 @@ class ImageAnalyzer:
                 max_tokens=50,  # Short response is sufficient
             )
             
-            # Extract the response text from the new response format
-            response_text = response.choices[0].message.content.lower()
+            self.last_usage = getattr(response, "usage", None)
+            result = self.parse_detection_response(response, text_to_detect)
+            self.store_cached_detection(image_hash, text_to_detect, result)
+            return result
+        except Exception as e:
+            print(f"Error in detect_text_in_image: {e}")
+            import traceback
+            print(traceback.format_exc())
+            raise
+    
+    def make_composite_image(self, images, labels, label_height=14, padding=4):
+        """
+        Stack several images vertically, each under a text label.
+        
+        Args:
+            images: List of PIL.Images or NumPy arrays.
+            labels: List of labels, one per image.
+            label_height: Height in pixels of the label strip above each image.
+            padding: Vertical gap in pixels between entries.
             
-            # Print the model's response
-            print(f"\nModel detection response: {response_text}")
+        Returns:
+            PIL.Image: The composite image.
+        """
+        images = [Image.fromarray(image) if isinstance(image, np.ndarray) else image for image in images]
+        width = max(image.width for image in images)
+        height = sum(label_height + image.height + padding for image in images)
+        
+        composite = Image.new("RGB", (width, height), color="white")
+        draw = ImageDraw.Draw(composite)
+        top = 0
+        for image, label in zip(images, labels):
+            draw.text((2, top + 1), label, fill="black")
+            top += label_height
+            composite.paste(image.convert("RGB"), (0, top))
+            top += image.height + padding
+        return composite
+    
+    def build_batch_detection_messages(self, images, texts_to_detect, area_indices, composite=False):
+        """
+        Build one request asking about several labelled areas at once.
+        
+        Args:
+            images: List of images, one per area.
+            texts_to_detect: List of phrases, one per area.
+            area_indices: List of area indices used as labels.
+            composite: Send one labelled composite image instead of one image per area.
             
-            # Check if the response indicates the text is present
-            if re.search(r'\byes\b', response_text) or re.search(f'{text_to_detect.lower()}.*present', response_text, re.IGNORECASE):
-                print(f"DETECTION RESULT: \"{text_to_detect}\" is present")
-                return True
+        Returns:
+            list: The messages for the chat completions API.
+        """
+        example = ", ".join(f'"{i}": "no"' for i in area_indices)
+        content = [
+            {"type": "text", "text": "You will check several screen areas for specific phrases."},
+        ]
+        
+        if composite:
+            labels = [f"Area {i}" for i in area_indices]
+            content.append({"type": "image_url", "image_url": self.image_to_data_url(
+                self.make_composite_image(images, labels)
+            )})
+            for area_index, text_to_detect in zip(area_indices, texts_to_detect):
+                content.append({"type": "text", "text": f'Area {area_index}: is the phrase "{text_to_detect}" present in the part labelled "Area {area_index}"?'})
+        else:
+            for area_index, image, text_to_detect in zip(area_indices, images, texts_to_detect):
+                content.append({"type": "text", "text": f'Area {area_index}: is the phrase "{text_to_detect}" present in the next image?'})
+                content.append({"type": "image_url", "image_url": self.image_to_data_url(image)})
+        
+        content.append({"type": "text", "text": f'Answer only with a JSON object that maps every area number to "yes" or "no", for example {{{example}}}.'})
+        return [{"role": "user", "content": content}]
+    
+    def parse_batch_detection_response(self, response, area_indices):
+        """
+        Interpret the model's JSON answer to a batched detection request.
+        
+        Areas missing from the answer, e.g. because it was cut off at max_tokens or
+        malformed, get None: the model gave no verdict for them.
+        
+        Args:
+            response: The chat completions API response.
+            area_indices: The area indices that were asked about.
+            
+        Returns:
+            dict: Maps each area index to its detection result, or None if it has none.
+        """
+        response_text = response.choices[0].message.content
+        print(f"\nModel batch detection response: {response_text}")
+        
+        verdicts = {}
+        match = re.search(r'\{.*\}', response_text, re.DOTALL)
+        if match:
+            try:
+                verdicts = {str(key).strip().lower().replace("area", "").strip(): value
+                            for key, value in json.loads(match.group(0)).items()}
+            except (ValueError, AttributeError):
+                verdicts = {}
+        
+        if not verdicts:
+            # Fall back to "Area N: yes" style answers
+            verdicts = dict(re.findall(r'(\d+)\W+\s*(yes|no|true|false)', response_text, re.IGNORECASE))
+        
+        results = {}
+        for area_index in area_indices:
+            value = verdicts.get(str(area_index))
+            if value is None:
+                print(f"No verdict for area {area_index} in batch response")
+                results[area_index] = None
+            else:
+                results[area_index] = str(value).strip().lower() in ("yes", "true", "1")
+        
+        print(f"BATCH DETECTION RESULT: {results}")
+        return results
+    
+    def detect_text_in_images_batch(self, images, texts_to_detect, area_indices=None, composite=False):
+        """
+        Detect phrases in several images with a single API request.
+        
+        Args:
+            images: List of images (file paths, encoded bytes, PIL.Images or NumPy arrays).
+            texts_to_detect: List of phrases, one per image.
+            area_indices: Labels for the images (defaults to 0..len(images)-1).
+            composite: Send one labelled composite image instead of one image per area.
+            
+        Returns:
+            dict: Maps each area index to its detection result, or None if the answer
+                has no verdict for it.
             
-            print(f"DETECTION RESULT: \"{text_to_detect}\" is not present")    
-            return False
+        Raises:
+            ValueError: If the number of images, phrases and indices differ.
+            Exception: If the API call fails.
+        """
+        area_indices = list(range(len(images))) if area_indices is None else list(area_indices)
+        if not len(images) == len(texts_to_detect) == len(area_indices):
+            raise ValueError("Each image needs exactly one phrase and one area index")
+        
+        results, misses = self.split_cached_batch(images, texts_to_detect, area_indices)
+        if not misses:
+            return results
+        area_indices, images, texts_to_detect, image_hashes = (list(column) for column in zip(*misses))
+        
+        try:
+            messages = self.build_batch_detection_messages(images, texts_to_detect, area_indices, composite)
+            
+            print(f"Sending batch detection request for {len(images)} areas using model {self.model}")
+            
+            response = self.client.chat.completions.create(
+                model=self.model,
+                messages=messages,
+                temperature=0.3,
+                n=1,
+                max_tokens=20 + 10 * len(images),  # Room for one short verdict per area
+            )
+            
+            self.last_usage = getattr(response, "usage", None)
+            batch_results = self.parse_batch_detection_response(response, area_indices)
+            for area_index, text_to_detect, image_hash in zip(area_indices, texts_to_detect, image_hashes):
+                # Areas without a verdict are asked again next time
+                if batch_results[area_index] is not None:
+                    self.store_cached_detection(image_hash, text_to_detect, batch_results[area_index])
+            results.update(batch_results)
+            return results
         except Exception as e:
-            print(f"Error in detect_text_in_image: {e}")
+            print(f"Error in detect_text_in_images_batch: {e}")
             import traceback
             print(traceback.format_exc())
-            raise 
\ No newline at end of file
+            raise
@@ -0,0 +1,229 @@
+"""
+Input backends that move and click the mouse, with per-click latency measurement.
+"""
+
+import os
+import threading
+import time
+
+import pyautogui
+
+try:
+    from Xlib import X
+    from Xlib import display as xdisplay
+    from Xlib.ext import xtest
+except ImportError:
+    X = xdisplay = xtest = None
+
+# Supported backend names for create_input_backend
+INPUT_BACKENDS = ("auto", "xtest", "pyautogui")
+
+
+class InputBackend:
+    """
+    Base class for input backends.
+    
+    Subclasses implement _move() and _click(); click() and move() time every call so
+    that backends can be compared on the click path.
+    
+    Attributes:
+        name: Name of the backend.
+        timings: Seconds taken by each click.
+    """
+    
+    name = "input"
+    
+    def __init__(self):
+        """Initialize the latency measurement."""
+        self.timings = []
+        self._timings_lock = threading.Lock()
+    
+    def click(self, x, y):
+        """
+        Click the left mouse button at a screen position.
+        
+        Args:
+            x: The screen x-coordinate.
+            y: The screen y-coordinate.
+        """
+        start = time.perf_counter()
+        self._click(int(x), int(y))
+        elapsed = time.perf_counter() - start
+        with self._timings_lock:
+            self.timings.append(elapsed)
+    
+    def move(self, x, y):
+        """
+        Move the mouse pointer to a screen position without clicking.
+        
+        Args:
+            x: The screen x-coordinate.
+            y: The screen y-coordinate.
+        """
+        self._move(int(x), int(y))
+    
+    def _click(self, x, y):
+        raise NotImplementedError
+    
+    def _move(self, x, y):
+        raise NotImplementedError
+    
+    def get_stats(self):
+        """
+        Get the per-click latency of the backend.
+        
+        Returns:
+            dict: Number of clicks and the mean and maximum milliseconds per click.
+        """
+        with self._timings_lock:
+            timings = list(self.timings)
+        return {
+            "name": self.name,
+            "clicks": len(timings),
+            "mean_ms": 1000.0 * sum(timings) / len(timings) if timings else 0.0,
+            "max_ms": 1000.0 * max(timings) if timings else 0.0
+        }
+    
+    def close(self):
+        """Release the resources of the backend."""
+
+
+class PyAutoGuiBackend(InputBackend):
+    """
+    Input backend that goes through pyautogui.
+    
+    pyautogui sleeps pyautogui.PAUSE (0.1 seconds by default) after every call. The
+    callers already wait for the UI between clicks, so the pause is skipped unless
+    requested; the fail-safe corner check stays active either way.
+    
+    Attributes:
+        pause: Whether pyautogui's pause after every call is kept.
+    """
+    
+    name = "pyautogui"
+    
+    def __init__(self, pause=False):
+        """
+        Initialize a PyAutoGuiBackend.
+        
+        Args:
+            pause: Whether to keep pyautogui's pause after every call.
+        """
+        super().__init__()
+        self.pause = pause
+    
+    def _click(self, x, y):
+        pyautogui.click(x=x, y=y, _pause=self.pause)
+    
+    def _move(self, x, y):
+        pyautogui.moveTo(x, y, _pause=self.pause)
+
+
+class XTestBackend(InputBackend):
+    """
+    Input backend that sends events straight to the X server with the XTEST extension.
+    
+    Keeps one display connection open, so a click costs three requests and one
+    round trip instead of pyautogui's per-call pause and checks.
+    
+    Attributes:
+        display_name: The X display (None for $DISPLAY).
+    """
+    
+    name = "xtest"
+    
+    def __init__(self, display_name=None):
+        """
+        Initialize an XTestBackend.
+        
+        Args:
+            display_name: The X display (None for $DISPLAY).
+        
+        Raises:
+            RuntimeError: If python-xlib is not installed or the display has no XTEST extension.
+        """
+        if xtest is None:
+            raise RuntimeError("python-xlib is not installed")
+        super().__init__()
+        self.display_name = display_name
+        try:
+            self._display = xdisplay.Display(display_name)
+        except Exception as e:
+            raise RuntimeError(f"Cannot open X display {display_name or os.environ.get('DISPLAY')}: {e}")
+        if not self._display.has_extension("XTEST"):
+            self._display.close()
+            raise RuntimeError("The X server has no XTEST extension")
+        # The connection is shared by the worker threads that click
+        self._lock = threading.Lock()
+    
+    def _click(self, x, y):
+        with self._lock:
+            xtest.fake_input(self._display, X.MotionNotify, x=x, y=y)
+            xtest.fake_input(self._display, X.ButtonPress, 1)
+            xtest.fake_input(self._display, X.ButtonRelease, 1)
+            self._display.sync()
+    
+    def _move(self, x, y):
+        with self._lock:
+            xtest.fake_input(self._display, X.MotionNotify, x=x, y=y)
+            self._display.sync()
+    
+    def close(self):
+        """Close the display connection."""
+        with self._lock:
+            self._display.close()
+
+
+class RecordingBackend(InputBackend):
+    """
+    Input backend that only records the events, for tests and benchmarks.
+    
+    Attributes:
+        events: ("click" or "move", x, y, time.perf_counter()) tuples in order.
+    """
+    
+    name = "recording"
+    
+    def __init__(self):
+        """Initialize a RecordingBackend."""
+        super().__init__()
+        self.events = []
+    
+    @property
+    def clicks(self):
+        """The (x, y) positions clicked, in order."""
+        return [(x, y) for kind, x, y, _ in self.events if kind == "click"]
+    
+    def _click(self, x, y):
+        self.events.append(("click", x, y, time.perf_counter()))
+    
+    def _move(self, x, y):
+        self.events.append(("move", x, y, time.perf_counter()))
+
+
+def create_input_backend(backend="auto", **kwargs):
+    """
+    Create an input backend, preferring XTEST when an X display supports it.
+    
+    Args:
+        backend: "auto", "xtest" or "pyautogui".
+        **kwargs: Arguments for the backend's constructor.
+    
+    Returns:
+        InputBackend: The backend.
+    
+    Raises:
+        ValueError: If the backend name is not supported.
+        RuntimeError: If "xtest" is requested but not available.
+    """
+    if backend not in INPUT_BACKENDS:
+        raise ValueError(f"Unsupported input backend: {backend}")
+    
+    if backend == "xtest":
+        return XTestBackend(**kwargs)
+    if backend == "auto" and xtest is not None and os.environ.get("DISPLAY"):
+        try:
+            return XTestBackend(**kwargs)
+        except RuntimeError as e:
+            print(f"XTEST input not available, using pyautogui: {e}")
+    return PyAutoGuiBackend()
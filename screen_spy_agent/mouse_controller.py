@@ -3,7 +3,7 @@ MouseController module for simulating mouse clicks.
 """
 
 import pyautogui
-import time
+import threading
 
 
 class MouseController:
@@ -11,25 +11,46 @@ class MouseController:
     Class for controlling mouse movements and clicks.
     
     Attributes:
+        target_x: X coordinate of the default click of areas 1+.
+        target_y: Y coordinate of the default click of areas 1+.
         click_coordinates: A list of lists where each inner list contains coordinate pairs [x, y] for each area.
         vertical_shift: Vertical shift to apply to click coordinates.
+        click_delay: Seconds to wait between the clicks of an area.
+        ui_waiter: Optional UiWaiter; clicks then wait for the UI to react instead of click_delay.
+        input_backend: Optional InputBackend that performs the clicks (None calls pyautogui directly).
+        stop_event: threading.Event that interrupts the waits between clicks when set.
     """
     
-    def __init__(self, target_x=0, target_y=0):
+    def __init__(self, target_x=0, target_y=0, click_delay=2.0, ui_waiter=None, input_backend=None,
+                 stop_event=None):
         """
         Initialize a MouseController with the given target coordinates.
         
         Args:
             target_x: The default x-coordinate to click at (legacy).
             target_y: The default y-coordinate to click at (legacy).
+            click_delay: Seconds to wait between the clicks of an area.
+            ui_waiter: Optional UiWaiter. Between clicks, the area around the last click is
+                then watched until it reacts and settles (at most the waiter's timeout)
+                instead of sleeping click_delay.
+            input_backend: Optional InputBackend (e.g. XTestBackend) that performs the
+                clicks instead of pyautogui.click with its per-call pause.
+            stop_event: Optional threading.Event shared with the agent; setting it ends a
+                click sequence at its next wait instead of after the remaining clicks.
             
         Raises:
-            ValueError: If coordinates are negative.
+            ValueError: If coordinates or the delay are negative.
         """
         if target_x < 0 or target_y < 0:
             raise ValueError("Coordinates must be non-negative")
+        if click_delay < 0:
+            raise ValueError("Click delay must be non-negative")
         
-        # Initialize with a default click for each of the 4 areas
+        self.target_x = target_x
+        self.target_y = target_y
+        
+        # Initialize with a default click for each of the 4 areas; more areas are added
+        # by set_click_coordinates
         self.click_coordinates = [
             [],  # Area 0 - no clicks by default
             [[target_x, target_y]],  # Area 1 - one click at the target coordinates
@@ -38,20 +59,24 @@ class MouseController:
         ]
         
         self.vertical_shift = 0
+        self.click_delay = click_delay
+        self.ui_waiter = ui_waiter
+        self.input_backend = input_backend
+        self.stop_event = stop_event or threading.Event()
     
     def set_click_coordinates(self, area_index, coordinates):
         """
         Set the click coordinates for a specific area.
         
         Args:
-            area_index: The index of the area (0-3).
+            area_index: The index of the area (0 or more).
             coordinates: A list of coordinate pairs, where each pair is [x, y].
             
         Raises:
-            ValueError: If area_index is out of range or coordinates are invalid.
+            ValueError: If area_index is negative or coordinates are invalid.
         """
-        if area_index < 0 or area_index > 3:
-            raise ValueError("Area index must be between 0 and 3")
+        if area_index < 0:
+            raise ValueError("Area index must be non-negative")
         
         if not isinstance(coordinates, list):
             raise ValueError("Coordinates must be a list of [x, y] pairs")
@@ -62,8 +87,23 @@ class MouseController:
             if coord[0] < 0 or coord[1] < 0:
                 raise ValueError("Coordinates must be non-negative")
         
+        # Areas between the known ones and this one keep the default click
+        while len(self.click_coordinates) <= area_index:
+            self.click_coordinates.append(self.get_default_coordinates(len(self.click_coordinates)))
         self.click_coordinates[area_index] = coordinates
     
+    def get_default_coordinates(self, area_index):
+        """
+        Get the click coordinates of an area that has not been set.
+        
+        Args:
+            area_index: The index of the area.
+            
+        Returns:
+            list: No clicks for area 0, one click at the target coordinates for the others.
+        """
+        return [] if area_index == 0 else [[self.target_x, self.target_y]]
+    
     def set_vertical_shift(self, shift):
         """
         Set the vertical shift to apply to click coordinates.
@@ -73,39 +113,103 @@ class MouseController:
         """
         self.vertical_shift = shift
     
+    def get_click_positions(self, area_index=1):
+        """
+        Get the screen positions to click for an area, with the current vertical shift applied.
+        
+        Args:
+            area_index: The index of the area (0 or more).
+            
+        Returns:
+            list: (x, y) tuples in click order.
+            
+        Raises:
+            ValueError: If area_index is negative.
+        """
+        if area_index < 0:
+            raise ValueError("Area index must be non-negative")
+        
+        if area_index < len(self.click_coordinates):
+            coordinates = self.click_coordinates[area_index]
+        else:
+            coordinates = self.get_default_coordinates(area_index)
+        return [(coord[0], coord[1] + self.vertical_shift) for coord in coordinates]
+    
+    def press(self, x, y):
+        """
+        Click once through the input backend, letting errors propagate.
+        
+        Args:
+            x: The screen x-coordinate.
+            y: The screen y-coordinate.
+        """
+        if self.input_backend is not None:
+            self.input_backend.click(x, y)
+        else:
+            pyautogui.click(x=x, y=y)
+    
+    def click_at(self, x, y):
+        """
+        Simulate a single mouse click at a screen position.
+        
+        Args:
+            x: The screen x-coordinate.
+            y: The screen y-coordinate.
+            
+        Returns:
+            bool: True if the click was successful, False otherwise.
+        """
+        try:
+            print(f"Clicking at position ({x}, {y})")
+            self.press(x, y)
+            return True
+        except Exception as e:
+            print(f"Error clicking at position ({x}, {y}): {e}")
+            return False
+    
     def click_at_position(self, area_index=1):
         """
         Simulate a mouse click at the target position(s) for the specified area.
         
+        Blocks between clicks, for click_delay seconds or until the UI reacts if a
+        ui_waiter is set; use a ClickExecutor to play click sequences without blocking
+        the caller. Setting stop_event ends the sequence at its next wait.
+        
         Args:
-            area_index: The index of the area (0-3).
+            area_index: The index of the area.
             
         Returns:
-            bool: True if all clicks were successful, False otherwise.
+            bool: True if all clicks were successful, False otherwise (also when interrupted).
         """
-        if area_index < 0 or area_index > 3:
-            raise ValueError("Area index must be between 0 and 3")
-        
-        # Get the click coordinates for this area
-        coordinates = self.click_coordinates[area_index]
+        # Get the click positions for this area
+        positions = self.get_click_positions(area_index)
         
         # If there are no coordinates, return successfully (no clicks needed)
-        if len(coordinates) == 0:
+        if len(positions) == 0:
             print(f"No clicks defined for area {area_index}")
             return True
         
         success = True
         
         try:
-            for i, coord in enumerate(coordinates):
-                x, y = coord[0], coord[1] + self.vertical_shift
+            for i, (x, y) in enumerate(positions):
                 print(f"Clicking at position ({x}, {y}) with vertical shift {self.vertical_shift}")
-                pyautogui.click(x=x, y=y)
                 
-                # Add a 2-second pause between clicks, but not after the last click
-                if i < len(coordinates) - 1:
-                    print("Waiting 2 seconds before the next click...")
-                    time.sleep(2)
+                # Pause between clicks, but not after the last click
+                if i == len(positions) - 1:
+                    self.press(x, y)
+                elif self.ui_waiter is not None:
+                    _, waited = self.ui_waiter.click_and_wait(lambda: self.press(x, y), x, y,
+                                                              stop_event=self.stop_event)
+                    if waited.interrupted:
+                        print(f"Clicks for area {area_index} interrupted by shutdown")
+                        return False
+                else:
+                    self.press(x, y)
+                    print(f"Waiting {self.click_delay} seconds before the next click...")
+                    if self.stop_event.wait(self.click_delay):
+                        print(f"Clicks for area {area_index} interrupted by shutdown")
+                        return False
             
             return success
         
@@ -113,6 +217,47 @@ class MouseController:
             print(f"Error clicking at positions for area {area_index}: {e}")
             return False
     
+    @staticmethod
+    def box_center(origin_x, origin_y, box):
+        """
+        Get the screen position of the center of a box found inside a captured area.
+        
+        Args:
+            origin_x: Screen x-coordinate of the area's left edge as captured.
+            origin_y: Screen y-coordinate of the area's top edge as captured.
+            box: The (x, y, width, height) of the element inside the area.
+            
+        Returns:
+            tuple: The rounded (x, y) screen position.
+        """
+        x, y, width, height = box
+        return round(origin_x + x + width / 2), round(origin_y + y + height / 2)
+    
+    def click_at_box(self, origin_x, origin_y, box):
+        """
+        Simulate a mouse click at the center of a box found inside a captured area.
+        
+        The box is translated into screen coordinates with the area's origin, so the
+        click follows the detected element and no vertical shift is applied.
+        
+        Args:
+            origin_x: Screen x-coordinate of the area's left edge as captured.
+            origin_y: Screen y-coordinate of the area's top edge as captured.
+            box: The (x, y, width, height) of the element inside the area.
+            
+        Returns:
+            bool: True if the click was successful, False otherwise.
+        """
+        screen_x, screen_y = self.box_center(origin_x, origin_y, box)
+        
+        try:
+            print(f"Clicking at detected position ({screen_x}, {screen_y})")
+            self.press(screen_x, screen_y)
+            return True
+        except Exception as e:
+            print(f"Error clicking at detected position ({screen_x}, {screen_y}): {e}")
+            return False
+    
     @staticmethod
     def get_screen_size():
         """
@@ -0,0 +1,565 @@
+"""
+OCR engines that keep Tesseract loaded between calls, and an OCR-based detector.
+"""
+
+import os
+import re
+import subprocess
+import tempfile
+import threading
+
+from screen_spy_agent.detectors import Detector, DetectionResult, inconclusive
+from screen_spy_agent.ocr_preprocessing import prepare_for_ocr
+
+try:
+    import tesserocr
+except ImportError:
+    tesserocr = None
+
+try:
+    import pytesseract
+except ImportError:
+    pytesseract = None
+
+# Characters the OCR is limited to when looking for words
+LETTERS_WHITELIST = "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz"
+
+# Supported engine names for create_ocr_engine
+OCR_ENGINES = ("auto", "tesserocr", "subprocess")
+
+
+class WordBox:
+    """
+    A recognized word and its bounding box.
+    
+    Attributes:
+        text: The recognized word.
+        left: Left edge in pixels of the image that was read.
+        top: Top edge in pixels.
+        width: Width in pixels.
+        height: Height in pixels.
+        confidence: Tesseract's confidence (0-100, -1 if unknown).
+    """
+    
+    def __init__(self, text, left, top, width, height, confidence=-1.0):
+        """
+        Initialize a WordBox.
+        
+        Args:
+            text: The recognized word.
+            left: Left edge in pixels.
+            top: Top edge in pixels.
+            width: Width in pixels.
+            height: Height in pixels.
+            confidence: Tesseract's confidence (0-100, -1 if unknown).
+        """
+        self.text = text
+        self.left = left
+        self.top = top
+        self.width = width
+        self.height = height
+        self.confidence = confidence
+    
+    @property
+    def box(self):
+        """The (x, y, width, height) of the word."""
+        return (self.left, self.top, self.width, self.height)
+    
+    @property
+    def center(self):
+        """The (x, y) center of the word."""
+        return (self.left + self.width / 2, self.top + self.height / 2)
+    
+    def scaled(self, factor):
+        """
+        Get the box in the coordinates of an image enlarged by a factor.
+        
+        Args:
+            factor: The factor (e.g. 1 / 2 to map back from a 2x enlarged image).
+        
+        Returns:
+            WordBox: The scaled box.
+        """
+        return WordBox(self.text, round(self.left * factor), round(self.top * factor),
+                       round(self.width * factor), round(self.height * factor), self.confidence)
+    
+    def __repr__(self):
+        return f"WordBox({self.text!r}, box={self.box}, confidence={self.confidence})"
+
+
+class OcrEngine:
+    """
+    Base class for OCR engines.
+    
+    Attributes:
+        name: Name of the engine.
+    """
+    
+    name = "ocr"
+    
+    def recognize(self, image, psm=7, whitelist=None):
+        """
+        Recognize the text in an image.
+        
+        Args:
+            image: A PIL.Image.
+            psm: Tesseract page segmentation mode.
+            whitelist: Optional string of the only characters to recognize.
+        
+        Returns:
+            str: The recognized text.
+        """
+        raise NotImplementedError
+    
+    def recognize_words(self, image, psm=7, whitelist=None):
+        """
+        Recognize the words in an image with their bounding boxes.
+        
+        Args:
+            image: A PIL.Image.
+            psm: Tesseract page segmentation mode.
+            whitelist: Optional string of the only characters to recognize.
+        
+        Returns:
+            list: WordBox instances in reading order.
+        
+        Raises:
+            NotImplementedError: If the engine cannot report word boxes.
+        """
+        raise NotImplementedError
+    
+    def iter_recognize(self, images, psm=7, whitelist=None):
+        """
+        Recognize the text of several images with the same settings.
+        
+        The default implementation is lazy, so callers that stop at the first useful
+        result do not pay for the remaining images.
+        
+        Args:
+            images: Iterable of PIL.Images.
+            psm: Tesseract page segmentation mode.
+            whitelist: Optional string of the only characters to recognize.
+        
+        Yields:
+            str: The recognized text of each image, in order.
+        """
+        for image in images:
+            yield self.recognize(image, psm=psm, whitelist=whitelist)
+    
+    def close(self):
+        """Release the engine's resources."""
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class TesserocrEngine(OcrEngine):
+    """
+    OCR engine that keeps one Tesseract instance loaded through the tesserocr C API binding.
+    
+    Loading the language model happens once in __init__; every call then only sets
+    the image and reads the text, with no process start or temporary files.
+    
+    Attributes:
+        lang: Tesseract language.
+    """
+    
+    name = "tesserocr"
+    
+    def __init__(self, lang="eng", tessdata_path=None):
+        """
+        Initialize a TesserocrEngine.
+        
+        Args:
+            lang: Tesseract language.
+            tessdata_path: Directory with the traineddata files (None for the default).
+        
+        Raises:
+            ImportError: If tesserocr is not installed.
+        """
+        if tesserocr is None:
+            raise ImportError("tesserocr is not installed")
+        
+        self.lang = lang
+        kwargs = {"lang": lang}
+        if tessdata_path is not None:
+            kwargs["path"] = tessdata_path
+        self._api = tesserocr.PyTessBaseAPI(**kwargs)
+        self._whitelist = None
+        # The API object is not thread-safe
+        self._lock = threading.Lock()
+        print(f"Tesseract {tesserocr.tesseract_version().splitlines()[0]} loaded in process")
+    
+    def recognize(self, image, psm=7, whitelist=None):
+        """
+        Recognize the text in an image with the loaded Tesseract instance.
+        
+        Args:
+            image: A PIL.Image.
+            psm: Tesseract page segmentation mode.
+            whitelist: Optional string of the only characters to recognize.
+        
+        Returns:
+            str: The recognized text.
+        """
+        with self._lock:
+            self._set_image(image, psm, whitelist)
+            return self._api.GetUTF8Text()
+    
+    def recognize_words(self, image, psm=7, whitelist=None):
+        """
+        Recognize the words in an image with the loaded Tesseract instance.
+        
+        Args:
+            image: A PIL.Image.
+            psm: Tesseract page segmentation mode.
+            whitelist: Optional string of the only characters to recognize.
+        
+        Returns:
+            list: WordBox instances in reading order.
+        """
+        level = tesserocr.RIL.WORD
+        words = []
+        with self._lock:
+            self._set_image(image, psm, whitelist)
+            self._api.Recognize()
+            iterator = self._api.GetIterator()
+            if iterator is None:
+                return words
+            for result in tesserocr.iterate_level(iterator, level):
+                text = result.GetUTF8Text(level)
+                box = result.BoundingBox(level)
+                if not text or not text.strip() or box is None:
+                    continue
+                x1, y1, x2, y2 = box
+                words.append(WordBox(text.strip(), x1, y1, x2 - x1, y2 - y1, result.Confidence(level)))
+        return words
+    
+    def _set_image(self, image, psm, whitelist):
+        """Apply the settings and hand the image to the API (the lock must be held)."""
+        self._api.SetPageSegMode(psm)
+        if whitelist != self._whitelist:
+            self._api.SetVariable("tessedit_char_whitelist", whitelist or "")
+            self._whitelist = whitelist
+        self._api.SetImage(image)
+    
+    def close(self):
+        """Shut down the Tesseract instance."""
+        with self._lock:
+            if self._api is not None:
+                self._api.End()
+                self._api = None
+
+
+class SubprocessTesseractEngine(OcrEngine):
+    """
+    OCR engine that runs the tesseract command line program.
+    
+    Single images go through pytesseract, as before. iter_recognize() hands all images
+    to one tesseract process through a list file, so a frame costs one process start
+    per page segmentation mode instead of one per image.
+    
+    Attributes:
+        tesseract_cmd: Path of the tesseract executable.
+        batch: Whether iter_recognize() uses a single process for all images.
+    """
+    
+    name = "subprocess"
+    
+    def __init__(self, tesseract_cmd=None, batch=True):
+        """
+        Initialize a SubprocessTesseractEngine.
+        
+        Args:
+            tesseract_cmd: Path of the tesseract executable (defaults to pytesseract's setting).
+            batch: Whether iter_recognize() uses a single process for all images.
+        """
+        if tesseract_cmd is None:
+            tesseract_cmd = pytesseract.pytesseract.tesseract_cmd if pytesseract is not None else "tesseract"
+        self.tesseract_cmd = tesseract_cmd
+        self.batch = batch
+    
+    def config(self, psm, whitelist):
+        """
+        Build the tesseract command line options.
+        
+        Args:
+            psm: Tesseract page segmentation mode.
+            whitelist: Optional string of the only characters to recognize.
+        
+        Returns:
+            list: The options.
+        """
+        options = ["--oem", "3", "--psm", str(psm)]
+        if whitelist:
+            options += ["-c", f"tessedit_char_whitelist={whitelist}"]
+        return options
+    
+    def recognize(self, image, psm=7, whitelist=None):
+        """
+        Recognize the text in an image with one tesseract process.
+        
+        Args:
+            image: A PIL.Image.
+            psm: Tesseract page segmentation mode.
+            whitelist: Optional string of the only characters to recognize.
+        
+        Returns:
+            str: The recognized text.
+        
+        Raises:
+            ImportError: If pytesseract is not installed.
+        """
+        if pytesseract is None:
+            raise ImportError("pytesseract is not installed")
+        pytesseract.pytesseract.tesseract_cmd = self.tesseract_cmd
+        return pytesseract.image_to_string(image, config=" ".join(self.config(psm, whitelist)))
+    
+    def recognize_words(self, image, psm=7, whitelist=None):
+        """
+        Recognize the words in an image with their bounding boxes from tesseract's TSV output.
+        
+        Args:
+            image: A PIL.Image.
+            psm: Tesseract page segmentation mode.
+            whitelist: Optional string of the only characters to recognize.
+        
+        Returns:
+            list: WordBox instances in reading order.
+        
+        Raises:
+            ImportError: If pytesseract is not installed.
+        """
+        if pytesseract is None:
+            raise ImportError("pytesseract is not installed")
+        pytesseract.pytesseract.tesseract_cmd = self.tesseract_cmd
+        data = pytesseract.image_to_data(
+            image, config=" ".join(self.config(psm, whitelist)), output_type=pytesseract.Output.DICT
+        )
+        words = []
+        for i, text in enumerate(data["text"]):
+            if not text or not str(text).strip():
+                continue
+            words.append(WordBox(str(text).strip(), int(data["left"][i]), int(data["top"][i]),
+                                 int(data["width"][i]), int(data["height"][i]), float(data["conf"][i])))
+        return words
+    
+    def iter_recognize(self, images, psm=7, whitelist=None):
+        """
+        Recognize the text of several images with a single tesseract process.
+        
+        Args:
+            images: Iterable of PIL.Images.
+            psm: Tesseract page segmentation mode.
+            whitelist: Optional string of the only characters to recognize.
+        
+        Yields:
+            str: The recognized text of each image, in order.
+        """
+        images = list(images)
+        if not self.batch or len(images) < 2:
+            yield from super().iter_recognize(images, psm=psm, whitelist=whitelist)
+            return
+        
+        with tempfile.TemporaryDirectory() as directory:
+            paths = []
+            for number, image in enumerate(images):
+                path = os.path.join(directory, f"{number}.png")
+                image.save(path)
+                paths.append(path)
+            list_path = os.path.join(directory, "images.txt")
+            with open(list_path, "w") as f:
+                f.write("\n".join(paths) + "\n")
+            
+            completed = subprocess.run(
+                [self.tesseract_cmd, list_path, "stdout"] + self.config(psm, whitelist),
+                stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True
+            )
+        
+        # Tesseract ends every page with a form feed
+        pages = completed.stdout.decode("utf-8", errors="replace").split("\f")[:len(images)]
+        if len(pages) != len(images):
+            print(f"Batched OCR returned {len(pages)} pages for {len(images)} images, retrying one by one")
+            yield from super().iter_recognize(images, psm=psm, whitelist=whitelist)
+            return
+        yield from pages
+
+
+def create_ocr_engine(engine="auto", **kwargs):
+    """
+    Create an OCR engine, preferring the in-process binding when it is installed.
+    
+    Args:
+        engine: "auto", "tesserocr" or "subprocess".
+        **kwargs: Arguments for the engine's constructor.
+    
+    Returns:
+        OcrEngine: The engine.
+    
+    Raises:
+        ValueError: If the engine name is not supported.
+    """
+    if engine not in OCR_ENGINES:
+        raise ValueError(f"Unsupported OCR engine: {engine}")
+    
+    if engine == "tesserocr" or (engine == "auto" and tesserocr is not None):
+        return TesserocrEngine(**kwargs)
+    return SubprocessTesseractEngine(**kwargs)
+
+
+def phrase_pattern(phrase):
+    """
+    Build a regular expression that finds all words of a phrase in order.
+    
+    Args:
+        phrase: The phrase, e.g. "reject accept".
+    
+    Returns:
+        re.Pattern: The compiled, case-insensitive pattern.
+    """
+    words = [re.escape(word) for word in phrase.split()]
+    return re.compile(r".*?".join(words), re.IGNORECASE | re.DOTALL)
+
+
+def find_phrase_words(words, phrase):
+    """
+    Find the words of a phrase, in order, among recognized words.
+    
+    A recognized word matches a phrase word if it contains it, ignoring case and
+    punctuation, so "Accept!" and "[Accept" still match "accept".
+    
+    Args:
+        words: WordBox instances in reading order.
+        phrase: The phrase, e.g. "reject accept".
+    
+    Returns:
+        list: The matching WordBox of each phrase word, or None if not all were found.
+    """
+    targets = phrase.lower().split()
+    matched = []
+    for word in words:
+        if len(matched) == len(targets):
+            break
+        if targets[len(matched)] in re.sub(r"[^a-z0-9]", "", word.text.lower()):
+            matched.append(word)
+    return matched if len(matched) == len(targets) else None
+
+
+class OcrDetector(Detector):
+    """
+    Detector that reads the area with OCR and looks for the words of the phrase.
+    
+    A miss is inconclusive by default, because OCR can fail on unusual fonts; a
+    cascade then escalates to the next stage.
+    
+    A match carries the bounding box of the phrase's last word (the button to
+    press, e.g. "accept" in "reject accept") in area pixels as its location, when
+    the engine reports word boxes.
+    
+    Attributes:
+        engine: The OcrEngine instance.
+        psm_modes: Page segmentation modes to try, in order.
+        scale: Factor the image is enlarged by before OCR.
+        miss_is_negative: Whether a miss counts as a confident "not present".
+        locate_words: Whether to read word boxes to locate the match.
+    """
+    
+    name = "ocr"
+    
+    def __init__(self, engine=None, psm_modes=(7, 6), scale=2, miss_is_negative=False, locate_words=True):
+        """
+        Initialize an OcrDetector.
+        
+        Args:
+            engine: The OcrEngine instance (None creates one with create_ocr_engine()).
+            psm_modes: Page segmentation modes to try, in order.
+            scale: Factor the image is enlarged by before OCR.
+            miss_is_negative: Whether a miss counts as a confident "not present".
+            locate_words: Whether to read word boxes to locate the match.
+        """
+        self.engine = engine if engine is not None else create_ocr_engine()
+        self.psm_modes = tuple(psm_modes)
+        self.scale = scale
+        self.miss_is_negative = miss_is_negative
+        self.locate_words = locate_words
+    
+    def prepare(self, image):
+        """
+        Convert an image to enlarged grayscale for OCR.
+        
+        Args:
+            image: The screenshot as a PIL.Image or NumPy array.
+        
+        Returns:
+            PIL.Image: The prepared image.
+        """
+        return prepare_for_ocr(image, self.scale)
+    
+    def detect(self, image, text_to_detect, area_index=None):
+        """
+        Read the area and look for the phrase.
+        
+        Args:
+            image: The screenshot as a PIL.Image or NumPy array.
+            text_to_detect: The phrase to look for.
+            area_index: The index of the area the screenshot belongs to.
+        
+        Returns:
+            DetectionResult: A match (with the location of the phrase's last word if
+                known), a miss (if miss_is_negative) or an inconclusive result.
+        """
+        pattern = phrase_pattern(text_to_detect)
+        prepared = self.prepare(image)
+        for psm in self.psm_modes:
+            words = self.read_words(prepared, psm)
+            if words is not None:
+                text = " ".join(word.text for word in words)
+            else:
+                text = self.engine.recognize(prepared, psm=psm)
+            if pattern.search(text):
+                return DetectionResult(True, 0.95, self.name, self.locate(words, text_to_detect))
+        
+        if self.miss_is_negative:
+            return DetectionResult(False, 0.8, self.name)
+        return inconclusive(self.name)
+    
+    def read_words(self, prepared, psm):
+        """
+        Read the word boxes of a prepared image if the engine supports it.
+        
+        Args:
+            prepared: The image returned by prepare().
+            psm: Tesseract page segmentation mode.
+        
+        Returns:
+            list: WordBox instances, or None if word boxes are not used.
+        """
+        if not self.locate_words:
+            return None
+        try:
+            return self.engine.recognize_words(prepared, psm=psm)
+        except NotImplementedError:
+            print(f"OCR engine {self.engine.name} does not report word boxes, matching text only")
+            self.locate_words = False
+            return None
+    
+    def locate(self, words, phrase):
+        """
+        Get the location of the phrase's last word in area pixels.
+        
+        Args:
+            words: WordBox instances of the prepared image, or None.
+            phrase: The phrase that was matched.
+        
+        Returns:
+            tuple: The (x, y, width, height) of the word, or None if it was not found.
+        """
+        if not words:
+            return None
+        matched = find_phrase_words(words, phrase)
+        if matched is None:
+            return None
+        return matched[-1].scaled(1 / self.scale).box
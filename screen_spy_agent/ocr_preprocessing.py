@@ -0,0 +1,395 @@
+"""
+Vectorized preprocessing of screen areas into the image variants read by OCR.
+"""
+
+import numpy as np
+from PIL import Image
+
+# Gray levels the area is binarized at, from dark to light
+DEFAULT_THRESHOLDS = (100, 120, 140, 160, 180)
+
+# Automatic binarization methods
+AUTO_THRESHOLD_METHODS = ("otsu", "adaptive")
+
+
+def to_gray_array(image):
+    """
+    Convert an image to a uint8 grayscale array.
+    
+    Args:
+        image: A PIL.Image or NumPy array (grayscale, RGB or RGBA).
+    
+    Returns:
+        numpy.ndarray: The 2-D uint8 grayscale array.
+    """
+    if not isinstance(image, Image.Image):
+        image = Image.fromarray(np.asarray(image, dtype=np.uint8))
+    return np.asarray(image.convert("L"))
+
+
+def threshold_stack(gray, thresholds=DEFAULT_THRESHOLDS):
+    """
+    Binarize a grayscale array at several thresholds in one broadcast comparison.
+    
+    Args:
+        gray: The 2-D uint8 grayscale array.
+        thresholds: Gray levels to binarize at.
+    
+    Returns:
+        tuple: Two uint8 arrays of shape (len(thresholds), height, width). In the
+            binary stack pixels darker than the threshold are 0 and all others 255
+            (dark text on a light background); the inverted stack is the opposite.
+    """
+    levels = np.asarray(thresholds, dtype=np.int16).reshape(-1, 1, 1)
+    light = gray[np.newaxis] >= levels
+    binary = light.view(np.uint8) * np.uint8(255)
+    inverted = np.uint8(255) - binary
+    return binary, inverted
+
+
+def upscale(gray, factor=2):
+    """
+    Enlarge a grayscale array with Lanczos resampling.
+    
+    Args:
+        gray: The 2-D uint8 grayscale array.
+        factor: Integer factor to enlarge by (1 returns the array unchanged).
+    
+    Returns:
+        numpy.ndarray: The enlarged 2-D uint8 array.
+    """
+    if factor == 1:
+        return gray
+    height, width = gray.shape
+    image = Image.fromarray(gray).resize((width * factor, height * factor), Image.LANCZOS)
+    return np.asarray(image)
+
+
+def prepare_for_ocr(image, scale=2):
+    """
+    Convert an image to enlarged grayscale for OCR.
+    
+    Args:
+        image: A PIL.Image or NumPy array.
+        scale: Integer factor to enlarge by.
+    
+    Returns:
+        PIL.Image: The prepared grayscale image.
+    """
+    return Image.fromarray(upscale(to_gray_array(image), scale))
+
+
+def otsu_threshold(gray, histogram=None):
+    """
+    Find the gray level that best separates text from background with Otsu's method.
+    
+    The between-class variance of every possible split is computed at once from the
+    histogram's cumulative sums.
+    
+    Args:
+        gray: The 2-D uint8 grayscale array.
+        histogram: Optional 256-bin histogram of gray, to reuse one already computed.
+    
+    Returns:
+        int: The threshold; pixels below it form the dark class (as in threshold_stack()).
+    """
+    if histogram is None:
+        histogram = np.bincount(gray.ravel(), minlength=256)
+    histogram = np.asarray(histogram, dtype=np.float64)
+    levels = np.arange(256, dtype=np.float64)
+    dark_weight = np.cumsum(histogram)
+    light_weight = dark_weight[-1] - dark_weight
+    dark_sum = np.cumsum(histogram * levels)
+    light_sum = dark_sum[-1] - dark_sum
+    
+    with np.errstate(divide="ignore", invalid="ignore"):
+        between = dark_weight * light_weight * np.square(dark_sum / dark_weight - light_sum / light_weight)
+    between = np.nan_to_num(between)
+    return int(np.argmax(between)) + 1
+
+
+def dark_share(gray, threshold):
+    """
+    Get the share of pixels darker than a threshold.
+    
+    Args:
+        gray: The 2-D uint8 grayscale array.
+        threshold: The gray level.
+    
+    Returns:
+        float: The share (0-1) of pixels below the threshold.
+    """
+    return float(np.count_nonzero(gray < threshold)) / gray.size
+
+
+def text_polarity(gray, threshold=None, margin=0.1):
+    """
+    Detect whether the text is darker or lighter than its background.
+    
+    Text covers less of a button than its background, so the background is the
+    larger of the two classes split at the threshold.
+    
+    Args:
+        gray: The 2-D uint8 grayscale array.
+        threshold: Gray level separating the classes (None for Otsu's threshold).
+        margin: How far from an even split the classes must be to decide.
+    
+    Returns:
+        str: "dark" for dark text on a light background, "light" for light text on a
+            dark background, or None if the classes are too even to tell.
+    """
+    if threshold is None:
+        threshold = otsu_threshold(gray)
+    share = dark_share(gray, threshold)
+    if share > 0.5 + margin:
+        return "light"
+    if share < 0.5 - margin:
+        return "dark"
+    return None
+
+
+def local_mean(gray, block_size=15):
+    """
+    Compute the mean of the block around every pixel with an integral image.
+    
+    Args:
+        gray: The 2-D uint8 grayscale array.
+        block_size: Odd side length of the block.
+    
+    Returns:
+        numpy.ndarray: The float64 local means, same shape as gray.
+    """
+    half = block_size // 2
+    padded = np.pad(gray.astype(np.float64), half, mode="edge")
+    table = np.zeros((padded.shape[0] + 1, padded.shape[1] + 1))
+    table[1:, 1:] = padded
+    np.cumsum(table, axis=0, out=table)
+    np.cumsum(table, axis=1, out=table)
+    sums = (table[block_size:, block_size:] - table[:-block_size, block_size:]
+            - table[block_size:, :-block_size] + table[:-block_size, :-block_size])
+    return sums / (block_size * block_size)
+
+
+def binarize(gray, method="otsu", polarity="dark", block_size=15, offset=10):
+    """
+    Binarize an area automatically into black text on a white background.
+    
+    Args:
+        gray: The 2-D uint8 grayscale array.
+        method: "otsu" (one global threshold) or "adaptive" (threshold at the local mean).
+        polarity: "dark" if the text is darker than the background, "light" otherwise.
+        block_size: Odd side length of the blocks of the adaptive method.
+        offset: How far past the local mean a pixel must be to count as text (adaptive).
+    
+    Returns:
+        numpy.ndarray: The 2-D uint8 array with text 0 and background 255.
+    
+    Raises:
+        ValueError: If the method is not supported or block_size is not odd.
+    """
+    if method not in AUTO_THRESHOLD_METHODS:
+        raise ValueError(f"Unsupported threshold method: {method}")
+    
+    if method == "otsu":
+        threshold = otsu_threshold(gray)
+        text = gray < threshold if polarity == "dark" else gray >= threshold
+    else:
+        if block_size % 2 == 0:
+            raise ValueError("block_size must be odd")
+        mean = local_mean(gray, block_size)
+        text = gray < mean - offset if polarity == "dark" else gray > mean + offset
+    return (~text).view(np.uint8) * np.uint8(255)
+
+
+def variant_names(thresholds=DEFAULT_THRESHOLDS, scale=2):
+    """
+    List the names of the preprocessing variants in their default order.
+    
+    The order is the one recognize_text() has always tried: for each threshold
+    "binary-<t>", "inverted-<t>", "scaled-binary-<t>" and "scaled-inverted-<t>", then
+    "grayscale", "original", "scaled-grayscale" and "scaled-original". Scaled variants
+    are left out when scale is 1.
+    
+    Args:
+        thresholds: Gray levels to binarize at.
+        scale: Integer factor the scaled variants are enlarged by.
+    
+    Returns:
+        list: The variant names.
+    """
+    scaled = scale != 1
+    names = []
+    for threshold in thresholds:
+        names += [f"binary-{threshold}", f"inverted-{threshold}"]
+        if scaled:
+            names += [f"scaled-binary-{threshold}", f"scaled-inverted-{threshold}"]
+    names += ["grayscale", "original"]
+    if scaled:
+        names += ["scaled-grayscale", "scaled-original"]
+    return names
+
+
+class OcrVariants:
+    """
+    Lazily generated, remembered preprocessing variants of one area.
+    
+    A variant is only built when it is first requested, by name or by iterating, and
+    then kept, so reading the same variants with several page segmentation modes
+    preprocesses each one only once. The threshold stack of each size is computed
+    for all thresholds at once on first use, and the grayscale area is upscaled once.
+    
+    With an automatic method the area is first binarized at the scaled size into
+    black text on white, with the text polarity detected from the larger (background)
+    class. This adds the variant "<method>", or "<method>" and "<method>-inverted" when
+    the polarity is unclear, in front of the fixed threshold sweep.
+    
+    Attributes:
+        image: The area as a PIL.Image.
+        thresholds: Gray levels the area is binarized at.
+        scale: Integer factor the scaled variants are enlarged by.
+        auto: Automatic binarization method ("otsu", "adaptive" or None).
+        polarity: Detected text polarity ("dark", "light" or None) if auto is set.
+        names: The variant names in their default order.
+    """
+    
+    def __init__(self, image, thresholds=DEFAULT_THRESHOLDS, scale=2, auto=None, sweep=True):
+        """
+        Initialize an OcrVariants.
+        
+        Args:
+            image: The area as a PIL.Image or NumPy array.
+            thresholds: Gray levels to binarize at.
+            scale: Integer factor the scaled variants are enlarged by.
+            auto: Automatic binarization method ("otsu", "adaptive" or None).
+            sweep: Whether to include the fixed threshold sweep and the unthresholded variants.
+        
+        Raises:
+            ValueError: If auto is not a supported method.
+        """
+        if auto is not None and auto not in AUTO_THRESHOLD_METHODS:
+            raise ValueError(f"Unsupported threshold method: {auto}")
+        
+        if not isinstance(image, Image.Image):
+            image = Image.fromarray(np.asarray(image, dtype=np.uint8))
+        self.image = image
+        self.thresholds = tuple(thresholds)
+        self.scale = scale
+        self.auto = auto
+        self.polarity = None
+        self._variants = {}
+        self._arrays = {}
+        
+        self.names = []
+        if auto is not None:
+            self.polarity = text_polarity(self._array("gray"))
+            self.names.append(auto)
+            if self.polarity is None:
+                self.names.append(f"{auto}-inverted")
+        if sweep:
+            self.names += variant_names(self.thresholds, scale)
+    
+    def _array(self, key):
+        """
+        Get an intermediate array, computing it on first use.
+        
+        Args:
+            key: "gray", "stack", "scaled-gray" or "scaled-stack".
+        
+        Returns:
+            The grayscale array or the (binary, inverted) threshold stacks.
+        """
+        if key not in self._arrays:
+            if key == "gray":
+                value = to_gray_array(self.image)
+            elif key == "stack":
+                value = threshold_stack(self._array("gray"), self.thresholds)
+            elif key == "scaled-gray":
+                value = upscale(self._array("gray"), self.scale)
+            else:
+                value = threshold_stack(self._array("scaled-gray"), self.thresholds)
+            self._arrays[key] = value
+        return self._arrays[key]
+    
+    def _build(self, name):
+        """
+        Build a variant.
+        
+        Args:
+            name: The variant name.
+        
+        Returns:
+            PIL.Image: The variant image.
+        """
+        if name == "original":
+            return self.image
+        if name == "scaled-original":
+            return self.image.resize((self.image.width * self.scale, self.image.height * self.scale), Image.LANCZOS)
+        if name == "grayscale":
+            return Image.fromarray(self._array("gray"))
+        if name == "scaled-grayscale":
+            return Image.fromarray(self._array("scaled-gray"))
+        if name == self.auto:
+            return Image.fromarray(binarize(self._array("scaled-gray"), self.auto, self.polarity or "dark"))
+        if name == f"{self.auto}-inverted":
+            return Image.fromarray(binarize(self._array("scaled-gray"), self.auto, "light"))
+        
+        prefix, threshold = name.rsplit("-", 1)
+        index = self.thresholds.index(int(threshold))
+        scaled = prefix.startswith("scaled-")
+        binary, inverted = self._array("scaled-stack" if scaled else "stack")
+        return Image.fromarray((inverted if prefix.endswith("inverted") else binary)[index])
+    
+    def variant(self, name):
+        """
+        Get a variant by name.
+        
+        Args:
+            name: The variant name, e.g. "scaled-binary-140".
+        
+        Returns:
+            PIL.Image: The variant image.
+        
+        Raises:
+            KeyError: If the name is not one of this area's variants.
+        """
+        if name not in self._variants:
+            if name not in self.names:
+                raise KeyError(f"Unknown OCR preprocessing variant: {name}")
+            self._variants[name] = self._build(name)
+        return self._variants[name]
+    
+    def __iter__(self):
+        for name in self.names:
+            yield self.variant(name), name
+    
+    def images(self):
+        """
+        Iterate over the variant images without their names.
+        
+        Yields:
+            PIL.Image: Each variant image, in order.
+        """
+        for image, _ in self:
+            yield image
+    
+    @property
+    def generated(self):
+        """The number of variants generated so far."""
+        return len(self._variants)
+
+
+def iter_variants(image, thresholds=DEFAULT_THRESHOLDS, scale=2, auto=None, sweep=True):
+    """
+    Generate the preprocessed variants of an area lazily, in their default order.
+    
+    Args:
+        image: The area as a PIL.Image or NumPy array.
+        thresholds: Gray levels to binarize at.
+        scale: Integer factor the scaled variants are enlarged by.
+        auto: Automatic binarization method ("otsu", "adaptive" or None).
+        sweep: Whether to include the fixed threshold sweep and the unthresholded variants.
+    
+    Yields:
+        tuple: (PIL.Image, variant name) for each variant.
+    """
+    yield from OcrVariants(image, thresholds, scale, auto, sweep)
@@ -0,0 +1,279 @@
+"""
+Run independent OCR attempts in a process pool and stop at the first one that finds the phrase.
+"""
+
+import functools
+import multiprocessing
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+from screen_spy_agent.ocr_engine import TesserocrEngine, SubprocessTesseractEngine, tesserocr
+
+# Per-process state of the pool's workers, set by _init_worker
+_worker_engine = None
+_hit_run = None
+
+
+class OcrAttemptResult:
+    """
+    Outcome of one OCR attempt.
+    
+    Attributes:
+        method: Name of the preprocessing variant.
+        psm: Tesseract page segmentation mode.
+        text: The recognized text ("" if the attempt was skipped or failed).
+        hit: Whether the text matched the pattern.
+        elapsed: Seconds the attempt took in the worker.
+        skipped: Whether the attempt was skipped because another attempt already hit.
+        error: Error message if the attempt failed, None otherwise.
+    """
+    
+    def __init__(self, method, psm, text="", hit=False, elapsed=0.0, skipped=False, error=None):
+        """
+        Initialize an OcrAttemptResult.
+        
+        Args:
+            method: Name of the preprocessing variant.
+            psm: Tesseract page segmentation mode.
+            text: The recognized text.
+            hit: Whether the text matched the pattern.
+            elapsed: Seconds the attempt took in the worker.
+            skipped: Whether the attempt was skipped.
+            error: Error message if the attempt failed.
+        """
+        self.method = method
+        self.psm = psm
+        self.text = text
+        self.hit = hit
+        self.elapsed = elapsed
+        self.skipped = skipped
+        self.error = error
+    
+    def __repr__(self):
+        return (f"OcrAttemptResult(method={self.method!r}, psm={self.psm}, hit={self.hit}, "
+                f"elapsed={self.elapsed * 1000:.1f}ms)")
+
+
+def create_worker_engine(tesseract_cmd=None):
+    """
+    Create the OCR engine of a worker, preferring the in-process binding.
+    
+    Args:
+        tesseract_cmd: Path of the tesseract executable for the subprocess fallback.
+    
+    Returns:
+        OcrEngine: The engine.
+    """
+    if tesserocr is not None:
+        try:
+            return TesserocrEngine()
+        except Exception as e:
+            print(f"In-process OCR engine not available in worker {os.getpid()}: {e}")
+    return SubprocessTesseractEngine(tesseract_cmd=tesseract_cmd)
+
+
+def run_attempt(engine, image, method, psm, pattern, whitelist=None):
+    """
+    Run one OCR attempt and time it.
+    
+    Args:
+        engine: The OcrEngine.
+        image: The preprocessed PIL.Image.
+        method: Name of the preprocessing variant.
+        psm: Tesseract page segmentation mode.
+        pattern: Compiled regular expression the text must match for a hit.
+        whitelist: Optional string of the only characters to recognize.
+    
+    Returns:
+        OcrAttemptResult: The outcome.
+    """
+    start = time.perf_counter()
+    try:
+        text = engine.recognize(image, psm=psm, whitelist=whitelist)
+    except Exception as e:
+        return OcrAttemptResult(method, psm, elapsed=time.perf_counter() - start, error=str(e))
+    hit = pattern is not None and pattern.search(text) is not None
+    return OcrAttemptResult(method, psm, text, hit, time.perf_counter() - start)
+
+
+def iter_attempts(engine, attempts, pattern, whitelist=None, stop_on_hit=True):
+    """
+    Run OCR attempts one after another in this process.
+    
+    Args:
+        engine: The OcrEngine.
+        attempts: Iterable of (image, method, psm) tuples; read lazily.
+        pattern: Regular expression (string or compiled) the text must match for a hit.
+        whitelist: Optional string of the only characters to recognize.
+        stop_on_hit: Whether to stop after the first hit.
+    
+    Yields:
+        OcrAttemptResult: The outcome of each attempt, in order.
+    """
+    pattern = compile_pattern(pattern)
+    for image, method, psm in attempts:
+        result = run_attempt(engine, image, method, psm, pattern, whitelist)
+        yield result
+        if result.hit and stop_on_hit:
+            return
+
+
+def compile_pattern(pattern):
+    """
+    Compile a pattern given as a string, case-insensitively.
+    
+    Args:
+        pattern: A regular expression string, a compiled pattern or None.
+    
+    Returns:
+        re.Pattern: The compiled pattern, or None.
+    """
+    if isinstance(pattern, str):
+        return re.compile(pattern, re.IGNORECASE | re.DOTALL)
+    return pattern
+
+
+def _init_worker(engine_factory, hit_run):
+    """Create the worker's OCR engine once and keep the shared hit marker."""
+    global _worker_engine, _hit_run
+    _worker_engine = engine_factory()
+    _hit_run = hit_run
+
+
+def _worker_attempt(run_id, stop_on_hit, image, method, psm, pattern, whitelist):
+    """Run an attempt in a worker unless another attempt of the same run already hit."""
+    if stop_on_hit and _hit_run.value == run_id:
+        return OcrAttemptResult(method, psm, skipped=True)
+    result = run_attempt(_worker_engine, image, method, psm, pattern, whitelist)
+    if result.hit and stop_on_hit:
+        # Tell the other workers to skip the rest of this run
+        _hit_run.value = run_id
+    return result
+
+
+class ParallelOcrRunner:
+    """
+    Class for spreading OCR attempts over a pool of worker processes.
+    
+    Every worker creates its OCR engine once. Attempts are taken lazily from the
+    caller's iterable and at most one per worker is in flight, so an ordered or
+    early-stopping plan keeps its effect. When an attempt hits, its worker marks the
+    run in shared memory: workers skip the run's attempts they have not started,
+    and the runner cancels the queued ones and returns without waiting for the rest.
+    
+    Attributes:
+        workers: Number of worker processes.
+        runs: Number of runs started.
+        timings: Seconds of every finished attempt of the last run, as (method, psm, seconds).
+        last_wall_time: Wall-clock seconds of the last run.
+    """
+    
+    def __init__(self, workers=None, engine_factory=None, tesseract_cmd=None, mp_context=None):
+        """
+        Initialize a ParallelOcrRunner.
+        
+        Args:
+            workers: Number of worker processes (defaults to the number of cores).
+            engine_factory: Picklable callable that creates a worker's OcrEngine
+                (defaults to create_worker_engine).
+            tesseract_cmd: Path of the tesseract executable for the default factory.
+            mp_context: Optional multiprocessing context for the pool.
+        """
+        self.workers = workers or os.cpu_count() or 1
+        if engine_factory is None:
+            engine_factory = functools.partial(create_worker_engine, tesseract_cmd)
+        
+        context = mp_context or multiprocessing.get_context()
+        self._hit_run = context.Value("i", -1, lock=False)
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers, mp_context=context,
+            initializer=_init_worker, initargs=(engine_factory, self._hit_run)
+        )
+        self.runs = 0
+        self.timings = []
+        self.last_wall_time = 0.0
+        print(f"Parallel OCR runner started with {self.workers} workers")
+    
+    def run(self, attempts, pattern, whitelist=None, stop_on_hit=True):
+        """
+        Run OCR attempts in the pool.
+        
+        Args:
+            attempts: Iterable of (image, method, psm) tuples; read lazily.
+            pattern: Regular expression (string or compiled) the text must match for a hit.
+            whitelist: Optional string of the only characters to recognize.
+            stop_on_hit: Whether to cancel the remaining attempts after the first hit.
+        
+        Yields:
+            OcrAttemptResult: The outcome of each finished attempt, in completion order.
+                Attempts skipped because of a hit are not yielded.
+        """
+        pattern = compile_pattern(pattern)
+        run_id = self.runs
+        self.runs += 1
+        self.timings = []
+        start = time.perf_counter()
+        
+        attempts = iter(attempts)
+        pending = set()
+        exhausted = False
+        try:
+            while True:
+                # Keep one attempt per worker in flight
+                while not exhausted and len(pending) < self.workers:
+                    try:
+                        image, method, psm = next(attempts)
+                    except StopIteration:
+                        exhausted = True
+                        break
+                    pending.add(self._executor.submit(
+                        _worker_attempt, run_id, stop_on_hit, image, method, psm, pattern, whitelist
+                    ))
+                if not pending:
+                    return
+                
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    result = future.result()
+                    if result.skipped:
+                        continue
+                    self.timings.append((result.method, result.psm, result.elapsed))
+                    yield result
+                    if result.hit and stop_on_hit:
+                        return
+        finally:
+            # Runs end after a hit, when the caller stops early, or when all attempts are done
+            self._hit_run.value = run_id
+            for future in pending:
+                future.cancel()
+            self.last_wall_time = time.perf_counter() - start
+    
+    def get_stats(self):
+        """
+        Get the timing of the last run.
+        
+        Returns:
+            dict: Number of finished attempts, their summed and mean worker seconds,
+                the wall-clock seconds and the resulting speedup.
+        """
+        busy = sum(seconds for _, _, seconds in self.timings)
+        count = len(self.timings)
+        return {
+            "attempts": count,
+            "busy_time": busy,
+            "mean_attempt_time": busy / count if count else 0.0,
+            "wall_time": self.last_wall_time,
+            "speedup": busy / self.last_wall_time if self.last_wall_time else 0.0
+        }
+    
+    def close(self):
+        """Shut down the worker processes."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
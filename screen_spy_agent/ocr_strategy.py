@@ -0,0 +1,273 @@
+"""
+Adaptive ordering of OCR attempts learned from which attempts found the phrase.
+"""
+
+import json
+import os
+import threading
+
+
+class OcrPlan:
+    """
+    The attempts of one frame, in the order the strategy chose.
+    
+    Iterating yields (variant name, psm) pairs. Iteration stops after a hit (unless
+    the frame is exploring), or once the attempts tried so far account for the
+    strategy's confidence share of all recorded hits.
+    
+    Attributes:
+        attempts: The ordered (variant name, psm) pairs.
+        exploring: Whether every attempt is tried to refresh the statistics.
+        found: Whether an attempt of this frame was a hit.
+        tried: Number of attempts recorded so far.
+    """
+    
+    def __init__(self, strategy, attempts, exploring):
+        """
+        Initialize an OcrPlan.
+        
+        Args:
+            strategy: The AdaptiveOcrStrategy that made the plan.
+            attempts: The ordered (variant name, psm) pairs.
+            exploring: Whether every attempt is tried.
+        """
+        self.attempts = attempts
+        self.exploring = exploring
+        self.found = False
+        self.tried = 0
+        self._strategy = strategy
+        self._current = None
+    
+    def __iter__(self):
+        covered = 0
+        total = self._strategy.total_hits()
+        for attempt in self.attempts:
+            if self.found and not self.exploring:
+                return
+            if (not self.exploring and not self.found and total >= self._strategy.min_hits
+                    and covered >= self._strategy.confidence * total):
+                print(f"OCR strategy: stopping after {self.tried} attempts "
+                      f"({covered}/{total} recorded hits covered)")
+                return
+            self._current = attempt
+            yield attempt
+            covered += self._strategy.hits(*attempt)
+    
+    def record(self, hit, attempt=None):
+        """
+        Record the outcome of an attempt.
+        
+        Args:
+            hit: Whether the attempt found the phrase.
+            attempt: The (variant name, psm) pair (defaults to the one yielded last;
+                give it when attempts finish out of order).
+        """
+        method, psm = attempt or self._current
+        self._strategy.record(method, psm, hit)
+        self.tried += 1
+        self.found = self.found or hit
+
+
+class AdaptiveOcrStrategy:
+    """
+    Class for ordering (preprocessing variant, page segmentation mode) attempts by past success.
+    
+    Attempts are ranked by their smoothed hit rate, so combinations that found the
+    phrase before are tried first, and untried ones keep their default order among
+    themselves. A frame with no hit stops once the attempts already tried account for
+    the confidence share of all recorded hits. Every explore_interval frames all
+    attempts are tried to keep the statistics of the others current.
+    
+    Attributes:
+        confidence: Share of the recorded hits that must be covered before stopping.
+        min_hits: Number of recorded hits needed before attempts are skipped.
+        explore_interval: Frames between full explorations (None to never explore).
+        state_path: JSON file the statistics are persisted in (None to keep them in memory).
+        frames: Number of frames planned.
+    """
+    
+    def __init__(self, confidence=0.95, min_hits=20, explore_interval=50, state_path=None):
+        """
+        Initialize an AdaptiveOcrStrategy.
+        
+        Args:
+            confidence: Share of the recorded hits that must be covered before stopping.
+            min_hits: Number of recorded hits needed before attempts are skipped.
+            explore_interval: Frames between full explorations (None to never explore).
+            state_path: JSON file the statistics are persisted in (None to keep them in memory).
+        
+        Raises:
+            ValueError: If confidence is not between 0 and 1.
+        """
+        if not 0 < confidence <= 1:
+            raise ValueError("confidence must be between 0 and 1")
+        
+        self.confidence = confidence
+        self.min_hits = min_hits
+        self.explore_interval = explore_interval
+        self.state_path = state_path
+        self.frames = 0
+        
+        self._stats = {}
+        self._lock = threading.Lock()
+        
+        if state_path is not None:
+            self.load(state_path)
+    
+    def hits(self, method, psm):
+        """
+        Get the number of recorded hits of an attempt.
+        
+        Args:
+            method: The preprocessing variant name.
+            psm: The page segmentation mode.
+        
+        Returns:
+            int: The number of hits.
+        """
+        return self._stats.get((method, psm), [0, 0])[1]
+    
+    def total_hits(self):
+        """
+        Get the number of recorded hits of all attempts.
+        
+        Returns:
+            int: The number of hits.
+        """
+        return sum(hits for _, hits in self._stats.values())
+    
+    def success_rate(self, method, psm):
+        """
+        Get the smoothed hit rate of an attempt.
+        
+        Args:
+            method: The preprocessing variant name.
+            psm: The page segmentation mode.
+        
+        Returns:
+            float: (hits + 1) / (tries + 2), so untried attempts rate 0.5.
+        """
+        tries, hits = self._stats.get((method, psm), [0, 0])
+        return (hits + 1) / (tries + 2)
+    
+    def order(self, methods, psm_modes):
+        """
+        Order all combinations of variants and page segmentation modes by past success.
+        
+        Args:
+            methods: Variant names in their default order.
+            psm_modes: Page segmentation modes in their default order.
+        
+        Returns:
+            list: (variant name, psm) pairs, best first. Ties keep the default order
+                with the page segmentation mode as the outer loop.
+        """
+        attempts = [(method, psm) for psm in psm_modes for method in methods]
+        with self._lock:
+            # Attempts that have hits go first; among them and among the rest, sort by rate
+            return sorted(attempts, key=lambda attempt: (self.hits(*attempt) == 0, -self.success_rate(*attempt)))
+    
+    def plan(self, methods, psm_modes):
+        """
+        Plan the attempts of a new frame.
+        
+        Args:
+            methods: Variant names in their default order.
+            psm_modes: Page segmentation modes in their default order.
+        
+        Returns:
+            OcrPlan: The ordered attempts.
+        """
+        attempts = self.order(methods, psm_modes)
+        with self._lock:
+            self.frames += 1
+            exploring = bool(self.explore_interval) and self.frames % self.explore_interval == 0
+        if exploring:
+            print(f"OCR strategy: exploring all {len(attempts)} attempts")
+        return OcrPlan(self, attempts, exploring)
+    
+    def record(self, method, psm, hit):
+        """
+        Record the outcome of an attempt.
+        
+        Args:
+            method: The preprocessing variant name.
+            psm: The page segmentation mode.
+            hit: Whether the attempt found the phrase.
+        """
+        with self._lock:
+            stats = self._stats.setdefault((method, psm), [0, 0])
+            stats[0] += 1
+            if hit:
+                stats[1] += 1
+    
+    def get_stats(self):
+        """
+        Get the statistics of all recorded attempts.
+        
+        Returns:
+            list: Dicts with method, psm, tries, hits and success_rate, best first.
+        """
+        with self._lock:
+            stats = [
+                {"method": method, "psm": psm, "tries": tries, "hits": hits,
+                 "success_rate": hits / tries if tries else 0.0}
+                for (method, psm), (tries, hits) in self._stats.items()
+            ]
+        return sorted(stats, key=lambda entry: (-entry["hits"], -entry["success_rate"]))
+    
+    def save(self, path=None):
+        """
+        Write the statistics to a JSON file atomically.
+        
+        Args:
+            path: The file to write (defaults to state_path).
+        """
+        path = path or self.state_path
+        if path is None:
+            return
+        
+        with self._lock:
+            attempts = [
+                {"method": method, "psm": psm, "tries": tries, "hits": hits}
+                for (method, psm), (tries, hits) in self._stats.items()
+            ]
+            frames = self.frames
+        temp_path = f"{path}.tmp"
+        try:
+            with open(temp_path, "w") as f:
+                json.dump({"frames": frames, "attempts": attempts}, f, indent=4)
+            os.replace(temp_path, path)
+        except OSError as e:
+            print(f"Error saving OCR strategy to {path}: {e}")
+    
+    def load(self, path=None):
+        """
+        Load statistics saved by save(), replacing the current ones.
+        
+        Args:
+            path: The file to read (defaults to state_path).
+        
+        Returns:
+            bool: True if statistics were loaded.
+        """
+        path = path or self.state_path
+        if path is None or not os.path.exists(path):
+            return False
+        
+        try:
+            with open(path, "r") as f:
+                data = json.load(f)
+            stats = {
+                (entry["method"], int(entry["psm"])): [int(entry["tries"]), int(entry["hits"])]
+                for entry in data.get("attempts", [])
+            }
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            print(f"Error loading OCR strategy from {path}: {e}")
+            return False
+        
+        with self._lock:
+            self._stats = stats
+            self.frames = int(data.get("frames", 0))
+        print(f"Loaded OCR statistics of {len(stats)} attempts from {path}")
+        return True
@@ -0,0 +1,343 @@
+"""
+PipelineEngine module for running capture, analysis and action as overlapping stages.
+"""
+
+import queue
+import threading
+import time
+import traceback
+
+# Items that may wait between two stages before the stage in front blocks
+DEFAULT_QUEUE_SIZE = 2
+
+# Seconds a stage waits on an empty queue or a full one before checking for shutdown
+POLL_INTERVAL = 0.1
+
+
+class StageStats:
+    """
+    Running latency statistics of one pipeline stage, in constant memory.
+    
+    Attributes:
+        count: Number of items the stage finished.
+        errors: Number of items the stage failed on.
+        total: Seconds spent on the finished items.
+        max: Longest time in seconds spent on one item.
+    """
+    
+    def __init__(self):
+        """Initialize empty statistics."""
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.max = 0.0
+        self._lock = threading.Lock()
+    
+    def add(self, seconds):
+        """
+        Record the time spent on one item.
+        
+        Args:
+            seconds: The time in seconds.
+        """
+        with self._lock:
+            self.count += 1
+            self.total += seconds
+            self.max = max(self.max, seconds)
+    
+    def add_error(self):
+        """Record an item the stage failed on."""
+        with self._lock:
+            self.errors += 1
+    
+    def as_dict(self):
+        """
+        Get the statistics as a dictionary.
+        
+        Returns:
+            dict: Items done, errors, and the mean and maximum milliseconds per item.
+        """
+        with self._lock:
+            return {
+                "count": self.count,
+                "errors": self.errors,
+                "mean_ms": 1000.0 * self.total / self.count if self.count else 0.0,
+                "max_ms": 1000.0 * self.max
+            }
+
+
+class PipelineItem:
+    """
+    One unit of work travelling through the pipeline.
+    
+    Attributes:
+        seq: Sequence number in capture order.
+        payload: What the capture stage produced.
+        key: Key of the payload; only one item per key is in the pipeline at a time.
+        captured_at: time.perf_counter() value when the item was captured.
+        result: What the analysis stage returned.
+    """
+    
+    def __init__(self, seq, payload, key=None, captured_at=None):
+        """
+        Initialize a PipelineItem.
+        
+        Args:
+            seq: Sequence number in capture order.
+            payload: What the capture stage produced.
+            key: Optional key of the payload.
+            captured_at: time.perf_counter() value when the item was captured.
+        """
+        self.seq = seq
+        self.payload = payload
+        self.key = key
+        self.captured_at = time.perf_counter() if captured_at is None else captured_at
+        self.result = None
+
+
+class PipelineEngine:
+    """
+    Class for running capture, analysis and action as stages that overlap in time.
+    
+    A producer thread calls capture() at most once every interval seconds, a pool of
+    worker threads calls analyze() on each captured payload, and a single action
+    thread calls act() with each payload and its analysis result. The stages are
+    connected by bounded queues: when the analysis workers fall behind, the queue
+    in front of them fills and the producer blocks instead of capturing frames
+    that would be stale by the time they are analyzed; the same holds between
+    analysis and action. Throughput is then set by the slowest stage rather than
+    by the sum of all stages.
+    
+    Payloads can carry a key (e.g. the area index). While an item with a key is
+    in the pipeline, is_busy(key) is True and new payloads with that key are
+    dropped, so each key is analyzed and acted on by one worker at a time.
+    
+    Attributes:
+        capture: Callable returning a list of payloads for one capture.
+        analyze: Callable taking a payload and returning its result.
+        act: Callable taking a payload and its result.
+        key: Optional callable returning the key of a payload.
+        analysis_workers: Number of analysis threads.
+        queue_size: Capacity of each queue between stages.
+        interval: Minimum seconds between the starts of two captures.
+        stage_stats: StageStats of the "capture", "analysis", "action" and "end_to_end" stages.
+        dropped: Number of payloads dropped because their key was busy.
+        stop_event: threading.Event that stops every stage when set.
+    """
+    
+    def __init__(self, capture, analyze, act, key=None, analysis_workers=2, queue_size=DEFAULT_QUEUE_SIZE,
+                 interval=0.0, stop_event=None):
+        """
+        Initialize a PipelineEngine.
+        
+        Args:
+            capture: Callable returning a list of payloads for one capture.
+            analyze: Callable taking a payload and returning its result.
+            act: Callable taking a payload and its result.
+            key: Optional callable returning the key of a payload.
+            analysis_workers: Number of analysis threads.
+            queue_size: Capacity of each queue between stages.
+            interval: Minimum seconds between the starts of two captures.
+            stop_event: Optional threading.Event shared with the caller; setting it stops
+                every stage as stop() does.
+        
+        Raises:
+            ValueError: If analysis_workers or queue_size is below 1 or interval is negative.
+        """
+        if analysis_workers < 1:
+            raise ValueError("analysis_workers must be at least 1")
+        if queue_size < 1:
+            raise ValueError("queue_size must be at least 1")
+        if interval < 0:
+            raise ValueError("interval must be non-negative")
+        
+        self.capture = capture
+        self.analyze = analyze
+        self.act = act
+        self.key = key
+        self.analysis_workers = analysis_workers
+        self.queue_size = queue_size
+        self.interval = interval
+        self.stage_stats = {stage: StageStats() for stage in ("capture", "analysis", "action", "end_to_end")}
+        self.dropped = 0
+        
+        self._analysis_queue = queue.Queue(maxsize=queue_size)
+        self._action_queue = queue.Queue(maxsize=queue_size)
+        self._busy = set()
+        self._lock = threading.Lock()
+        self._seq = 0
+        self._threads = []
+        self.stop_event = stop_event or threading.Event()
+    
+    @property
+    def running(self):
+        """Whether the stage threads are running."""
+        return bool(self._threads) and not self.stop_event.is_set()
+    
+    def start(self):
+        """
+        Start the producer, the analysis workers and the action thread.
+        
+        Raises:
+            RuntimeError: If the engine is already running or has been stopped.
+        """
+        if self._threads:
+            raise RuntimeError("PipelineEngine can only be started once")
+        
+        targets = [("pipeline-capture", self._produce)]
+        targets += [(f"pipeline-analysis-{n}", self._analyze_worker) for n in range(self.analysis_workers)]
+        targets.append(("pipeline-action", self._act_worker))
+        for name, target in targets:
+            thread = threading.Thread(target=target, name=name)
+            thread.daemon = True
+            self._threads.append(thread)
+            thread.start()
+    
+    def stop(self, timeout=None):
+        """
+        Stop every stage; items still queued are dropped and in-progress ones finish.
+        
+        Args:
+            timeout: Maximum seconds to wait for each thread.
+        """
+        self.stop_event.set()
+        for thread in self._threads:
+            if thread is not threading.current_thread():
+                thread.join(timeout)
+    
+    def is_busy(self, key):
+        """
+        Check whether an item with a key is in the pipeline.
+        
+        Args:
+            key: The key.
+        
+        Returns:
+            bool: True if an item with the key is queued, being analyzed or being acted on.
+        """
+        with self._lock:
+            return key in self._busy
+    
+    def _release(self, item):
+        """Let new payloads with the item's key into the pipeline."""
+        if item.key is not None:
+            with self._lock:
+                self._busy.discard(item.key)
+    
+    def _put(self, target, item):
+        """Put an item into a queue, blocking while it is full; False if stopped first."""
+        while not self.stop_event.is_set():
+            try:
+                target.put(item, timeout=POLL_INTERVAL)
+                return True
+            except queue.Full:
+                continue
+        self._release(item)
+        return False
+    
+    def _get(self, source):
+        """Take an item from a queue, blocking while it is empty; None if stopped first."""
+        while not self.stop_event.is_set():
+            try:
+                return source.get(timeout=POLL_INTERVAL)
+            except queue.Empty:
+                continue
+        return None
+    
+    def _produce(self):
+        """Capture payloads at most once per interval and queue them for analysis."""
+        while not self.stop_event.is_set():
+            started = time.perf_counter()
+            try:
+                payloads = self.capture()
+                self.stage_stats["capture"].add(time.perf_counter() - started)
+            except Exception:
+                print("Error in pipeline capture stage: ")
+                print(traceback.format_exc())
+                self.stage_stats["capture"].add_error()
+                payloads = []
+            
+            for payload in payloads:
+                key = self.key(payload) if self.key is not None else None
+                with self._lock:
+                    if key is not None and key in self._busy:
+                        self.dropped += 1
+                        continue
+                    if key is not None:
+                        self._busy.add(key)
+                    self._seq += 1
+                    item = PipelineItem(self._seq, payload, key, started)
+                # Blocks while the analysis stage is behind
+                if not self._put(self._analysis_queue, item):
+                    return
+            
+            remaining = started + self.interval - time.perf_counter()
+            if remaining > 0 and self.stop_event.wait(remaining):
+                return
+            if not payloads:
+                # Nothing to do until a busy key frees up
+                self.stop_event.wait(POLL_INTERVAL)
+    
+    def _analyze_worker(self):
+        """Analyze queued payloads and pass them to the action stage."""
+        while True:
+            item = self._get(self._analysis_queue)
+            if item is None:
+                return
+            started = time.perf_counter()
+            try:
+                item.result = self.analyze(item.payload)
+                self.stage_stats["analysis"].add(time.perf_counter() - started)
+            except Exception:
+                print("Error in pipeline analysis stage: ")
+                print(traceback.format_exc())
+                self.stage_stats["analysis"].add_error()
+                self._release(item)
+                continue
+            # Blocks while the action stage is behind
+            if not self._put(self._action_queue, item):
+                return
+    
+    def _act_worker(self):
+        """Act on analyzed payloads one at a time, in the order they arrive."""
+        while True:
+            item = self._get(self._action_queue)
+            if item is None:
+                return
+            started = time.perf_counter()
+            try:
+                self.act(item.payload, item.result)
+                finished = time.perf_counter()
+                self.stage_stats["action"].add(finished - started)
+                self.stage_stats["end_to_end"].add(finished - item.captured_at)
+            except Exception:
+                print("Error in pipeline action stage: ")
+                print(traceback.format_exc())
+                self.stage_stats["action"].add_error()
+            finally:
+                self._release(item)
+    
+    def get_stats(self):
+        """
+        Get the queue depths and the per-stage latencies.
+        
+        Returns:
+            dict: Items captured and dropped, the current depth of each queue, the keys in
+                the pipeline, and count, errors, mean and maximum milliseconds per stage.
+        """
+        with self._lock:
+            captured, busy = self._seq, sorted(self._busy, key=repr)
+        return {
+            "captured": captured,
+            "dropped": self.dropped,
+            "queue_depths": {"analysis": self._analysis_queue.qsize(), "action": self._action_queue.qsize()},
+            "busy_keys": busy,
+            "stages": {stage: stats.as_dict() for stage, stats in self.stage_stats.items()}
+        }
+    
+    def __enter__(self):
+        self.start()
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
@@ -0,0 +1,201 @@
+"""
+Region module for describing the watched screen regions and loading them from configuration.
+"""
+
+import json
+
+# Text phrase detected in each area of the legacy four-area configuration
+DETECTION_PHRASES = (
+    "new chat",       # Area 0
+    "reject accept",  # Area 1
+    "resume the",     # Area 2
+    "try again"       # Area 3
+)
+
+
+class Region:
+    """
+    One watched region of the screen: where to look, what to look for and what to do.
+    
+    The first region keeps its special role in the agent: when its phrase is detected
+    the other regions move up by NEW_CHAT_VERTICAL_SHIFT, and it never clicks.
+    
+    Attributes:
+        bbox: The (x1, y1, x2, y2) rectangle of the region on the screen.
+        phrase: The text phrase to detect in the region.
+        clicks: Screen positions [x, y] clicked, in order, when the phrase is detected.
+        detector: Detector of the region, the name of one to be resolved with
+            resolve_detectors(), or None to use the agent's default.
+        interval: Seconds between two polls of the region (None uses the agent's interval).
+        priority: Regions with a higher priority are handled first when several are due.
+        name: Optional label of the region.
+    """
+    
+    def __init__(self, bbox, phrase, clicks=None, detector=None, interval=None, priority=0, name=None):
+        """
+        Initialize a Region.
+        
+        Args:
+            bbox: The (x1, y1, x2, y2) rectangle of the region on the screen.
+            phrase: The text phrase to detect in the region.
+            clicks: Screen positions [x, y] clicked when the phrase is detected (default: none).
+            detector: Detector, detector name or None.
+            interval: Seconds between two polls of the region (None uses the agent's interval).
+            priority: Priority of the region when several regions are due.
+            name: Optional label of the region.
+        
+        Raises:
+            ValueError: If the rectangle, the phrase, a click position or the interval is invalid.
+        """
+        if len(bbox) != 4 or min(bbox) < 0 or bbox[2] <= bbox[0] or bbox[3] <= bbox[1]:
+            raise ValueError(f"Invalid region rectangle: {bbox}")
+        if not phrase:
+            raise ValueError("A region needs a phrase to detect")
+        clicks = [list(click) for click in clicks or []]
+        for click in clicks:
+            if len(click) != 2 or click[0] < 0 or click[1] < 0:
+                raise ValueError(f"Invalid click position: {click}")
+        if interval is not None and interval < 0:
+            raise ValueError("interval must be non-negative")
+        
+        self.bbox = tuple(bbox)
+        self.phrase = phrase
+        self.clicks = clicks
+        self.detector = detector
+        self.interval = interval
+        self.priority = priority
+        self.name = name
+    
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Create a Region from its configuration entry.
+        
+        Args:
+            data: Dictionary with "bbox" and "phrase", and optionally "clicks", "detector"
+                (a detector name), "interval", "priority" and "name".
+        
+        Returns:
+            Region: The region.
+        
+        Raises:
+            ValueError: If a required key is missing or a value is invalid.
+        """
+        for key in ("bbox", "phrase"):
+            if key not in data:
+                raise ValueError(f"Region entry without \"{key}\": {data}")
+        return cls(
+            data["bbox"],
+            data["phrase"],
+            clicks=data.get("clicks"),
+            detector=data.get("detector"),
+            interval=data.get("interval"),
+            priority=data.get("priority", 0),
+            name=data.get("name")
+        )
+    
+    def to_dict(self):
+        """
+        Get the configuration entry of the region.
+        
+        Returns:
+            dict: The entry; detector instances are left out, detector names are kept.
+        """
+        data = {"bbox": list(self.bbox), "phrase": self.phrase, "clicks": self.clicks}
+        if isinstance(self.detector, str):
+            data["detector"] = self.detector
+        if self.interval is not None:
+            data["interval"] = self.interval
+        if self.priority:
+            data["priority"] = self.priority
+        if self.name is not None:
+            data["name"] = self.name
+        return data
+    
+    def __repr__(self):
+        return f"Region({self.name or self.phrase!r}, bbox={self.bbox}, clicks={len(self.clicks)})"
+
+
+def load_regions(config):
+    """
+    Load the regions of a configuration.
+    
+    Reads the "regions" list. Configurations without it use the legacy "areas" and
+    "clicks" lists, with the phrases of DETECTION_PHRASES.
+    
+    Args:
+        config: The configuration dictionary.
+    
+    Returns:
+        list: The Regions, in order.
+    
+    Raises:
+        ValueError: If there are no regions, a region is invalid, or a legacy configuration
+            has more areas than DETECTION_PHRASES or a different number of click lists.
+    """
+    if "regions" in config:
+        regions = [Region.from_dict(entry) for entry in config["regions"]]
+    else:
+        areas = config.get("areas", [])
+        clicks = config.get("clicks", [[] for _ in areas])
+        if len(areas) > len(DETECTION_PHRASES):
+            raise ValueError(f"Only {len(DETECTION_PHRASES)} areas have default phrases; "
+                             f"list more areas under \"regions\" with their phrases")
+        if len(clicks) != len(areas):
+            raise ValueError("Each area needs exactly one click list")
+        regions = [Region(bbox, phrase, area_clicks)
+                   for bbox, phrase, area_clicks in zip(areas, DETECTION_PHRASES, clicks)]
+    
+    if not regions:
+        raise ValueError("The configuration has no regions")
+    return regions
+
+
+def load_regions_file(path):
+    """
+    Load the regions of a JSON configuration file.
+    
+    Args:
+        path: Path to the file.
+    
+    Returns:
+        list: The Regions, in order.
+    
+    Raises:
+        OSError: If the file cannot be read.
+        ValueError: If the file is not valid JSON or its regions are invalid.
+    """
+    with open(path, "r") as f:
+        return load_regions(json.load(f))
+
+
+def regions_to_config(regions):
+    """
+    Get the configuration entries of regions.
+    
+    Args:
+        regions: The Regions.
+    
+    Returns:
+        dict: {"regions": [...]}, ready to be merged into a configuration and saved.
+    """
+    return {"regions": [region.to_dict() for region in regions]}
+
+
+def resolve_detectors(regions, detectors):
+    """
+    Replace the detector names of regions with detector instances.
+    
+    Args:
+        regions: The Regions.
+        detectors: Dictionary of the available Detectors by name.
+    
+    Raises:
+        ValueError: If a region names a detector that is not available.
+    """
+    for region in regions:
+        if isinstance(region.detector, str):
+            if region.detector not in detectors:
+                raise ValueError(f"Unknown detector \"{region.detector}\" for region {region!r}; "
+                                 f"available: {', '.join(sorted(detectors))}")
+            region.detector = detectors[region.detector]
@@ -0,0 +1,169 @@
+"""
+RingBuffer module for fixed-capacity detection and action histories.
+"""
+
+import numpy as np
+
+
+class RingBuffer:
+    """
+    Fixed-capacity history of boolean results with O(1) append.
+    
+    The storage is allocated once: a bool array for single results, or one row of
+    bits per entry (np.packbits) when every entry holds the results of width areas.
+    Once the buffer is full, appending overwrites the oldest entry instead of
+    re-slicing a list, so memory stays flat however long the agent runs.
+    
+    Indexing, slicing, iteration and comparison with lists behave like a list of
+    the retained entries, oldest first; entries are returned as bool or as a new
+    list of bools.
+    
+    Attributes:
+        capacity: Maximum number of entries kept.
+        width: Number of results per entry (None for single results).
+    """
+    
+    def __init__(self, capacity, width=None, entries=()):
+        """
+        Initialize a RingBuffer.
+        
+        Args:
+            capacity: Maximum number of entries kept.
+            width: Number of results per entry (None for single results).
+            entries: Optional initial entries, oldest first.
+        
+        Raises:
+            ValueError: If capacity or width is not positive.
+        """
+        if capacity < 1:
+            raise ValueError("capacity must be positive")
+        if width is not None and width < 1:
+            raise ValueError("width must be positive")
+        
+        self.capacity = capacity
+        self.width = width
+        if width is None:
+            self._data = np.zeros(capacity, dtype=bool)
+        else:
+            self._data = np.zeros((capacity, (width + 7) // 8), dtype=np.uint8)
+        self._start = 0
+        self._length = 0
+        
+        for entry in entries:
+            self.append(entry)
+    
+    def _slot(self, index):
+        """Get the storage row of an entry index, which may be negative."""
+        if index < 0:
+            index += self._length
+        if index < 0 or index >= self._length:
+            raise IndexError("RingBuffer index out of range")
+        return (self._start + index) % self.capacity
+    
+    def _pack(self, values):
+        """Pack one entry of width results into a row of bits."""
+        values = np.asarray(values, dtype=bool)
+        if values.shape != (self.width,):
+            raise ValueError(f"Expected {self.width} results per entry, got {values.shape}")
+        return np.packbits(values)
+    
+    def append(self, value):
+        """
+        Append an entry, dropping the oldest one when the buffer is full.
+        
+        Args:
+            value: A result (True/False), or a sequence of width results.
+        """
+        slot = (self._start + self._length) % self.capacity
+        if self.width is None:
+            self._data[slot] = bool(value)
+        else:
+            self._data[slot] = self._pack(value)
+        
+        if self._length == self.capacity:
+            self._start = (self._start + 1) % self.capacity
+        else:
+            self._length += 1
+    
+    def set_result(self, index, position, value):
+        """
+        Set one result of an entry in place.
+        
+        Args:
+            index: The index of the entry (negative counts from the newest).
+            position: The index of the result inside the entry (the area index).
+            value: The result (True/False).
+        
+        Raises:
+            ValueError: If the buffer holds single results.
+            IndexError: If the entry or position is out of range.
+        """
+        if self.width is None:
+            raise ValueError("set_result needs entries of several results")
+        if position < 0 or position >= self.width:
+            raise IndexError(f"Position {position} is out of range (0 to {self.width - 1}).")
+        
+        row = self._data[self._slot(index)]
+        bit = np.uint8(0x80 >> (position % 8))
+        if value:
+            row[position // 8] |= bit
+        else:
+            row[position // 8] &= ~bit
+    
+    def clear(self):
+        """Remove every entry without releasing the storage."""
+        self._start = 0
+        self._length = 0
+    
+    def copy(self):
+        """
+        Copy the buffer, storage included.
+        
+        Returns:
+            RingBuffer: A buffer with the same capacity, width and entries.
+        """
+        buffer = RingBuffer(self.capacity, self.width)
+        buffer._data = self._data.copy()
+        buffer._start = self._start
+        buffer._length = self._length
+        return buffer
+    
+    def to_list(self):
+        """
+        Copy the entries into a list.
+        
+        Returns:
+            list: The entries, oldest first.
+        """
+        return [self[i] for i in range(self._length)]
+    
+    @property
+    def nbytes(self):
+        """Bytes of storage, fixed by capacity and width."""
+        return self._data.nbytes
+    
+    def __len__(self):
+        return self._length
+    
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._length))]
+        
+        value = self._data[self._slot(index)]
+        if self.width is None:
+            return bool(value)
+        return np.unpackbits(value, count=self.width).astype(bool).tolist()
+    
+    def __iter__(self):
+        for i in range(self._length):
+            yield self[i]
+    
+    def __eq__(self, other):
+        if isinstance(other, (RingBuffer, list, tuple)):
+            return len(self) == len(other) and self.to_list() == list(other)
+        return NotImplemented
+    
+    __hash__ = None
+    
+    def __repr__(self):
+        return f"RingBuffer({self.to_list()!r}, capacity={self.capacity})"
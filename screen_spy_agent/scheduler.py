@@ -0,0 +1,185 @@
+"""
+FixedRateScheduler module for running per-area work at fixed rates on the monotonic clock.
+"""
+
+import time
+
+# What to do with runs missed because the work took longer than the interval
+SCHEDULE_POLICIES = ("skip", "catch_up")
+
+
+class ScheduledTask:
+    """
+    One task of a FixedRateScheduler.
+    
+    Attributes:
+        key: Key of the task (e.g. the area index).
+        interval: Seconds between two runs.
+        priority: Tasks with a higher priority run first when several are due.
+        next_run: Monotonic time of the next run.
+        runs: Number of runs.
+        skipped: Number of runs dropped by the policy.
+        max_lateness: Longest delay in seconds between a due time and its run.
+    """
+    
+    def __init__(self, key, interval, priority=0, next_run=0.0):
+        """
+        Initialize a ScheduledTask.
+        
+        Args:
+            key: Key of the task.
+            interval: Seconds between two runs.
+            priority: Tasks with a higher priority run first when several are due.
+            next_run: Monotonic time of the first run.
+        """
+        self.key = key
+        self.interval = interval
+        self.priority = priority
+        self.next_run = next_run
+        self.runs = 0
+        self.skipped = 0
+        self.max_lateness = 0.0
+
+
+class FixedRateScheduler:
+    """
+    Class for running tasks at fixed rates, each with its own interval and priority.
+    
+    The due times of a task are its start time plus whole multiples of its interval
+    on time.monotonic(), so the period does not grow by the time the work takes and
+    does not drift. When the work overruns one or more due times, the policy
+    decides: "skip" drops the missed runs and continues at the next due time in
+    the future, "catch_up" runs them back to back (at most max_catch_up of them).
+    
+    Attributes:
+        policy: "skip" or "catch_up".
+        max_catch_up: Most missed runs made up in "catch_up" mode; older ones are skipped.
+        tasks: ScheduledTask of each key.
+    """
+    
+    def __init__(self, policy="skip", max_catch_up=3, clock=None):
+        """
+        Initialize a FixedRateScheduler.
+        
+        Args:
+            policy: "skip" or "catch_up".
+            max_catch_up: Most missed runs made up in "catch_up" mode.
+            clock: Callable returning the current time in seconds (defaults to time.monotonic).
+        
+        Raises:
+            ValueError: If the policy is not supported or max_catch_up is negative.
+        """
+        if policy not in SCHEDULE_POLICIES:
+            raise ValueError(f"Unsupported schedule policy: {policy}")
+        if max_catch_up < 0:
+            raise ValueError("max_catch_up must be non-negative")
+        
+        self.policy = policy
+        self.max_catch_up = max_catch_up
+        self.clock = clock or time.monotonic
+        self.tasks = {}
+    
+    def add(self, key, interval, priority=0, start=None):
+        """
+        Schedule a task.
+        
+        Args:
+            key: Key of the task.
+            interval: Seconds between two runs (0 runs it whenever the scheduler is polled).
+            priority: Tasks with a higher priority run first when several are due.
+            start: Monotonic time of the first run (defaults to now).
+        
+        Raises:
+            ValueError: If the interval is negative.
+        """
+        if interval < 0:
+            raise ValueError(f"Interval of {key} must be non-negative")
+        self.tasks[key] = ScheduledTask(key, interval, priority, self.clock() if start is None else start)
+    
+    def reset(self, now=None):
+        """
+        Make every task due now, e.g. when the work starts long after the tasks were added.
+        
+        Args:
+            now: The current monotonic time (defaults to the clock).
+        """
+        now = self.clock() if now is None else now
+        for task in self.tasks.values():
+            task.next_run = now
+    
+    def due(self, now=None):
+        """
+        Get the tasks that are due.
+        
+        Args:
+            now: The current monotonic time (defaults to the clock).
+        
+        Returns:
+            list: The keys of the due tasks, highest priority first, then earliest due first.
+        """
+        now = self.clock() if now is None else now
+        due = [task for task in self.tasks.values() if task.next_run <= now]
+        due.sort(key=lambda task: (-task.priority, task.next_run))
+        return [task.key for task in due]
+    
+    def mark_run(self, key, now=None):
+        """
+        Record that a task has started and schedule its next run.
+        
+        Args:
+            key: Key of the task.
+            now: The current monotonic time (defaults to the clock).
+        
+        Returns:
+            int: The number of runs skipped by the policy.
+        """
+        now = self.clock() if now is None else now
+        task = self.tasks[key]
+        task.runs += 1
+        task.max_lateness = max(task.max_lateness, now - task.next_run)
+        
+        if task.interval == 0:
+            task.next_run = now
+            return 0
+        
+        task.next_run += task.interval
+        skipped = 0
+        if task.next_run <= now:
+            missed = int((now - task.next_run) // task.interval) + 1
+            skipped = missed if self.policy == "skip" else max(missed - self.max_catch_up, 0)
+            task.next_run += skipped * task.interval
+            task.skipped += skipped
+        return skipped
+    
+    def time_until_next(self, now=None):
+        """
+        Get the time until the next task is due.
+        
+        Args:
+            now: The current monotonic time (defaults to the clock).
+        
+        Returns:
+            float: Seconds until the next due time (0 if a task is due), or None without tasks.
+        """
+        if not self.tasks:
+            return None
+        now = self.clock() if now is None else now
+        return max(min(task.next_run for task in self.tasks.values()) - now, 0.0)
+    
+    def get_stats(self):
+        """
+        Get the statistics of every task.
+        
+        Returns:
+            dict: Interval, priority, runs, skipped runs and maximum lateness in milliseconds, by key.
+        """
+        return {
+            key: {
+                "interval": task.interval,
+                "priority": task.priority,
+                "runs": task.runs,
+                "skipped": task.skipped,
+                "max_lateness_ms": 1000.0 * task.max_lateness
+            }
+            for key, task in self.tasks.items()
+        }
@@ -2,27 +2,42 @@
 ScreenSpyAgent class that ties everything together.
 """
 
+import asyncio
+import inspect
 import threading
-import time
 import os
 import traceback
-from typing import TypedDict, List, Optional, Dict, Any, Union
+from typing import TypedDict, List, Optional, Dict, Any, Union, Annotated
 from langchain_core.runnables import chain
 from langgraph.graph import END, StateGraph
 
-from screen_spy_agent.screenshot_taker import ScreenshotTaker
+from screen_spy_agent.screenshot_taker import ScreenshotTaker, MultiAreaCapture
 from screen_spy_agent.image_analyzer import ImageAnalyzer
 from screen_spy_agent.mouse_controller import MouseController
-from screen_spy_agent.agent_state import AgentState
+from screen_spy_agent.agent_state import AgentState, append_history
 from screen_spy_agent.agent_node import AgentNode
+from screen_spy_agent.detectors import Detector, VisionModelDetector
+from screen_spy_agent.pipeline import PipelineEngine
+from screen_spy_agent.scheduler import FixedRateScheduler
+from screen_spy_agent.region import DETECTION_PHRASES
 
 # Thread-local storage for sharing components with nodes
 thread_local = threading.local()
 
-# Define the state schema for langgraph
+# Vertical shift applied to areas 1+ when "new chat" is detected in area 0
+NEW_CHAT_VERTICAL_SHIFT = -23
+
+# Supported capture modes
+CAPTURE_MODES = ("per_area", "single_grab")
+
+# Supported analysis modes
+ANALYSIS_MODES = ("sequential", "concurrent", "batched", "pipelined")
+
+# Define the state schema for langgraph; nodes return only the keys they change
+# and the histories are appended to, not replaced
 class AgentStateDict(TypedDict):
-    detection_history: List[Union[bool, List[bool]]]
-    action_history: List[bool]
+    detection_history: Annotated[List[Union[bool, List[bool]]], append_history]
+    action_history: Annotated[List[bool], append_history]
     current_screenshot: str
     current_screenshots: List[str]
     both_words_detected: bool
@@ -44,9 +59,33 @@ class ScreenSpyAgent:
         workflow: LangGraph workflow.
         running: Whether the agent is running.
         agent_thread: Thread for the agent loop.
+        capture_mode: "per_area" grabs each area separately, "single_grab" grabs all areas at once.
+        multi_area_capture: MultiAreaCapture instance used in "single_grab" mode (None otherwise).
+        save_screenshots: Whether screenshots are also written to disk for debugging.
+        analysis_mode: "sequential" analyzes one area after another, "concurrent" analyzes all areas at once,
+            "pipelined" overlaps capture, analysis and clicks in a PipelineEngine.
+        max_concurrency: Maximum number of analysis requests in flight in "concurrent" mode, and the
+            number of analysis workers in "pipelined" mode.
+        batch_composite: In "batched" mode, send one labelled composite image instead of one image per area.
+        change_detector: Optional ChangeDetector; unchanged areas reuse their last detection result.
+        detectors: Detector used for each area (None entries use the vision model directly).
+        click_detected_location: Whether to click the center of the element a detector located
+            instead of the area's fixed click coordinates.
+        skip_shift_detection: Whether to skip the area 0 "new chat" analysis and capture areas 1+
+            tall enough to cover both positions instead.
+        click_executor: Optional ClickExecutor that plays click sequences in the background.
+        click_futures: Future of the latest click sequence of each area, by area index.
+        pipeline: The PipelineEngine while the agent runs in "pipelined" mode (None otherwise).
+        scheduler: FixedRateScheduler that decides when each analyzed area is polled.
+        stop_event: threading.Event set by stop_agent() that interrupts every wait of the agent.
     """
     
-    def __init__(self, screenshot_taker, image_analyzer, mouse_controller, interval=15):
+    def __init__(self, screenshot_taker, image_analyzer, mouse_controller, interval=15,
+                 capture_mode="per_area", max_capture_gap=None, save_screenshots=False,
+                 analysis_mode="sequential", max_concurrency=4, batch_composite=False,
+                 change_detector=None, detectors=None, click_detected_location=False,
+                 skip_shift_detection=False, click_executor=None, area_intervals=None,
+                 area_priorities=None, schedule_policy="skip", stop_event=None, detection_phrases=None):
         """
         Initialize the agent with the given components.
         
@@ -55,6 +94,50 @@ class ScreenSpyAgent:
             image_analyzer: ImageAnalyzer instance.
             mouse_controller: MouseController instance.
             interval: Interval in seconds between screenshots.
+            capture_mode: "per_area" (one grab per area) or "single_grab" (one grab per cycle).
+            max_capture_gap: In "single_grab" mode, maximum distance in pixels between areas
+                that share a grab (None grabs the union of all areas at once).
+            save_screenshots: Whether to also write every screenshot to disk for debugging.
+                Screenshots are always handed to the image analyzer in memory.
+            analysis_mode: "sequential" (one area after another), "concurrent" (all areas at
+                once, using the async API when the analyzer is an AsyncImageAnalyzer),
+                "batched" (all areas in a single request) or "pipelined" (capture, analysis and
+                clicks as overlapping stages connected by bounded queues).
+            max_concurrency: Maximum number of analysis requests in flight in "concurrent" mode,
+                and the number of analysis workers in "pipelined" mode.
+            batch_composite: In "batched" mode, send one labelled composite image instead of
+                one image per area.
+            change_detector: Optional ChangeDetector. Areas whose screenshot has not changed
+                since their last analysis reuse the last detection result instead of being
+                analyzed again.
+            detectors: Detector (e.g. a DetectorCascade) used for every area, or a list with
+                one Detector or None per area. Areas without a detector ask the vision model
+                through image_analyzer.
+            click_detected_location: Whether to click the center of the element a detector
+                located (e.g. the OCR word box of "accept") instead of the area's fixed click
+                coordinates. Areas without a location fall back to the fixed coordinates.
+            skip_shift_detection: Whether to skip the area 0 "new chat" analysis, which only
+                serves to guess the vertical shift. Areas 1+ are then captured extended upward
+                by the shift so the element is inside them at either position, and clicks go
+                to the detected location. Requires click_detected_location.
+            click_executor: Optional ClickExecutor. Click sequences are then played on its
+                per-area workers and the agent keeps capturing and analyzing meanwhile;
+                without it clicks block the cycle.
+            area_intervals: Optional dict of per-area intervals in seconds, by area index;
+                other areas are polled every interval seconds.
+            area_priorities: Optional dict of per-area priorities, by area index; areas with a
+                higher priority are handled first when several are due (default 0).
+            schedule_policy: "skip" drops the polls an area missed while the agent was busy,
+                "catch_up" makes them up back to back.
+            stop_event: Optional threading.Event to share with the mouse controller and click
+                executor, so that stop_agent() also interrupts their waits between clicks.
+            detection_phrases: The phrase to detect in each area (defaults to DETECTION_PHRASES,
+                which covers four areas; more areas need their own phrases, see from_regions()).
+                
+        Raises:
+            ValueError: If capture_mode, analysis_mode or schedule_policy is not supported, shift
+                detection is skipped without clicking detected locations, an area interval or
+                priority refers to an unknown area, or an area has no detection phrase.
         """
         # Check if screenshot_taker is a list (multiple areas) or a single instance
         if isinstance(screenshot_taker, list):
@@ -70,14 +153,64 @@ class ScreenSpyAgent:
         self.agent_state = AgentState(num_areas=self.num_areas)
         self.running = False
         self.agent_thread = None
+        self.stop_event = stop_event or threading.Event()
+        
+        if capture_mode not in CAPTURE_MODES:
+            raise ValueError(f"Unsupported capture mode: {capture_mode}")
+        self.capture_mode = capture_mode
+        self.save_screenshots = save_screenshots
+        
+        if analysis_mode not in ANALYSIS_MODES:
+            raise ValueError(f"Unsupported analysis mode: {analysis_mode}")
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+        self.analysis_mode = analysis_mode
+        self.max_concurrency = max_concurrency
+        self.batch_composite = batch_composite
+        self.change_detector = change_detector
+        self._last_results = {}
+        # Guards the last results and the detected locations, which the analysis workers
+        # of the pipelined mode update from several threads
+        self._results_lock = threading.Lock()
+        if detectors is None or isinstance(detectors, Detector):
+            detectors = [detectors] * self.num_areas
+        self.detectors = list(detectors)
+        self.vision_detector = VisionModelDetector(image_analyzer)
+        if skip_shift_detection and not click_detected_location:
+            raise ValueError("skip_shift_detection requires click_detected_location")
+        self.click_detected_location = click_detected_location
+        self.skip_shift_detection = skip_shift_detection
+        
+        # Poll every area at a fixed rate, by default the global interval
+        area_intervals = dict(area_intervals or {})
+        area_priorities = dict(area_priorities or {})
+        for area_index in list(area_intervals) + list(area_priorities):
+            if area_index < 0 or area_index >= self.num_areas:
+                raise ValueError(f"Area index {area_index} is out of range (0 to {self.num_areas-1}).")
+        self.scheduler = FixedRateScheduler(schedule_policy)
+        for i in self.get_analyzed_areas():
+            self.scheduler.add(i, area_intervals.get(i, interval), area_priorities.get(i, 0))
+        self.click_executor = click_executor
+        self.click_futures = {}
+        self.pipeline = None
+        self._locations = {}
+        self._area_origins = {}
+        self._event_loop = None
+        self.multi_area_capture = None
+        if capture_mode == "single_grab":
+            # Pad the grab so that shifted crops stay inside the frame
+            self.multi_area_capture = MultiAreaCapture(
+                self.screenshot_takers,
+                max_shift=abs(NEW_CHAT_VERTICAL_SHIFT),
+                max_gap=max_capture_gap
+            )
         
         # Define the text phrases to detect for each area
-        self.detection_phrases = [
-            "new chat",       # Area 0
-            "reject accept",  # Area 1
-            "resume the",     # Area 2
-            "try again"       # Area 3
-        ]
+        if detection_phrases is None:
+            detection_phrases = DETECTION_PHRASES
+        if len(detection_phrases) < self.num_areas:
+            raise ValueError(f"{self.num_areas} areas need {self.num_areas} detection phrases, got {len(detection_phrases)}")
+        self.detection_phrases = list(detection_phrases)
         
         # Store components in thread_local
         thread_local.image_analyzer = image_analyzer
@@ -86,6 +219,52 @@ class ScreenSpyAgent:
         # Set up the workflow
         self.setup_workflow()
     
+    @classmethod
+    def from_regions(cls, regions, image_analyzer, mouse_controller, interval=15, **kwargs):
+        """
+        Create an agent that watches the given regions.
+        
+        Each region brings its screenshot area, phrase, click positions (set on the mouse
+        controller), and optionally its detector, interval and priority. Detector names
+        must have been resolved with resolve_detectors() first.
+        
+        Args:
+            regions: List of Region instances; the first one is area 0.
+            image_analyzer: ImageAnalyzer instance.
+            mouse_controller: MouseController instance.
+            interval: Interval in seconds between screenshots of regions without their own.
+            **kwargs: The other options of the agent. Detectors given here are used for the
+                regions without their own; area_intervals and area_priorities given here
+                take precedence over the regions' own.
+        
+        Returns:
+            ScreenSpyAgent: The agent (an instance of cls).
+        
+        Raises:
+            ValueError: If a region's detector is still a name, or an option is invalid.
+        """
+        for region in regions:
+            if isinstance(region.detector, str):
+                raise ValueError(f"Detector \"{region.detector}\" of {region!r} is not resolved")
+        
+        screenshot_takers = [ScreenshotTaker(*region.bbox, interval) for region in regions]
+        for i, region in enumerate(regions):
+            mouse_controller.set_click_coordinates(i, region.clicks)
+        
+        # A region's own detector replaces the one the options give for its area
+        detectors = kwargs.pop("detectors", None)
+        if detectors is None or isinstance(detectors, Detector):
+            detectors = [detectors] * len(regions)
+        detectors = [region.detector or detector for region, detector in zip(regions, detectors)]
+        area_intervals = {i: region.interval for i, region in enumerate(regions) if region.interval is not None}
+        area_intervals.update(kwargs.pop("area_intervals", None) or {})
+        area_priorities = {i: region.priority for i, region in enumerate(regions) if region.priority}
+        area_priorities.update(kwargs.pop("area_priorities", None) or {})
+        
+        return cls(screenshot_takers, image_analyzer, mouse_controller, interval,
+                   area_intervals=area_intervals, area_priorities=area_priorities,
+                   detectors=detectors, detection_phrases=[region.phrase for region in regions], **kwargs)
+    
     def setup_workflow(self):
         """Set up the LangGraph workflow."""
         # Create the workflow
@@ -110,6 +289,625 @@ class ScreenSpyAgent:
         # Compile the workflow
         self.workflow = builder.compile()
     
+    def capture_area(self, area_index, vertical_shift=0):
+        """
+        Capture the screenshot of one area, applying the vertical shift to areas 1+.
+        
+        Args:
+            area_index: The index of the area.
+            vertical_shift: The current vertical shift.
+            
+        Returns:
+            PIL.Image: The captured screenshot.
+        """
+        screenshot_taker = self.screenshot_takers[area_index]
+        
+        # Only areas after the first one follow the vertical shift
+        shift = vertical_shift if area_index > 0 else 0
+        # Without shift detection, areas 1+ also cover the position they move up to
+        extend_up = self.get_extend_up(area_index)
+        self._area_origins[area_index] = (screenshot_taker.x1, screenshot_taker.y1 + shift - extend_up)
+        if shift != 0:
+            print(f"Applied vertical shift {shift} to area {area_index}: ({screenshot_taker.x1}, {screenshot_taker.y1}) -> ({screenshot_taker.x1}, {screenshot_taker.y1 + shift})")
+            print(f"Applied vertical shift {shift} to area {area_index}: ({screenshot_taker.x2}, {screenshot_taker.y2}) -> ({screenshot_taker.x2}, {screenshot_taker.y2 + shift})")
+        
+        print(f"Capturing screenshot for area {area_index}...")
+        if self.multi_area_capture is not None:
+            if extend_up:
+                return self.multi_area_capture.crop(area_index, shift, extend_up)
+            return self.multi_area_capture.crop(area_index, shift)
+        
+        return screenshot_taker.capture_screenshot(
+            screenshot_taker.x1,
+            screenshot_taker.y1 + shift - extend_up,
+            screenshot_taker.x2,
+            screenshot_taker.y2 + shift
+        )
+    
+    def get_extend_up(self, area_index):
+        """
+        Get how many pixels above an area are captured with it.
+        
+        Args:
+            area_index: The index of the area.
+            
+        Returns:
+            int: The extension (non-zero only for areas 1+ when shift detection is skipped).
+        """
+        if self.skip_shift_detection and area_index > 0:
+            return abs(NEW_CHAT_VERTICAL_SHIFT)
+        return 0
+    
+    def get_analyzed_areas(self):
+        """
+        Get the indices of the areas that are captured and analyzed each cycle.
+        
+        Returns:
+            list: The area indices (without area 0 when shift detection is skipped).
+        """
+        if self.skip_shift_detection and self.num_areas > 1:
+            return list(range(1, self.num_areas))
+        return list(range(self.num_areas))
+    
+    def remember_location(self, area_index, result):
+        """
+        Keep the location a detector found for an area, for clicking.
+        
+        Args:
+            area_index: The index of the area.
+            result: The DetectionResult of the area.
+        """
+        with self._results_lock:
+            self._locations[area_index] = result.location if result.detected else None
+    
+    def save_area_screenshot(self, area_index, screenshot):
+        """
+        Write an area screenshot to disk (debug sink).
+        
+        Every area gets its own file so that areas do not overwrite each other.
+        
+        Args:
+            area_index: The index of the area.
+            screenshot: The PIL.Image to save.
+            
+        Returns:
+            str: The path to the saved screenshot.
+        """
+        screenshot_taker = self.screenshot_takers[area_index]
+        if self.num_areas == 1:
+            screenshot_path = screenshot_taker.save_screenshot(screenshot)
+            self.agent_state.set_current_screenshot(screenshot_path)
+        else:
+            screenshot_path = screenshot_taker.save_screenshot(screenshot, f"current_screenshot_{area_index}.jpg")
+            self.agent_state.set_current_screenshot_for_area(area_index, screenshot_path)
+        
+        print(f"Screenshot for area {area_index} saved to {screenshot_path}")
+        return screenshot_path
+    
+    def change_key(self, area_index, vertical_shift):
+        """
+        Get the change detector key of an area at a vertical shift.
+        
+        Args:
+            area_index: The index of the area.
+            vertical_shift: The current vertical shift.
+            
+        Returns:
+            tuple: The area index and the shift that applies to it.
+        """
+        return (area_index, vertical_shift if area_index > 0 else 0)
+    
+    def reuse_unchanged_result(self, area_index, vertical_shift, screenshot):
+        """
+        Get the last detection result of an area if its screenshot has not changed.
+        
+        Args:
+            area_index: The index of the area.
+            vertical_shift: The vertical shift the screenshot was captured with.
+            screenshot: The screenshot of the area.
+            
+        Returns:
+            bool: The last detection result, or None if the area needs analysis.
+        """
+        if self.change_detector is None:
+            return None
+        
+        key = self.change_key(area_index, vertical_shift)
+        with self._results_lock:
+            has_result = key in self._last_results
+            last_result = self._last_results.get(key)
+        if not has_result:
+            # No usable result yet (e.g. the last analysis failed)
+            self.change_detector.forget(key)
+        if self.change_detector.should_analyze(key, screenshot):
+            with self._results_lock:
+                self._last_results.pop(key, None)
+            return None
+        
+        print(f"Area {area_index} unchanged, reusing detection result {last_result}")
+        return last_result
+    
+    def remember_result(self, area_index, vertical_shift, detection_result):
+        """
+        Keep a fresh detection result for reuse while the area stays unchanged.
+        
+        Args:
+            area_index: The index of the area.
+            vertical_shift: The vertical shift the screenshot was captured with.
+            detection_result: The detection result.
+        """
+        if self.change_detector is not None:
+            with self._results_lock:
+                self._last_results[self.change_key(area_index, vertical_shift)] = detection_result
+    
+    def analyze_areas_if_changed(self, area_indices, screenshots, vertical_shift):
+        """
+        Analyze the changed areas together and reuse the results of unchanged ones.
+        
+        Args:
+            area_indices: The indices of the areas.
+            screenshots: The screenshots of the areas, in the same order.
+            vertical_shift: The vertical shift the screenshots were captured with.
+            
+        Returns:
+            list: The detection results, in the same order as the areas.
+        """
+        detection_results = [
+            self.reuse_unchanged_result(i, vertical_shift, screenshot)
+            for i, screenshot in zip(area_indices, screenshots)
+        ]
+        changed = [n for n, result in enumerate(detection_results) if result is None]
+        
+        if changed:
+            fresh_results = self.analyze_areas_together(
+                [area_indices[n] for n in changed],
+                [screenshots[n] for n in changed]
+            )
+            for n, detection_result in zip(changed, fresh_results):
+                detection_results[n] = detection_result
+                self.remember_result(area_indices[n], vertical_shift, detection_result)
+        
+        return detection_results
+    
+    def report_skipped_analyses(self):
+        """Print how many analyses the change detector has skipped so far."""
+        if self.change_detector is not None:
+            stats = self.change_detector.get_stats()
+            print(f"Change detector: {stats['skipped']} analyses skipped, {stats['analyzed']} performed")
+    
+    def get_detector(self, area_index):
+        """
+        Get the detector that analyzes an area.
+        
+        Args:
+            area_index: The index of the area.
+            
+        Returns:
+            Detector: The area's detector, or the vision model detector.
+        """
+        detector = self.detectors[area_index] if area_index < len(self.detectors) else None
+        return detector or self.vision_detector
+    
+    def analyze_area(self, area_index, screenshot):
+        """
+        Analyze the screenshot of one area for the area's detection phrase.
+        
+        Args:
+            area_index: The index of the area.
+            screenshot: The screenshot of the area.
+            
+        Returns:
+            bool: The detection result.
+        """
+        print(f"Analyzing screenshot for area {area_index} looking for \"{self.detection_phrases[area_index]}\"...")
+        result = self.get_detector(area_index).detect(
+            screenshot, 
+            self.detection_phrases[area_index],
+            area_index
+        )
+        self.remember_location(area_index, result)
+        return result.detected if result.conclusive else False
+    
+    async def analyze_areas_concurrently(self, area_indices, screenshots):
+        """
+        Analyze the screenshots of several areas at the same time.
+        
+        Async analyzers are awaited directly; blocking detectors run in worker threads.
+        At most max_concurrency analyses are in flight at once.
+        
+        Args:
+            area_indices: The indices of the areas.
+            screenshots: The screenshots of the areas, in the same order.
+            
+        Returns:
+            list: The detection results, in the same order as the areas.
+        """
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        
+        async def analyze(area_index, screenshot):
+            async with semaphore:
+                print(f"Analyzing screenshot for area {area_index} looking for \"{self.detection_phrases[area_index]}\"...")
+                result = await self.get_detector(area_index).detect_async(
+                    screenshot, self.detection_phrases[area_index], area_index
+                )
+                self.remember_location(area_index, result)
+                return result.detected if result.conclusive else False
+        
+        return list(await asyncio.gather(*(
+            analyze(area_index, screenshot) for area_index, screenshot in zip(area_indices, screenshots)
+        )))
+    
+    async def analyze_areas_batched(self, area_indices, screenshots):
+        """
+        Analyze the screenshots of several areas with a single request.
+        
+        Local detector stages run first; only the areas they cannot decide are sent.
+        
+        Args:
+            area_indices: The indices of the areas.
+            screenshots: The screenshots of the areas, in the same order.
+            
+        Returns:
+            list: The detection results, in the same order as the areas.
+        """
+        verdicts = {}
+        remaining = []
+        # The local stages (OCR, templates, brightness) are CPU work; keep them off the event loop
+        local_results = await self.run_blocking(self.detect_areas_locally, area_indices, screenshots)
+        for area_index, screenshot, result in zip(area_indices, screenshots, local_results):
+            if result.conclusive:
+                verdicts[area_index] = result.detected
+                self.remember_location(area_index, result)
+            else:
+                with self._results_lock:
+                    self._locations[area_index] = None
+                remaining.append((area_index, screenshot))
+        
+        if remaining:
+            remaining_indices = [area_index for area_index, _ in remaining]
+            remaining_screenshots = [screenshot for _, screenshot in remaining]
+            phrases = [self.detection_phrases[i] for i in remaining_indices]
+            print(f"Analyzing screenshots for areas {remaining_indices} in one request...")
+            detect = self.image_analyzer.detect_text_in_images_batch
+            if inspect.iscoroutinefunction(detect):
+                batch_verdicts = await detect(remaining_screenshots, phrases, area_indices=remaining_indices,
+                                              composite=self.batch_composite)
+            else:
+                batch_verdicts = await self.run_blocking(
+                    detect, remaining_screenshots, phrases, area_indices=remaining_indices,
+                    composite=self.batch_composite
+                )
+            
+            # Let the local stages learn from the model's verdicts; areas the answer has
+            # no verdict for count as not detected this cycle and teach nothing
+            await self.run_blocking(self.learn_batch_verdicts, remaining, batch_verdicts)
+            for area_index, _ in remaining:
+                verdicts[area_index] = bool(batch_verdicts[area_index])
+        
+        return [verdicts[i] for i in area_indices]
+    
+    def detect_areas_locally(self, area_indices, screenshots):
+        """
+        Run the local detector stages of several areas (blocking).
+        
+        Args:
+            area_indices: The indices of the areas.
+            screenshots: The screenshots of the areas, in the same order.
+            
+        Returns:
+            list: The DetectionResults, in the same order as the areas.
+        """
+        return [
+            self.get_detector(area_index).detect_local(screenshot, self.detection_phrases[area_index], area_index)
+            for area_index, screenshot in zip(area_indices, screenshots)
+        ]
+    
+    def learn_batch_verdicts(self, areas, batch_verdicts):
+        """
+        Teach the detectors of areas the verdicts of a batched request (blocking).
+        
+        Args:
+            areas: The (area index, screenshot) pairs that were sent.
+            batch_verdicts: Maps each area index to its verdict, or None if it has none.
+        """
+        for area_index, screenshot in areas:
+            verdict = batch_verdicts[area_index]
+            if verdict is not None:
+                self.get_detector(area_index).learn(
+                    screenshot, self.detection_phrases[area_index], area_index, verdict
+                )
+    
+    def analyze_areas_together(self, area_indices, screenshots):
+        """
+        Analyze several areas at once, concurrently or in one batch depending on the analysis mode.
+        
+        Args:
+            area_indices: The indices of the areas.
+            screenshots: The screenshots of the areas, in the same order.
+            
+        Returns:
+            list: The detection results, in the same order as the areas.
+        """
+        if self.analysis_mode == "batched":
+            return self.run_async(self.analyze_areas_batched(area_indices, screenshots))
+        return self.run_async(self.analyze_areas_concurrently(area_indices, screenshots))
+    
+    async def run_blocking(self, function, *args, **kwargs):
+        """
+        Run a blocking call in a worker thread.
+        
+        Args:
+            function: The callable.
+            *args: Positional arguments of the call.
+            **kwargs: Keyword arguments of the call.
+        
+        Returns:
+            The result of the call.
+        """
+        return await asyncio.to_thread(function, *args, **kwargs)
+    
+    def run_async(self, coroutine):
+        """
+        Run a coroutine on the agent's event loop.
+        
+        Args:
+            coroutine: The coroutine to run.
+            
+        Returns:
+            The result of the coroutine.
+        """
+        if self._event_loop is None or self._event_loop.is_closed():
+            self._event_loop = asyncio.new_event_loop()
+        return self._event_loop.run_until_complete(coroutine)
+    
+    def record_detection(self, area_index, detection_result):
+        """
+        Store a detection result in the agent state and update the vertical shift for area 0.
+        
+        Args:
+            area_index: The index of the area.
+            detection_result: The detection result.
+            
+        Returns:
+            int: The vertical shift in effect after this result.
+        """
+        # Update the agent state with the detection result
+        if self.num_areas == 1:
+            self.agent_state.update_detection(detection_result)
+        else:
+            self.agent_state.update_detection_for_area(area_index, detection_result)
+        
+        print(f"Area {area_index} detection result: {detection_result}")
+        
+        # For area 0, update the vertical shift based on the detection result
+        if area_index == 0:
+            # If "new chat" is detected in area 0, shift the other areas up, otherwise reset
+            vertical_shift = NEW_CHAT_VERTICAL_SHIFT if detection_result else 0
+            self.agent_state.set_vertical_shift(vertical_shift)
+            self.mouse_controller.set_vertical_shift(vertical_shift)
+            print(f"Vertical shift set to: {vertical_shift}")
+        
+        return self.agent_state.get_vertical_shift()
+    
+    def act_on_detection(self, area_index, detection_result):
+        """
+        Perform the clicks of an area if its phrase was detected (area 0 never clicks).
+        
+        Args:
+            area_index: The index of the area.
+            detection_result: The detection result.
+        """
+        if area_index > 0 and detection_result:
+            print(f"Detected the phrase \"{self.detection_phrases[area_index]}\" in area {area_index}, executing clicks...")
+            with self._results_lock:
+                location = self._locations.get(area_index) if self.click_detected_location else None
+            if self.click_executor is not None:
+                # Play the clicks in the background so the other areas keep being monitored
+                if location is not None:
+                    origin_x, origin_y = self._area_origins[area_index]
+                    future = self.click_executor.submit_box(area_index, origin_x, origin_y, location)
+                else:
+                    future = self.click_executor.submit_area(area_index)
+                self.click_futures[area_index] = future
+            elif location is not None:
+                origin_x, origin_y = self._area_origins[area_index]
+                self.mouse_controller.click_at_box(origin_x, origin_y, location)
+            else:
+                self.mouse_controller.click_at_position(area_index)
+    
+    def run_sequential_cycle(self, area_indices=None):
+        """
+        Capture, analyze and act on every area, one area after another.
+        
+        Args:
+            area_indices: The areas to handle, in order (defaults to every analyzed area).
+        
+        Returns:
+            list: The detection results of all areas.
+        """
+        # Areas that are not analyzed count as not detected
+        detection_results = [False] * self.num_areas
+        
+        # Start from the current vertical shift; area 0 updates it before areas 1+ when it is handled
+        vertical_shift = self.agent_state.get_vertical_shift()
+        
+        # In single-grab mode the screen is read once per cycle
+        if self.multi_area_capture is not None:
+            self.multi_area_capture.grab()
+        
+        if area_indices is None:
+            area_indices = self.get_analyzed_areas()
+        for i in area_indices:
+            # Capture a screenshot for this area
+            screenshot = self.capture_area(i, vertical_shift)
+            
+            # Optionally persist the screenshot for debugging
+            if self.save_screenshots:
+                self.save_area_screenshot(i, screenshot)
+            
+            # Analyze the screenshot with the appropriate text phrase, unless it is unchanged
+            detection_result = self.reuse_unchanged_result(i, vertical_shift, screenshot)
+            if detection_result is None:
+                detection_result = self.analyze_area(i, screenshot)
+                self.remember_result(i, vertical_shift, detection_result)
+            detection_results[i] = detection_result
+            
+            vertical_shift = self.record_detection(i, detection_result)
+            
+            # Perform clicks if text was detected in this area (except area 0)
+            self.act_on_detection(i, detection_result)
+        
+        return detection_results
+    
+    def run_concurrent_cycle(self, area_indices=None):
+        """
+        Capture every area, analyze all of them together, then act on the results.
+        
+        The areas are analyzed concurrently or in one batched request depending on the
+        analysis mode.
+        
+        Areas 1+ are captured with the vertical shift of the previous cycle. If the area 0
+        result of this cycle changes the shift, those areas are captured and analyzed again
+        at the new position, so clicks always follow the current area 0 result.
+        
+        Args:
+            area_indices: The areas to handle (defaults to every analyzed area).
+        
+        Returns:
+            list: The detection results of all areas.
+        """
+        vertical_shift = self.agent_state.get_vertical_shift()
+        
+        # In single-grab mode the screen is read once per cycle
+        if self.multi_area_capture is not None:
+            self.multi_area_capture.grab()
+        
+        area_indices = self.get_analyzed_areas() if area_indices is None else sorted(area_indices)
+        screenshots = [self.capture_area(i, vertical_shift) for i in area_indices]
+        results = self.analyze_areas_if_changed(area_indices, screenshots, vertical_shift)
+        
+        new_shift = vertical_shift
+        if self.num_areas > 1 and area_indices[0] == 0:
+            new_shift = NEW_CHAT_VERTICAL_SHIFT if results[0] else 0
+        
+        if new_shift != vertical_shift:
+            print(f"Vertical shift changed from {vertical_shift} to {new_shift}, re-analyzing areas 1-{self.num_areas - 1}")
+            shifted_indices = area_indices[1:]
+            screenshots[1:] = [self.capture_area(i, new_shift) for i in shifted_indices]
+            results[1:] = self.analyze_areas_if_changed(shifted_indices, screenshots[1:], new_shift)
+        
+        # Areas that are not analyzed count as not detected
+        detection_results = [False] * self.num_areas
+        for i, screenshot, detection_result in zip(area_indices, screenshots, results):
+            detection_results[i] = detection_result
+            
+            # Optionally persist the screenshot for debugging
+            if self.save_screenshots:
+                self.save_area_screenshot(i, screenshot)
+            
+            self.record_detection(i, detection_result)
+            self.act_on_detection(i, detection_result)
+        
+        return detection_results
+    
+    def pipeline_capture(self):
+        """
+        Capture stage of the pipelined mode: capture the due areas that are not in the pipeline.
+        
+        Returns:
+            list: (area index, vertical shift, screenshot) payloads.
+        """
+        vertical_shift = self.agent_state.get_vertical_shift()
+        area_indices = [i for i in self.scheduler.due() if not self.pipeline.is_busy(i)]
+        if not area_indices:
+            return []
+        for i in area_indices:
+            self.scheduler.mark_run(i)
+        
+        # In single-grab mode the screen is read once per capture
+        if self.multi_area_capture is not None:
+            self.multi_area_capture.grab()
+        
+        payloads = []
+        for i in area_indices:
+            screenshot = self.capture_area(i, vertical_shift)
+            
+            # Optionally persist the screenshot for debugging
+            if self.save_screenshots:
+                self.save_area_screenshot(i, screenshot)
+            payloads.append((i, vertical_shift, screenshot))
+        return payloads
+    
+    def pipeline_analyze(self, payload):
+        """
+        Analysis stage of the pipelined mode, run on the engine's worker threads.
+        
+        Args:
+            payload: The (area index, vertical shift, screenshot) of an area.
+            
+        Returns:
+            bool: The detection result.
+        """
+        area_index, vertical_shift, screenshot = payload
+        detection_result = self.reuse_unchanged_result(area_index, vertical_shift, screenshot)
+        if detection_result is None:
+            detection_result = self.analyze_area(area_index, screenshot)
+            self.remember_result(area_index, vertical_shift, detection_result)
+        return detection_result
+    
+    def pipeline_act(self, payload, detection_result):
+        """
+        Action stage of the pipelined mode: record the result and click.
+        
+        Results of areas 1+ captured with a vertical shift that area 0 has changed since
+        are dropped; the next capture uses the new shift.
+        
+        Args:
+            payload: The (area index, vertical shift, screenshot) of an area.
+            detection_result: The detection result.
+        """
+        area_index, vertical_shift, _ = payload
+        if area_index > 0 and self.num_areas > 1 and vertical_shift != self.agent_state.get_vertical_shift():
+            print(f"Dropping the result of area {area_index}: captured with vertical shift {vertical_shift}, "
+                  f"now {self.agent_state.get_vertical_shift()}")
+            return
+        
+        self.record_detection(area_index, detection_result)
+        self.act_on_detection(area_index, detection_result)
+    
+    def create_pipeline(self):
+        """
+        Create the PipelineEngine of the pipelined mode.
+        
+        Returns:
+            PipelineEngine: The engine, with one in-flight item per area at most.
+        """
+        return PipelineEngine(
+            self.pipeline_capture,
+            self.pipeline_analyze,
+            self.pipeline_act,
+            key=lambda payload: payload[0],
+            analysis_workers=self.max_concurrency,
+            stop_event=self.stop_event
+        )
+    
+    def run_pipeline(self):
+        """Run the pipelined mode until the agent is stopped, reporting the stage statistics."""
+        self.pipeline = self.create_pipeline()
+        self.scheduler.reset()
+        self.pipeline.start()
+        try:
+            while self.running:
+                # Report the statistics every interval until the agent is stopped
+                if self.stop_event.wait(max(self.interval, 1.0)):
+                    break
+                print(f"Pipeline stats: {self.pipeline.get_stats()}")
+                print(f"Schedule stats: {self.scheduler.get_stats()}")
+                self.report_skipped_analyses()
+        finally:
+            self.pipeline.stop(timeout=10)
+            print(f"Pipeline stats: {self.pipeline.get_stats()}")
+    
     def agent_loop(self):
         """The agent's main loop."""
         print("Agent started")
@@ -118,92 +916,56 @@ class ScreenSpyAgent:
         thread_local.image_analyzer = self.image_analyzer
         thread_local.mouse_controller = self.mouse_controller
         
-        while self.running:
-            try:
-                # Process each screenshot area
-                screenshot_paths = []
-                detection_results = []
-                
-                # Initialize verticalShift to 0
-                vertical_shift = 0
-                
-                for i, screenshot_taker in enumerate(self.screenshot_takers):
-                    # Initialize variables with original coordinates first
-                    original_x1 = screenshot_taker.x1
-                    original_y1 = screenshot_taker.y1
-                    original_x2 = screenshot_taker.x2
-                    original_y2 = screenshot_taker.y2
-                    shifted_y1 = original_y1
-                    shifted_y2 = original_y2
-
-                    # If this is not the first area, apply the vertical shift to the screenshot coordinates
-                    if i > 0 and vertical_shift != 0:
-                        shifted_y1 = original_y1 + vertical_shift
-                        shifted_y2 = original_y2 + vertical_shift
-                        print(f"Applied vertical shift {vertical_shift} to area {i}: ({original_x1}, {original_y1}) -> ({original_x1}, {shifted_y1})")
-                        print(f"Applied vertical shift {vertical_shift} to area {i}: ({original_x2}, {original_y2}) -> ({original_x2}, {shifted_y2})")
-
-                    # Capture a screenshot for this area
-                    print(f"Capturing screenshot for area {i}...")
-                    screenshot = screenshot_taker.capture_screenshot(original_x1, shifted_y1, original_x2, shifted_y2)
-                    screenshot_path = screenshot_taker.save_screenshot(screenshot)
-                    
-                    # Update the agent state
-                    print(f"Screenshot for area {i} saved to {screenshot_path}")
-                    
-                    if self.num_areas == 1:
-                        self.agent_state.set_current_screenshot(screenshot_path)
-                    else:
-                        self.agent_state.set_current_screenshot_for_area(i, screenshot_path)
-                    
-                    screenshot_paths.append(screenshot_path)
-                    
-                    # Analyze the screenshot with the appropriate text phrase
-                    print(f"Analyzing screenshot for area {i} looking for \"{self.detection_phrases[i]}\"...")
-                    detection_result = self.image_analyzer.detect_text_in_image(
-                        screenshot_path, 
-                        text_to_detect=self.detection_phrases[i]
-                    )
-                    
-                    # Update the agent state with the detection result
-                    if self.num_areas == 1:
-                        self.agent_state.update_detection(detection_result)
-                    else:
-                        self.agent_state.update_detection_for_area(i, detection_result)
-                    
-                    detection_results.append(detection_result)
-                    print(f"Area {i} detection result: {detection_result}")
+        try:
+            if self.analysis_mode == "pipelined":
+                # The stages run on the engine's threads until the agent is stopped
+                self.run_pipeline()
+                return
+            
+            self.scheduler.reset()
+            while self.running:
+                try:
+                    # Process the areas that are due, at their fixed rates
+                    due = self.scheduler.due()
+                    if due:
+                        for i in due:
+                            self.scheduler.mark_run(i)
+                        if self.analysis_mode in ("concurrent", "batched"):
+                            self.run_concurrent_cycle(due)
+                        else:
+                            self.run_sequential_cycle(due)
+                        self.report_skipped_analyses()
                     
-                    # For area 0, update the vertical shift based on the detection result
-                    if i == 0:
-                        # If "new chat" is detected in area 0, set verticalShift to -23, otherwise to 0
-                        vertical_shift = -23 if detection_result else 0
-                        self.agent_state.set_vertical_shift(vertical_shift)
-                        self.mouse_controller.set_vertical_shift(vertical_shift)
-                        print(f"Vertical shift set to: {vertical_shift}")
+                    # Update the agent state with the vertical shift
+                    state_dict = self.agent_state.get_state()
                     
-                    # Perform clicks if text was detected in this area (except area 0)
-                    if i > 0 and detection_result:
-                        print(f"Detected the phrase \"{self.detection_phrases[i]}\" in area {i}, executing clicks...")
-                        self.mouse_controller.click_at_position(i)
+                    # Wait until the next area is due; the processing time is not added to the period
+                    if self.running:
+                        wait = self.scheduler.time_until_next()
+                        print(f"Waiting for {wait:.1f} seconds...")
+                        self.stop_event.wait(wait)
                 
-                # Update the agent state with the vertical shift
-                state_dict = self.agent_state.get_state()
-                
-                # Wait for the next interval
-                if self.running:
-                    print(f"Waiting for {self.interval} seconds...")
-                    time.sleep(self.interval)
-            
-            except Exception as e:
-                print("Error in agent loop: ")
-                print(traceback.format_exc())
-                time.sleep(5)  # Wait a bit before retrying
+                except Exception as e:
+                    print("Error in agent loop: ")
+                    print(traceback.format_exc())
+                    self.stop_event.wait(5)  # Wait a bit before retrying
+        finally:
+            self.close_event_loop()
+    
+    def close_event_loop(self):
+        """Close the agent's event loop, closing the analyzer's connections on it first."""
+        if self._event_loop is not None:
+            close = getattr(self.image_analyzer, "close", None)
+            if inspect.iscoroutinefunction(close):
+                self._event_loop.run_until_complete(close())
+            self._event_loop.close()
+            self._event_loop = None
     
     def run_agent(self):
         """Start the agent's main loop in a separate thread."""
         if not self.running:
             self.running = True
+            self.stop_event.clear()
             self.agent_thread = threading.Thread(target=self.agent_loop)
             self.agent_thread.daemon = True
             self.agent_thread.start()
@@ -212,6 +974,10 @@ class ScreenSpyAgent:
         """Stop the agent's main loop."""
         if self.running:
             self.running = False
+            # Wake the loop from any wait instead of letting it finish the interval
+            self.stop_event.set()
             if self.agent_thread:
                 self.agent_thread.join(timeout=10)
+                if self.agent_thread.is_alive():
+                    print("Agent thread did not stop within 10 seconds")
             print("Agent stopped") 
\ No newline at end of file
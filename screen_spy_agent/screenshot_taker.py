@@ -4,6 +4,7 @@ ScreenshotTaker module for capturing and saving screenshots of screen regions.
 
 import os
 import time
+import numpy as np
 import PIL.ImageGrab as ImageGrab
 
 
@@ -57,17 +58,20 @@ class ScreenshotTaker:
         """
         return ImageGrab.grab(bbox=(x1, y1, x2, y2))
     
-    def save_screenshot(self, image):
+    def save_screenshot(self, image, filename="current_screenshot.jpg"):
         """
-        Save a screenshot with a fixed filename.
+        Save a screenshot to disk.
+        
+        The agent analyzes screenshots in memory, so saving is only needed
+        for debugging.
         
         Args:
             image: The PIL.Image to save.
+            filename: The filename to save the image under.
             
         Returns:
             str: The absolute path to the saved image.
         """
-        filename = "current_screenshot.jpg"
         path = os.path.abspath(filename)
         image.save(path)
         return path
@@ -79,4 +83,196 @@ class ScreenshotTaker:
         Returns:
             str: The filename for the screenshot.
         """
-        return "current_screenshot.jpg" 
\ No newline at end of file
+        return "current_screenshot.jpg"
+
+
+class MultiAreaCapture:
+    """
+    Class for capturing several screen regions with a single screen grab.
+    
+    Instead of one ImageGrab round-trip per area, the union bounding box of all
+    areas is grabbed once per cycle and every area is cut out of that frame.
+    Areas that lie far apart can be split into separate groups (for example one
+    per monitor) so the union does not cover large unused parts of the screen.
+    
+    Attributes:
+        bboxes: List of (x1, y1, x2, y2) tuples, one per area.
+        max_shift: Largest absolute vertical shift that crops may request.
+        max_gap: Maximum distance in pixels between areas grabbed together (None for a single grab).
+        groups: List of lists of area indices that share one grab.
+        frames: List of (PIL.Image, left, top) tuples from the last grab, one per group.
+    """
+    
+    def __init__(self, bboxes, max_shift=0, max_gap=None):
+        """
+        Initialize a MultiAreaCapture for the given areas.
+        
+        Args:
+            bboxes: List of (x1, y1, x2, y2) tuples or ScreenshotTaker instances.
+            max_shift: Largest absolute vertical shift that crops may request.
+            max_gap: Maximum distance in pixels between areas grabbed together (None for a single grab).
+            
+        Raises:
+            ValueError: If no areas are given or max_shift is negative.
+        """
+        if len(bboxes) == 0:
+            raise ValueError("At least one area is required")
+        if max_shift < 0:
+            raise ValueError("max_shift must be non-negative")
+        
+        self.bboxes = []
+        for bbox in bboxes:
+            if isinstance(bbox, ScreenshotTaker):
+                bbox = (bbox.x1, bbox.y1, bbox.x2, bbox.y2)
+            x1, y1, x2, y2 = bbox
+            self.bboxes.append((min(x1, x2), min(y1, y2), max(x1, x2), max(y1, y2)))
+        
+        self.max_shift = max_shift
+        self.max_gap = max_gap
+        self.groups = self._group_areas()
+        self.frames = [None] * len(self.groups)
+        self._arrays = {}
+        
+        # Map each area to the group whose frame contains it
+        self._area_group = {}
+        for group_index, group in enumerate(self.groups):
+            for area_index in group:
+                self._area_group[area_index] = group_index
+    
+    def _group_areas(self):
+        """
+        Split the areas into groups that are grabbed together.
+        
+        Returns:
+            list: Lists of area indices.
+        """
+        if self.max_gap is None:
+            return [list(range(len(self.bboxes)))]
+        
+        groups = []
+        group_boxes = []
+        for area_index, (x1, y1, x2, y2) in enumerate(self.bboxes):
+            for group, box in zip(groups, group_boxes):
+                gx1, gy1, gx2, gy2 = box
+                # Distance between the rectangles along each axis (0 if they overlap)
+                dx = max(gx1 - x2, x1 - gx2, 0)
+                dy = max(gy1 - y2, y1 - gy2, 0)
+                if max(dx, dy) <= self.max_gap:
+                    group.append(area_index)
+                    box[:] = [min(gx1, x1), min(gy1, y1), max(gx2, x2), max(gy2, y2)]
+                    break
+            else:
+                groups.append([area_index])
+                group_boxes.append([x1, y1, x2, y2])
+        return groups
+    
+    def get_union_bbox(self, group_index=0):
+        """
+        Get the bounding box grabbed for a group, padded for vertical shifts.
+        
+        Args:
+            group_index: The index of the group.
+            
+        Returns:
+            tuple: The (x1, y1, x2, y2) bounding box.
+        """
+        boxes = [self.bboxes[i] for i in self.groups[group_index]]
+        x1 = min(box[0] for box in boxes)
+        y1 = max(min(box[1] for box in boxes) - self.max_shift, 0)
+        x2 = max(box[2] for box in boxes)
+        y2 = max(box[3] for box in boxes) + self.max_shift
+        return (x1, y1, x2, y2)
+    
+    def grab(self):
+        """
+        Grab the screen once per group and keep the frames for cropping.
+        
+        Returns:
+            list: The grabbed frames as (PIL.Image, left, top) tuples.
+        """
+        self._arrays = {}
+        for group_index in range(len(self.groups)):
+            bbox = self.get_union_bbox(group_index)
+            frame = ImageGrab.grab(bbox=bbox)
+            self.frames[group_index] = (frame, bbox[0], bbox[1])
+        return self.frames
+    
+    def _frame_box(self, area_index, shift):
+        """
+        Get the frame holding an area and the area box relative to that frame.
+        
+        Args:
+            area_index: The index of the area.
+            shift: Vertical shift to apply to the area.
+            
+        Returns:
+            tuple: The (frame, (left, top, right, bottom)) pair.
+            
+        Raises:
+            ValueError: If the shift is larger than max_shift.
+            RuntimeError: If grab() has not been called yet.
+        """
+        if abs(shift) > self.max_shift:
+            raise ValueError(f"Shift {shift} exceeds max_shift {self.max_shift}")
+        
+        frame_info = self.frames[self._area_group[area_index]]
+        if frame_info is None:
+            raise RuntimeError("grab() must be called before cropping")
+        
+        frame, left, top = frame_info
+        x1, y1, x2, y2 = self.bboxes[area_index]
+        y1 = max(y1 + shift, 0)
+        y2 = max(y2 + shift, y1)
+        return frame, (x1 - left, y1 - top, x2 - left, y2 - top)
+    
+    def crop(self, area_index, shift=0, extend_up=0):
+        """
+        Cut one area out of the last grabbed frame.
+        
+        Args:
+            area_index: The index of the area.
+            shift: Vertical shift to apply to the area.
+            extend_up: Extra pixels to include above the area (at most max_shift).
+            
+        Returns:
+            PIL.Image: The screenshot of the area.
+        """
+        frame, (left, top, right, bottom) = self._frame_box(area_index, shift)
+        if extend_up:
+            if extend_up > self.max_shift:
+                raise ValueError(f"extend_up {extend_up} exceeds max_shift {self.max_shift}")
+            top = max(top - extend_up, 0)
+        return frame.crop((left, top, right, bottom))
+    
+    def view(self, area_index, shift=0):
+        """
+        Get one area of the last grabbed frame as a NumPy view.
+        
+        The frame is converted to an array once per grab, so every area after the
+        first costs only a slice of the shared buffer.
+        
+        Args:
+            area_index: The index of the area.
+            shift: Vertical shift to apply to the area.
+            
+        Returns:
+            numpy.ndarray: A (height, width, channels) view into the frame buffer.
+        """
+        frame, (left, top, right, bottom) = self._frame_box(area_index, shift)
+        group_index = self._area_group[area_index]
+        if group_index not in self._arrays:
+            self._arrays[group_index] = np.asarray(frame)
+        return self._arrays[group_index][top:bottom, left:right]
+    
+    def capture_all(self, shift=0):
+        """
+        Grab the screen once and crop every area.
+        
+        Args:
+            shift: Vertical shift to apply to every area.
+            
+        Returns:
+            list: The screenshots of all areas, in area order.
+        """
+        self.grab()
+        return [self.crop(i, shift) for i in range(len(self.bboxes))]
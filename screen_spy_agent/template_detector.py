@@ -0,0 +1,339 @@
+"""
+TemplateDetector module for finding known button images with normalized cross-correlation.
+"""
+
+import json
+import os
+import re
+import numpy as np
+from PIL import Image
+
+from screen_spy_agent.detectors import Detector, DetectionResult, inconclusive
+
+# Name of the index file written next to the template images
+TEMPLATE_INDEX = "templates.json"
+
+
+def to_grayscale(image):
+    """
+    Convert an image to a float32 grayscale array.
+    
+    Args:
+        image: A PIL.Image or NumPy array (grayscale, RGB or RGBA).
+    
+    Returns:
+        numpy.ndarray: The 2-D grayscale array.
+    """
+    if isinstance(image, Image.Image):
+        return np.asarray(image.convert("L"), dtype=np.float32)
+    
+    pixels = np.asarray(image, dtype=np.float32)
+    if pixels.ndim == 3:
+        # ITU-R 601-2 luma, as used by PIL's "L" conversion
+        pixels = pixels[:, :, :3] @ np.array([0.299, 0.587, 0.114], dtype=np.float32)
+    return pixels
+
+
+def integral_tables(image):
+    """
+    Compute the integral images of an image and of its square.
+    
+    Args:
+        image: The 2-D float32 grayscale image.
+    
+    Returns:
+        numpy.ndarray: Array of shape (2, height + 1, width + 1) with both tables.
+    """
+    tables = np.zeros((2, image.shape[0] + 1, image.shape[1] + 1))
+    tables[0, 1:, 1:] = image
+    tables[1, 1:, 1:] = np.square(image)
+    np.cumsum(tables, axis=1, out=tables)
+    np.cumsum(tables, axis=2, out=tables)
+    return tables
+
+
+class Template:
+    """
+    Grayscale reference crop prepared for normalized cross-correlation.
+    
+    Attributes:
+        pixels: The 2-D float32 grayscale template.
+        zero_mean: The template minus its mean.
+        norm: The L2 norm of zero_mean (0 for a flat template).
+    """
+    
+    def __init__(self, pixels):
+        """
+        Initialize a Template.
+        
+        Args:
+            pixels: The 2-D float32 grayscale template.
+        """
+        self.pixels = pixels
+        self.zero_mean = pixels - pixels.mean()
+        self.norm = float(np.sqrt(np.square(self.zero_mean).sum()))
+        self._spectra = {}
+    
+    @property
+    def shape(self):
+        """The (height, width) of the template."""
+        return self.pixels.shape
+    
+    def spectrum(self, shape):
+        """
+        Get the conjugate spectrum of the template padded to an image shape (cached per shape).
+        
+        Args:
+            shape: The (height, width) of the image.
+        
+        Returns:
+            numpy.ndarray: The conjugate of the template's 2-D real FFT.
+        """
+        if shape not in self._spectra:
+            self._spectra[shape] = np.conj(np.fft.rfft2(self.zero_mean, s=shape))
+        return self._spectra[shape]
+    
+    def match(self, image, image_spectrum=None, tables=None):
+        """
+        Compute the best zero-mean normalized cross-correlation over an image.
+        
+        Window sums come from integral images and the correlation from one FFT
+        product, so no Python loop runs per position. The image spectrum and integral
+        tables can be passed in to share them between several templates.
+        
+        Args:
+            image: The 2-D float32 grayscale image.
+            image_spectrum: Optional precomputed np.fft.rfft2(image).
+            tables: Optional precomputed integral_tables(image).
+        
+        Returns:
+            tuple: The best score (-1 to 1) and its (x, y) position, or (0.0, None) if
+                the template does not fit or has no contrast.
+        """
+        height, width = self.shape
+        if height > image.shape[0] or width > image.shape[1] or self.norm == 0:
+            return 0.0, None
+        
+        if image_spectrum is None:
+            image_spectrum = np.fft.rfft2(image)
+        if tables is None:
+            tables = integral_tables(image)
+        
+        # Window sums of the image and its square
+        window_sums = (tables[:, height:, width:] - tables[:, :-height, width:]
+                       - tables[:, height:, :-width] + tables[:, :-height, :-width])
+        variance = window_sums[1] - np.square(window_sums[0]) / (height * width)
+        
+        # The template has zero mean, so the window mean drops out of the numerator.
+        # Positions where the template fits never wrap around, so circular correlation is exact there.
+        correlation = np.fft.irfft2(image_spectrum * self.spectrum(image.shape), s=image.shape)
+        numerator = correlation[:variance.shape[0], :variance.shape[1]]
+        denominator = np.sqrt(np.maximum(variance, 0)) * self.norm
+        
+        scores = np.zeros(numerator.shape)
+        np.divide(numerator, denominator, out=scores, where=denominator > 1e-6)
+        
+        y, x = np.unravel_index(int(np.argmax(scores)), scores.shape)
+        return float(scores[y, x]), (int(x), int(y))
+
+
+def match_template(image, template):
+    """
+    Compute the best zero-mean normalized cross-correlation of a template over an image.
+    
+    Args:
+        image: The 2-D float32 grayscale image.
+        template: The 2-D float32 grayscale template.
+    
+    Returns:
+        tuple: The best score (-1 to 1) and its (x, y) position, or (0.0, None) if
+            the template does not fit or has no contrast.
+    """
+    return Template(template).match(image)
+
+
+def template_filename(phrase, area_index, number):
+    """
+    Build the file name of a stored template.
+    
+    Args:
+        phrase: The phrase the template shows.
+        area_index: The index of the area (None for templates shared by all areas).
+        number: Running number of the template for this area and phrase.
+    
+    Returns:
+        str: The file name.
+    """
+    slug = re.sub(r"[^a-z0-9]+", "_", phrase.lower()).strip("_")
+    area = "any" if area_index is None else f"area{area_index}"
+    return f"{area}_{slug}_{number}.png"
+
+
+class TemplateDetector(Detector):
+    """
+    Detector that looks for reference crops of known buttons.
+    
+    Templates are stored per (area index, phrase); templates stored with area index
+    None are used for every area. A score at or above match_threshold is a match,
+    a score below reject_threshold is a confident "not present", anything between is
+    inconclusive so that a cascade can escalate.
+    
+    Attributes:
+        match_threshold: Minimum correlation score for a match.
+        reject_threshold: Score below which the phrase counts as not present.
+        templates: Dict mapping (area index, phrase) to lists of Template instances.
+    """
+    
+    name = "template"
+    
+    def __init__(self, template_dir=None, match_threshold=0.9, reject_threshold=0.5):
+        """
+        Initialize a TemplateDetector.
+        
+        Args:
+            template_dir: Directory to load templates from (None to start empty).
+            match_threshold: Minimum correlation score for a match.
+            reject_threshold: Score below which the phrase counts as not present.
+        
+        Raises:
+            ValueError: If reject_threshold is greater than match_threshold.
+        """
+        if reject_threshold > match_threshold:
+            raise ValueError("reject_threshold must not be greater than match_threshold")
+        
+        self.match_threshold = match_threshold
+        self.reject_threshold = reject_threshold
+        self.templates = {}
+        
+        if template_dir is not None:
+            self.load_templates(template_dir)
+    
+    def add_template(self, image, phrase, area_index=None):
+        """
+        Add a reference crop of a button.
+        
+        Args:
+            image: The crop as a PIL.Image or NumPy array.
+            phrase: The phrase the button shows.
+            area_index: The index of the area (None to use the template for every area).
+        """
+        self.templates.setdefault((area_index, phrase), []).append(Template(to_grayscale(image)))
+    
+    def get_templates(self, phrase, area_index=None):
+        """
+        Get the templates that apply to an area and phrase.
+        
+        Args:
+            phrase: The phrase to look for.
+            area_index: The index of the area.
+        
+        Returns:
+            list: The area's own templates followed by the shared ones.
+        """
+        templates = list(self.templates.get((area_index, phrase), []))
+        if area_index is not None:
+            templates.extend(self.templates.get((None, phrase), []))
+        return templates
+    
+    def match(self, image, phrase, area_index=None):
+        """
+        Find the best match of any template for an area and phrase.
+        
+        Args:
+            image: The screenshot as a PIL.Image or NumPy array.
+            phrase: The phrase to look for.
+            area_index: The index of the area.
+        
+        Returns:
+            tuple: The best score and the (x, y, width, height) of the match, or
+                (None, None) if there are no templates.
+        """
+        templates = self.get_templates(phrase, area_index)
+        if not templates:
+            return None, None
+        
+        gray = to_grayscale(image)
+        image_spectrum = np.fft.rfft2(gray)
+        tables = integral_tables(gray)
+        best_score, best_location = -1.0, None
+        for template in templates:
+            score, position = template.match(gray, image_spectrum, tables)
+            if position is not None and score > best_score:
+                best_score = score
+                best_location = (position[0], position[1], template.shape[1], template.shape[0])
+        return best_score, best_location
+    
+    def detect(self, image, text_to_detect, area_index=None):
+        """
+        Look for the templates of a phrase in an image.
+        
+        Args:
+            image: The screenshot as a PIL.Image or NumPy array.
+            text_to_detect: The phrase to look for.
+            area_index: The index of the area the screenshot belongs to.
+        
+        Returns:
+            DetectionResult: A match with its score and location, a confident miss,
+                or an inconclusive result.
+        """
+        score, location = self.match(image, text_to_detect, area_index)
+        if score is None:
+            return inconclusive(self.name)
+        
+        if score >= self.match_threshold:
+            return DetectionResult(True, score, self.name, location)
+        if score < self.reject_threshold:
+            return DetectionResult(False, 1.0 - max(score, 0.0), self.name)
+        return DetectionResult(None, score, self.name, location)
+    
+    def save_templates(self, template_dir):
+        """
+        Write all templates as PNG files with an index file.
+        
+        Args:
+            template_dir: The directory to write to (created if missing).
+        """
+        os.makedirs(template_dir, exist_ok=True)
+        index = []
+        for (area_index, phrase), templates in self.templates.items():
+            for number, template in enumerate(templates):
+                filename = template_filename(phrase, area_index, number)
+                Image.fromarray(np.clip(template.pixels, 0, 255).astype(np.uint8)).save(
+                    os.path.join(template_dir, filename)
+                )
+                index.append({"file": filename, "phrase": phrase, "area_index": area_index})
+        
+        with open(os.path.join(template_dir, TEMPLATE_INDEX), "w") as f:
+            json.dump({"templates": index}, f, indent=4)
+        print(f"Saved {len(index)} templates to {template_dir}")
+    
+    def load_templates(self, template_dir):
+        """
+        Load the templates listed in a directory's index file.
+        
+        Args:
+            template_dir: The directory to read from.
+        
+        Returns:
+            int: The number of templates loaded.
+        """
+        index_path = os.path.join(template_dir, TEMPLATE_INDEX)
+        if not os.path.exists(index_path):
+            print(f"No template index found at {index_path}")
+            return 0
+        
+        with open(index_path, "r") as f:
+            index = json.load(f).get("templates", [])
+        
+        loaded = 0
+        for entry in index:
+            path = os.path.join(template_dir, entry["file"])
+            try:
+                with Image.open(path) as image:
+                    self.add_template(image, entry["phrase"], entry.get("area_index"))
+                loaded += 1
+            except OSError as e:
+                print(f"Error loading template {path}: {e}")
+        
+        print(f"Loaded {loaded} templates from {template_dir}")
+        return loaded
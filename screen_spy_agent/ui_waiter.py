@@ -0,0 +1,248 @@
+"""
+UiWaiter module for waiting until the screen reacts to a click instead of sleeping a fixed time.
+"""
+
+import time
+import numpy as np
+import PIL.ImageGrab as ImageGrab
+
+from screen_spy_agent.change_detector import ChangeDetector
+
+
+class UiWaitResult:
+    """
+    Outcome of waiting for the UI to react.
+    
+    Attributes:
+        changed: Whether the region changed.
+        settled: Whether the region stopped changing after it changed.
+        target_gone: Whether the target_gone check reported the target as gone.
+        timed_out: Whether the timeout ended the wait.
+        interrupted: Whether the stop event ended the wait.
+        latency: Seconds from the click to the first change (None if nothing changed).
+        elapsed: Seconds from the click to the end of the wait.
+        frames: Number of frames captured while waiting.
+    """
+    
+    def __init__(self, changed=False, settled=False, target_gone=False, timed_out=False,
+                 interrupted=False, latency=None, elapsed=0.0, frames=0):
+        """
+        Initialize a UiWaitResult.
+        
+        Args:
+            changed: Whether the region changed.
+            settled: Whether the region stopped changing after it changed.
+            target_gone: Whether the target was reported as gone.
+            timed_out: Whether the timeout ended the wait.
+            interrupted: Whether the stop event ended the wait.
+            latency: Seconds from the click to the first change.
+            elapsed: Seconds from the click to the end of the wait.
+            frames: Number of frames captured while waiting.
+        """
+        self.changed = changed
+        self.settled = settled
+        self.target_gone = target_gone
+        self.timed_out = timed_out
+        self.interrupted = interrupted
+        self.latency = latency
+        self.elapsed = elapsed
+        self.frames = frames
+    
+    def __repr__(self):
+        latency = "None" if self.latency is None else f"{self.latency * 1000:.0f}ms"
+        return (f"UiWaitResult(changed={self.changed}, settled={self.settled}, target_gone={self.target_gone}, "
+                f"timed_out={self.timed_out}, latency={latency}, elapsed={self.elapsed * 1000:.0f}ms)")
+
+
+class UiWaiter:
+    """
+    Class for waiting until a screen region reacts to a click and settles.
+    
+    After a click the region around it is captured every poll_interval seconds and
+    compared with the frame taken before the click (with the ChangeDetector metric).
+    The wait ends as soon as the region has changed and then stayed still for
+    settle_time, when an optional check reports the target as gone, or at the
+    timeout, so a sequence takes as long as the UI actually needs.
+    
+    Attributes:
+        threshold: Difference above which two frames count as different.
+        poll_interval: Seconds between captures.
+        settle_time: Seconds the region must stay unchanged after a change.
+        timeout: Longest wait in seconds.
+        region_size: (width, height) of the region captured around a click.
+        waits: Number of waits.
+        timeouts: Number of waits ended by the timeout.
+        latencies: Click-to-effect latencies in seconds of the waits that saw a change.
+    """
+    
+    def __init__(self, capture=None, threshold=1.0, method="mad", poll_interval=0.05, settle_time=0.15,
+                 timeout=3.0, region_size=(200, 80)):
+        """
+        Initialize a UiWaiter.
+        
+        Args:
+            capture: Callable taking an (x1, y1, x2, y2) box and returning the screenshot
+                as a PIL.Image or NumPy array (defaults to PIL.ImageGrab).
+            threshold: Difference above which two frames count as different.
+            method: "mad" or "tiles", see ChangeDetector.
+            poll_interval: Seconds between captures.
+            settle_time: Seconds the region must stay unchanged after a change.
+            timeout: Longest wait in seconds.
+            region_size: (width, height) of the region captured around a click.
+        
+        Raises:
+            ValueError: If poll_interval is not positive or timeout is negative.
+        """
+        if poll_interval <= 0:
+            raise ValueError("poll_interval must be positive")
+        if timeout < 0:
+            raise ValueError("timeout must be non-negative")
+        
+        self.capture = capture or (lambda bbox: ImageGrab.grab(bbox=bbox))
+        self.change_detector = ChangeDetector(threshold, method=method, force_refresh_interval=None)
+        self.threshold = threshold
+        self.poll_interval = poll_interval
+        self.settle_time = settle_time
+        self.timeout = timeout
+        self.region_size = region_size
+        self.waits = 0
+        self.timeouts = 0
+        self.latencies = []
+    
+    def region_around(self, x, y):
+        """
+        Get the region captured around a click position.
+        
+        Args:
+            x: The screen x-coordinate of the click.
+            y: The screen y-coordinate of the click.
+        
+        Returns:
+            tuple: The (x1, y1, x2, y2) box, clamped to the top-left screen corner.
+        """
+        width, height = self.region_size
+        x1, y1 = max(int(x) - width // 2, 0), max(int(y) - height // 2, 0)
+        return x1, y1, x1 + width, y1 + height
+    
+    def snapshot(self, bbox):
+        """
+        Capture a region as an array.
+        
+        Args:
+            bbox: The (x1, y1, x2, y2) box.
+        
+        Returns:
+            numpy.ndarray: The captured pixels.
+        """
+        return np.asarray(self.capture(bbox))
+    
+    def _changed(self, previous, current):
+        """Whether two frames differ by more than the threshold."""
+        if previous.shape != current.shape:
+            return True
+        return self.change_detector.difference(previous, current) > self.threshold
+    
+    def wait_for_change(self, bbox, reference=None, target_gone=None, timeout=None, start_time=None,
+                        stop_event=None):
+        """
+        Wait until a region changes and settles, its target is gone, or the timeout passes.
+        
+        Args:
+            bbox: The (x1, y1, x2, y2) box to watch.
+            reference: The frame from before the click (captured now if None).
+            target_gone: Optional callable taking a frame and returning True once the
+                clicked element has disappeared; the wait then ends without settling.
+            timeout: Longest wait in seconds (defaults to the waiter's timeout).
+            start_time: time.perf_counter() value of the click (defaults to now).
+            stop_event: Optional threading.Event that ends the wait early when set.
+        
+        Returns:
+            UiWaitResult: What happened and how long it took.
+        """
+        start = time.perf_counter() if start_time is None else start_time
+        timeout = self.timeout if timeout is None else timeout
+        if reference is None:
+            reference = self.snapshot(bbox)
+        
+        result = UiWaitResult()
+        previous = reference
+        stable_since = None
+        while True:
+            remaining = start + timeout - time.perf_counter()
+            if remaining <= 0:
+                result.timed_out = True
+                break
+            pause = min(self.poll_interval, remaining)
+            if stop_event is not None:
+                if stop_event.wait(pause):
+                    result.interrupted = True
+                    break
+            else:
+                time.sleep(pause)
+            
+            frame = self.snapshot(bbox)
+            now = time.perf_counter()
+            result.frames += 1
+            if target_gone is not None and target_gone(frame):
+                result.target_gone = True
+                if not result.changed:
+                    result.changed, result.latency = True, now - start
+                break
+            
+            if self._changed(previous, frame):
+                if not result.changed:
+                    result.changed, result.latency = True, now - start
+                previous, stable_since = frame, now
+            elif result.changed and now - stable_since >= self.settle_time:
+                result.settled = True
+                break
+        
+        result.elapsed = time.perf_counter() - start
+        self.waits += 1
+        if result.timed_out:
+            self.timeouts += 1
+        if result.latency is not None:
+            self.latencies.append(result.latency)
+        return result
+    
+    def click_and_wait(self, click, x, y, target_gone=None, timeout=None, stop_event=None):
+        """
+        Capture the region around a position, click, and wait for the region to react.
+        
+        Args:
+            click: Callable performing the click; its return value is passed through.
+            x: The screen x-coordinate of the click.
+            y: The screen y-coordinate of the click.
+            target_gone: Optional callable, see wait_for_change().
+            timeout: Longest wait in seconds (defaults to the waiter's timeout).
+            stop_event: Optional threading.Event that ends the wait early when set.
+        
+        Returns:
+            tuple: The click's return value and the UiWaitResult.
+        """
+        bbox = self.region_around(x, y)
+        reference = self.snapshot(bbox)
+        start = time.perf_counter()
+        clicked = click()
+        result = self.wait_for_change(bbox, reference, target_gone, timeout, start, stop_event)
+        if result.changed:
+            print(f"UI reacted {result.latency * 1000:.0f} ms after the click at ({x}, {y}), "
+                  f"continuing after {result.elapsed * 1000:.0f} ms")
+        else:
+            print(f"No UI change after the click at ({x}, {y}) within {result.elapsed:.1f} seconds")
+        return clicked, result
+    
+    def get_stats(self):
+        """
+        Get the click-to-effect statistics.
+        
+        Returns:
+            dict: Number of waits and timeouts, and the mean and maximum latency in milliseconds.
+        """
+        latencies = self.latencies
+        return {
+            "waits": self.waits,
+            "timeouts": self.timeouts,
+            "mean_latency_ms": 1000.0 * sum(latencies) / len(latencies) if latencies else 0.0,
+            "max_latency_ms": 1000.0 * max(latencies) if latencies else 0.0
+        }
@@ -10,6 +10,7 @@ setup(
         "langchain-openai>=0.0.5",
         "langchain-community>=0.0.13",
         "langgraph>=0.0.20",
+        "numpy>=1.22.0",
         "openai>=1.10.0",
         "pillow>=10.0.0",
         "pyautogui>=0.9.54",
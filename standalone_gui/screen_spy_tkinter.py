@@ -10,6 +10,23 @@ import pytesseract
 import re
 import os
 
+# Make the screen_spy_agent package importable when run from this directory
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from screen_spy_agent.ocr_engine import create_ocr_engine, LETTERS_WHITELIST
+from screen_spy_agent.ocr_preprocessing import OcrVariants
+from screen_spy_agent.ocr_strategy import AdaptiveOcrStrategy
+from screen_spy_agent.ocr_runner import ParallelOcrRunner, iter_attempts
+from screen_spy_agent.brightness_detector import BrightnessDetector
+
+# Statistics of which OCR attempts found the buttons, kept across runs
+OCR_STRATEGY_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "ocr_strategy.json")
+
+# Text containing both words, with the same partial matches recognize_text() accepts
+REJECT_ACCEPT_PATTERN = re.compile(
+    r'(?=.*(?:rej+e*c*t|reje?c?t|rej|jec|re.?ct))(?=.*(?:ac+e*p*t|acc?e?pt|acc|cept|ac+.?pt))',
+    re.IGNORECASE | re.DOTALL
+)
+
 class ScreenSpy:
     def __init__(self, root):
         self.root = root
@@ -54,6 +71,20 @@ class ScreenSpy:
         
         # Check for Tesseract installation
         self.tesseract_available = self.check_tesseract()
+        self.ocr_engine = None
+        if self.tesseract_available:
+            # Keep one OCR engine for the whole session instead of starting tesseract per call
+            self.ocr_engine = self.create_ocr_engine()
+        # Spread OCR attempts over the cores when there is more than one
+        self.ocr_runner = None
+        if self.tesseract_available and (os.cpu_count() or 1) > 1:
+            self.ocr_runner = self.create_ocr_runner()
+        # Order of OCR attempts learned from earlier runs
+        self.ocr_strategy = AdaptiveOcrStrategy(state_path=OCR_STRATEGY_FILE)
+        # Text-likeness check used when OCR finds nothing or is not installed; only light
+        # text on a dark background, as the old backup check, so light-theme screens
+        # with ordinary dark text do not raise the alert
+        self.brightness_detector = BrightnessDetector(polarity="light")
         if not self.tesseract_available:
             self.status_var.set("Warning: Tesseract OCR not found. Using backup detection method.")
             # Keep text recognition enabled even without Tesseract
@@ -326,6 +357,25 @@ class ScreenSpy:
         except Exception as e:
             self.status_var.set(f"Error: {str(e)}")
     
+    def create_ocr_engine(self):
+        """Create the OCR engine, preferring the in-process Tesseract binding"""
+        try:
+            engine = create_ocr_engine()
+        except Exception as e:
+            print(f"In-process OCR engine not available: {str(e)}")
+            # Uses the tesseract path found by check_tesseract
+            engine = create_ocr_engine("subprocess")
+        print(f"Using OCR engine: {engine.name}")
+        return engine
+    
+    def create_ocr_runner(self):
+        """Create the process pool that runs OCR attempts in parallel"""
+        try:
+            return ParallelOcrRunner(tesseract_cmd=pytesseract.pytesseract.tesseract_cmd)
+        except Exception as e:
+            print(f"Parallel OCR not available, reading attempts one by one: {str(e)}")
+            return None
+    
     def recognize_text(self, image):
         """Recognize text in the image and check for 'accept'"""
         try:
@@ -335,144 +385,119 @@ class ScreenSpy:
             
             # First try with direct OCR if Tesseract is available
             if self.tesseract_available:
-                # Prepare image for better OCR - convert to grayscale
-                gray_image = image.convert('L')
-                
                 # Try multiple threshold values to improve detection
                 threshold_values = [100, 120, 140, 160, 180]  # Expanded range
                 
                 # Try multiple PSM modes
                 psm_modes = [7, 6, 10, 11, 3]  # Added more page segmentation modes
                 
-                # Enhanced attempts list with various preprocessing techniques
-                attempts = []
+                # An Otsu binarization with detected text polarity comes first, then the
+                # thresholded, inverted, scaled, grayscale and original variants, built
+                # from one NumPy threshold stack on first use and reused for every PSM mode
+                attempts = OcrVariants(image, threshold_values, scale=2, auto="otsu")
                 
-                # Add thresholded images
-                for threshold in threshold_values:
-                    # Standard threshold (dark text on light background)
-                    binary = gray_image.point(lambda p: 0 if p < threshold else 255)
-                    attempts.append((binary, f"binary-{threshold}"))
+                # Try with various combinations of image processing and OCR settings
+                # PSM 7 - Treat the image as a single text line
+                # PSM 6 - Assume a single uniform block of text
+                # PSM 10 - Treat the image as a single character
+                # PSM 11 - Sparse text. Find as much text as possible in no particular order
+                # PSM 3 - Fully automatic page segmentation (default)
+                #
+                # Try the (variant, PSM) combinations that found the phrase before first,
+                # and stop once the tried ones account for most of the past hits
+                plan = self.ocr_strategy.plan(attempts.names, psm_modes)
+                planned = ((attempts.variant(method), method, psm) for method, psm in plan)
+                # Allow more characters but optimize for "accept". With the process pool the
+                # attempts run on all cores and the rest are cancelled at the first hit
+                if self.ocr_runner is not None:
+                    results = self.ocr_runner.run(planned, REJECT_ACCEPT_PATTERN, LETTERS_WHITELIST,
+                                                  stop_on_hit=not plan.exploring)
+                else:
+                    results = iter_attempts(self.ocr_engine, planned, REJECT_ACCEPT_PATTERN, LETTERS_WHITELIST,
+                                            stop_on_hit=not plan.exploring)
+                alerted = False
+                for result in results:
+                    method, psm, text = result.method, result.psm, result.text
+                    if result.error is not None:
+                        print(f"OCR attempt failed (method: {method}, psm: {psm}): {result.error}")
+                        continue
+                    print(f"OCR result (method: {method}, psm: {psm}, {result.elapsed * 1000:.0f} ms): '{text.strip()}'")
                     
-                    # Inverted threshold (light text on dark background)
-                    inverted = gray_image.point(lambda p: 255 if p < threshold else 0)
-                    attempts.append((inverted, f"inverted-{threshold}"))
+                    # Check for both "reject" and "accept" in the same text
+                    has_accept = re.search(r'ac+e*p*t|acc?e?pt|accept', text, re.IGNORECASE) is not None
+                    has_reject = re.search(r'rej+e*c*t|reje?c?t|reject', text, re.IGNORECASE) is not None
                     
-                    # Scaled versions
-                    scaled_binary = binary.resize((width*2, height*2), Image.LANCZOS)
-                    attempts.append((scaled_binary, f"scaled-binary-{threshold}"))
+                    # Check for partial matches for accept
+                    if not has_accept:
+                        has_accept = (re.search(r'acc', text, re.IGNORECASE) or 
+                                    re.search(r'cept', text, re.IGNORECASE) or
+                                    re.search(r'ac+.?pt', text, re.IGNORECASE)) is not None
                     
-                    scaled_inverted = inverted.resize((width*2, height*2), Image.LANCZOS)
-                    attempts.append((scaled_inverted, f"scaled-inverted-{threshold}"))
-                
-                # Also add original images
-                attempts.append((gray_image, "grayscale"))
-                attempts.append((image, "original"))
-                scaled_gray = gray_image.resize((width*2, height*2), Image.LANCZOS)
-                attempts.append((scaled_gray, "scaled-grayscale"))
-                scaled_original = image.resize((width*2, height*2), Image.LANCZOS)
-                attempts.append((scaled_original, "scaled-original"))
-                
-                # Try with various combinations of image processing and OCR settings
-                for img, method in attempts:
-                    for psm in psm_modes:
-                        try:
-                            # Try with different OCR configurations
-                            # PSM 7 - Treat the image as a single text line
-                            # PSM 6 - Assume a single uniform block of text
-                            # PSM 10 - Treat the image as a single character
-                            # PSM 11 - Sparse text. Find as much text as possible in no particular order
-                            # PSM 3 - Fully automatic page segmentation (default)
-                            
-                            # Allow more characters but optimize for "accept"
-                            custom_config = f'--oem 3 --psm {psm} -c tessedit_char_whitelist=ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz'
-                            
-                            # Convert image to text
-                            text = pytesseract.image_to_string(img, config=custom_config)
-                            print(f"OCR result (method: {method}, psm: {psm}): '{text.strip()}'")
-                            
-                            # Check for both "reject" and "accept" in the same text
-                            has_accept = re.search(r'ac+e*p*t|acc?e?pt|accept', text, re.IGNORECASE) is not None
-                            has_reject = re.search(r'rej+e*c*t|reje?c?t|reject', text, re.IGNORECASE) is not None
-                            
-                            # Check for partial matches for accept
-                            if not has_accept:
-                                has_accept = (re.search(r'acc', text, re.IGNORECASE) or 
-                                            re.search(r'cept', text, re.IGNORECASE) or
-                                            re.search(r'ac+.?pt', text, re.IGNORECASE)) is not None
-                            
-                            # Check for partial matches for reject
-                            if not has_reject:
-                                has_reject = (re.search(r'rej', text, re.IGNORECASE) or 
-                                            re.search(r'jec', text, re.IGNORECASE) or
-                                            re.search(r're.?ct', text, re.IGNORECASE)) is not None
-                            
-                            # Update states based on what we found
-                            if has_accept:
-                                self.accept_found.set(True)
-                            
-                            if has_reject:
-                                self.reject_found.set(True)
-                            
-                            # If both are found, set the combined state
-                            if has_accept and has_reject:
-                                self.reject_accept_found.set(True)
-                                self.accept_status_var.set("'reject accept' FOUND TOGETHER!")
-                                self.status_indicator.configure(style='Alert.TLabel')
-                                self.root.bell()
-                                self.root.attributes('-topmost', True)
-                                self.root.update()
-                                self.root.attributes('-topmost', False)
-                                return
-                            # If only accept is found but combined state is not activated yet
-                            elif has_accept and not self.reject_accept_found.get():
-                                self.accept_status_var.set("'accept' FOUND!")
-                                self.status_indicator.configure(style='Alert.TLabel')
-                            # If only reject is found but combined state is not activated yet
-                            elif has_reject and not self.reject_accept_found.get():
-                                self.accept_status_var.set("'reject' FOUND!")
-                                self.status_indicator.configure(style='Alert.TLabel')
-                                
-                        except Exception as e:
-                            print(f"OCR attempt failed (method: {method}, psm: {psm}): {str(e)}")
-                            continue
-            
-            # If we get here, try pattern matching as backup
-            # This is simplified image analysis that works without Tesseract
-            # Convert to grayscale for simplicity
-            gray = image.convert('L')
-            
-            # Get pixel data
-            pixels = list(gray.getdata())
-            avg_brightness = sum(pixels) / len(pixels)
-            
-            # This is a very simplified backup method - looking for bright text on dark background
-            # It's not as accurate as OCR but can serve as a fallback
-            # Specifically checking for patterns that could indicate "accept" text
-            if avg_brightness < 100:  # Dark background with light text (like the screenshot)
-                # Count bright pixels - in a pattern consistent with text
-                bright_pixels = sum(1 for p in pixels if p > 200)
-                bright_ratio = bright_pixels / len(pixels)
-                
-                print(f"Backup detection - Avg brightness: {avg_brightness}, Bright ratio: {bright_ratio}")
-                
-                # If we have a significant number of bright pixels (potential text)
-                if 0.01 < bright_ratio < 0.5:  # Adjusted to be more permissive
-                    print("Potential text detected by backup method")
+                    # Check for partial matches for reject
+                    if not has_reject:
+                        has_reject = (re.search(r'rej', text, re.IGNORECASE) or 
+                                    re.search(r'jec', text, re.IGNORECASE) or
+                                    re.search(r're.?ct', text, re.IGNORECASE)) is not None
                     
-                    # Since we can't do precise OCR without Tesseract, just assume there might be "reject accept"
-                    # This is a very simplistic approach, but better than nothing for backup
-                    if not self.reject_accept_found.get():
-                        # Set all detection states as potentials
+                    # Update states based on what we found
+                    if has_accept:
                         self.accept_found.set(True)
+                    
+                    if has_reject:
                         self.reject_found.set(True)
-                        self.reject_accept_found.set(True)
-                        self.accept_status_var.set("Potential 'reject accept' detected!")
+                    
+                    # Let the strategy learn which attempts find the phrase
+                    plan.record(has_accept and has_reject, (method, psm))
+                    
+                    # If both are found, set the combined state
+                    if has_accept and has_reject:
+                        if not alerted:
+                            self.reject_accept_found.set(True)
+                            self.accept_status_var.set("'reject accept' FOUND TOGETHER!")
+                            self.status_indicator.configure(style='Alert.TLabel')
+                            self.root.bell()
+                            self.root.attributes('-topmost', True)
+                            self.root.update()
+                            self.root.attributes('-topmost', False)
+                            alerted = True
+                        # Exploring frames keep going to measure the other attempts
+                        if not plan.exploring:
+                            return
+                    # If only accept is found but combined state is not activated yet
+                    elif has_accept and not self.reject_accept_found.get():
+                        self.accept_status_var.set("'accept' FOUND!")
                         self.status_indicator.configure(style='Alert.TLabel')
-                        self.root.bell()
-                        self.root.attributes('-topmost', True)
-                        self.root.update()
-                        self.root.attributes('-topmost', False)
-                
+                    # If only reject is found but combined state is not activated yet
+                    elif has_reject and not self.reject_accept_found.get():
+                        self.accept_status_var.set("'reject' FOUND!")
+                        self.status_indicator.configure(style='Alert.TLabel')
+                if plan.found:
+                    return
+            
+            # If we get here, look for text-like shapes as backup
+            # This works without Tesseract but cannot read the words
+            result = self.brightness_detector.detect(image, "reject accept")
+            features = self.brightness_detector.last_features
+            if features is not None:
+                print(f"Backup detection - Avg brightness: {features['mean']:.1f}, "
+                      f"Bright ratio: {features['bright_ratio']:.3f}, Result: {result}")
+            
+            if result.detected:
+                print("Potential text detected by backup method")
+                # Since we can't do precise OCR without Tesseract, just assume there might be "reject accept"
+                # This is a very simplistic approach, but better than nothing for backup
+                if not self.reject_accept_found.get():
+                    # Set all detection states as potentials
+                    self.accept_found.set(True)
+                    self.reject_found.set(True)
+                    self.reject_accept_found.set(True)
+                    self.accept_status_var.set("Potential 'reject accept' detected!")
+                    self.status_indicator.configure(style='Alert.TLabel')
+                    self.root.bell()
+                    self.root.attributes('-topmost', True)
+                    self.root.update()
+                    self.root.attributes('-topmost', False)
+            
         except Exception as e:
             self.status_var.set(f"Text recognition error: {str(e)}")
             print(f"OCR Error: {str(e)}")
@@ -485,6 +510,11 @@ class ScreenSpy:
     
     def on_close(self):
         self.running = False
+        if self.ocr_engine is not None:
+            self.ocr_engine.close()
+        if self.ocr_runner is not None:
+            self.ocr_runner.close()
+        self.ocr_strategy.save()
         self.root.destroy()
 
     def check_tesseract(self):
@@ -1,7 +1,10 @@
 import pytest
 from unittest.mock import patch, MagicMock
 from screen_spy_agent.agent_node import AgentNode
-from screen_spy_agent.agent_state import AgentState
+from screen_spy_agent.agent_state import AgentState, append_history
+from screen_spy_agent.ring_buffer import RingBuffer
+from screen_spy_agent.screen_spy_agent import AgentStateDict
+from langgraph.graph import END, StateGraph
 
 
 class TestAgentNode:
@@ -110,4 +113,51 @@ class TestAgentNode:
         assert len(state.detection_history) == 1
         assert len(state.action_history) == 1
         assert state.detection_history[0] is True
-        assert state.action_history[0] is True 
\ No newline at end of file
+        assert state.action_history[0] is True
+
+    def test_dict_nodes_return_only_changed_keys(self):
+        """Test that dictionary states get partial updates and are not copied or modified."""
+        state = AgentState().get_state()
+        mock_analyzer = MagicMock()
+        mock_analyzer.detect_text_in_image.return_value = True
+        mock_controller = MagicMock()
+        mock_controller.click_at_position.return_value = True
+        
+        assert AgentNode.detect_words_in_screenshot(state, mock_analyzer) == {
+            "both_words_detected": True,
+            "detection_history": [True]
+        }
+        assert AgentNode.decide_action({**state, "both_words_detected": True}) == {"should_click": True}
+        assert AgentNode.execute_action({**state, "should_click": True}, mock_controller) == {"action_history": [True]}
+        assert AgentNode.execute_action(state, mock_controller) == {}
+        assert state["detection_history"] == []
+
+    def test_append_history_reducer(self):
+        """Test that the reducer adopts a copy of a RingBuffer, appends to it in place and concatenates lists."""
+        history = RingBuffer(2)
+        adopted = append_history([], history)
+        assert adopted is not history
+        assert append_history(adopted, [True, False, True]) is adopted
+        assert adopted == [False, True]
+        assert history == []
+        assert append_history([True], [False]) == [True, False]
+    
+    def test_workflow_does_not_change_its_input(self):
+        """Test that running a graph leaves the histories of the invoking state unchanged."""
+        builder = StateGraph(AgentStateDict)
+        builder.add_node("detect", lambda state: {"detection_history": [True]})
+        builder.add_node("act", lambda state: {"action_history": [True]})
+        builder.add_edge("detect", "act")
+        builder.add_edge("act", END)
+        builder.set_entry_point("detect")
+        workflow = builder.compile()
+        state = AgentState()
+        
+        for _ in range(2):
+            result = workflow.invoke(state.get_state())
+        
+        assert result["detection_history"] == [True]
+        assert result["action_history"] == [True]
+        assert state.detection_history == []
+        assert state.action_history == []
+
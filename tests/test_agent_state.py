@@ -199,4 +199,17 @@ class TestAgentState:
         assert state.detection_history == expected_history
         
         # The last 3 action items should be [True, False, True] (for i=2,3,4)
-        assert state.action_history == [True, False, True] 
\ No newline at end of file
+        assert state.action_history == [True, False, True]
+
+    def test_history_stays_bounded_in_place(self):
+        """Test that long runs reuse the same history storage."""
+        state = AgentState(history_limit=5, num_areas=4)
+        history = state.get_state()["detection_history"]
+        
+        for i in range(1000):
+            for area in range(4):
+                state.update_detection_for_area(area, (i + area) % 2 == 0)
+        
+        assert state.get_state()["detection_history"] is history
+        assert len(history) == 5
+        assert history[-1] == [False, True, False, True]
@@ -0,0 +1,133 @@
+import pytest
+import asyncio
+import time
+from unittest.mock import patch, MagicMock, AsyncMock
+from PIL import Image
+from screen_spy_agent.async_image_analyzer import AsyncImageAnalyzer
+
+
+def make_response(content):
+    """Create a chat completions response with the given content."""
+    response = MagicMock()
+    response.choices[0].message.content = content
+    return response
+
+
+class TestAsyncImageAnalyzer:
+    """Tests for the AsyncImageAnalyzer class."""
+
+    def test_init(self):
+        """Test initialization with valid parameters."""
+        analyzer = AsyncImageAnalyzer(
+            api_key="test_key",
+            api_base="https://api.example.com",
+            model="vis-openai/test-model",
+            max_concurrency=2
+        )
+        assert analyzer.model == "test-model"
+        assert analyzer.max_concurrency == 2
+
+    def test_init_invalid_concurrency(self):
+        """Test that a concurrency limit below 1 raises ValueError."""
+        with pytest.raises(ValueError):
+            AsyncImageAnalyzer("test_key", "https://api.example.com", "test-model", max_concurrency=0)
+
+    def test_client_is_replaced_when_the_event_loop_changes(self):
+        """Test that a client created by the analyzer is not reused on another event loop."""
+        def create_client(*args):
+            client = MagicMock()
+            client.chat.completions.create = AsyncMock(return_value=make_response("Yes."))
+            client.close = AsyncMock()
+            return client
+        with patch.object(AsyncImageAnalyzer, "create_client", create_client):
+            analyzer = AsyncImageAnalyzer("test_key", "https://api.example.com", "test-model")
+        analyzer.create_client = create_client
+        image = Image.new('RGB', (30, 10))
+        
+        async def detect_twice():
+            await analyzer.detect_text_in_image(image, text_to_detect="new chat")
+            await analyzer.detect_text_in_image(image, text_to_detect="try again")
+            return analyzer.client
+        
+        first = asyncio.run(detect_twice())
+        second = asyncio.run(detect_twice())
+        assert first is not second
+        assert first.chat.completions.create.await_count == 2
+        assert second.chat.completions.create.await_count == 2
+        
+        async def detect_and_close():
+            await analyzer.detect_text_in_image(image, text_to_detect="new chat")
+            client = analyzer.client
+            await analyzer.close()
+            return client
+        closed = asyncio.run(detect_and_close())
+        closed.close.assert_awaited_once()
+        assert analyzer.client is not closed
+        
+        # An assigned client is used on every loop
+        assigned = create_client()
+        analyzer.client = assigned
+        asyncio.run(detect_twice())
+        asyncio.run(detect_twice())
+        assert assigned.chat.completions.create.await_count == 4
+
+    def test_detect_text_in_image(self):
+        """Test that detect_text_in_image awaits the async client and parses the answer."""
+        analyzer = AsyncImageAnalyzer("test_key", "https://api.example.com", "test-model")
+        analyzer.client = MagicMock()
+        analyzer.client.chat.completions.create = AsyncMock(return_value=make_response("Yes."))
+        
+        result = asyncio.run(analyzer.detect_text_in_image(Image.new('RGB', (10, 10)), "try again"))
+        
+        assert result is True
+        analyzer.client.chat.completions.create.assert_awaited_once()
+
+    def test_detect_text_in_images_concurrently(self):
+        """Test that several images are analyzed in parallel under the concurrency limit."""
+        analyzer = AsyncImageAnalyzer("test_key", "https://api.example.com", "test-model", max_concurrency=2)
+        in_flight = 0
+        max_in_flight = 0
+        
+        async def create(**kwargs):
+            nonlocal in_flight, max_in_flight
+            in_flight += 1
+            max_in_flight = max(max_in_flight, in_flight)
+            await asyncio.sleep(0.05)
+            in_flight -= 1
+            question = kwargs["messages"][0]["content"][0]["text"]
+            return make_response("yes" if "reject accept" in question else "no")
+        
+        analyzer.client = MagicMock()
+        analyzer.client.chat.completions.create = create
+        images = [Image.new('RGB', (10, 10)) for _ in range(4)]
+        
+        start = time.perf_counter()
+        results = asyncio.run(analyzer.detect_text_in_images(
+            images, ["new chat", "reject accept", "resume the", "try again"]
+        ))
+        elapsed = time.perf_counter() - start
+        
+        assert results == [False, True, False, False]
+        assert max_in_flight == 2
+        assert elapsed < 0.15
+
+    def test_detect_text_in_images_length_mismatch(self):
+        """Test that each image needs one phrase."""
+        analyzer = AsyncImageAnalyzer("test_key", "https://api.example.com", "test-model")
+        with pytest.raises(ValueError):
+            asyncio.run(analyzer.detect_text_in_images([Image.new('RGB', (10, 10))], []))
+
+    def test_detect_text_in_images_batch(self):
+        """Test that the async batch request is awaited once for all areas."""
+        analyzer = AsyncImageAnalyzer("test_key", "https://api.example.com", "test-model")
+        analyzer.client = MagicMock()
+        analyzer.client.chat.completions.create = AsyncMock(
+            return_value=make_response('{"0": "no", "1": "yes"}')
+        )
+        
+        result = asyncio.run(analyzer.detect_text_in_images_batch(
+            [Image.new('RGB', (10, 10)), Image.new('RGB', (10, 10))], ["new chat", "reject accept"]
+        ))
+        
+        assert result == {0: False, 1: True}
+        analyzer.client.chat.completions.create.assert_awaited_once()
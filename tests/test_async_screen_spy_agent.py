@@ -0,0 +1,187 @@
+import pytest
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock
+from screen_spy_agent.async_screen_spy_agent import AsyncScreenSpyAgent
+from screen_spy_agent.detectors import Detector, DetectionResult
+
+
+def make_analyzer(phrase=None, delay=0.0):
+    """Create an analyzer with a coroutine detection method that finds one phrase."""
+    analyzer = MagicMock()
+    
+    async def detect(screenshot, text_to_detect):
+        await asyncio.sleep(delay)
+        return text_to_detect == phrase
+    analyzer.detect_text_in_image = detect
+    return analyzer
+
+
+class TestAsyncScreenSpyAgent:
+    """Tests for the AsyncScreenSpyAgent class."""
+    
+    def test_init_invalid_analysis_mode(self):
+        """Test that modes that need a thread of their own are rejected."""
+        with pytest.raises(ValueError):
+            AsyncScreenSpyAgent([MagicMock() for _ in range(4)], make_analyzer(), MagicMock(),
+                                analysis_mode="pipelined")
+    
+    def test_cycle_analyzes_together_and_schedules_clicks(self):
+        """Test that the areas are analyzed concurrently and the cycle does not wait for clicks."""
+        mouse_controller = MagicMock()
+        mouse_controller.click_at_position.side_effect = lambda area_index: time.sleep(0.3) or True
+        agent = AsyncScreenSpyAgent([MagicMock() for _ in range(4)], make_analyzer("resume the", 0.2),
+                                    mouse_controller)
+        
+        async def cycle():
+            start = time.perf_counter()
+            results = await agent.run_cycle()
+            elapsed = time.perf_counter() - start
+            task = agent.click_tasks[2]
+            assert not task.done()
+            # The area is still clicking, so the next detection does not start another sequence
+            agent.act_on_detection(2, True)
+            assert agent.click_tasks[2] is task
+            return results, elapsed, await task
+        
+        results, elapsed, clicked = asyncio.run(cycle())
+        assert results == [False, False, True, False]
+        assert elapsed < 0.35
+        assert clicked is True
+        mouse_controller.click_at_position.assert_called_once_with(2)
+    
+    def test_batched_local_stages_do_not_block_the_loop(self):
+        """Test that slow local detector stages run in the executor in batched mode."""
+        local_detector = MagicMock(spec=Detector)
+        local_detector.detect_local.side_effect = (
+            lambda *args: time.sleep(0.1) or DetectionResult(None, 0.0, "ocr")
+        )
+        analyzer = MagicMock()
+        
+        async def detect_batch(screenshots, phrases, area_indices, composite):
+            return {area_index: area_index == 3 for area_index in area_indices}
+        analyzer.detect_text_in_images_batch = detect_batch
+        agent = AsyncScreenSpyAgent([MagicMock() for _ in range(4)], analyzer, MagicMock(),
+                                    analysis_mode="batched", detectors=local_detector)
+        
+        async def cycle():
+            ticks = 0
+            
+            async def tick():
+                nonlocal ticks
+                while True:
+                    await asyncio.sleep(0.01)
+                    ticks += 1
+            ticker = asyncio.create_task(tick())
+            results = await agent.run_cycle()
+            ticker.cancel()
+            return results, ticks
+        
+        results, ticks = asyncio.run(cycle())
+        assert results == [False, False, False, True]
+        # The loop kept running while the local stages took 0.4 seconds
+        assert ticks >= 10
+        assert local_detector.learn.call_count == 4
+    
+    def test_start_and_stop(self):
+        """Test that stop() interrupts the wait for the next cycle and ends the task."""
+        agent = AsyncScreenSpyAgent([MagicMock() for _ in range(4)], make_analyzer(), MagicMock(), interval=15)
+        
+        async def run():
+            async with agent:
+                while agent.scheduler.get_stats()[0]["runs"] == 0:
+                    await asyncio.sleep(0.01)
+                await asyncio.sleep(0.05)
+                start = time.perf_counter()
+            return time.perf_counter() - start
+        
+        assert asyncio.run(run()) < 0.5
+        assert agent.task.done()
+        assert agent.running is False
+        assert agent.stop_event.is_set()
+    
+    def test_many_agents_share_one_loop(self):
+        """Test that agents on one event loop do not need a thread each."""
+        executor = ThreadPoolExecutor(max_workers=2)
+        threads_before = threading.active_count()
+        agents = [
+            AsyncScreenSpyAgent([MagicMock() for _ in range(4)], make_analyzer(), MagicMock(),
+                                interval=0.05, executor=executor)
+            for _ in range(20)
+        ]
+        
+        async def run():
+            for agent in agents:
+                await agent.start()
+            await asyncio.sleep(0.3)
+            threads = threading.active_count()
+            for agent in agents:
+                await agent.stop()
+            return threads
+        
+        threads = asyncio.run(run())
+        executor.shutdown()
+        # Only the shared executor's threads are added, not one per agent
+        assert threads - threads_before <= 2
+        runs = [agent.scheduler.get_stats()[1]["runs"] for agent in agents]
+        assert min(runs) >= 1 and sum(runs) > len(agents)
+    
+    def test_clicks_after_restart_on_a_new_loop(self):
+        """Test that clicks of several areas still play after the agent restarts on another event loop."""
+        mouse_controller = MagicMock()
+        mouse_controller.click_at_position.side_effect = lambda area_index: time.sleep(0.05) or True
+        analyzer = MagicMock()
+        
+        async def detect(screenshot, text_to_detect):
+            return text_to_detect in ("resume the", "try again")
+        analyzer.detect_text_in_image = detect
+        agent = AsyncScreenSpyAgent([MagicMock() for _ in range(4)], analyzer, mouse_controller, interval=15)
+        
+        async def run_once():
+            async with agent:
+                while mouse_controller.click_at_position.call_count < 2 * runs:
+                    await asyncio.sleep(0.01)
+        
+        for runs in (1, 2):
+            asyncio.run(asyncio.wait_for(run_once(), 2))
+            assert all(task.exception() is None for task in agent.click_tasks.values())
+        assert mouse_controller.click_at_position.call_count == 4
+    
+    def test_stop_cancels_a_stuck_agent(self):
+        """Test that stop() waits for the cancelled loop and click tasks after the timeout."""
+        mouse_controller = MagicMock()
+        release = threading.Event()
+        mouse_controller.click_at_position.side_effect = lambda area_index: release.wait(2) or True
+        agent = AsyncScreenSpyAgent([MagicMock() for _ in range(4)], make_analyzer("try again"), mouse_controller,
+                                    interval=15)
+        
+        async def run():
+            await agent.start()
+            while 3 not in agent.click_tasks:
+                await asyncio.sleep(0.01)
+            start = time.perf_counter()
+            await agent.stop(timeout=0.1)
+            elapsed = time.perf_counter() - start
+            release.set()
+            return elapsed
+        
+        assert asyncio.run(run()) < 0.5
+        assert agent.task.cancelled()
+        assert agent.click_tasks[3].cancelled()
+    
+    def test_run_agent_in_thread(self):
+        """Test that run_agent() and stop_agent() still drive the agent from a thread."""
+        analyzer = make_analyzer()
+        agent = AsyncScreenSpyAgent([MagicMock() for _ in range(4)], analyzer, MagicMock(), interval=15)
+        
+        agent.run_agent()
+        while agent.scheduler.get_stats()[0]["runs"] == 0:
+            time.sleep(0.01)
+        time.sleep(0.05)
+        
+        start = time.perf_counter()
+        agent.stop_agent()
+        assert time.perf_counter() - start < 0.5
+        assert not agent.agent_thread.is_alive()
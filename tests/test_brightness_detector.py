@@ -0,0 +1,139 @@
+import pytest
+import numpy as np
+from unittest.mock import MagicMock, patch
+from PIL import Image, ImageDraw
+from screen_spy_agent import brightness_detector
+from screen_spy_agent.brightness_detector import (
+    BrightnessDetector, brightness_features, component_boxes, reduce_mask, text_likeness
+)
+from screen_spy_agent.detectors import DetectorCascade, VisionModelDetector
+
+
+def make_area(background=(30, 30, 30), foreground=(230, 230, 230), size=(140, 27)):
+    """Create an area with "Reject Accept" text like the real button row."""
+    image = Image.new('RGB', size, color=background)
+    ImageDraw.Draw(image).text((8, 7), "Reject  Accept", fill=foreground)
+    return image
+
+
+class TestBrightnessDetector:
+    """Tests for the brightness features, component labelling and the BrightnessDetector class."""
+    
+    def test_brightness_features_match_pixel_lists(self):
+        """Test that the histogram features equal the old per-pixel Python sums."""
+        gray = make_area().convert('L')
+        pixels = np.asarray(gray).ravel().tolist()
+        features = brightness_features(np.asarray(gray))
+        
+        assert features["histogram"].sum() == len(pixels)
+        assert features["mean"] == pytest.approx(sum(pixels) / len(pixels))
+        assert features["bright_ratio"] == pytest.approx(sum(1 for p in pixels if p > 200) / len(pixels))
+    
+    def test_reduce_mask(self):
+        """Test that a block is set when any of its pixels is, and partial blocks are dropped."""
+        mask = np.zeros((7, 9), dtype=bool)
+        mask[4, 5] = True
+        mask[6, 8] = True
+        
+        reduced = reduce_mask(mask, 3)
+        
+        assert reduced.shape == (2, 3)
+        assert reduced.tolist() == [[False, False, False], [False, True, False]]
+    
+    @pytest.mark.parametrize("use_scipy", [False, True])
+    def test_component_boxes(self, use_scipy):
+        """Test boxes and pixel counts of 8-connected components with and without SciPy."""
+        if use_scipy:
+            pytest.importorskip("scipy")
+        mask = np.zeros((6, 8), dtype=bool)
+        mask[0, 0] = mask[1, 1] = mask[2, 2] = True    # diagonal stroke
+        mask[1:5, 5:7] = True                           # block
+        mask[4, 4] = True                               # touches the block diagonally
+        mask[5, 0:2] = True                             # separate run
+        
+        with patch.object(brightness_detector, "ndimage",
+                          brightness_detector.ndimage if use_scipy else None):
+            boxes, areas = component_boxes(mask)
+        
+        found = sorted((tuple(box), area) for box, area in zip(boxes.tolist(), areas.tolist()))
+        assert found == [((0, 0, 3, 3), 3), ((0, 5, 2, 1), 2), ((4, 1, 3, 4), 9)]
+        assert component_boxes(np.zeros((4, 4), dtype=bool))[0].shape == (0, 4)
+    
+    def test_text_likeness(self):
+        """Test that letter-sized components score high and specks or blobs do not."""
+        letters = np.array([[10 * i, 5, 6, 10] for i in range(5)])
+        score, location = text_likeness(letters, np.full(5, 30))
+        assert score == pytest.approx(1.0)
+        assert location == (0, 5, 46, 10)
+        
+        specks = np.array([[i, 0, 1, 1] for i in range(20)])
+        assert text_likeness(specks, np.ones(20)) == (0.0, None)
+        
+        # A large filled panel outweighs two letters
+        mixed = np.vstack([letters[:2], [[0, 0, 40, 40]]])
+        assert text_likeness(mixed, np.array([30, 30, 1500]))[0] < 0.5
+    
+    @pytest.mark.parametrize("colors", [
+        ((30, 30, 30), (230, 230, 230)),
+        ((240, 240, 240), (20, 20, 20)),
+        ((60, 60, 60), (150, 150, 150)),
+    ])
+    def test_detects_text_in_both_polarities(self, colors):
+        """Test that light, dark and low-contrast text is found with its location."""
+        detector = BrightnessDetector()
+        result = detector.detect(make_area(*colors), "reject accept", 1)
+        
+        assert result.detected is True
+        assert result.confidence <= detector.max_confidence
+        x, y, width, height = result.location
+        assert 5 <= x <= 10 and 5 <= y <= 10 and width > 60 and height < 15
+    
+    def test_empty_area_is_confident_no(self):
+        """Test that flat and noisy areas without text give a confident negative verdict."""
+        detector = BrightnessDetector()
+        noise = np.random.default_rng(0).normal(60, 6, (27, 140)).clip(0, 255).astype(np.uint8)
+        
+        for image in (Image.new('RGB', (140, 27), (30, 30, 30)), noise):
+            result = detector.detect(image, "reject accept")
+            assert result.detected is False
+            assert result.confidence > 0.9
+    
+    def test_fixed_polarity(self):
+        """Test that a fixed polarity is inconclusive when the background does not fit."""
+        detector = BrightnessDetector(polarity="light")
+        
+        assert detector.detect(make_area(), "reject accept").conclusive
+        assert detector.detect(make_area((240, 240, 240), (20, 20, 20)), "reject accept").detected is None
+        assert detector.last_features["mean"] > 200
+        
+        with pytest.raises(ValueError):
+            BrightnessDetector(polarity="bright")
+    
+    def test_large_area_is_reduced(self):
+        """Test that full-screen areas are labelled on a reduced mask and still locate the text."""
+        image = Image.new('RGB', (1920, 1080), color=(30, 30, 30))
+        draw = ImageDraw.Draw(image)
+        for x in (100, 600, 1100):
+            draw.text((x, 500), "Reject  Accept", fill=(230, 230, 230))
+        detector = BrightnessDetector(max_pixels=250000)
+        
+        with patch.object(brightness_detector, "component_boxes",
+                          wraps=brightness_detector.component_boxes) as mock_boxes:
+            result = detector.detect(image, "reject accept")
+        
+        assert mock_boxes.call_args.args[0].shape == (360, 640)
+        assert result.detected is True
+        assert 95 <= result.location[0] <= 110 and 490 <= result.location[1] <= 510
+    
+    def test_cascade_skips_vision_model_for_empty_areas(self):
+        """Test that a confident "no text" verdict ends the cascade before the vision model."""
+        image_analyzer = MagicMock()
+        image_analyzer.detect_text_in_image.return_value = True
+        cascade = DetectorCascade([(BrightnessDetector(), 0.9), VisionModelDetector(image_analyzer)])
+        
+        assert cascade.detect(Image.new('RGB', (140, 27), (30, 30, 30)), "reject accept", 1).detected is False
+        image_analyzer.detect_text_in_image.assert_not_called()
+        
+        # Text-like areas are passed on, since the detector cannot read the phrase
+        assert cascade.detect(make_area(), "reject accept", 1).stage == "vision_model"
+        image_analyzer.detect_text_in_image.assert_called_once()
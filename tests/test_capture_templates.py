@@ -0,0 +1,45 @@
+import pytest
+import json
+from unittest.mock import patch
+from PIL import Image
+import capture_templates
+from screen_spy_agent.template_detector import TemplateDetector
+
+
+class TestCaptureTemplates:
+    """Tests for the capture_templates command line tool."""
+    
+    @patch('screen_spy_agent.screenshot_taker.ImageGrab')
+    def test_main_captures_template(self, mock_image_grab, tmp_path):
+        """Test that main() grabs the given rectangle and saves it as a template of the area."""
+        mock_image_grab.grab.return_value = Image.new('RGB', (100, 22), color="white")
+        out = tmp_path / "templates"
+        argv = ["capture_templates.py", "--area", "3", "--x1", "1540", "--y1", "682", "--x2", "1640", "--y2", "704",
+                "--delay", "0", "--out", str(out)]
+        
+        with patch('sys.argv', argv):
+            capture_templates.main()
+        
+        mock_image_grab.grab.assert_called_once_with(bbox=(1540, 682, 1640, 704))
+        assert TemplateDetector(str(out)).get_templates("try again", 3)
+    
+    @patch('screen_spy_agent.screenshot_taker.ImageGrab')
+    def test_main_with_config(self, mock_image_grab, tmp_path):
+        """Test that the rectangle and phrase come from the configured region."""
+        mock_image_grab.grab.return_value = Image.new('RGB', (40, 10), color="white")
+        config = tmp_path / "config.json"
+        config.write_text(json.dumps({"regions": [
+            {"bbox": [0, 0, 10, 10], "phrase": "first"},
+            {"bbox": [10, 20, 50, 30], "phrase": "second"}
+        ]}))
+        out = tmp_path / "templates"
+        argv = ["capture_templates.py", "--area", "1", "--config", str(config), "--delay", "0", "--out", str(out)]
+        
+        with patch('sys.argv', argv):
+            capture_templates.main()
+        
+        mock_image_grab.grab.assert_called_once_with(bbox=(10, 20, 50, 30))
+        assert TemplateDetector(str(out)).get_templates("second", 1)
+        
+        with patch('sys.argv', argv[:2] + ["5"] + argv[3:]), pytest.raises(SystemExit):
+            capture_templates.main()
@@ -0,0 +1,87 @@
+import pytest
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from PIL import Image
+from screen_spy_agent.change_detector import ChangeDetector
+
+
+class TestChangeDetector:
+    """Tests for the ChangeDetector class."""
+    
+    def test_first_frame_is_analyzed(self):
+        """Test that the first frame of a key always needs analysis."""
+        detector = ChangeDetector()
+        assert detector.should_analyze(0, Image.new('RGB', (20, 10)), now=0) is True
+        assert detector.analyzed == 1
+    
+    def test_unchanged_frame_is_skipped(self):
+        """Test that an identical frame is skipped and counted."""
+        detector = ChangeDetector()
+        frame = Image.new('RGB', (20, 10), color="gray")
+        detector.should_analyze(0, frame, now=0)
+        assert detector.should_analyze(0, frame.copy(), now=1) is False
+        assert detector.skipped == 1
+    
+    def test_mad_threshold(self):
+        """Test that small differences stay below the mean absolute difference threshold."""
+        detector = ChangeDetector(threshold=5.0, method="mad")
+        detector.should_analyze(0, np.full((10, 20, 3), 100, dtype=np.uint8), now=0)
+        assert detector.should_analyze(0, np.full((10, 20, 3), 103, dtype=np.uint8), now=1) is False
+        assert detector.should_analyze(0, np.full((10, 20, 3), 110, dtype=np.uint8), now=2) is True
+    
+    def test_drift_is_measured_against_analyzed_frame(self):
+        """Test that small steps add up against the last analyzed frame."""
+        detector = ChangeDetector(threshold=5.0, method="mad")
+        detector.should_analyze(0, np.full((10, 20), 100, dtype=np.uint8), now=0)
+        assert detector.should_analyze(0, np.full((10, 20), 104, dtype=np.uint8), now=1) is False
+        assert detector.should_analyze(0, np.full((10, 20), 108, dtype=np.uint8), now=2) is True
+    
+    def test_tiles_method(self):
+        """Test that the tiles method reports the percentage of changed tiles."""
+        detector = ChangeDetector(threshold=30.0, method="tiles", tile_size=10)
+        previous = np.zeros((20, 20), dtype=np.uint8)
+        current = previous.copy()
+        current[0, 0] = 255
+        assert detector.difference(previous, current) == 25.0
+        
+        detector.should_analyze(0, previous, now=0)
+        assert detector.should_analyze(0, current, now=1) is False
+        current[15, 15] = 255
+        assert detector.should_analyze(0, current, now=2) is True
+    
+    def test_forced_refresh(self):
+        """Test that an unchanged frame is analyzed after the refresh interval."""
+        detector = ChangeDetector(force_refresh_interval=60)
+        frame = Image.new('RGB', (20, 10))
+        detector.should_analyze(0, frame, now=0)
+        assert detector.should_analyze(0, frame, now=30) is False
+        assert detector.should_analyze(0, frame, now=61) is True
+    
+    def test_forget(self):
+        """Test that a forgotten key is analyzed again."""
+        detector = ChangeDetector()
+        frame = Image.new('RGB', (20, 10))
+        detector.should_analyze(0, frame, now=0)
+        detector.forget(0)
+        assert detector.should_analyze(0, frame, now=1) is True
+    
+    def test_keys_checked_from_several_threads(self):
+        """Test that the counters add up when every thread checks its own key."""
+        detector = ChangeDetector(force_refresh_interval=None)
+        frames = [np.full((10, 20), value, dtype=np.uint8) for value in (0, 0, 100)]
+        
+        def check(key):
+            for i in range(300):
+                detector.should_analyze(key, frames[i % 3])
+        
+        with ThreadPoolExecutor(8) as executor:
+            list(executor.map(check, range(8)))
+        
+        # Per key: the first frame, then every switch between the two values
+        assert detector.get_stats()["analyzed"] == 8 * 200
+        assert detector.get_stats()["skipped"] == 8 * 100
+    
+    def test_invalid_method(self):
+        """Test that an unsupported method raises ValueError."""
+        with pytest.raises(ValueError):
+            ChangeDetector(method="ssim")
@@ -0,0 +1,145 @@
+import pytest
+import threading
+import time
+from unittest.mock import patch, MagicMock
+from screen_spy_agent.click_executor import ClickExecutor
+from screen_spy_agent.mouse_controller import MouseController
+from screen_spy_agent.screen_spy_agent import ScreenSpyAgent
+
+
+class TestClickExecutor:
+    """Tests for the ClickExecutor class."""
+    
+    @patch('screen_spy_agent.mouse_controller.pyautogui')
+    def test_submit_area_plays_clicks_in_order(self, mock_pyautogui):
+        """Test that the configured clicks of an area play with the vertical shift of submission."""
+        controller = MouseController(100, 200)
+        controller.set_click_coordinates(1, [[10, 20], [30, 40]])
+        controller.set_vertical_shift(-23)
+        
+        with ClickExecutor(controller, click_delay=0) as executor:
+            future = executor.submit_area(1)
+            controller.set_vertical_shift(0)
+            assert future.result(timeout=5) is True
+        
+        assert [c.kwargs for c in mock_pyautogui.click.call_args_list] == [{"x": 10, "y": -3}, {"x": 30, "y": 17}]
+    
+    def test_submit_box_clicks_center(self):
+        """Test that a detected box is clicked at its center."""
+        controller = MagicMock()
+        controller.box_center = MouseController.box_center
+        controller.click_at.return_value = True
+        
+        with ClickExecutor(controller, click_delay=0) as executor:
+            assert executor.submit_box(2, 1730, 857, (80, 30, 55, 15)).result(timeout=5) is True
+        
+        controller.click_at.assert_called_once_with(1838, 894)
+    
+    def test_areas_play_independently(self):
+        """Test that a long sequence in one area does not hold up the clicks of another."""
+        controller = MagicMock()
+        controller.click_at.return_value = True
+        executor = ClickExecutor(controller, click_delay=0, area_delays={1: 0.3})
+        
+        slow = executor.submit(1, [(1, 1), (1, 2), (1, 3)])
+        start = time.perf_counter()
+        assert executor.submit(2, [(2, 1)]).result(timeout=5) is True
+        assert time.perf_counter() - start < 0.25
+        assert not slow.done()
+        assert slow.result(timeout=5) is True
+        executor.shutdown()
+    
+    def test_coalesces_pending_sequences(self):
+        """Test that a busy area returns its pending sequence instead of queueing a duplicate."""
+        controller = MagicMock()
+        release = threading.Event()
+        controller.click_at.side_effect = lambda x, y: release.wait(5)
+        executor = ClickExecutor(controller, click_delay=0)
+        
+        first = executor.submit(1, [(1, 1)])
+        assert executor.submit(1, [(1, 1)]) is first
+        assert executor.is_busy(1)
+        release.set()
+        first.result(timeout=5)
+        
+        assert executor.submit(1, [(1, 1)]) is not first
+        executor.shutdown()
+        assert executor.get_stats()["sequences"] == 2
+        assert executor.get_stats()["coalesced"] == 1
+    
+    def test_failed_click_and_errors(self):
+        """Test that a failed click resolves to False and an exception is set on the future."""
+        controller = MagicMock()
+        controller.click_at.side_effect = [False, True, RuntimeError("no display")]
+        
+        with ClickExecutor(controller, click_delay=0) as executor:
+            assert executor.submit(1, [(1, 1), (2, 2)]).result(timeout=5) is False
+            with pytest.raises(RuntimeError):
+                executor.submit(1, [(3, 3)]).result(timeout=5)
+    
+    def test_shutdown_interrupts_delay_and_cancels_queue(self):
+        """Test that shutdown stops a sequence at its pause and cancels queued ones."""
+        controller = MagicMock()
+        controller.click_at.return_value = True
+        executor = ClickExecutor(controller, click_delay=30, coalesce=False)
+        
+        playing = executor.submit(1, [(1, 1), (1, 2)])
+        queued = executor.submit(1, [(1, 3)])
+        while controller.click_at.call_count == 0:
+            time.sleep(0.01)
+        
+        start = time.perf_counter()
+        executor.shutdown(timeout=5)
+        assert time.perf_counter() - start < 2
+        assert playing.result(timeout=1) is False
+        assert queued.cancelled()
+        with pytest.raises(RuntimeError):
+            executor.submit(1, [(1, 1)])
+        
+        with pytest.raises(ValueError):
+            ClickExecutor(controller, click_delay=-1)
+    
+    def test_shared_stop_event(self):
+        """Test that a stop event shared with the agent stops sequences without shutdown()."""
+        controller = MagicMock()
+        controller.click_at.return_value = True
+        stop_event = threading.Event()
+        executor = ClickExecutor(controller, click_delay=30, coalesce=False, stop_event=stop_event)
+        
+        playing = executor.submit(1, [(1, 1), (1, 2)])
+        queued = executor.submit(1, [(1, 3)])
+        while controller.click_at.call_count == 0:
+            time.sleep(0.01)
+        
+        start = time.perf_counter()
+        stop_event.set()
+        assert playing.result(timeout=5) is False
+        assert time.perf_counter() - start < 1
+        with pytest.raises(Exception):
+            queued.result(timeout=5)
+        assert queued.cancelled()
+        controller.click_at.assert_called_once_with(1, 1)
+        with pytest.raises(RuntimeError):
+            executor.submit(1, [(1, 1)])
+        executor.shutdown(timeout=5)
+    
+    @patch('screen_spy_agent.mouse_controller.pyautogui')
+    def test_agent_cycle_does_not_wait_for_clicks(self, mock_pyautogui):
+        """Test that the agent's cycle time does not grow with the length of click sequences."""
+        controller = MouseController(100, 200, click_delay=0.2)
+        controller.set_click_coordinates(1, [[10, 20], [30, 40], [50, 60]])
+        executor = ClickExecutor(controller)
+        image_analyzer = MagicMock()
+        image_analyzer.detect_text_in_image.side_effect = (
+            lambda screenshot, text_to_detect: text_to_detect == "reject accept"
+        )
+        agent = ScreenSpyAgent([MagicMock() for _ in range(4)], image_analyzer, controller,
+                               click_executor=executor)
+        
+        start = time.perf_counter()
+        assert agent.run_sequential_cycle() == [False, True, False, False]
+        assert time.perf_counter() - start < 0.2
+        
+        assert agent.click_futures[1].result(timeout=5) is True
+        assert mock_pyautogui.click.call_count == 3
+        executor.shutdown()
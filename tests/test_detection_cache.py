@@ -0,0 +1,168 @@
+import pytest
+import os
+import tempfile
+import numpy as np
+from unittest.mock import MagicMock
+from PIL import Image, ImageDraw
+from screen_spy_agent.detection_cache import DetectionCache, perceptual_hash, hamming_distance
+from screen_spy_agent.image_analyzer import ImageAnalyzer
+
+
+def make_button(text, noise=0):
+    """Create a small screenshot of a button with the given label."""
+    image = Image.new('RGB', (170, 27), color=(40, 40, 40))
+    draw = ImageDraw.Draw(image)
+    draw.rectangle((5, 3, 120, 23), fill=(200, 200, 200))
+    draw.text((10, 8), text, fill=(0, 0, 0))
+    if noise:
+        pixels = np.asarray(image, dtype=np.int16)
+        pixels = pixels + np.random.RandomState(0).randint(-noise, noise + 1, pixels.shape)
+        image = Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8))
+    return image
+
+
+def make_response(content):
+    """Create a chat completions response with the given content."""
+    response = MagicMock()
+    response.choices[0].message.content = content
+    return response
+
+
+class TestPerceptualHash:
+    """Tests for the perceptual hash helpers."""
+    
+    def test_hash_is_stable_under_noise(self):
+        """Test that slight pixel noise changes only a few bits."""
+        distance = hamming_distance(perceptual_hash(make_button("Accept")), perceptual_hash(make_button("Accept", noise=3)))
+        assert distance <= 2
+    
+    def test_hash_differs_for_different_content(self):
+        """Test that an empty area and a button hash far apart."""
+        empty = Image.new('RGB', (170, 27), color=(40, 40, 40))
+        assert hamming_distance(perceptual_hash(empty), perceptual_hash(make_button("Accept"))) > 2
+    
+    def test_hash_accepts_arrays_and_bytes(self):
+        """Test that NumPy arrays and encoded bytes hash like the PIL image."""
+        import io
+        image = make_button("Accept")
+        buffer = io.BytesIO()
+        image.save(buffer, format="PNG")
+        assert perceptual_hash(np.asarray(image)) == perceptual_hash(image)
+        assert perceptual_hash(buffer.getvalue()) == perceptual_hash(image)
+
+
+class TestDetectionCache:
+    """Tests for the DetectionCache class."""
+    
+    def test_miss_then_hit(self):
+        """Test that a stored result is returned and counted."""
+        cache = DetectionCache()
+        assert cache.get(0b1010, "try again", "model", now=0) is None
+        cache.put(0b1010, "try again", "model", True, now=0)
+        assert cache.get(0b1010, "try again", "model", now=1) is True
+        assert cache.hits == 1
+        assert cache.misses == 1
+    
+    def test_key_includes_phrase_and_model(self):
+        """Test that other phrases or models do not share results."""
+        cache = DetectionCache()
+        cache.put(7, "try again", "model", True, now=0)
+        assert cache.get(7, "new chat", "model", now=0) is None
+        assert cache.get(7, "try again", "other-model", now=0) is None
+    
+    def test_near_identical_hash_hits(self):
+        """Test that hashes within max_distance bits reuse the result."""
+        cache = DetectionCache(max_distance=2)
+        cache.put(0b1111, "try again", "model", False, now=0)
+        assert cache.get(0b1100, "try again", "model", now=0) is False
+        assert cache.get(0b0000, "try again", "model", now=0) is None
+    
+    def test_ttl_expiry(self):
+        """Test that entries older than the TTL are ignored."""
+        cache = DetectionCache(ttl=10)
+        cache.put(1, "try again", "model", True, now=0)
+        assert cache.get(1, "try again", "model", now=5) is True
+        assert cache.get(1, "try again", "model", now=11) is None
+    
+    def test_lru_eviction(self):
+        """Test that the least recently used entry is evicted first."""
+        cache = DetectionCache(max_entries=2, max_distance=0)
+        cache.put(1, "p", "m", True, now=0)
+        cache.put(2, "p", "m", True, now=0)
+        cache.get(1, "p", "m", now=0)
+        cache.put(4, "p", "m", True, now=0)
+        assert cache.get(2, "p", "m", now=0) is None
+        assert cache.get(1, "p", "m", now=0) is True
+    
+    def test_disk_tier_survives_restart(self):
+        """Test that results written to disk are loaded by a new cache."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "cache.json")
+            first = DetectionCache(disk_path=path)
+            first.put(123, "try again", "model", True)
+            first.close()
+            
+            cache = DetectionCache(disk_path=path)
+            assert cache.get(123, "try again", "model") is True
+            assert cache.disk_hits == 1
+            assert cache.get_stats()["memory_entries"] == 1
+    
+    def test_disk_writes_are_batched(self):
+        """Test that the disk tier is written after save_every entries or save_interval seconds."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "cache.json")
+            cache = DetectionCache(disk_path=path, save_every=3, save_interval=60)
+            
+            cache.put(1, "p", "m", True, now=0)
+            cache.put(2, "p", "m", True, now=1)
+            assert not os.path.exists(path)
+            cache.put(3, "p", "m", False, now=2)
+            assert DetectionCache(disk_path=path).get_stats()["disk_entries"] == 3
+            
+            cache.put(4, "p", "m", True, now=30)
+            assert DetectionCache(disk_path=path).get_stats()["disk_entries"] == 3
+            cache.put(5, "p", "m", True, now=62)
+            assert DetectionCache(disk_path=path).get_stats()["disk_entries"] == 5
+            
+            cache.put(6, "p", "m", True, now=63)
+            cache.close()
+            assert DetectionCache(disk_path=path).get_stats()["disk_entries"] == 6
+            assert not os.path.exists(f"{path}.tmp")
+    
+    def test_invalid_parameters(self):
+        """Test that invalid sizes raise ValueError."""
+        with pytest.raises(ValueError):
+            DetectionCache(max_entries=0)
+        with pytest.raises(ValueError):
+            DetectionCache(max_distance=-1)
+        with pytest.raises(ValueError):
+            DetectionCache(save_every=0)
+    
+    def test_analyzer_skips_api_call_on_hit(self):
+        """Test that ImageAnalyzer only calls the API for unseen screenshots."""
+        analyzer = ImageAnalyzer("test_key", "https://api.example.com", "test-model", cache=DetectionCache())
+        analyzer.client = MagicMock()
+        analyzer.client.chat.completions.create.return_value = make_response("Yes.")
+        
+        assert analyzer.detect_text_in_image(make_button("Try again"), "try again") is True
+        assert analyzer.detect_text_in_image(make_button("Try again", noise=3), "try again") is True
+        
+        assert analyzer.client.chat.completions.create.call_count == 1
+        assert analyzer.cache.hits == 1
+    
+    def test_batch_sends_only_misses(self):
+        """Test that a batched request only contains the areas that missed the cache."""
+        cache = DetectionCache()
+        analyzer = ImageAnalyzer("test_key", "https://api.example.com", "test-model", cache=cache)
+        cached_image = make_button("New chat")
+        cache.put(perceptual_hash(cached_image), "new chat", analyzer.model, True)
+        analyzer.client = MagicMock()
+        analyzer.client.chat.completions.create.return_value = make_response('{"1": "no"}')
+        
+        results = analyzer.detect_text_in_images_batch(
+            [cached_image, Image.new('RGB', (170, 27))], ["new chat", "try again"]
+        )
+        
+        assert results == {0: True, 1: False}
+        content = analyzer.client.chat.completions.create.call_args.kwargs["messages"][0]["content"]
+        assert sum(1 for part in content if part["type"] == "image_url") == 1
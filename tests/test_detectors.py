@@ -0,0 +1,164 @@
+import pytest
+import asyncio
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock
+from PIL import Image
+from screen_spy_agent.detectors import (
+    DetectionResult, Detector, DetectorCascade, PixelDiffDetector,
+    ColorSignatureDetector, VisionModelDetector
+)
+
+
+class FixedDetector(Detector):
+    """Detector that always returns the same result."""
+    
+    name = "fixed"
+    
+    def __init__(self, detected, confidence=1.0):
+        self.detected = detected
+        self.confidence = confidence
+        self.calls = 0
+        self.learned = []
+    
+    def detect(self, image, text_to_detect, area_index=None):
+        self.calls += 1
+        return DetectionResult(self.detected, self.confidence, self.name)
+    
+    def learn(self, image, text_to_detect, area_index, detected):
+        self.learned.append(detected)
+
+
+class TestDetectors:
+    """Tests for the detector stages and the DetectorCascade class."""
+    
+    def test_pixel_diff_repeats_verdict_for_identical_frame(self):
+        """Test that the pixel diff stage only answers for unchanged frames."""
+        detector = PixelDiffDetector()
+        frame = Image.new('RGB', (20, 10), color="gray")
+        assert detector.detect(frame, "try again", 3).detected is None
+        
+        detector.learn(frame, "try again", 3, True)
+        result = detector.detect(frame.copy(), "try again", 3)
+        assert result.detected is True
+        assert result.confidence == 1.0
+        assert detector.detect(Image.new('RGB', (20, 10), color="white"), "try again", 3).detected is None
+        assert detector.detect(frame, "try again", 2).detected is None
+    
+    def test_color_signature_picks_nearest_verdict(self):
+        """Test that the colour signature stage uses the nearest known signature."""
+        detector = ColorSignatureDetector()
+        empty = Image.new('RGB', (40, 20), color=(30, 30, 30))
+        button = empty.copy()
+        button.paste((0, 120, 255), (5, 5, 35, 15))
+        detector.add_signature(empty, "try again", False)
+        detector.add_signature(button, "try again", True)
+        
+        shifted_button = empty.copy()
+        shifted_button.paste((0, 120, 255), (4, 4, 34, 14))
+        result = detector.detect(shifted_button, "try again")
+        assert result.detected is True
+        assert result.confidence > 0.99
+        assert detector.detect(button, "new chat").detected is None
+    
+    def test_color_signature_small_button_is_not_a_confident_negative(self):
+        """Test that a small button in a large area does not match the empty area's signature."""
+        detector = ColorSignatureDetector()
+        empty = Image.new('RGB', (400, 200), color=(30, 30, 30))
+        button = empty.copy()
+        button.paste((0, 120, 255), (170, 90, 230, 110))
+        detector.add_signature(empty, "try again", False)
+        
+        assert detector.detect(button, "try again").detected is None
+        assert detector.detect(empty, "try again").confidence == 1.0
+        
+        # Knowing the button's signature, the small difference decides the verdict
+        detector.add_signature(button, "try again", True)
+        half_button = empty.copy()
+        half_button.paste((0, 120, 255), (170, 90, 200, 110))
+        result = detector.detect(half_button, "try again")
+        assert result.confidence < 0.98
+    
+    def test_vision_model_detector_wraps_analyzer(self):
+        """Test that the vision model stage calls the image analyzer."""
+        mock_image_analyzer = MagicMock()
+        mock_image_analyzer.detect_text_in_image.return_value = True
+        detector = VisionModelDetector(mock_image_analyzer)
+        
+        assert detector.detect("image", "new chat").detected is True
+        assert detector.detect_local("image", "new chat").detected is None
+        mock_image_analyzer.detect_text_in_image.assert_called_once_with("image", text_to_detect="new chat")
+    
+    def test_vision_model_detector_awaits_async_analyzer(self):
+        """Test that async analyzers are awaited by detect_async."""
+        mock_image_analyzer = MagicMock()
+        
+        async def detect(image, text_to_detect):
+            return text_to_detect == "new chat"
+        mock_image_analyzer.detect_text_in_image = detect
+        detector = VisionModelDetector(mock_image_analyzer)
+        
+        assert asyncio.run(detector.detect_async("image", "new chat")).detected is True
+        assert detector.detect("image", "try again").detected is False
+    
+    def test_cascade_stops_at_first_confident_stage(self):
+        """Test that later stages are skipped once a stage is confident enough."""
+        local = FixedDetector(True, confidence=0.9)
+        remote = FixedDetector(False)
+        cascade = DetectorCascade([(local, 0.8), remote])
+        
+        result = cascade.detect("image", "try again", 1)
+        
+        assert result.detected is True
+        assert remote.calls == 0
+        assert remote.learned == [True]
+        stats = cascade.get_stats()
+        assert stats[0]["hits"] == 1
+        assert stats[1]["calls"] == 0
+    
+    def test_cascade_escalates_below_threshold(self):
+        """Test that a stage below its threshold escalates to the next one."""
+        local = FixedDetector(True, confidence=0.5)
+        remote = FixedDetector(False)
+        cascade = DetectorCascade([(local, 0.8), remote])
+        
+        assert cascade.detect("image", "try again", 1).detected is False
+        assert local.learned == [False]
+        assert [stats["calls"] for stats in cascade.get_stats()] == [1, 1]
+    
+    def test_cascade_local_stages_learn_from_vision_model(self):
+        """Test that a repeated frame is answered locally after the first model call."""
+        mock_image_analyzer = MagicMock()
+        mock_image_analyzer.detect_text_in_image.return_value = True
+        cascade = DetectorCascade([(PixelDiffDetector(), 0.99), VisionModelDetector(mock_image_analyzer)])
+        frame = np.full((10, 20, 3), 200, dtype=np.uint8)
+        
+        assert cascade.detect(frame, "reject accept", 1).detected is True
+        assert cascade.detect(frame.copy(), "reject accept", 1).detected is True
+        
+        assert mock_image_analyzer.detect_text_in_image.call_count == 1
+        assert cascade.get_stats()[0]["hits"] == 1
+    
+    def test_cascade_from_several_threads(self):
+        """Test that the stage counters and the learned signatures stay consistent across threads."""
+        signatures = ColorSignatureDetector(max_signatures=4)
+        # The colour signature stage never reaches its threshold, so every call learns from the last stage
+        cascade = DetectorCascade([(signatures, 1.1), FixedDetector(True)])
+        
+        def detect(value):
+            frame = np.full((10, 20, 3), value, dtype=np.uint8)
+            for _ in range(50):
+                cascade.detect(frame, "try again", 1)
+        
+        with ThreadPoolExecutor(8) as executor:
+            list(executor.map(detect, range(0, 256, 32)))
+        
+        stats = cascade.get_stats()
+        assert [stage["calls"] for stage in stats] == [400, 400]
+        assert [stage["hits"] for stage in stats] == [0, 400]
+        assert len(signatures._signatures[(1, "try again")]) == 4
+    
+    def test_cascade_requires_stages(self):
+        """Test that an empty cascade raises ValueError."""
+        with pytest.raises(ValueError):
+            DetectorCascade([])
@@ -1,8 +1,12 @@
 import pytest
 import base64
 import os
+import io
+import numpy as np
 from unittest.mock import patch, MagicMock
+from PIL import Image
 from screen_spy_agent.image_analyzer import ImageAnalyzer
+from screen_spy_agent.detection_cache import DetectionCache
 
 
 class TestImageAnalyzer:
@@ -37,6 +41,40 @@ class TestImageAnalyzer:
         except Exception as e:
             pytest.fail(f"Failed to decode base64 string: {e}")
 
+    def test_encode_in_memory_image(self):
+        """Test that PIL images, arrays and bytes are encoded without touching the disk."""
+        analyzer = ImageAnalyzer(
+            api_key="test_key",
+            api_base="https://api.example.com",
+            model="test-model"
+        )
+        image = Image.new('RGBA', (40, 20), color='white')
+        
+        with patch('builtins.open') as mock_open:
+            encoded_image = analyzer.encode_image(image)
+            encoded_array = analyzer.encode_image(np.zeros((20, 40, 3), dtype=np.uint8))
+            encoded_bytes = analyzer.encode_image(b"raw-bytes")
+        
+        mock_open.assert_not_called()
+        decoded = Image.open(io.BytesIO(base64.b64decode(encoded_image)))
+        assert decoded.format == "JPEG"
+        assert decoded.size == (40, 20)
+        assert len(base64.b64decode(encoded_array)) > 0
+        assert base64.b64decode(encoded_bytes) == b"raw-bytes"
+
+    def test_image_to_data_url(self):
+        """Test that the data URL carries the right MIME type."""
+        analyzer = ImageAnalyzer(
+            api_key="test_key",
+            api_base="https://api.example.com",
+            model="test-model"
+        )
+        buffer = io.BytesIO()
+        Image.new('RGB', (4, 4)).save(buffer, format="PNG")
+        
+        assert analyzer.image_to_data_url(buffer.getvalue()).startswith("data:image/png;base64,")
+        assert analyzer.image_to_data_url(Image.new('RGB', (4, 4))).startswith("data:image/jpeg;base64,")
+
     @patch('screen_spy_agent.image_analyzer.openai')
     def test_analyze_image(self, mock_openai, sample_image, mock_api_response_both_words):
         """Test that analyze_image correctly calls the OpenAI API."""
@@ -148,4 +186,95 @@ class TestImageAnalyzer:
         
         # Call method and verify it handles the exception
         with pytest.raises(Exception, match="API Error"):
-            analyzer.analyze_image(sample_image) 
\ No newline at end of file
+            analyzer.analyze_image(sample_image) 
+
+    def test_detect_text_in_images_batch(self):
+        """Test that several areas are checked with one request and a JSON answer."""
+        analyzer = ImageAnalyzer(
+            api_key="test_key",
+            api_base="https://api.example.com",
+            model="test-model"
+        )
+        response = MagicMock()
+        response.choices[0].message.content = 'Here you go: {"1": "yes", "2": "no", "3": "YES"}'
+        analyzer.client = MagicMock()
+        analyzer.client.chat.completions.create.return_value = response
+        images = [Image.new('RGB', (30, 10)) for _ in range(3)]
+        
+        result = analyzer.detect_text_in_images_batch(
+            images, ["reject accept", "resume the", "try again"], area_indices=[1, 2, 3]
+        )
+        
+        assert result == {1: True, 2: False, 3: True}
+        analyzer.client.chat.completions.create.assert_called_once()
+        content = analyzer.client.chat.completions.create.call_args.kwargs["messages"][0]["content"]
+        assert sum(1 for part in content if part["type"] == "image_url") == 3
+        assert analyzer.last_usage == response.usage
+
+    def test_detect_text_in_images_batch_composite(self):
+        """Test that composite mode sends a single labelled image."""
+        analyzer = ImageAnalyzer(
+            api_key="test_key",
+            api_base="https://api.example.com",
+            model="test-model"
+        )
+        response = MagicMock()
+        response.choices[0].message.content = "Area 0: no\nArea 1: yes"
+        analyzer.client = MagicMock()
+        analyzer.client.chat.completions.create.return_value = response
+        
+        result = analyzer.detect_text_in_images_batch(
+            [Image.new('RGB', (30, 10)), Image.new('RGB', (50, 12))],
+            ["new chat", "reject accept"],
+            composite=True
+        )
+        
+        assert result == {0: False, 1: True}
+        content = analyzer.client.chat.completions.create.call_args.kwargs["messages"][0]["content"]
+        assert sum(1 for part in content if part["type"] == "image_url") == 1
+
+    def test_parse_batch_detection_response_missing_area(self):
+        """Test that areas missing from the answer have no verdict."""
+        analyzer = ImageAnalyzer(
+            api_key="test_key",
+            api_base="https://api.example.com",
+            model="test-model"
+        )
+        response = MagicMock()
+        response.choices[0].message.content = '{"Area 0": "yes"}'
+        
+        assert analyzer.parse_batch_detection_response(response, [0, 1]) == {0: True, 1: None}
+
+    def test_detect_text_in_images_batch_does_not_cache_missing_verdicts(self):
+        """Test that a cut-off answer is not cached as a negative for the areas it misses."""
+        analyzer = ImageAnalyzer(
+            api_key="test_key",
+            api_base="https://api.example.com",
+            model="test-model",
+            cache=DetectionCache()
+        )
+        truncated = MagicMock()
+        truncated.choices[0].message.content = '{"0": "no", "1": "y'
+        complete = MagicMock()
+        complete.choices[0].message.content = '{"1": "yes"}'
+        analyzer.client = MagicMock()
+        analyzer.client.chat.completions.create.side_effect = [truncated, complete]
+        images = [Image.new('RGB', (30, 10)), Image.new('RGB', (30, 10), color="white")]
+        
+        assert analyzer.detect_text_in_images_batch(images, ["new chat", "reject accept"]) == {0: False, 1: None}
+        assert analyzer.detect_text_in_images_batch(images, ["new chat", "reject accept"]) == {0: False, 1: True}
+        second_request = analyzer.client.chat.completions.create.call_args.kwargs["messages"][0]["content"]
+        assert sum(1 for part in second_request if part["type"] == "image_url") == 1
+
+    def test_make_composite_image(self):
+        """Test the size of the composite image."""
+        analyzer = ImageAnalyzer(
+            api_key="test_key",
+            api_base="https://api.example.com",
+            model="test-model"
+        )
+        composite = analyzer.make_composite_image(
+            [Image.new('RGB', (30, 10)), np.zeros((12, 50, 3), dtype=np.uint8)],
+            ["Area 0", "Area 1"], label_height=14, padding=4
+        )
+        assert composite.size == (50, 14 + 10 + 4 + 14 + 12 + 4)
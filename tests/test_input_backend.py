@@ -0,0 +1,88 @@
+import pytest
+from unittest.mock import patch, MagicMock
+from screen_spy_agent import input_backend
+from screen_spy_agent.input_backend import (
+    PyAutoGuiBackend, XTestBackend, RecordingBackend, create_input_backend
+)
+from screen_spy_agent.mouse_controller import MouseController
+
+
+class TestInputBackend:
+    """Tests for the input backends."""
+    
+    def test_recording_backend(self):
+        """Test that the recording backend records and times every click."""
+        backend = RecordingBackend()
+        backend.move(5, 6)
+        backend.click(10.7, 20)
+        backend.click(30, 40)
+        
+        assert backend.clicks == [(10, 20), (30, 40)]
+        assert [event[0] for event in backend.events] == ["move", "click", "click"]
+        stats = backend.get_stats()
+        assert stats["name"] == "recording"
+        assert stats["clicks"] == 2
+        assert stats["max_ms"] >= stats["mean_ms"] >= 0
+    
+    @patch('screen_spy_agent.input_backend.pyautogui')
+    def test_pyautogui_backend_skips_pause(self, mock_pyautogui):
+        """Test that the pyautogui backend clicks without pyautogui's pause by default."""
+        PyAutoGuiBackend().click(100, 200)
+        mock_pyautogui.click.assert_called_once_with(x=100, y=200, _pause=False)
+        
+        PyAutoGuiBackend(pause=True).move(1, 2)
+        mock_pyautogui.moveTo.assert_called_once_with(1, 2, _pause=True)
+    
+    def test_xtest_backend_click(self):
+        """Test that a click sends a motion, a press and a release, then syncs once."""
+        mock_xtest, mock_xdisplay = MagicMock(), MagicMock()
+        display = mock_xdisplay.Display.return_value
+        display.has_extension.return_value = True
+        with patch.object(input_backend, 'xtest', mock_xtest), \
+                patch.object(input_backend, 'xdisplay', mock_xdisplay), \
+                patch.object(input_backend, 'X', MagicMock()) as mock_x:
+            backend = XTestBackend()
+            backend.click(100, 200)
+            
+            calls = mock_xtest.fake_input.call_args_list
+            assert [c.args[1] for c in calls] == [mock_x.MotionNotify, mock_x.ButtonPress, mock_x.ButtonRelease]
+            assert calls[0].kwargs == {"x": 100, "y": 200}
+            display.sync.assert_called_once()
+            assert backend.get_stats()["clicks"] == 1
+            
+            backend.close()
+            display.close.assert_called_once()
+    
+    def test_xtest_backend_unavailable(self):
+        """Test that XTestBackend raises RuntimeError without python-xlib or XTEST."""
+        with patch.object(input_backend, 'xtest', None):
+            with pytest.raises(RuntimeError):
+                XTestBackend()
+        
+        mock_xdisplay = MagicMock()
+        mock_xdisplay.Display.return_value.has_extension.return_value = False
+        with patch.object(input_backend, 'xtest', MagicMock()), \
+                patch.object(input_backend, 'xdisplay', mock_xdisplay):
+            with pytest.raises(RuntimeError):
+                XTestBackend()
+    
+    def test_create_input_backend(self):
+        """Test choosing a backend by name, with auto falling back to pyautogui."""
+        with pytest.raises(ValueError):
+            create_input_backend("mouse")
+        
+        assert isinstance(create_input_backend("pyautogui"), PyAutoGuiBackend)
+        with patch.dict('os.environ', {}, clear=True):
+            assert isinstance(create_input_backend("auto"), PyAutoGuiBackend)
+    
+    @patch('screen_spy_agent.mouse_controller.pyautogui')
+    def test_mouse_controller_uses_backend(self, mock_pyautogui):
+        """Test that MouseController clicks through its input backend instead of pyautogui."""
+        backend = RecordingBackend()
+        controller = MouseController(100, 200, input_backend=backend)
+        
+        assert controller.click_at(300, 400) is True
+        assert controller.click_at_box(10, 20, (0, 0, 40, 20)) is True
+        
+        assert backend.clicks == [(300, 400), (30, 30)]
+        mock_pyautogui.click.assert_not_called()
@@ -1,4 +1,6 @@
 import pytest
+import threading
+import time
 from unittest.mock import patch, MagicMock
 from screen_spy_agent.mouse_controller import MouseController
 
@@ -59,4 +61,57 @@ class TestMouseController:
         
         # Verify
         assert result == (1920, 1080)
-        mock_pyautogui.size.assert_called_once() 
\ No newline at end of file
+        mock_pyautogui.size.assert_called_once() 
+
+    @patch('screen_spy_agent.mouse_controller.pyautogui')
+    def test_click_at_box(self, mock_pyautogui):
+        """Test that click_at_box clicks the box center in screen coordinates."""
+        controller = MouseController(100, 200)
+        controller.set_vertical_shift(-23)
+        
+        result = controller.click_at_box(1730, 857, (80, 30, 55, 15))
+        
+        # The area origin already includes any shift, so the vertical shift is not added again
+        mock_pyautogui.click.assert_called_once_with(x=1838, y=894)
+        assert result is True
+    
+    def test_get_click_positions(self):
+        """Test that click positions carry the vertical shift and the delay is validated."""
+        controller = MouseController(100, 200)
+        controller.set_click_coordinates(2, [[10, 20], [30, 40]])
+        controller.set_vertical_shift(-23)
+        
+        assert controller.get_click_positions(2) == [(10, -3), (30, 17)]
+        assert controller.get_click_positions(0) == []
+        with pytest.raises(ValueError):
+            MouseController(100, 200, click_delay=-1)
+    
+    def test_click_coordinates_beyond_four_areas(self):
+        """Test that any area index can have clicks and areas without them use the target position."""
+        controller = MouseController(100, 200)
+        controller.set_click_coordinates(9, [[10, 20]])
+        
+        assert controller.get_click_positions(9) == [(10, 20)]
+        assert controller.get_click_positions(6) == [(100, 200)]
+        assert controller.get_click_positions(12) == [(100, 200)]
+        with pytest.raises(ValueError):
+            controller.set_click_coordinates(-1, [[10, 20]])
+    
+    @patch('screen_spy_agent.mouse_controller.pyautogui')
+    def test_stop_event_interrupts_click_delay(self, mock_pyautogui):
+        """Test that setting the stop event ends a click sequence at its pause."""
+        stop_event = threading.Event()
+        controller = MouseController(100, 200, click_delay=30, stop_event=stop_event)
+        controller.set_click_coordinates(1, [[10, 20], [30, 40]])
+        results = []
+        thread = threading.Thread(target=lambda: results.append(controller.click_at_position(1)))
+        thread.start()
+        while mock_pyautogui.click.call_count == 0:
+            time.sleep(0.01)
+        
+        start = time.perf_counter()
+        stop_event.set()
+        thread.join(timeout=5)
+        assert time.perf_counter() - start < 1
+        assert results == [False]
+        mock_pyautogui.click.assert_called_once_with(x=10, y=20)
@@ -0,0 +1,155 @@
+import pytest
+from unittest.mock import patch, MagicMock
+from PIL import Image
+from screen_spy_agent import ocr_engine
+from screen_spy_agent.ocr_engine import (
+    OcrEngine, OcrDetector, SubprocessTesseractEngine, TesserocrEngine, WordBox, create_ocr_engine,
+    find_phrase_words, phrase_pattern
+)
+
+
+class FakeEngine(OcrEngine):
+    """OCR engine that returns fixed text per page segmentation mode."""
+    
+    def __init__(self, texts):
+        self.texts = texts
+        self.calls = []
+    
+    def recognize(self, image, psm=7, whitelist=None):
+        self.calls.append(psm)
+        return self.texts.get(psm, "")
+
+
+class FakeWordEngine(OcrEngine):
+    """OCR engine that returns fixed word boxes."""
+    
+    def __init__(self, words):
+        self.words = words
+    
+    def recognize_words(self, image, psm=7, whitelist=None):
+        return self.words
+
+
+class TestOcrEngine:
+    """Tests for the OCR engines and the OcrDetector class."""
+    
+    def test_tesserocr_engine_reuses_api(self):
+        """Test that one Tesseract instance serves every call."""
+        mock_tesserocr = MagicMock()
+        mock_tesserocr.tesseract_version.return_value = "tesseract 5.3.0\n"
+        mock_api = mock_tesserocr.PyTessBaseAPI.return_value
+        mock_api.GetUTF8Text.return_value = "Reject Accept\n"
+        
+        with patch.object(ocr_engine, "tesserocr", mock_tesserocr):
+            engine = TesserocrEngine()
+            image = Image.new('L', (10, 10))
+            assert engine.recognize(image, psm=7, whitelist="abc") == "Reject Accept\n"
+            assert list(engine.iter_recognize([image, image], psm=6, whitelist="abc")) == ["Reject Accept\n"] * 2
+            engine.close()
+        
+        mock_tesserocr.PyTessBaseAPI.assert_called_once()
+        assert mock_api.SetImage.call_count == 3
+        mock_api.SetVariable.assert_called_once_with("tessedit_char_whitelist", "abc")
+        mock_api.End.assert_called_once()
+    
+    def test_tesserocr_engine_requires_binding(self):
+        """Test that a missing binding raises ImportError."""
+        with patch.object(ocr_engine, "tesserocr", None):
+            with pytest.raises(ImportError):
+                TesserocrEngine()
+    
+    @patch('screen_spy_agent.ocr_engine.subprocess.run')
+    def test_subprocess_engine_batches_images(self, mock_run):
+        """Test that several images are read by a single tesseract process."""
+        mock_run.return_value.stdout = b"Reject\n\fAccept\n\f"
+        engine = SubprocessTesseractEngine(tesseract_cmd="tesseract")
+        images = [Image.new('L', (10, 10)), Image.new('L', (10, 10))]
+        
+        assert list(engine.iter_recognize(images, psm=7, whitelist="abc")) == ["Reject\n", "Accept\n"]
+        
+        mock_run.assert_called_once()
+        command = mock_run.call_args[0][0]
+        assert command[0] == "tesseract"
+        assert command[2] == "stdout"
+        assert command[3:] == ["--oem", "3", "--psm", "7", "-c", "tessedit_char_whitelist=abc"]
+    
+    def test_create_ocr_engine(self):
+        """Test that the subprocess engine is used when tesserocr is missing."""
+        with patch.object(ocr_engine, "tesserocr", None):
+            assert isinstance(create_ocr_engine(), SubprocessTesseractEngine)
+        with pytest.raises(ValueError):
+            create_ocr_engine("easyocr")
+    
+    def test_phrase_pattern(self):
+        """Test that phrase words are matched in order, ignoring case."""
+        assert phrase_pattern("reject accept").search("REJECT  Accept")
+        assert not phrase_pattern("reject accept").search("Accept Reject")
+    
+    def test_ocr_detector(self):
+        """Test that the detector tries PSM modes until the phrase is read."""
+        engine = FakeEngine({6: "Try again"})
+        detector = OcrDetector(engine, psm_modes=(7, 6))
+        
+        result = detector.detect(Image.new('RGB', (20, 10)), "try again", 3)
+        
+        assert result.detected is True
+        assert engine.calls == [7, 6]
+        assert detector.detect(Image.new('RGB', (20, 10)), "new chat", 0).detected is None
+        assert OcrDetector(engine, miss_is_negative=True).detect(Image.new('RGB', (20, 10)), "new chat").detected is False
+    
+    def test_tesserocr_engine_word_boxes(self):
+        """Test that word boxes come from the result iterator."""
+        mock_tesserocr = MagicMock()
+        mock_tesserocr.tesseract_version.return_value = "tesseract 5.3.0\n"
+        word = MagicMock()
+        word.GetUTF8Text.return_value = "Accept"
+        word.BoundingBox.return_value = (100, 10, 160, 30)
+        word.Confidence.return_value = 91.5
+        mock_tesserocr.iterate_level.return_value = [word]
+        
+        with patch.object(ocr_engine, "tesserocr", mock_tesserocr):
+            engine = TesserocrEngine()
+            words = engine.recognize_words(Image.new('L', (200, 40)), psm=7)
+        
+        mock_tesserocr.PyTessBaseAPI.return_value.Recognize.assert_called_once()
+        assert [(w.text, w.box, w.confidence) for w in words] == [("Accept", (100, 10, 60, 20), 91.5)]
+    
+    def test_subprocess_engine_word_boxes(self):
+        """Test that word boxes are parsed from image_to_data and empty entries dropped."""
+        mock_pytesseract = MagicMock()
+        mock_pytesseract.image_to_data.return_value = {
+            "text": ["", "Reject", "Accept"], "left": [0, 10, 80], "top": [0, 5, 6],
+            "width": [200, 50, 55], "height": [40, 20, 20], "conf": [-1, 96, 93.5]
+        }
+        with patch.object(ocr_engine, "pytesseract", mock_pytesseract):
+            words = SubprocessTesseractEngine(tesseract_cmd="tesseract").recognize_words(Image.new('L', (200, 40)), psm=6)
+        
+        assert [w.text for w in words] == ["Reject", "Accept"]
+        assert words[1].box == (80, 6, 55, 20)
+        assert "--psm 6" in mock_pytesseract.image_to_data.call_args.kwargs["config"]
+    
+    def test_find_phrase_words(self):
+        """Test that phrase words are found in order, ignoring case and punctuation."""
+        words = [WordBox("[Reject", 0, 0, 10, 5), WordBox("or", 12, 0, 5, 5), WordBox("Accept!", 20, 0, 12, 5)]
+        assert [w.text for w in find_phrase_words(words, "reject accept")] == ["[Reject", "Accept!"]
+        assert find_phrase_words(words, "accept reject") is None
+        assert WordBox("a", 10, 20, 30, 40).center == (25.0, 40.0)
+    
+    def test_ocr_detector_locates_last_word(self):
+        """Test that a match carries the box of the phrase's last word in area pixels."""
+        engine = FakeWordEngine([WordBox("Reject", 20, 10, 100, 30), WordBox("Accept", 160, 10, 110, 30)])
+        detector = OcrDetector(engine, scale=2)
+        
+        result = detector.detect(Image.new('RGB', (170, 27)), "reject accept", 1)
+        
+        assert result.detected is True
+        assert result.location == (80, 5, 55, 15)
+    
+    def test_ocr_detector_without_word_boxes(self):
+        """Test that engines without word boxes still detect, without a location."""
+        detector = OcrDetector(FakeEngine({7: "Reject Accept"}))
+        result = detector.detect(Image.new('RGB', (20, 10)), "reject accept", 1)
+        
+        assert result.detected is True
+        assert result.location is None
+        assert detector.locate_words is False
@@ -0,0 +1,150 @@
+import pytest
+import numpy as np
+from PIL import Image, ImageDraw
+from screen_spy_agent.ocr_preprocessing import (
+    OcrVariants, binarize, iter_variants, local_mean, otsu_threshold, prepare_for_ocr, text_polarity,
+    threshold_stack, to_gray_array, upscale
+)
+
+
+def make_area():
+    """Create a dark area with light text like the real button row."""
+    image = Image.new('RGB', (140, 27), color=(30, 30, 30))
+    ImageDraw.Draw(image).text((8, 7), "Reject  Accept", fill=(230, 230, 230))
+    return image
+
+
+class TestOcrPreprocessing:
+    """Tests for the OCR preprocessing functions and the OcrVariants class."""
+    
+    def test_threshold_stack_matches_point_lambdas(self):
+        """Test that the broadcast stack equals the per-pixel PIL thresholds."""
+        gray_image = make_area().convert('L')
+        binary, inverted = threshold_stack(np.asarray(gray_image), (100, 140, 180))
+        
+        assert binary.shape == (3, 27, 140)
+        assert binary.dtype == np.uint8
+        for index, threshold in enumerate((100, 140, 180)):
+            expected = np.asarray(gray_image.point(lambda p: 0 if p < threshold else 255))
+            assert np.array_equal(binary[index], expected)
+            assert np.array_equal(inverted[index], 255 - expected)
+    
+    def test_to_gray_array_accepts_arrays(self):
+        """Test that NumPy RGB input converts like a PIL image."""
+        image = make_area()
+        assert np.array_equal(to_gray_array(np.asarray(image)), np.asarray(image.convert('L')))
+    
+    def test_upscale_and_prepare(self):
+        """Test that upscaling enlarges once by the factor."""
+        gray = to_gray_array(make_area())
+        assert upscale(gray, 2).shape == (54, 280)
+        assert upscale(gray, 1) is gray
+        prepared = prepare_for_ocr(make_area(), scale=3)
+        assert prepared.mode == 'L'
+        assert prepared.size == (420, 81)
+    
+    def test_variant_order_and_names(self):
+        """Test that the variants keep the names and order recognize_text() used."""
+        methods = [method for _, method in iter_variants(make_area(), (100, 120))]
+        assert methods == [
+            "binary-100", "inverted-100", "scaled-binary-100", "scaled-inverted-100",
+            "binary-120", "inverted-120", "scaled-binary-120", "scaled-inverted-120",
+            "grayscale", "original", "scaled-grayscale", "scaled-original"
+        ]
+        
+        variants = dict((method, image) for image, method in iter_variants(make_area(), (100,)))
+        assert variants["binary-100"].size == (140, 27)
+        assert variants["scaled-inverted-100"].size == (280, 54)
+        assert variants["scaled-original"].mode == 'RGB'
+    
+    def test_no_scaled_variants_at_scale_one(self):
+        """Test that scale 1 leaves out the scaled variants."""
+        methods = [method for _, method in iter_variants(make_area(), (100,), scale=1)]
+        assert methods == ["binary-100", "inverted-100", "grayscale", "original"]
+    
+    def test_variants_are_generated_lazily_and_reused(self):
+        """Test that OcrVariants generates on demand and shares variants between passes."""
+        variants = OcrVariants(make_area())
+        assert variants.generated == 0
+        
+        first = next(iter(variants))
+        assert variants.generated == 1
+        assert first[1] == "binary-100"
+        
+        # Two passes at the same time, as in zip(attempts, engine.iter_recognize(attempts.images()))
+        pairs = list(zip(variants, variants.images()))
+        assert len(pairs) == 24
+        assert all(image is other for (image, _), other in pairs)
+        assert variants.generated == 24
+        assert next(iter(variants))[0] is first[0]
+    
+    def test_variant_by_name(self):
+        """Test that a variant can be built directly by name."""
+        variants = OcrVariants(make_area(), (100, 140))
+        scaled = variants.variant("scaled-inverted-140")
+        assert scaled.size == (280, 54)
+        assert variants.generated == 1
+        assert variants.variant("scaled-inverted-140") is scaled
+        
+        with pytest.raises(KeyError):
+            variants.variant("binary-999")
+    
+    def test_otsu_threshold_splits_two_levels(self):
+        """Test that Otsu's threshold falls between the two gray levels of an area."""
+        gray = np.full((20, 40), 40, dtype=np.uint8)
+        gray[5:15, 5:20] = 200
+        threshold = otsu_threshold(gray)
+        assert 40 < threshold <= 200
+        
+        binary, _ = threshold_stack(gray, (threshold,))
+        assert np.array_equal(binary[0] == 255, gray == 200)
+    
+    def test_text_polarity(self):
+        """Test that the larger class is taken as the background."""
+        gray = to_gray_array(make_area())
+        assert text_polarity(gray) == "light"
+        assert text_polarity(255 - gray) == "dark"
+        
+        even = np.zeros((10, 10), dtype=np.uint8)
+        even[:, 5:] = 255
+        assert text_polarity(even) is None
+    
+    def test_binarize_gives_black_text_on_white(self):
+        """Test that both methods turn light text on dark into black on white."""
+        gray = to_gray_array(make_area())
+        for method in ("otsu", "adaptive"):
+            binary = binarize(gray, method, "light")
+            assert binary.dtype == np.uint8
+            assert set(np.unique(binary)) == {0, 255}
+            # The text pixels are the minority and are bright in the original
+            assert np.count_nonzero(binary == 0) < binary.size / 4
+            assert gray[binary == 0].mean() > gray[binary == 255].mean()
+        
+        with pytest.raises(ValueError):
+            binarize(gray, "median")
+        with pytest.raises(ValueError):
+            binarize(gray, "adaptive", block_size=4)
+    
+    def test_adaptive_threshold_handles_gradient(self):
+        """Test that the adaptive method finds text on a strong background gradient."""
+        gray = np.tile(np.linspace(60, 230, 80), (20, 1))
+        gray[8:12, 10:70] -= 50
+        gray = gray.astype(np.uint8)
+        
+        assert np.allclose(local_mean(np.full((5, 5), 7, dtype=np.uint8), 3), 7)
+        text = binarize(gray, "adaptive", "dark", block_size=9) == 0
+        assert text[8:12, 10:70].mean() > 0.9
+        assert text[:6].mean() < 0.05
+    
+    def test_auto_variants(self):
+        """Test that an automatic method puts one scaled binarization in front of the sweep."""
+        variants = OcrVariants(make_area(), (100,), auto="otsu")
+        assert variants.polarity == "light"
+        assert variants.names[:2] == ["otsu", "binary-100"]
+        assert variants.variant("otsu").size == (280, 54)
+        
+        only_auto = OcrVariants(make_area(), auto="adaptive", sweep=False)
+        assert only_auto.names == ["adaptive"]
+        
+        with pytest.raises(ValueError):
+            OcrVariants(make_area(), auto="median")
@@ -0,0 +1,104 @@
+import multiprocessing
+import time
+import pytest
+from PIL import Image
+from screen_spy_agent.ocr_engine import OcrEngine
+from screen_spy_agent.ocr_runner import ParallelOcrRunner, iter_attempts, run_attempt
+
+PATTERN = r"reject.*accept"
+
+
+class WidthEngine(OcrEngine):
+    """OCR engine that reads "Reject Accept" from 20 pixel wide images and nothing from others."""
+    
+    def __init__(self, delay=0.0):
+        self.delay = delay
+    
+    def recognize(self, image, psm=7, whitelist=None):
+        time.sleep(self.delay)
+        if image.width == 99:
+            raise RuntimeError("unreadable")
+        return "Reject Accept" if image.width == 20 else "noise"
+
+
+def slow_engine():
+    """Create an engine that takes 50 ms per call (picklable for the pool)."""
+    return WidthEngine(delay=0.05)
+
+
+def attempts(widths):
+    """Build (image, method, psm) attempts from image widths."""
+    return [(Image.new('L', (width, 5)), f"variant-{number}", 7) for number, width in enumerate(widths)]
+
+
+@pytest.fixture
+def runner():
+    """A two-worker runner with the slow fake engine."""
+    with ParallelOcrRunner(workers=2, engine_factory=slow_engine,
+                           mp_context=multiprocessing.get_context("fork")) as runner:
+        yield runner
+
+
+class TestOcrRunner:
+    """Tests for the OCR attempt runners."""
+    
+    def test_run_attempt_times_and_matches(self):
+        """Test that a single attempt reports its text, hit and time."""
+        import re
+        result = run_attempt(WidthEngine(), Image.new('L', (20, 5)), "binary-100", 6, re.compile(PATTERN, re.I))
+        assert result.hit
+        assert result.text == "Reject Accept"
+        assert result.psm == 6
+        assert result.elapsed >= 0
+        
+        failed = run_attempt(WidthEngine(), Image.new('L', (99, 5)), "binary-100", 6, None)
+        assert not failed.hit
+        assert failed.error == "unreadable"
+    
+    def test_iter_attempts_stops_at_first_hit(self):
+        """Test that sequential attempts stop after the first hit."""
+        results = list(iter_attempts(WidthEngine(), attempts([10, 20, 20]), PATTERN))
+        assert [result.hit for result in results] == [False, True]
+        
+        results = list(iter_attempts(WidthEngine(), attempts([10, 20, 20]), PATTERN, stop_on_hit=False))
+        assert len(results) == 3
+    
+    def test_parallel_run_stops_at_first_hit(self, runner):
+        """Test that the pool returns at the hit and skips the remaining attempts."""
+        results = list(runner.run(attempts([10, 20, 10, 10, 10, 10, 10, 10]), PATTERN))
+        
+        assert results[-1].hit
+        assert results[-1].method == "variant-1"
+        # At most the attempts in flight beside the hit finish
+        assert len(results) <= 3
+        assert runner.get_stats()["attempts"] == len(results)
+    
+    def test_parallel_run_uses_all_workers(self, runner):
+        """Test that independent attempts overlap in time."""
+        results = list(runner.run(attempts([10] * 6), PATTERN))
+        stats = runner.get_stats()
+        
+        assert len(results) == 6
+        assert not any(result.hit for result in results)
+        assert stats["busy_time"] >= 0.3
+        assert stats["speedup"] > 1.4
+    
+    def test_parallel_run_reads_attempts_lazily(self, runner):
+        """Test that no more attempts than workers are taken before results come back."""
+        taken = []
+        
+        def plan():
+            for attempt in attempts([20, 10, 10, 10, 10]):
+                taken.append(attempt[1])
+                yield attempt
+        
+        results = list(runner.run(plan(), PATTERN))
+        assert any(result.hit for result in results)
+        assert len(taken) <= 3
+    
+    def test_runs_after_a_hit_are_not_skipped(self, runner):
+        """Test that the hit marker of one run does not affect the next."""
+        list(runner.run(attempts([20, 10]), PATTERN))
+        results = list(runner.run(attempts([10, 10, 20]), PATTERN, stop_on_hit=False))
+        assert len(results) == 3
+        assert sum(result.hit for result in results) == 1
@@ -0,0 +1,95 @@
+import json
+import pytest
+from screen_spy_agent.ocr_strategy import AdaptiveOcrStrategy
+
+METHODS = ["binary-100", "inverted-100", "grayscale"]
+PSM_MODES = [7, 6]
+
+
+def run_frame(strategy, hits):
+    """Run one frame, counting an attempt as a hit if it is in hits."""
+    plan = strategy.plan(METHODS, PSM_MODES)
+    tried = []
+    for method, psm in plan:
+        tried.append((method, psm))
+        plan.record((method, psm) in hits)
+    return plan, tried
+
+
+class TestAdaptiveOcrStrategy:
+    """Tests for the AdaptiveOcrStrategy class."""
+    
+    def test_default_order_without_history(self):
+        """Test that untried attempts keep the PSM-outer default order."""
+        strategy = AdaptiveOcrStrategy(explore_interval=None)
+        assert strategy.order(METHODS, PSM_MODES) == [
+            ("binary-100", 7), ("inverted-100", 7), ("grayscale", 7),
+            ("binary-100", 6), ("inverted-100", 6), ("grayscale", 6)
+        ]
+    
+    def test_successful_attempts_move_to_front(self):
+        """Test that the attempt that found the phrase is tried first next time."""
+        strategy = AdaptiveOcrStrategy(explore_interval=None)
+        plan, tried = run_frame(strategy, {("grayscale", 6)})
+        assert plan.found
+        assert tried[-1] == ("grayscale", 6)
+        
+        plan, tried = run_frame(strategy, {("grayscale", 6)})
+        assert tried == [("grayscale", 6)]
+        # Attempts that missed rank below untried ones
+        assert strategy.order(METHODS, PSM_MODES)[-1] != ("grayscale", 6)
+    
+    def test_stops_when_confident(self):
+        """Test that a frame without a hit stops once the tried attempts cover the past hits."""
+        strategy = AdaptiveOcrStrategy(confidence=0.9, min_hits=3, explore_interval=None)
+        for _ in range(3):
+            run_frame(strategy, {("inverted-100", 7)})
+        
+        plan, tried = run_frame(strategy, set())
+        assert tried == [("inverted-100", 7)]
+        assert not plan.found
+    
+    def test_full_sweep_before_min_hits(self):
+        """Test that nothing is skipped until enough hits are recorded."""
+        strategy = AdaptiveOcrStrategy(min_hits=5, explore_interval=None)
+        run_frame(strategy, {("binary-100", 7)})
+        _, tried = run_frame(strategy, set())
+        assert len(tried) == 6
+    
+    def test_exploration_tries_everything(self):
+        """Test that exploring frames try all attempts even after a hit."""
+        strategy = AdaptiveOcrStrategy(min_hits=1, explore_interval=2)
+        run_frame(strategy, {("binary-100", 7)})
+        plan, tried = run_frame(strategy, {("binary-100", 7), ("grayscale", 6)})
+        assert plan.exploring
+        assert len(tried) == 6
+        assert strategy.hits("grayscale", 6) == 1
+    
+    def test_save_and_load(self, tmp_path):
+        """Test that the statistics survive a restart."""
+        path = str(tmp_path / "ocr_strategy.json")
+        strategy = AdaptiveOcrStrategy(explore_interval=None, state_path=path)
+        run_frame(strategy, {("inverted-100", 6)})
+        strategy.save()
+        
+        with open(path) as f:
+            assert json.load(f)["frames"] == 1
+        
+        restored = AdaptiveOcrStrategy(explore_interval=None, state_path=path)
+        assert restored.frames == 1
+        assert restored.order(METHODS, PSM_MODES)[0] == ("inverted-100", 6)
+        assert restored.get_stats()[0] == {
+            "method": "inverted-100", "psm": 6, "tries": 1, "hits": 1, "success_rate": 1.0
+        }
+    
+    def test_load_ignores_corrupt_file(self, tmp_path):
+        """Test that a corrupt state file leaves the strategy empty."""
+        path = tmp_path / "ocr_strategy.json"
+        path.write_text("not json")
+        strategy = AdaptiveOcrStrategy(state_path=str(path))
+        assert strategy.get_stats() == []
+    
+    def test_invalid_confidence(self):
+        """Test that the confidence must be a share."""
+        with pytest.raises(ValueError):
+            AdaptiveOcrStrategy(confidence=1.5)
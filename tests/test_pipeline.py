@@ -0,0 +1,149 @@
+import pytest
+import threading
+import time
+from unittest.mock import MagicMock
+from screen_spy_agent.pipeline import PipelineEngine
+from screen_spy_agent.screen_spy_agent import ScreenSpyAgent, NEW_CHAT_VERTICAL_SHIFT
+
+
+def wait_until(condition, timeout=5):
+    """Poll a condition until it holds or the timeout passes."""
+    deadline = time.perf_counter() + timeout
+    while not condition():
+        if time.perf_counter() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+class TestPipelineEngine:
+    """Tests for the PipelineEngine class."""
+    
+    def test_stages_overlap(self):
+        """Test that throughput follows the slowest stage instead of the sum of the stages."""
+        counter = iter(range(1000))
+        acted = []
+        
+        def capture():
+            time.sleep(0.04)
+            return [next(counter)]
+        
+        def analyze(payload):
+            time.sleep(0.04)
+            return payload * 2
+        
+        def act(payload, result):
+            time.sleep(0.04)
+            acted.append((payload, result))
+        
+        engine = PipelineEngine(capture, analyze, act, analysis_workers=1)
+        start = time.perf_counter()
+        with engine:
+            assert wait_until(lambda: len(acted) >= 10)
+        elapsed = time.perf_counter() - start
+        
+        # In series ten items take 1.2 seconds; overlapped about 0.44
+        assert elapsed < 0.9
+        assert acted[:10] == [(n, n * 2) for n in range(10)]
+        stats = engine.get_stats()
+        assert stats["stages"]["analysis"]["count"] >= 10
+        assert stats["stages"]["end_to_end"]["mean_ms"] >= stats["stages"]["analysis"]["mean_ms"]
+    
+    def test_backpressure_blocks_the_producer(self):
+        """Test that a stalled analysis stage stops the producer once the queue is full."""
+        release = threading.Event()
+        engine = PipelineEngine(lambda: [object()], lambda payload: release.wait(), lambda payload, result: None,
+                                analysis_workers=1, queue_size=2)
+        engine.start()
+        try:
+            assert wait_until(lambda: engine.get_stats()["queue_depths"]["analysis"] == 2)
+            time.sleep(0.2)
+            # One item is being analyzed, two are queued and one waits in the producer
+            assert engine.get_stats()["captured"] == 4
+        finally:
+            release.set()
+            engine.stop()
+    
+    def test_one_item_per_key(self):
+        """Test that a key is not analyzed twice at once and busy keys are dropped."""
+        active = set()
+        overlaps = []
+        lock = threading.Lock()
+        
+        def analyze(key):
+            with lock:
+                if key in active:
+                    overlaps.append(key)
+                active.add(key)
+            time.sleep(0.05)
+            with lock:
+                active.discard(key)
+            return True
+        
+        engine = PipelineEngine(lambda: [0, 1], analyze, lambda payload, result: None,
+                                key=lambda payload: payload, analysis_workers=4)
+        with engine:
+            assert wait_until(lambda: engine.stage_stats["action"].count >= 6)
+        
+        assert overlaps == []
+        assert engine.dropped > 0
+    
+    def test_errors_release_the_key(self):
+        """Test that a failing analysis is counted and does not keep its key busy."""
+        calls = []
+        
+        def analyze(payload):
+            calls.append(payload)
+            if len(calls) == 1:
+                raise RuntimeError("analysis failed")
+            return True
+        
+        acted = []
+        engine = PipelineEngine(lambda: ["area"], analyze, lambda payload, result: acted.append(result),
+                                key=lambda payload: payload)
+        with engine:
+            assert wait_until(lambda: acted)
+        
+        assert engine.get_stats()["stages"]["analysis"]["errors"] == 1
+    
+    def test_invalid_arguments(self):
+        """Test that invalid sizes raise ValueError."""
+        with pytest.raises(ValueError):
+            PipelineEngine(list, str, print, analysis_workers=0)
+        with pytest.raises(ValueError):
+            PipelineEngine(list, str, print, queue_size=0)
+
+
+class TestPipelinedAgent:
+    """Tests for the pipelined analysis mode of ScreenSpyAgent."""
+    
+    def make_agent(self):
+        image_analyzer = MagicMock()
+        image_analyzer.detect_text_in_image.side_effect = (
+            lambda screenshot, text_to_detect: text_to_detect == "reject accept"
+        )
+        mouse_controller = MagicMock()
+        return ScreenSpyAgent([MagicMock() for _ in range(4)], image_analyzer, mouse_controller,
+                              interval=0, analysis_mode="pipelined")
+    
+    def test_pipeline_clicks_detected_areas(self):
+        """Test that the pipeline captures, analyzes and clicks every area."""
+        agent = self.make_agent()
+        agent.pipeline = agent.create_pipeline()
+        with agent.pipeline:
+            assert wait_until(lambda: agent.pipeline.stage_stats["action"].count >= 8)
+        
+        agent.mouse_controller.click_at_position.assert_any_call(1)
+        assert all(c.args == (1,) for c in agent.mouse_controller.click_at_position.call_args_list)
+        assert agent.agent_state.detection_results == [False, True, False, False]
+    
+    def test_stale_shift_results_are_dropped(self):
+        """Test that results captured before area 0 changed the vertical shift are not acted on."""
+        agent = self.make_agent()
+        agent.agent_state.set_vertical_shift(NEW_CHAT_VERTICAL_SHIFT)
+        
+        agent.pipeline_act((1, 0, MagicMock()), True)
+        agent.mouse_controller.click_at_position.assert_not_called()
+        
+        agent.pipeline_act((1, NEW_CHAT_VERTICAL_SHIFT, MagicMock()), True)
+        agent.mouse_controller.click_at_position.assert_called_once_with(1)
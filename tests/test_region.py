@@ -0,0 +1,84 @@
+import pytest
+import json
+from unittest.mock import MagicMock
+from screen_spy_agent.region import (
+    DETECTION_PHRASES, Region, load_regions, load_regions_file, regions_to_config, resolve_detectors
+)
+
+
+class TestRegion:
+    """Tests for the Region class and the region configuration."""
+    
+    def test_load_regions(self, tmp_path):
+        """Test that any number of regions are loaded with their settings."""
+        config = {"regions": [
+            {"bbox": [0, 10 * i, 100, 10 * i + 8], "phrase": f"phrase {i}", "clicks": [[i, i]]}
+            for i in range(6)
+        ]}
+        config["regions"][5].update(detector="ocr", interval=3, priority=2, name="retry")
+        path = tmp_path / "config.json"
+        path.write_text(json.dumps(config))
+        
+        regions = load_regions_file(str(path))
+        
+        assert len(regions) == 6
+        assert regions[5].bbox == (0, 50, 100, 58)
+        assert regions[5].phrase == "phrase 5"
+        assert regions[5].clicks == [[5, 5]]
+        assert (regions[5].detector, regions[5].interval, regions[5].priority) == ("ocr", 3, 2)
+        assert regions[0].interval is None and regions[0].priority == 0
+    
+    def test_load_legacy_config(self):
+        """Test that configurations with "areas" and "clicks" use the default phrases."""
+        config = {
+            "areas": [[0, 0, 100, 100], [100, 0, 200, 100], [200, 0, 300, 100], [300, 0, 400, 100]],
+            "clicks": [[], [[50, 50]], [[60, 60], [70, 70]], [[80, 80]]]
+        }
+        
+        regions = load_regions(config)
+        
+        assert [region.phrase for region in regions] == list(DETECTION_PHRASES)
+        assert regions[2].clicks == [[60, 60], [70, 70]]
+        with pytest.raises(ValueError):
+            load_regions({"areas": config["areas"] + [[0, 0, 10, 10]]})
+        with pytest.raises(ValueError):
+            load_regions({"areas": config["areas"], "clicks": config["clicks"][:3]})
+    
+    def test_invalid_regions(self):
+        """Test that invalid regions are rejected."""
+        with pytest.raises(ValueError):
+            load_regions({"regions": []})
+        with pytest.raises(ValueError):
+            Region.from_dict({"bbox": [0, 0, 10, 10]})
+        with pytest.raises(ValueError):
+            Region((10, 0, 5, 10), "phrase")
+        with pytest.raises(ValueError):
+            Region((0, 0, 10, 10), "")
+        with pytest.raises(ValueError):
+            Region((0, 0, 10, 10), "phrase", clicks=[[1, 2, 3]])
+        with pytest.raises(ValueError):
+            Region((0, 0, 10, 10), "phrase", interval=-1)
+    
+    def test_regions_to_config(self):
+        """Test that saved regions load back the same."""
+        regions = [
+            Region((0, 0, 10, 10), "first"),
+            Region((0, 20, 10, 30), "second", clicks=[[5, 25]], detector="template", interval=4, priority=1)
+        ]
+        
+        loaded = load_regions(json.loads(json.dumps(regions_to_config(regions))))
+        
+        assert [region.to_dict() for region in loaded] == [region.to_dict() for region in regions]
+    
+    def test_resolve_detectors(self):
+        """Test that detector names are replaced with the detectors and unknown names are rejected."""
+        ocr_detector = MagicMock()
+        regions = [Region((0, 0, 10, 10), "first"), Region((0, 20, 10, 30), "second", detector="ocr")]
+        
+        resolve_detectors(regions, {"ocr": ocr_detector})
+        
+        assert regions[0].detector is None
+        assert regions[1].detector is ocr_detector
+        assert "detector" not in regions[1].to_dict()
+        with pytest.raises(ValueError):
+            resolve_detectors([Region((0, 0, 10, 10), "first", detector="missing")], {"ocr": ocr_detector})
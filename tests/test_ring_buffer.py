@@ -0,0 +1,70 @@
+import pytest
+from screen_spy_agent.ring_buffer import RingBuffer
+
+
+class TestRingBuffer:
+    """Tests for the RingBuffer class."""
+    
+    def test_append_wraps_around(self):
+        """Test that appending past the capacity drops the oldest entries."""
+        buffer = RingBuffer(3)
+        assert buffer == []
+        
+        for value in [True, False, True, True, False]:
+            buffer.append(value)
+        
+        assert len(buffer) == 3
+        assert buffer == [True, True, False]
+        assert buffer[0] is True
+        assert buffer[-1] is False
+        assert buffer[1:] == [True, False]
+        with pytest.raises(IndexError):
+            buffer[3]
+    
+    def test_packed_entries(self):
+        """Test entries of several results packed into bits, including more than eight areas."""
+        buffer = RingBuffer(2, width=10)
+        first = [True, False] * 5
+        buffer.append(first)
+        buffer.append([False] * 10)
+        buffer.set_result(-1, 9, True)
+        buffer.set_result(-1, 9, False)
+        buffer.set_result(-1, 8, True)
+        
+        assert buffer == [first, [False] * 8 + [True, False]]
+        assert buffer[0] == first
+        assert buffer.nbytes == 4
+        
+        with pytest.raises(ValueError):
+            buffer.append([True] * 9)
+        with pytest.raises(IndexError):
+            buffer.set_result(-1, 10, True)
+        with pytest.raises(ValueError):
+            RingBuffer(2).set_result(-1, 0, True)
+    
+    def test_storage_is_fixed(self):
+        """Test that the storage does not grow however many entries are appended."""
+        buffer = RingBuffer(100, width=4)
+        nbytes = buffer.nbytes
+        for i in range(10000):
+            buffer.append([i % 2 == 0, False, True, i % 3 == 0])
+        
+        assert buffer.nbytes == nbytes == 100
+        assert len(buffer) == 100
+        assert buffer[-1] == [False, False, True, True]
+    
+    def test_invalid_capacity(self):
+        """Test that a capacity below one raises ValueError."""
+        with pytest.raises(ValueError):
+            RingBuffer(0)
+    
+    def test_copy(self):
+        """Test that a copy keeps the entries and does not share the storage."""
+        buffer = RingBuffer(3, width=2, entries=[[True, False], [False, True], [True, True], [False, False]])
+        copy = buffer.copy()
+        
+        copy.append([True, True])
+        copy.set_result(0, 0, True)
+        
+        assert buffer == [[False, True], [True, True], [False, False]]
+        assert copy == [[True, True], [False, False], [True, True]]
@@ -0,0 +1,109 @@
+import pytest
+from unittest.mock import MagicMock
+from screen_spy_agent.scheduler import FixedRateScheduler
+from screen_spy_agent.screen_spy_agent import ScreenSpyAgent
+
+
+class FakeClock:
+    """Manually advanced clock."""
+    
+    def __init__(self):
+        self.now = 100.0
+    
+    def __call__(self):
+        return self.now
+
+
+class TestFixedRateScheduler:
+    """Tests for the FixedRateScheduler class."""
+    
+    def test_fixed_rate_does_not_drift(self):
+        """Test that due times stay on the grid however long each run takes."""
+        clock = FakeClock()
+        scheduler = FixedRateScheduler(clock=clock)
+        scheduler.add("area", 2.0)
+        
+        starts = []
+        for _ in range(5):
+            clock.now += scheduler.time_until_next()
+            assert scheduler.due() == ["area"]
+            starts.append(clock.now)
+            scheduler.mark_run("area")
+            clock.now += 0.7  # Work done after the due time
+        
+        assert starts == [100.0, 102.0, 104.0, 106.0, 108.0]
+        assert scheduler.time_until_next() == pytest.approx(1.3)
+    
+    def test_per_task_intervals_and_priorities(self):
+        """Test that tasks run at their own rates and higher priorities come first."""
+        clock = FakeClock()
+        scheduler = FixedRateScheduler(clock=clock)
+        scheduler.add("new chat", 30.0)
+        scheduler.add("reject accept", 2.0, priority=1)
+        
+        runs = {"new chat": 0, "reject accept": 0}
+        while clock.now < 160.0:
+            due = scheduler.due()
+            if due:
+                assert due[0] == "reject accept"
+                for key in due:
+                    runs[key] += 1
+                    scheduler.mark_run(key)
+            clock.now += 0.5
+        
+        assert runs == {"new chat": 2, "reject accept": 30}
+    
+    def test_skip_policy(self):
+        """Test that missed runs are skipped and the next run stays on the grid."""
+        clock = FakeClock()
+        scheduler = FixedRateScheduler("skip", clock=clock)
+        scheduler.add("area", 2.0)
+        
+        clock.now += 7.0  # The due times at 100, 102, 104 and 106 have passed
+        assert scheduler.mark_run("area") == 3
+        assert scheduler.due() == []
+        assert scheduler.time_until_next() == pytest.approx(1.0)
+        assert scheduler.get_stats()["area"]["max_lateness_ms"] == pytest.approx(7000)
+    
+    def test_catch_up_policy(self):
+        """Test that missed runs are made up back to back, up to max_catch_up."""
+        clock = FakeClock()
+        scheduler = FixedRateScheduler("catch_up", max_catch_up=2, clock=clock)
+        scheduler.add("area", 2.0)
+        
+        clock.now += 7.0
+        assert scheduler.mark_run("area") == 1
+        catch_up_runs = 0
+        while scheduler.due():
+            scheduler.mark_run("area")
+            catch_up_runs += 1
+        
+        assert catch_up_runs == 2
+        assert scheduler.get_stats()["area"]["runs"] == 3
+        assert scheduler.time_until_next() == pytest.approx(1.0)
+    
+    def test_invalid_arguments(self):
+        """Test that invalid policies and intervals raise ValueError."""
+        with pytest.raises(ValueError):
+            FixedRateScheduler("sometimes")
+        with pytest.raises(ValueError):
+            FixedRateScheduler().add("area", -1)
+    
+    def test_agent_polls_due_areas(self):
+        """Test that the agent only handles the areas that are due."""
+        image_analyzer = MagicMock()
+        image_analyzer.detect_text_in_image.return_value = False
+        takers = [MagicMock() for _ in range(4)]
+        agent = ScreenSpyAgent(takers, image_analyzer, MagicMock(), interval=15,
+                               area_intervals={1: 2}, area_priorities={1: 5})
+        
+        assert agent.scheduler.get_stats()[1]["interval"] == 2
+        assert agent.scheduler.get_stats()[0]["interval"] == 15
+        assert agent.scheduler.due()[0] == 1
+        
+        agent.run_sequential_cycle([1])
+        assert takers[1].capture_screenshot.call_count == 1
+        assert takers[0].capture_screenshot.call_count == 0
+        
+        with pytest.raises(ValueError):
+            ScreenSpyAgent(takers, image_analyzer, MagicMock(), area_intervals={4: 2})
@@ -1,7 +1,11 @@
 import pytest
 from unittest.mock import patch, MagicMock, call
 import time
+from PIL import Image
 from screen_spy_agent.screen_spy_agent import ScreenSpyAgent
+from screen_spy_agent.change_detector import ChangeDetector
+from screen_spy_agent.detectors import Detector, DetectionResult
+from screen_spy_agent.region import Region
 
 
 class TestScreenSpyAgent:
@@ -151,8 +155,7 @@ class TestScreenSpyAgent:
         # Verify
         assert agent.running is False
 
-    @patch('screen_spy_agent.screen_spy_agent.time.sleep')
-    def test_agent_loop(self, mock_sleep):
+    def test_agent_loop(self):
         """Test the agent_loop method."""
         # Create mock components
         mock_screenshot_taker = MagicMock()
@@ -188,7 +191,8 @@ class TestScreenSpyAgent:
             agent.running = False
             return None
         
-        mock_sleep.side_effect = stop_after_one_iteration
+        agent.stop_event = MagicMock()
+        agent.stop_event.wait.side_effect = stop_after_one_iteration
         
         # Set running to True before calling agent_loop
         agent.running = True
@@ -196,20 +200,19 @@ class TestScreenSpyAgent:
         # Call method directly
         agent.agent_loop()
         
-        # Verify capture and save were called
+        # Verify capture was called and the screenshot was analyzed in memory
         assert mock_screenshot_taker.capture_screenshot.call_count == 1
-        assert mock_screenshot_taker.save_screenshot.call_count == 1
-        assert mock_screenshot_taker.save_screenshot.call_args == call(mock_screenshot)
+        mock_screenshot_taker.save_screenshot.assert_not_called()
+        assert mock_image_analyzer.detect_text_in_image.call_args[0][0] == mock_screenshot
         
         # Verify workflow was invoked
         assert agent.workflow.invoke.call_count == 1
         
-        # Verify sleep was called
-        assert mock_sleep.call_count == 1
-        assert mock_sleep.call_args == call(15)
+        # Verify the loop waited once, for the rest of the interval
+        assert agent.stop_event.wait.call_count == 1
+        assert agent.stop_event.wait.call_args[0][0] == pytest.approx(15, abs=1)
 
-    @patch('screen_spy_agent.screen_spy_agent.time.sleep')
-    def test_agent_loop_with_multiple_areas(self, mock_sleep):
+    def test_agent_loop_with_multiple_areas(self):
         """Test the agent_loop method with multiple screenshot areas."""
         # Create mock components
         mock_screenshot_takers = [MagicMock() for _ in range(4)]
@@ -248,7 +251,8 @@ class TestScreenSpyAgent:
             agent.running = False
             return None
         
-        mock_sleep.side_effect = stop_after_one_iteration
+        agent.stop_event = MagicMock()
+        agent.stop_event.wait.side_effect = stop_after_one_iteration
         
         # Set running to True before calling agent_loop
         agent.running = True
@@ -256,11 +260,10 @@ class TestScreenSpyAgent:
         # Call method directly
         agent.agent_loop()
         
-        # Verify capture and save were called for each area
+        # Verify capture was called for each area and nothing was written to disk
         for i, (taker, screenshot) in enumerate(zip(mock_screenshot_takers, mock_screenshots)):
             assert taker.capture_screenshot.call_count == 1
-            assert taker.save_screenshot.call_count == 1
-            assert taker.save_screenshot.call_args == call(screenshot)
+            taker.save_screenshot.assert_not_called()
         
         # Verify workflow was invoked once with the combined state
         assert agent.workflow.invoke.call_count == 1
@@ -274,9 +277,9 @@ class TestScreenSpyAgent:
         assert "detection_results" in invoke_arg
         assert len(invoke_arg["detection_results"]) == 4
         
-        # Verify sleep was called
-        assert mock_sleep.call_count == 1
-        assert mock_sleep.call_args == call(15)
+        # Verify the loop waited once, for the rest of the interval
+        assert agent.stop_event.wait.call_count == 1
+        assert agent.stop_event.wait.call_args[0][0] == pytest.approx(15, abs=1)
 
     @patch('threading.Thread')
     def test_end_to_end_with_mocks(self, mock_thread):
@@ -309,11 +312,11 @@ class TestScreenSpyAgent:
                 # Set a flag to stop after one iteration
                 agent.running = True
                 
-                # Mock sleep to stop the agent after one iteration
-                with patch('time.sleep') as mock_sleep:
+                # Mock the wait to stop the agent after one iteration
+                with patch.object(agent.stop_event, 'wait') as mock_wait:
                     def stop_agent(*args, **kwargs):
                         agent.running = False
-                    mock_sleep.side_effect = stop_agent
+                    mock_wait.side_effect = stop_agent
                     
                     # Call the target function (should be agent_loop)
                     target_func()
@@ -327,10 +330,10 @@ class TestScreenSpyAgent:
         # Run the agent - this will directly execute agent_loop once
         agent.run_agent()
         
-        # Verify screenshot was captured and saved
+        # Verify screenshot was captured and handed to the analyzer without saving
         assert mock_screenshot_taker.capture_screenshot.call_count == 1
-        assert mock_screenshot_taker.save_screenshot.call_count == 1
-        assert mock_screenshot_taker.save_screenshot.call_args == call(mock_screenshot)
+        mock_screenshot_taker.save_screenshot.assert_not_called()
+        assert mock_image_analyzer.detect_text_in_image.call_args[0][0] == mock_screenshot
 
     @patch('threading.Thread')
     def test_end_to_end_with_multiple_areas(self, mock_thread):
@@ -364,11 +367,11 @@ class TestScreenSpyAgent:
                 # Set a flag to stop after one iteration
                 agent.running = True
                 
-                # Mock sleep to stop the agent after one iteration
-                with patch('time.sleep') as mock_sleep:
+                # Mock the wait to stop the agent after one iteration
+                with patch.object(agent.stop_event, 'wait') as mock_wait:
                     def stop_agent(*args, **kwargs):
                         agent.running = False
-                    mock_sleep.side_effect = stop_agent
+                    mock_wait.side_effect = stop_agent
                     
                     # Call the target function (should be agent_loop)
                     target_func()
@@ -382,8 +385,375 @@ class TestScreenSpyAgent:
         # Run the agent - this will directly execute agent_loop once
         agent.run_agent()
         
-        # Verify screenshots were captured and saved for each area
+        # Verify screenshots were captured for each area and analyzed in memory
+        analyzed = [c[0][0] for c in mock_image_analyzer.detect_text_in_image.call_args_list]
+        assert analyzed == mock_screenshots
         for i, (taker, screenshot) in enumerate(zip(mock_screenshot_takers, mock_screenshots)):
             assert taker.capture_screenshot.call_count == 1
-            assert taker.save_screenshot.call_count == 1
-            assert taker.save_screenshot.call_args == call(screenshot) 
\ No newline at end of file
+            taker.save_screenshot.assert_not_called() 
+
+    @patch('screen_spy_agent.screen_spy_agent.MultiAreaCapture')
+    def test_agent_loop_single_grab(self, mock_multi_capture):
+        """Test that single-grab mode reads the screen once per cycle and crops each area."""
+        mock_screenshot_takers = [MagicMock() for _ in range(4)]
+        mock_image_analyzer = MagicMock()
+        mock_image_analyzer.detect_text_in_image.side_effect = [True, False, False, False]
+        mock_mouse_controller = MagicMock()
+        
+        agent = ScreenSpyAgent(
+            screenshot_taker=mock_screenshot_takers,
+            image_analyzer=mock_image_analyzer,
+            mouse_controller=mock_mouse_controller,
+            interval=15,
+            capture_mode="single_grab"
+        )
+        capture = mock_multi_capture.return_value
+        
+        def stop_after_one_iteration(*args, **kwargs):
+            agent.running = False
+        agent.stop_event = MagicMock()
+        agent.stop_event.wait.side_effect = stop_after_one_iteration
+        
+        agent.running = True
+        agent.agent_loop()
+        
+        # One grab per cycle, one crop per area with the shift from area 0
+        capture.grab.assert_called_once()
+        assert capture.crop.call_args_list == [call(0, 0), call(1, -23), call(2, -23), call(3, -23)]
+        for taker in mock_screenshot_takers:
+            taker.capture_screenshot.assert_not_called()
+
+    def test_invalid_capture_mode(self):
+        """Test that an unknown capture mode is rejected."""
+        with pytest.raises(ValueError):
+            ScreenSpyAgent(MagicMock(), MagicMock(), MagicMock(), capture_mode="unknown")
+
+    def test_agent_loop_save_screenshots(self):
+        """Test that the debug sink writes one file per area when enabled."""
+        mock_screenshot_takers = [MagicMock() for _ in range(4)]
+        mock_screenshots = [MagicMock() for _ in range(4)]
+        for i, (taker, screenshot) in enumerate(zip(mock_screenshot_takers, mock_screenshots)):
+            taker.capture_screenshot.return_value = screenshot
+            taker.save_screenshot.return_value = f"/path/to/current_screenshot_{i}.jpg"
+        mock_image_analyzer = MagicMock()
+        mock_image_analyzer.detect_text_in_image.return_value = False
+        
+        agent = ScreenSpyAgent(
+            screenshot_taker=mock_screenshot_takers,
+            image_analyzer=mock_image_analyzer,
+            mouse_controller=MagicMock(),
+            interval=15,
+            save_screenshots=True
+        )
+        
+        def stop_after_one_iteration(*args, **kwargs):
+            agent.running = False
+        agent.stop_event = MagicMock()
+        agent.stop_event.wait.side_effect = stop_after_one_iteration
+        
+        agent.running = True
+        agent.agent_loop()
+        
+        for i, (taker, screenshot) in enumerate(zip(mock_screenshot_takers, mock_screenshots)):
+            taker.save_screenshot.assert_called_once_with(screenshot, f"current_screenshot_{i}.jpg")
+        assert agent.agent_state.current_screenshots[3] == "/path/to/current_screenshot_3.jpg"
+        # The analyzer still receives the in-memory image
+        assert mock_image_analyzer.detect_text_in_image.call_args[0][0] == mock_screenshots[3]
+
+    def test_concurrent_cycle_overlaps_analyses(self):
+        """Test that concurrent mode analyzes all areas at the same time."""
+        mock_screenshot_takers = [MagicMock() for _ in range(4)]
+        mock_image_analyzer = MagicMock()
+        
+        def slow_detect(screenshot, text_to_detect):
+            time.sleep(0.1)
+            return text_to_detect == "try again"
+        mock_image_analyzer.detect_text_in_image.side_effect = slow_detect
+        mock_mouse_controller = MagicMock()
+        
+        agent = ScreenSpyAgent(
+            screenshot_taker=mock_screenshot_takers,
+            image_analyzer=mock_image_analyzer,
+            mouse_controller=mock_mouse_controller,
+            analysis_mode="concurrent"
+        )
+        
+        start = time.perf_counter()
+        results = agent.run_concurrent_cycle()
+        elapsed = time.perf_counter() - start
+        
+        assert results == [False, False, False, True]
+        assert elapsed < 0.3
+        mock_mouse_controller.click_at_position.assert_called_once_with(3)
+
+    def test_concurrent_cycle_reanalyzes_on_shift_change(self):
+        """Test that areas 1+ are re-captured at the new shift when area 0 changes it."""
+        mock_screenshot_takers = [MagicMock() for _ in range(4)]
+        for taker in mock_screenshot_takers:
+            taker.x1, taker.y1, taker.x2, taker.y2 = 0, 100, 50, 120
+        mock_image_analyzer = MagicMock()
+        mock_image_analyzer.detect_text_in_image.side_effect = (
+            lambda screenshot, text_to_detect: text_to_detect in ("new chat", "reject accept")
+        )
+        mock_mouse_controller = MagicMock()
+        
+        agent = ScreenSpyAgent(
+            screenshot_taker=mock_screenshot_takers,
+            image_analyzer=mock_image_analyzer,
+            mouse_controller=mock_mouse_controller,
+            analysis_mode="concurrent"
+        )
+        
+        results = agent.run_concurrent_cycle()
+        
+        assert results == [True, True, False, False]
+        # Area 0 once, areas 1-3 once unshifted and once shifted
+        assert mock_image_analyzer.detect_text_in_image.call_count == 7
+        assert mock_screenshot_takers[1].capture_screenshot.call_args_list == [
+            call(0, 100, 50, 120), call(0, 77, 50, 97)
+        ]
+        assert agent.agent_state.get_vertical_shift() == -23
+        mock_mouse_controller.set_vertical_shift.assert_called_with(-23)
+        mock_mouse_controller.click_at_position.assert_called_once_with(1)
+        
+        # The next cycle starts from the new shift and needs no second pass
+        mock_image_analyzer.detect_text_in_image.reset_mock()
+        agent.run_concurrent_cycle()
+        assert mock_image_analyzer.detect_text_in_image.call_count == 4
+
+    def test_concurrent_cycle_with_async_analyzer(self):
+        """Test that coroutine analyzers are awaited on the agent's event loop."""
+        mock_image_analyzer = MagicMock()
+        
+        async def detect(screenshot, text_to_detect):
+            return text_to_detect == "resume the"
+        mock_image_analyzer.detect_text_in_image = detect
+        
+        agent = ScreenSpyAgent(
+            screenshot_taker=[MagicMock() for _ in range(4)],
+            image_analyzer=mock_image_analyzer,
+            mouse_controller=MagicMock(),
+            analysis_mode="concurrent"
+        )
+        
+        assert agent.run_concurrent_cycle() == [False, False, True, False]
+
+    def test_batched_cycle_uses_one_request(self):
+        """Test that batched mode sends all areas in a single analyzer call."""
+        mock_screenshot_takers = [MagicMock() for _ in range(4)]
+        mock_image_analyzer = MagicMock()
+        mock_image_analyzer.detect_text_in_images_batch.return_value = {0: False, 1: False, 2: True, 3: False}
+        mock_mouse_controller = MagicMock()
+        
+        agent = ScreenSpyAgent(
+            screenshot_taker=mock_screenshot_takers,
+            image_analyzer=mock_image_analyzer,
+            mouse_controller=mock_mouse_controller,
+            analysis_mode="batched",
+            batch_composite=True
+        )
+        
+        results = agent.run_concurrent_cycle()
+        
+        assert results == [False, False, True, False]
+        mock_image_analyzer.detect_text_in_images_batch.assert_called_once()
+        args, kwargs = mock_image_analyzer.detect_text_in_images_batch.call_args
+        assert args[1] == agent.detection_phrases
+        assert kwargs == {"area_indices": [0, 1, 2, 3], "composite": True}
+        mock_image_analyzer.detect_text_in_image.assert_not_called()
+        mock_mouse_controller.click_at_position.assert_called_once_with(2)
+
+    def test_batched_cycle_does_not_learn_missing_verdicts(self):
+        """Test that areas the batch answer has no verdict for are not detected and teach nothing."""
+        mock_image_analyzer = MagicMock()
+        mock_image_analyzer.detect_text_in_images_batch.return_value = {0: False, 1: None, 2: True, 3: None}
+        local_detector = MagicMock(spec=Detector)
+        local_detector.detect_local.return_value = DetectionResult(None, 0.0, "cascade")
+        
+        agent = ScreenSpyAgent(
+            screenshot_taker=[MagicMock() for _ in range(4)],
+            image_analyzer=mock_image_analyzer,
+            mouse_controller=MagicMock(),
+            analysis_mode="batched",
+            detectors=local_detector
+        )
+        
+        assert agent.run_concurrent_cycle() == [False, False, True, False]
+        assert [c.args[2:] for c in local_detector.learn.call_args_list] == [(0, False), (2, True)]
+
+    def test_sequential_cycle_skips_unchanged_areas(self):
+        """Test that unchanged areas reuse their last result instead of being analyzed again."""
+        mock_screenshot_takers = [MagicMock() for _ in range(4)]
+        frames = [Image.new('RGB', (20, 10), color=(i * 40, 0, 0)) for i in range(4)]
+        for taker, frame in zip(mock_screenshot_takers, frames):
+            taker.capture_screenshot.return_value = frame
+        mock_image_analyzer = MagicMock()
+        mock_image_analyzer.detect_text_in_image.side_effect = (
+            lambda screenshot, text_to_detect: text_to_detect == "try again"
+        )
+        mock_mouse_controller = MagicMock()
+        change_detector = ChangeDetector(threshold=1.0)
+        
+        agent = ScreenSpyAgent(
+            screenshot_taker=mock_screenshot_takers,
+            image_analyzer=mock_image_analyzer,
+            mouse_controller=mock_mouse_controller,
+            change_detector=change_detector
+        )
+        
+        assert agent.run_sequential_cycle() == [False, False, False, True]
+        assert mock_image_analyzer.detect_text_in_image.call_count == 4
+        
+        # Only area 2 changes in the second cycle
+        mock_screenshot_takers[2].capture_screenshot.return_value = Image.new('RGB', (20, 10), color="white")
+        assert agent.run_sequential_cycle() == [False, False, False, True]
+        assert mock_image_analyzer.detect_text_in_image.call_count == 5
+        assert change_detector.skipped == 3
+        # Reused detections still trigger their clicks
+        assert mock_mouse_controller.click_at_position.call_args_list == [call(3), call(3)]
+    
+    def test_batched_cycle_sends_only_changed_areas(self):
+        """Test that batched mode leaves unchanged areas out of the request."""
+        mock_screenshot_takers = [MagicMock() for _ in range(4)]
+        for taker in mock_screenshot_takers:
+            taker.capture_screenshot.return_value = Image.new('RGB', (20, 10))
+        mock_image_analyzer = MagicMock()
+        mock_image_analyzer.detect_text_in_images_batch.side_effect = (
+            lambda screenshots, phrases, area_indices, composite: {i: i == 1 for i in area_indices}
+        )
+        
+        agent = ScreenSpyAgent(
+            screenshot_taker=mock_screenshot_takers,
+            image_analyzer=mock_image_analyzer,
+            mouse_controller=MagicMock(),
+            analysis_mode="batched",
+            change_detector=ChangeDetector()
+        )
+        agent.run_concurrent_cycle()
+        
+        mock_screenshot_takers[3].capture_screenshot.return_value = Image.new('RGB', (20, 10), color="white")
+        assert agent.run_concurrent_cycle() == [False, True, False, False]
+        assert mock_image_analyzer.detect_text_in_images_batch.call_args.kwargs["area_indices"] == [3]
+
+    def test_sequential_cycle_uses_area_detectors(self):
+        """Test that areas with a local detector do not call the vision model."""
+        mock_image_analyzer = MagicMock()
+        mock_image_analyzer.detect_text_in_image.return_value = False
+        local_detector = MagicMock(spec=Detector)
+        local_detector.detect.return_value = DetectionResult(True, 1.0, "template")
+        mock_mouse_controller = MagicMock()
+        
+        agent = ScreenSpyAgent(
+            screenshot_taker=[MagicMock() for _ in range(4)],
+            image_analyzer=mock_image_analyzer,
+            mouse_controller=mock_mouse_controller,
+            detectors=[None, None, local_detector, None]
+        )
+        
+        assert agent.run_sequential_cycle() == [False, False, True, False]
+        assert mock_image_analyzer.detect_text_in_image.call_count == 3
+        local_detector.detect.assert_called_once()
+        assert local_detector.detect.call_args[0][1:] == ("resume the", 2)
+        mock_mouse_controller.click_at_position.assert_called_once_with(2)
+    
+    def test_click_detected_location(self):
+        """Test that a located detection is clicked at its center instead of the fixed coordinates."""
+        mock_screenshot_takers = [MagicMock(x1=100 * i, y1=50 * i) for i in range(4)]
+        local_detector = MagicMock(spec=Detector)
+        local_detector.detect.return_value = DetectionResult(True, 0.95, "ocr", (10, 4, 20, 8))
+        mock_mouse_controller = MagicMock()
+        mock_image_analyzer = MagicMock()
+        mock_image_analyzer.detect_text_in_image.return_value = False
+        
+        agent = ScreenSpyAgent(
+            screenshot_taker=mock_screenshot_takers,
+            image_analyzer=mock_image_analyzer,
+            mouse_controller=mock_mouse_controller,
+            detectors=[None, local_detector, None, None],
+            click_detected_location=True
+        )
+        
+        assert agent.run_sequential_cycle() == [False, True, False, False]
+        mock_mouse_controller.click_at_box.assert_called_once_with(100, 50, (10, 4, 20, 8))
+        mock_mouse_controller.click_at_position.assert_not_called()
+    
+    def test_skip_shift_detection(self):
+        """Test that area 0 is not analyzed and areas 1+ are captured extended upward."""
+        mock_screenshot_takers = [MagicMock(x1=10, y1=100, x2=50, y2=120) for _ in range(4)]
+        mock_image_analyzer = MagicMock()
+        mock_image_analyzer.detect_text_in_image.side_effect = (
+            lambda screenshot, text_to_detect: text_to_detect == "try again"
+        )
+        mock_mouse_controller = MagicMock()
+        
+        agent = ScreenSpyAgent(
+            screenshot_taker=mock_screenshot_takers,
+            image_analyzer=mock_image_analyzer,
+            mouse_controller=mock_mouse_controller,
+            analysis_mode="concurrent",
+            click_detected_location=True,
+            skip_shift_detection=True
+        )
+        
+        assert agent.run_concurrent_cycle() == [False, False, False, True]
+        assert mock_image_analyzer.detect_text_in_image.call_count == 3
+        mock_screenshot_takers[0].capture_screenshot.assert_not_called()
+        mock_screenshot_takers[3].capture_screenshot.assert_called_once_with(10, 77, 50, 120)
+        # The vision model gives no location, so the fixed coordinates are used
+        mock_mouse_controller.click_at_position.assert_called_once_with(3)
+        
+        with pytest.raises(ValueError):
+            ScreenSpyAgent(mock_screenshot_takers, mock_image_analyzer, mock_mouse_controller,
+                           skip_shift_detection=True)
+    
+    @patch('screen_spy_agent.screen_spy_agent.ScreenshotTaker')
+    def test_from_regions_with_many_regions(self, mock_taker_class):
+        """Test that an agent made from regions watches and clicks more than four areas."""
+        mock_taker_class.side_effect = lambda *args: MagicMock()
+        regions = [Region((0, 30 * i, 100, 30 * i + 20), f"phrase {i}", clicks=[[5, i]]) for i in range(10)]
+        regions[7].interval = 2
+        mock_image_analyzer = MagicMock()
+        mock_image_analyzer.detect_text_in_image.side_effect = (
+            lambda screenshot, text_to_detect: text_to_detect == "phrase 7"
+        )
+        mock_mouse_controller = MagicMock()
+        
+        agent = ScreenSpyAgent.from_regions(regions, mock_image_analyzer, mock_mouse_controller, interval=5)
+        
+        assert agent.num_areas == 10
+        mock_taker_class.assert_any_call(0, 270, 100, 290, 5)
+        mock_mouse_controller.set_click_coordinates.assert_any_call(9, [[5, 9]])
+        assert agent.scheduler.get_stats()[7]["interval"] == 2
+        assert agent.run_sequential_cycle() == [False] * 7 + [True] + [False] * 2
+        mock_mouse_controller.click_at_position.assert_called_once_with(7)
+        
+        with pytest.raises(ValueError):
+            ScreenSpyAgent([MagicMock() for _ in range(5)], mock_image_analyzer, mock_mouse_controller)
+    
+    def test_stop_agent_interrupts_wait(self):
+        """Test that stop_agent returns without waiting for the rest of the interval."""
+        mock_screenshot_taker = MagicMock()
+        mock_image_analyzer = MagicMock()
+        mock_image_analyzer.detect_text_in_image.return_value = False
+        mock_mouse_controller = MagicMock()
+        
+        agent = ScreenSpyAgent(
+            screenshot_taker=mock_screenshot_taker,
+            image_analyzer=mock_image_analyzer,
+            mouse_controller=mock_mouse_controller,
+            interval=15
+        )
+        agent.run_agent()
+        while mock_image_analyzer.detect_text_in_image.call_count == 0:
+            time.sleep(0.01)
+        
+        start = time.perf_counter()
+        agent.stop_agent()
+        assert time.perf_counter() - start < 1
+        assert not agent.agent_thread.is_alive()
+        assert agent.stop_event.is_set()
+        
+        # A restart clears the event again
+        agent.run_agent()
+        assert not agent.stop_event.is_set()
+        agent.stop_agent()
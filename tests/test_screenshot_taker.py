@@ -2,7 +2,7 @@ import os
 import pytest
 from unittest.mock import patch, MagicMock
 import PIL.Image
-from screen_spy_agent.screenshot_taker import ScreenshotTaker
+from screen_spy_agent.screenshot_taker import ScreenshotTaker, MultiAreaCapture
 
 
 class TestScreenshotTaker:
@@ -79,4 +79,68 @@ class TestScreenshotTaker:
         # Verify
         expected_path = os.path.abspath("screenshot_20230101_120000.jpg")
         assert path == expected_path
-        mock_time.strftime.assert_called_once_with("%Y%m%d_%H%M%S") 
\ No newline at end of file
+        mock_time.strftime.assert_called_once_with("%Y%m%d_%H%M%S") 
+
+class TestMultiAreaCapture:
+    """Tests for the MultiAreaCapture class."""
+
+    @staticmethod
+    def make_frame(bbox):
+        """Create a frame whose pixel values encode their screen coordinates."""
+        x1, y1, x2, y2 = bbox
+        image = PIL.Image.new('RGB', (x2 - x1, y2 - y1))
+        image.putdata([((x1 + x) % 256, (y1 + y) % 256, 0)
+                       for y in range(y2 - y1) for x in range(x2 - x1)])
+        return image
+
+    @patch('screen_spy_agent.screenshot_taker.ImageGrab')
+    def test_single_grab_for_all_areas(self, mock_image_grab):
+        """Test that all areas are cropped from one grab of the union bounding box."""
+        mock_image_grab.grab.side_effect = lambda bbox: self.make_frame(bbox)
+        capture = MultiAreaCapture([(10, 50, 30, 60), (40, 20, 60, 30), (5, 70, 15, 80)])
+        
+        crops = capture.capture_all()
+        
+        mock_image_grab.grab.assert_called_once_with(bbox=(5, 20, 60, 80))
+        assert [crop.size for crop in crops] == [(20, 10), (20, 10), (10, 10)]
+        assert crops[1].getpixel((0, 0)) == (40, 20, 0)
+        assert crops[2].getpixel((3, 4)) == (8, 74, 0)
+
+    @patch('screen_spy_agent.screenshot_taker.ImageGrab')
+    def test_crop_with_vertical_shift(self, mock_image_grab):
+        """Test that shifted crops come from the padded frame."""
+        mock_image_grab.grab.side_effect = lambda bbox: self.make_frame(bbox)
+        capture = MultiAreaCapture([(10, 50, 30, 60), (40, 100, 60, 110)], max_shift=23)
+        capture.grab()
+        
+        mock_image_grab.grab.assert_called_once_with(bbox=(10, 27, 60, 133))
+        assert capture.crop(1, -23).getpixel((0, 0)) == (40, 77, 0)
+        assert capture.view(1, -23)[0, 0].tolist() == [40, 77, 0]
+        with pytest.raises(ValueError):
+            capture.crop(1, -30)
+        
+        # Extending upward keeps the bottom edge and adds rows above
+        extended = capture.crop(1, 0, extend_up=23)
+        assert extended.size == (20, 33)
+        assert extended.getpixel((0, 0)) == (40, 77, 0)
+
+    @patch('screen_spy_agent.screenshot_taker.ImageGrab')
+    def test_max_gap_splits_groups(self, mock_image_grab):
+        """Test that distant areas are grabbed separately."""
+        mock_image_grab.grab.side_effect = lambda bbox: self.make_frame(bbox)
+        capture = MultiAreaCapture(
+            [(0, 0, 10, 10), (15, 0, 25, 10), (2000, 0, 2010, 10)],
+            max_gap=100
+        )
+        
+        crops = capture.capture_all()
+        
+        assert capture.groups == [[0, 1], [2]]
+        assert mock_image_grab.grab.call_count == 2
+        assert crops[2].getpixel((0, 0)) == (2000 % 256, 0, 0)
+
+    def test_crop_before_grab(self):
+        """Test that cropping without a grab raises an error."""
+        capture = MultiAreaCapture([(0, 0, 10, 10)])
+        with pytest.raises(RuntimeError):
+            capture.crop(0)
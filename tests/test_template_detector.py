@@ -0,0 +1,88 @@
+import pytest
+import os
+import tempfile
+import numpy as np
+from PIL import Image, ImageDraw
+from screen_spy_agent.template_detector import TemplateDetector, match_template, to_grayscale
+
+
+def make_area(button_at=None):
+    """Create an area screenshot, optionally with a button at the given position."""
+    image = Image.new('RGB', (170, 27), color=(40, 40, 40))
+    if button_at is not None:
+        x, y = button_at
+        draw = ImageDraw.Draw(image)
+        draw.rectangle((x, y, x + 70, y + 18), fill=(60, 120, 220))
+        draw.text((x + 6, y + 4), "Try again", fill=(255, 255, 255))
+    return image
+
+
+class TestTemplateDetector:
+    """Tests for the TemplateDetector class."""
+    
+    def test_match_template_finds_exact_position(self):
+        """Test that the correlation peaks with score 1 at the template position."""
+        rng = np.random.default_rng(0)
+        image = rng.integers(0, 256, (27, 170)).astype(np.float32)
+        score, position = match_template(image, image[5:20, 40:100])
+        assert score == pytest.approx(1.0, abs=1e-4)
+        assert position == (40, 5)
+    
+    def test_match_template_flat_or_too_large(self):
+        """Test that flat or oversized templates give no match."""
+        image = np.zeros((27, 170), dtype=np.float32)
+        assert match_template(image, np.full((5, 5), 7, dtype=np.float32)) == (0.0, None)
+        assert match_template(image, np.ones((30, 10), dtype=np.float32)) == (0.0, None)
+    
+    def test_detect_button(self):
+        """Test that a stored button is found at a new position with its location."""
+        detector = TemplateDetector()
+        template = make_area(button_at=(10, 4)).crop((10, 4, 81, 23))
+        detector.add_template(template, "try again", 3)
+        
+        result = detector.detect(make_area(button_at=(50, 6)), "try again", 3)
+        
+        assert result.detected is True
+        assert result.confidence > 0.99
+        assert result.location == (50, 6, 71, 19)
+    
+    def test_detect_absent_button(self):
+        """Test that an area without the button is a confident miss."""
+        detector = TemplateDetector()
+        detector.add_template(make_area(button_at=(10, 4)).crop((10, 4, 81, 23)), "try again", 3)
+        noise = np.random.default_rng(1).integers(0, 256, (27, 170, 3), dtype=np.uint8)
+        
+        result = detector.detect(noise, "try again", 3)
+        
+        assert result.detected is False
+        assert detector.detect(noise, "new chat", 0).detected is None
+    
+    def test_shared_templates_apply_to_every_area(self):
+        """Test that templates stored without an area index are used for all areas."""
+        detector = TemplateDetector()
+        detector.add_template(make_area(button_at=(10, 4)).crop((10, 4, 81, 23)), "try again")
+        assert detector.detect(make_area(button_at=(20, 4)), "try again", 2).detected is True
+    
+    def test_save_and_load_templates(self):
+        """Test that templates round-trip through the template directory."""
+        detector = TemplateDetector()
+        detector.add_template(make_area(button_at=(10, 4)).crop((10, 4, 81, 23)), "try again", 3)
+        
+        with tempfile.TemporaryDirectory() as temp_dir:
+            detector.save_templates(temp_dir)
+            assert os.path.exists(os.path.join(temp_dir, "area3_try_again_0.png"))
+            
+            loaded = TemplateDetector(temp_dir)
+        
+        assert len(loaded.get_templates("try again", 3)) == 1
+        assert loaded.detect(make_area(button_at=(30, 5)), "try again", 3).detected is True
+    
+    def test_grayscale_matches_pil(self):
+        """Test that NumPy and PIL grayscale conversion agree."""
+        image = make_area(button_at=(10, 4))
+        assert np.abs(to_grayscale(np.asarray(image)) - to_grayscale(image)).max() <= 1.0
+    
+    def test_invalid_thresholds(self):
+        """Test that a reject threshold above the match threshold raises ValueError."""
+        with pytest.raises(ValueError):
+            TemplateDetector(match_threshold=0.5, reject_threshold=0.9)
@@ -0,0 +1,115 @@
+import pytest
+import threading
+import time
+import numpy as np
+from unittest.mock import patch, MagicMock
+from screen_spy_agent.ui_waiter import UiWaiter
+from screen_spy_agent.mouse_controller import MouseController
+from screen_spy_agent.click_executor import ClickExecutor
+
+
+class FakeScreen:
+    """Capture function whose pixels change to given values at given times after a click."""
+    
+    def __init__(self, changes=()):
+        self.changes = list(changes)
+        self.clicked_at = None
+        self.captures = []
+    
+    def click(self, *args, **kwargs):
+        self.clicked_at = time.perf_counter()
+        return True
+    
+    def __call__(self, bbox):
+        self.captures.append(bbox)
+        value = 0
+        if self.clicked_at is not None:
+            elapsed = time.perf_counter() - self.clicked_at
+            for at, pixel in self.changes:
+                if elapsed >= at:
+                    value = pixel
+        return np.full((10, 20), value, dtype=np.uint8)
+
+
+class TestUiWaiter:
+    """Tests for the UiWaiter class."""
+    
+    def test_continues_once_the_ui_settles(self):
+        """Test that the wait ends shortly after the region changed and stayed still."""
+        screen = FakeScreen([(0.05, 100), (0.1, 150)])
+        waiter = UiWaiter(capture=screen, poll_interval=0.01, settle_time=0.05, timeout=2)
+        
+        clicked, result = waiter.click_and_wait(screen.click, 500, 300)
+        
+        assert clicked is True
+        assert result.changed and result.settled and not result.timed_out
+        assert 0.05 <= result.latency < 0.1
+        assert 0.15 <= result.elapsed < 0.5
+        assert screen.captures[0] == (400, 260, 600, 340)
+        assert waiter.get_stats()["waits"] == 1 and waiter.get_stats()["timeouts"] == 0
+    
+    def test_times_out_without_change(self):
+        """Test that a region that never reacts ends the wait at the timeout."""
+        waiter = UiWaiter(capture=FakeScreen(), poll_interval=0.01, timeout=0.1)
+        
+        result = waiter.wait_for_change((0, 0, 20, 10))
+        
+        assert result.timed_out and not result.changed
+        assert result.latency is None
+        assert 0.1 <= result.elapsed < 0.3
+        assert waiter.get_stats()["timeouts"] == 1
+    
+    def test_target_gone_ends_wait(self):
+        """Test that the wait ends as soon as the target is reported gone, without settling."""
+        screen = FakeScreen([(0.03, 255)])
+        waiter = UiWaiter(capture=screen, poll_interval=0.01, settle_time=5, timeout=2)
+        
+        _, result = waiter.click_and_wait(screen.click, 0, 0, target_gone=lambda frame: frame.mean() > 200)
+        
+        assert result.target_gone and not result.settled
+        assert result.elapsed < 0.5
+        assert waiter.region_around(0, 0) == (0, 0, 200, 80)
+    
+    def test_stop_event_interrupts(self):
+        """Test that setting the stop event ends the wait early."""
+        waiter = UiWaiter(capture=FakeScreen(), poll_interval=0.5, timeout=10)
+        stop_event = threading.Event()
+        threading.Timer(0.05, stop_event.set).start()
+        
+        result = waiter.wait_for_change((0, 0, 20, 10), stop_event=stop_event)
+        
+        assert result.interrupted and result.elapsed < 1
+        with pytest.raises(ValueError):
+            UiWaiter(poll_interval=0)
+    
+    @patch('screen_spy_agent.mouse_controller.pyautogui')
+    def test_mouse_controller_waits_for_ui(self, mock_pyautogui):
+        """Test that click sequences wait for the UI instead of the fixed delay."""
+        screen = FakeScreen([(0.02, 100)])
+        mock_pyautogui.click.side_effect = screen.click
+        waiter = UiWaiter(capture=screen, poll_interval=0.01, settle_time=0.03, timeout=5)
+        controller = MouseController(100, 200, click_delay=5, ui_waiter=waiter)
+        controller.set_click_coordinates(1, [[10, 20], [30, 40]])
+        
+        start = time.perf_counter()
+        assert controller.click_at_position(1) is True
+        
+        # Far less than the 5 second click delay
+        assert time.perf_counter() - start < 1
+        assert mock_pyautogui.click.call_count == 2
+        assert len(waiter.latencies) == 1
+    
+    def test_click_executor_uses_waiter(self):
+        """Test that the executor waits for the UI and shutdown interrupts the wait."""
+        controller = MagicMock()
+        controller.click_at.return_value = True
+        waiter = UiWaiter(capture=FakeScreen(), poll_interval=0.01, timeout=30)
+        executor = ClickExecutor(controller, click_delay=0, ui_waiter=waiter)
+        
+        future = executor.submit(1, [(1, 1), (2, 2)])
+        while controller.click_at.call_count == 0:
+            time.sleep(0.01)
+        executor.shutdown(timeout=5)
+        
+        assert future.result(timeout=1) is False
+        controller.click_at.assert_called_once_with(1, 1)